@@ -1,14 +1,17 @@
+import contextlib
+import datetime
 import json
+import os
+import subprocess
 import sys
+import time
 import uuid
 
 import dcoscli
-import docopt
-import rollbar
+import portalocker
 import six
-from concurrent.futures import ThreadPoolExecutor
-from dcos import http, mesos, util
-from dcoscli.constants import (ROLLBAR_SERVER_POST_KEY,
+from dcos import constants, http, util
+from dcoscli.constants import (ROLLBAR_SERVER_POST_KEY, ROLLBAR_URL,
                                SEGMENT_IO_CLI_ERROR_EVENT,
                                SEGMENT_IO_CLI_EVENT, SEGMENT_IO_WRITE_KEY_PROD,
                                SEGMENT_URL)
@@ -17,34 +20,57 @@ from requests.auth import HTTPBasicAuth
 logger = util.get_logger(__name__)
 session_id = uuid.uuid4().hex
 
-
-def wait_and_track(subproc):
+SPOOL_MAX_ATTEMPTS = 3
+"""Number of flushes that may fail to deliver an event before it's
+dropped."""
+
+SPOOL_MAX_BYTES = 1 << 20
+"""Events are no longer spooled once the spool reaches this size."""
+
+FLUSHER_SCRUBBED_ENV = [constants.DCOS_CASSETTE_ENV,
+                        constants.DCOS_CASSETTE_MODE_ENV,
+                        constants.DCOS_CASSETTE_LATENCY_ENV,
+                        constants.DCOS_HAR_ENV,
+                        constants.DCOS_HAR_PARENT_ENV,
+                        constants.DCOS_METRICS_ENV,
+                        constants.DCOS_PERF_START_ENV,
+                        constants.DCOS_PROFILE_ENV,
+                        constants.DCOS_TRACE_ENV,
+                        constants.DCOS_TRACE_PARENT_ENV]
+"""Environment variables that the flusher doesn't inherit, so that its
+requests don't show up in the user's cassettes, HAR files, traces, metrics
+or profiles."""
+
+
+def wait_and_track(subproc, command=None):
     """
     Run a command and report it to analytics services.
 
     :param subproc: Subprocess to capture
     :type subproc: Popen
+    :param command: the dcos subcommand that `subproc` runs
+    :type command: str | None
     :returns: exit code of subproc
     :rtype: int
     """
 
-    rollbar.init(ROLLBAR_SERVER_POST_KEY, 'prod')
-
     conf = util.get_config()
     report = conf.get('core.reporting', True)
-    with ThreadPoolExecutor(max_workers=2) as pool:
-        if report:
-            _segment_track_cli(pool, conf)
+    if report:
+        _segment_track_cli(conf, command)
 
-        exit_code, err = wait_and_capture(subproc)
+    exit_code, err = wait_and_capture(subproc)
 
-        # We only want to catch exceptions, not other stderr messages
-        # (such as "task does not exist", so we look for the 'Traceback'
-        # string.  This only works for python, so we'll need to revisit
-        # this in the future when we support subcommands written in other
-        # languages.
-        if report and 'Traceback' in err:
-            _track_err(pool, exit_code, err, conf)
+    # We only want to catch exceptions, not other stderr messages
+    # (such as "task does not exist", so we look for the 'Traceback'
+    # string.  This only works for python, so we'll need to revisit
+    # this in the future when we support subcommands written in other
+    # languages.
+    if report and 'Traceback' in err:
+        _track_err(exit_code, err, conf, command)
+
+    if report:
+        start_flusher()
 
     return exit_code
 
@@ -73,7 +99,7 @@ def wait_and_capture(subproc):
 
 def _segment_track(event, conf, properties):
     """
-    Send a segment.io 'track' event
+    Spool a segment.io 'track' event
 
     :param event: name of event
     :type event: string
@@ -84,7 +110,8 @@ def _segment_track(event, conf, properties):
     :rtype: None
     """
 
-    data = {'event': event,
+    data = {'type': 'track',
+            'event': event,
             'properties': properties}
 
     if 'core.email' in conf:
@@ -92,12 +119,12 @@ def _segment_track(event, conf, properties):
     else:
         data['anonymousId'] = session_id
 
-    _segment_request('track', data)
+    _spool('segment', data)
 
 
 def segment_identify(conf):
     """
-    Send a segment.io 'identify' event
+    Spool a segment.io 'identify' event, and flush it in the background
 
     :param conf: dcos config file
     :type conf: Toml
@@ -105,8 +132,10 @@ def segment_identify(conf):
     """
 
     if 'core.email' in conf:
-        data = {'userId': conf.get('core.email')}
-        _segment_request('identify', data)
+        data = {'type': 'identify',
+                'userId': conf.get('core.email')}
+        _spool('segment', data)
+        start_flusher()
 
 
 def _segment_request(path, data):
@@ -117,93 +146,124 @@ def _segment_request(path, data):
     :type path: str
     :param data: json POST data
     :type data: dict
-    :rtype: None
+    :returns: True if the request succeeded; False otherwise
+    :rtype: bool
     """
 
     key = SEGMENT_IO_WRITE_KEY_PROD
 
     try:
         # Set both the connect timeout and the request timeout to 1s,
-        # to prevent rollbar from hanging the CLI commands
+        # to prevent segment.io from hanging the flusher
         http.post('{}/{}'.format(SEGMENT_URL, path),
                   json=data,
                   auth=HTTPBasicAuth(key, ''),
                   timeout=(1, 1))
+        return True
     except Exception as e:
         logger.exception(e)
+        return False
 
 
-def _track_err(pool, exit_code, err, conf):
+def _rollbar_request(title, properties):
+    """
+    Send a rollbar error report
+
+    :param title: title of the report
+    :type title: str
+    :param properties: details of the error
+    :type properties: dict
+    :returns: True if the request succeeded; False otherwise
+    :rtype: bool
     """
-    Report error details to analytics services.
 
-    :param pool: thread pool
-    :type pool: ThreadPoolExecutor
+    message = dict(properties, body=title)
+    item = {'access_token': ROLLBAR_SERVER_POST_KEY,
+            'data': {'environment': 'prod',
+                     'level': 'error',
+                     'language': 'python',
+                     'timestamp': int(time.time()),
+                     'body': {'message': message}}}
+
+    try:
+        http.post(ROLLBAR_URL, json=item, timeout=(1, 1))
+        return True
+    except Exception as e:
+        logger.exception(e)
+        return False
+
+
+def _track_err(exit_code, err, conf, command):
+    """
+    Spool error details for the analytics services.
+
     :param exit_code: exit code of tracked process
     :type exit_code: int
     :param err: stderr of tracked process
     :type err: str
     :param conf: dcos config file
     :type conf: Toml
+    :param command: the dcos subcommand that failed
+    :type command: str | None
     :rtype: None
     """
 
-    # Segment.io calls are async, but rollbar is not, so for
-    # parallelism, we must call segment first.
-    _segment_track_err(pool, conf, err, exit_code)
-    _rollbar_track_err(conf, err, exit_code)
+    _segment_track_err(conf, err, exit_code, command)
+    _rollbar_track_err(conf, err, exit_code, command)
 
 
-def _segment_track_cli(pool, conf):
+def _segment_track_cli(conf, command):
     """
-    Send segment.io cli event.
+    Spool segment.io cli event.
 
-    :param pool: thread pool
-    :type pool: ThreadPoolExecutor
     :param conf: dcos config file
     :type conf: Toml
+    :param command: the dcos subcommand being run
+    :type command: str | None
     :rtype: None
     """
 
-    props = _base_properties(conf)
-    pool.submit(_segment_track, SEGMENT_IO_CLI_EVENT, conf, props)
+    props = _base_properties(conf, command)
+    _segment_track(SEGMENT_IO_CLI_EVENT, conf, props)
 
 
-def _segment_track_err(pool, conf, err, exit_code):
+def _segment_track_err(conf, err, exit_code, command):
     """
-    Send segment.io error event.
+    Spool segment.io error event.
 
-    :param pool: thread pool
-    :type segment: ThreadPoolExecutor
     :param conf: dcos config file
     :type conf: Toml
     :param err: stderr of tracked process
     :type err: str
     :param exit_code: exit code of tracked process
     :type exit_code: int
+    :param command: the dcos subcommand that failed
+    :type command: str | None
     :rtype: None
     """
 
-    props = _base_properties(conf)
+    props = _base_properties(conf, command)
     props['err'] = err
     props['exit_code'] = exit_code
-    pool.submit(_segment_track, SEGMENT_IO_CLI_ERROR_EVENT, conf, props)
+    _segment_track(SEGMENT_IO_CLI_ERROR_EVENT, conf, props)
 
 
-def _rollbar_track_err(conf, err, exit_code):
+def _rollbar_track_err(conf, err, exit_code, command):
     """
-    Report to rollbar.  Synchronous.
+    Spool a rollbar error report.
 
-    :param exit_code: exit code of tracked process
-    :type exit_code: int
-    :param err: stderr of tracked process
-    :type err: str
     :param conf: dcos config file
     :type conf: Toml
+    :param err: stderr of tracked process
+    :type err: str
+    :param exit_code: exit code of tracked process
+    :type exit_code: int
+    :param command: the dcos subcommand that failed
+    :type command: str | None
     :rtype: None
     """
 
-    props = _base_properties(conf)
+    props = _base_properties(conf, command)
     props['exit_code'] = exit_code
 
     lines = err.split('\n')
@@ -213,34 +273,19 @@ def _rollbar_track_err(conf, err, exit_code):
         title = err
     props['stderr'] = err
 
-    try:
-        rollbar.report_message(title, 'error', extra_data=props)
-    except Exception as e:
-        logger.exception(e)
-
+    _spool('rollbar', {'title': title, 'properties': props})
 
-def _command():
-    """ Return the subcommand used in this dcos process.
 
-    :returns: subcommand used in this dcos process
-    :rtype: str
+def _base_properties(conf=None, command=None):
     """
-
-    # avoid circular import
-    import dcoscli.main
-
-    args = docopt.docopt(dcoscli.main.__doc__,
-                         help=False,
-                         options_first=True)
-    return args['<command>']
-
-
-def _base_properties(conf=None):
-    """
-    These properties are sent with every analytics event.
+    These properties are sent with every analytics event.  Building them
+    must not touch the network: the CLUSTER_ID is read from the local
+    cache and filled in by the flusher if it isn't cached yet.
 
     :param conf: dcos config file
     :type conf: Toml
+    :param command: the dcos subcommand being run
+    :type command: str | None
     :rtype: dict
     """
 
@@ -248,25 +293,19 @@ def _base_properties(conf=None):
         conf = util.get_config()
 
     if len(sys.argv) > 1:
-        cmd = 'dcos ' + _command()
+        cmd = 'dcos ' + (command or 'help')
         full_cmd = 'dcos ' + ' '.join(sys.argv[1:])
     else:
         cmd = 'dcos'
         full_cmd = 'dcos'
 
+    dcos_url = conf.get('core.dcos_url')
     try:
-        dcos_hostname = six.moves.urllib.parse.urlparse(
-            conf.get('core.dcos_url')).hostname
-    except:
+        dcos_hostname = six.moves.urllib.parse.urlparse(dcos_url).hostname
+    except Exception:
         logger.exception('Unable to find the hostname of the cluster.')
         dcos_hostname = None
 
-    try:
-        cluster_id = mesos.DCOSClient().metadata().get('CLUSTER_ID')
-    except:
-        logger.exception('Unable to get the cluster_id of the cluster.')
-        cluster_id = None
-
     return {
         'cmd': cmd,
         'full_cmd': full_cmd,
@@ -274,5 +313,239 @@ def _base_properties(conf=None):
         'python_version': str(sys.version_info),
         'config': json.dumps(list(conf.property_items())),
         'DCOS_HOSTNAME': dcos_hostname,
-        'CLUSTER_ID': cluster_id
+        'DCOS_URL': dcos_url,
+        'CLUSTER_ID': _cached_cluster_ids().get(dcos_url)
     }
+
+
+def _spool_path(name):
+    """
+    :param name: file name inside the analytics spool directory
+    :type name: str
+    :returns: path to the file
+    :rtype: str
+    """
+
+    return util.get_cache_path('analytics', name)
+
+
+@contextlib.contextmanager
+def _lock(name, blocking=True):
+    """Context manager that holds an exclusive lock on the named lock file.
+    Yields False instead of waiting when `blocking` is False and the lock
+    is held by another process.
+
+    :param name: lock file name inside the spool directory
+    :type name: str
+    :param blocking: whether to wait for the lock
+    :type blocking: bool
+    :returns: whether the lock was acquired
+    :rtype: bool
+    """
+
+    path = _spool_path(name)
+    util.ensure_dir_exists(os.path.dirname(path))
+
+    mode = portalocker.LOCK_EX
+    if not blocking:
+        mode |= portalocker.LOCK_NB
+
+    with open(path, 'a') as lock_file:
+        try:
+            portalocker.lock(lock_file, mode)
+        except portalocker.LockException:
+            yield False
+            return
+
+        try:
+            yield True
+        finally:
+            portalocker.unlock(lock_file)
+
+
+def _spool(service, data, attempts=0):
+    """Append an event to the spool file.
+
+    :param service: service that receives the event: segment or rollbar
+    :type service: str
+    :param data: event data
+    :type data: dict
+    :param attempts: number of failed deliveries so far
+    :type attempts: int
+    :rtype: None
+    """
+
+    event = {'service': service,
+             'data': data,
+             'attempts': attempts,
+             'timestamp': data.get('timestamp') or
+             datetime.datetime.utcnow().isoformat() + 'Z'}
+    data['timestamp'] = event['timestamp']
+
+    try:
+        with _lock('spool.lock'):
+            path = _spool_path('spool.jsonl')
+            if (os.path.exists(path) and
+                    os.path.getsize(path) > SPOOL_MAX_BYTES):
+                logger.warning('Analytics spool is full. Dropping event.')
+                return
+
+            with open(path, 'a') as spool_file:
+                spool_file.write(json.dumps(event) + '\n')
+    except Exception:
+        logger.exception('Unable to spool analytics event')
+
+
+def _claim_spool():
+    """Take ownership of all the spooled events.
+
+    :returns: spooled events
+    :rtype: [dict]
+    """
+
+    with _lock('spool.lock'):
+        path = _spool_path('spool.jsonl')
+        try:
+            with open(path) as spool_file:
+                lines = spool_file.read().splitlines()
+            os.remove(path)
+        except (IOError, OSError):
+            return []
+
+    events = []
+    for line in lines:
+        try:
+            events.append(json.loads(line))
+        except ValueError:
+            logger.exception('Dropping corrupt analytics event: %r', line)
+    return events
+
+
+def _cached_cluster_ids():
+    """
+    :returns: map from core.dcos_url to the cluster's CLUSTER_ID
+    :rtype: dict
+    """
+
+    try:
+        with open(_spool_path('cluster_ids.json')) as cache_file:
+            return json.load(cache_file)
+    except (IOError, ValueError):
+        return {}
+
+
+def _resolve_cluster_ids(events):
+    """Fill in the CLUSTER_ID of events that were spooled before the id of
+    their cluster was cached, and cache the ids we learn.
+
+    :param events: spooled events
+    :type events: [dict]
+    :rtype: None
+    """
+
+    cluster_ids = _cached_cluster_ids()
+    updated = False
+
+    for event in events:
+        props = event['data'].get('properties', {})
+        dcos_url = props.get('DCOS_URL')
+        if props.get('CLUSTER_ID') or not dcos_url:
+            continue
+
+        if dcos_url not in cluster_ids:
+            try:
+                url = six.moves.urllib.parse.urljoin(dcos_url, 'metadata')
+                metadata = http.get(url, timeout=(1, 1)).json()
+                cluster_ids[dcos_url] = metadata.get('CLUSTER_ID')
+                updated = True
+            except Exception:
+                logger.exception(
+                    'Unable to get the cluster_id of the cluster.')
+                cluster_ids[dcos_url] = None
+
+        props['CLUSTER_ID'] = cluster_ids[dcos_url]
+
+    if updated:
+        known = dict((url, id_) for url, id_ in cluster_ids.items() if id_)
+        util.write_file_atomic(_spool_path('cluster_ids.json'),
+                               json.dumps(known).encode('utf-8'))
+
+
+def flush():
+    """Deliver all the spooled events.  segment.io events are sent as a
+    single batch; rollbar reports are sent one by one.  Events that fail
+    to deliver are spooled again, up to `SPOOL_MAX_ATTEMPTS` times.  Only
+    one process flushes at a time.
+
+    :rtype: None
+    """
+
+    with _lock('flush.lock', blocking=False) as acquired:
+        if not acquired:
+            return
+
+        events = _claim_spool()
+        if not events:
+            return
+
+        _resolve_cluster_ids(events)
+
+        segment = [e for e in events if e['service'] == 'segment']
+        if segment and not _segment_request(
+                'batch', {'batch': [e['data'] for e in segment]}):
+            _respool(segment)
+
+        for event in events:
+            if event['service'] == 'rollbar' and not _rollbar_request(
+                    event['data']['title'], event['data']['properties']):
+                _respool([event])
+
+
+def _respool(events):
+    """Spool undelivered events again.
+
+    :param events: undelivered events
+    :type events: [dict]
+    :rtype: None
+    """
+
+    for event in events:
+        if event['attempts'] + 1 < SPOOL_MAX_ATTEMPTS:
+            _spool(event['service'], event['data'], event['attempts'] + 1)
+
+
+def start_flusher():
+    """Start a detached process that flushes the spooled events.  The
+    process outlives the command, so the command never waits on it.  It
+    doesn't inherit `FLUSHER_SCRUBBED_ENV`.
+
+    :rtype: None
+    """
+
+    env = dict((name, value) for name, value in os.environ.items()
+               if name not in FLUSHER_SCRUBBED_ENV)
+
+    kwargs = {}
+    if util.is_windows_platform():
+        detached_process = 0x00000008
+        create_new_process_group = 0x00000200
+        kwargs['creationflags'] = detached_process | create_new_process_group
+    else:
+        kwargs['preexec_fn'] = os.setsid
+
+    try:
+        with open(os.devnull, 'r+') as devnull:
+            subprocess.Popen([sys.executable, '-m', 'dcoscli.analytics'],
+                             stdin=devnull,
+                             stdout=devnull,
+                             stderr=devnull,
+                             close_fds=not util.is_windows_platform(),
+                             env=env,
+                             **kwargs)
+    except Exception:
+        logger.exception('Unable to start the analytics flusher')
+
+
+if __name__ == '__main__':
+    util.configure_process_from_environ()
+    flush()
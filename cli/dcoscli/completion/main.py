@@ -0,0 +1,328 @@
+"""Generate shell completion scripts and query completion data
+
+Usage:
+    dcos completion --info
+    dcos completion bash
+    dcos completion zsh
+    dcos completion query <kind> [<prefix>]
+    dcos completion refresh
+
+Options:
+    -h, --help    Show this screen
+    --info        Show a short description of this subcommand
+    --version     Show version
+
+Positional Arguments:
+    <kind>        Kind of object to complete. One of: app, framework, node,
+                  service or task
+    <prefix>      Only list IDs that start with <prefix>
+
+Completion data is read from a local index of IDs that is updated whenever
+a command fetches cluster state, so completing never waits on the network.
+Enable completion by adding the following to your shell's rc file:
+
+    eval "$(dcos completion bash)"
+"""
+
+import dcoscli
+import docopt
+from dcos import (cmds, completion, emitting, marathon, mesos, subcommand,
+                  util)
+from dcos.errors import DCOSException, DefaultError
+from dcoscli.main import decorate_docopt_usage
+
+logger = util.get_logger(__name__)
+emitter = emitting.FlatEmitter()
+
+REFRESH_INTERVAL_MINUTES = 5
+"""Age after which the shell scripts refresh the index in the background."""
+
+ID_COMPLETIONS = [
+    ('task', 'task'),
+    ('task log', 'task'),
+    ('task ls', 'task'),
+    ('task sync', 'task'),
+    ('marathon app kill', 'app'),
+    ('marathon app remove', 'app'),
+    ('marathon app restart', 'app'),
+    ('marathon app show', 'app'),
+    ('marathon app start', 'app'),
+    ('marathon app stop', 'app'),
+    ('marathon app update', 'app'),
+    ('marathon app version list', 'app'),
+    ('marathon deployment list', 'app'),
+    ('marathon task list', 'app'),
+    ('marathon task show', 'task'),
+    ('service log', 'service'),
+    ('service shutdown', 'framework'),
+]
+"""Command words, with options removed, followed by an ID of the given
+kind."""
+
+VERB_COMPLETIONS = {
+    'completion': ['bash', 'query', 'refresh', 'zsh'],
+    'config': ['append', 'prepend', 'set', 'show', 'unset', 'validate'],
+    'marathon': ['about', 'app', 'deployment', 'group', 'task'],
+    'marathon app': ['add', 'kill', 'list', 'remove', 'restart', 'show',
+                     'start', 'stop', 'update', 'version'],
+    'marathon deployment': ['list', 'rollback', 'stop', 'watch'],
+    'marathon group': ['add', 'list', 'remove', 'scale', 'show', 'update'],
+    'marathon task': ['list', 'show'],
+    'node': ['log', 'ssh'],
+    'perf': ['report'],
+    'package': ['bundle', 'describe', 'install', 'list', 'search',
+                'sources', 'uninstall', 'update'],
+    'service': ['log', 'shutdown'],
+    'task': ['grep', 'log', 'ls', 'sync'],
+}
+"""Verbs completed after each of the built-in commands."""
+
+OPTION_COMPLETIONS = {
+    'node': ['--json', '--stats', '--watch'],
+    'service': ['--completed', '--inactive', '--json', '--watch'],
+    'task': ['--completed', '--json', '--watch'],
+    'task grep': ['--completed', '--count', '--files-with-matches',
+                  '--max-count='],
+    'task ls': ['--long', '--max-depth=', '--recursive'],
+}
+"""Options completed, for a word that starts with -, after each of the
+built-in commands."""
+
+BASH_SCRIPT = """\
+# dcos bash completion.  Generated by `dcos completion bash`.
+
+_dcos_index_dir='{index_dir}'
+
+_dcos_refresh_index() {{
+    local stamp="$_dcos_index_dir/.refresh"
+    if [ -z "$(find "$stamp" -mmin -{interval} 2>/dev/null)" ]; then
+        mkdir -p "$_dcos_index_dir" && touch "$stamp"
+        (dcos completion refresh </dev/null >/dev/null 2>&1 &)
+    fi
+}}
+
+_dcos_ids() {{
+    local index="$_dcos_index_dir/$1"
+    _dcos_refresh_index
+    if [ -r "$index" ]; then
+        awk -v p="$2" 'index($0, p) == 1' "$index"
+    fi
+}}
+
+_dcos() {{
+    local cur prev words word i kind verbs options
+    cur="${{COMP_WORDS[COMP_CWORD]}}"
+    COMPREPLY=()
+
+    if [ "$COMP_CWORD" -eq 1 ]; then
+        COMPREPLY=( $(compgen -W "{commands}" -- "$cur") )
+        return 0
+    fi
+
+    case "$cur" in
+        --slave=*)
+            COMPREPLY=( $(_dcos_ids node "${{cur#--slave=}}") )
+            return 0
+            ;;
+    esac
+    # bash splits `--slave=<id>` into three words
+    prev="${{COMP_WORDS[COMP_CWORD-1]}}"
+    if [ "$prev" = "=" ]; then
+        prev="${{COMP_WORDS[COMP_CWORD-2]}}"
+    fi
+    if [ "$prev" = "--slave" ]; then
+        COMPREPLY=( $(_dcos_ids node "$cur") )
+        return 0
+    fi
+
+    words=""
+    for (( i=1; i < COMP_CWORD; i++ )); do
+        word="${{COMP_WORDS[i]}}"
+        case "$word" in
+            -*) ;;
+            *) words="${{words:+$words }}$word" ;;
+        esac
+    done
+
+    case "$words" in
+{cases}
+    esac
+
+    if [ "${{cur:0:1}}" = "-" ]; then
+        COMPREPLY=( $(compgen -W "$options" -- "$cur") )
+        return 0
+    fi
+    if [ -n "$verbs" ]; then
+        COMPREPLY=( $(compgen -W "$verbs" -- "$cur") )
+    fi
+    if [ -n "$kind" ]; then
+        COMPREPLY+=( $(_dcos_ids "$kind" "$cur") )
+    fi
+    return 0
+}}
+
+complete -o default -F _dcos dcos
+"""
+
+ZSH_SCRIPT = """\
+# dcos zsh completion.  Generated by `dcos completion zsh`.
+
+autoload -U +X bashcompinit && bashcompinit
+
+{bash_script}"""
+
+
+def main():
+    try:
+        return _main()
+    except DCOSException as e:
+        emitter.publish(e)
+        return 1
+
+
+@decorate_docopt_usage
+def _main():
+    util.configure_process_from_environ()
+
+    args = docopt.docopt(
+        __doc__,
+        version='dcos-completion version {}'.format(dcoscli.version))
+
+    return cmds.execute(_cmds(), args)
+
+
+def _cmds():
+    """
+    :returns: All of the supported commands
+    :rtype: [Command]
+    """
+
+    return [
+        cmds.Command(
+            hierarchy=['completion', '--info'],
+            arg_keys=[],
+            function=_info),
+
+        cmds.Command(
+            hierarchy=['completion', 'bash'],
+            arg_keys=[],
+            function=_bash),
+
+        cmds.Command(
+            hierarchy=['completion', 'zsh'],
+            arg_keys=[],
+            function=_zsh),
+
+        cmds.Command(
+            hierarchy=['completion', 'query'],
+            arg_keys=['<kind>', '<prefix>'],
+            function=_query),
+
+        cmds.Command(
+            hierarchy=['completion', 'refresh'],
+            arg_keys=[],
+            function=_refresh),
+    ]
+
+
+def _info():
+    """Print completion cli information.
+
+    :returns: process return code
+    :rtype: int
+    """
+
+    emitter.publish(__doc__.split('\n')[0])
+    return 0
+
+
+def _bash():
+    """Print the bash completion script.
+
+    :returns: process return code
+    :rtype: int
+    """
+
+    emitter.publish(bash_script())
+    return 0
+
+
+def _zsh():
+    """Print the zsh completion script.
+
+    :returns: process return code
+    :rtype: int
+    """
+
+    emitter.publish(ZSH_SCRIPT.format(bash_script=bash_script()))
+    return 0
+
+
+def _query(kind, prefix):
+    """Print the indexed IDs of `kind` that start with `prefix`.
+
+    :param kind: kind of object. One of `completion.KINDS`
+    :type kind: str
+    :param prefix: prefix to match
+    :type prefix: str | None
+    :returns: process return code
+    :rtype: int
+    """
+
+    matches = completion.query(kind, prefix or '')
+    if matches:
+        emitter.publish('\n'.join(matches))
+    return 0
+
+
+def _refresh():
+    """Fetch the cluster state and rebuild the completion index.
+
+    :returns: process return code
+    :rtype: int
+    """
+
+    # Both calls update the index as a side effect of fetching the state
+    mesos.DCOSClient().get_master_state()
+
+    # Marathon is optional; a cluster without it still has tasks
+    try:
+        marathon.create_client().get_apps()
+    except DCOSException as e:
+        logger.exception('Unable to list marathon apps')
+        emitter.publish(DefaultError('Unable to list apps: {}'.format(e)))
+
+    return 0
+
+
+def bash_script():
+    """Returns the bash completion script.  The script completes IDs by
+    reading the index files directly, so it doesn't start the CLI.
+
+    :returns: bash completion script
+    :rtype: str
+    """
+
+    commands = sorted(set(subcommand.noun(path)
+                          for path in subcommand.list_paths()))
+
+    cases = []
+    ids = dict(ID_COMPLETIONS)
+    for words in sorted(set(ids) | set(VERB_COMPLETIONS) |
+                        set(OPTION_COMPLETIONS)):
+        actions = []
+        if words in VERB_COMPLETIONS:
+            actions.append('verbs="{}"'.format(
+                ' '.join(VERB_COMPLETIONS[words])))
+        if words in OPTION_COMPLETIONS:
+            actions.append('options="{}"'.format(
+                ' '.join(OPTION_COMPLETIONS[words])))
+        if words in ids:
+            actions.append('kind={}'.format(ids[words]))
+        cases.append('        "{}") {} ;;'.format(words, '; '.join(actions)))
+
+    return BASH_SCRIPT.format(
+        index_dir=util.get_cache_path(completion.INDEX_SUBDIR),
+        interval=REFRESH_INTERVAL_MINUTES,
+        commands=' '.join(commands),
+        cases='\n'.join(cases))
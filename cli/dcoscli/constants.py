@@ -1,4 +1,5 @@
 ROLLBAR_SERVER_POST_KEY = '62f87c5df3674629b143a137de3d3244'
+ROLLBAR_URL = 'https://api.rollbar.com/api/1/item/'
 
 SEGMENT_IO_WRITE_KEY_PROD = '51ybGTeFEFU1xo6u10XMDrr6kATFyRyh'
 SEGMENT_IO_CLI_EVENT = 'dcos-cli'
@@ -0,0 +1,204 @@
+import collections
+import itertools
+import re
+import threading
+
+from dcos import emitting, util
+from dcos.errors import DCOSException, DefaultError
+
+from six.moves import range
+
+logger = util.get_logger(__name__)
+emitter = emitting.FlatEmitter()
+
+CHUNK_SIZE = 1024 * 1024
+"""Number of bytes of a file read at a time"""
+
+PREFETCH_CHUNKS = 4
+"""Number of chunks of a file that are read concurrently, while the
+earlier chunks are searched"""
+
+
+def compile_pattern(pattern):
+    """
+    :param pattern: Python regular expression
+    :type pattern: str
+    :returns: the compiled expression
+    :rtype: re.RegexObject
+    """
+
+    try:
+        return re.compile(pattern)
+    except re.error as e:
+        raise DCOSException('Invalid pattern [{}]: {}'.format(pattern, e))
+
+
+def read_chunks(mesos_file):
+    """Reads a file `CHUNK_SIZE` bytes at a time, up to the size it has when
+    the reading starts.  Up to `PREFETCH_CHUNKS` chunks are read ahead of
+    the one being consumed, so that a file is read no further than needed,
+    give or take a few chunks.  Files that aren't read from files/download
+    are read one chunk at a time, since their chunks don't start at exact
+    byte offsets, see `MesosFile.downloads`.
+
+    :param mesos_file: file to read
+    :type mesos_file: MesosFile
+    :returns: the chunks
+    :rtype: iterator over bytes
+    """
+
+    end = mesos_file.size()
+    if not mesos_file.downloads():
+        mesos_file.seek(0)
+        while mesos_file.tell() < end:
+            data = mesos_file.read_bytes(
+                min(CHUNK_SIZE, end - mesos_file.tell()))
+            if not data:
+                return
+            yield data
+        return
+
+    # the reads run on daemon threads, so that the reads ahead of a file
+    # whose search stopped don't hold up the exit of the process
+    offsets = iter(range(0, end, CHUNK_SIZE))
+    pending = collections.deque()
+
+    def prefetch():
+        for offset in itertools.islice(offsets,
+                                       PREFETCH_CHUNKS - len(pending)):
+            pending.append(util.submit_daemon(
+                mesos_file.read_bytes_at, offset,
+                min(CHUNK_SIZE, end - offset)))
+
+    prefetch()
+    while pending:
+        data = pending.popleft().result()
+        if not data:
+            return
+        prefetch()
+        yield data
+
+
+def matching_lines(regex, chunks):
+    """Yields the lines of a stream that match `regex`.  The stream is split
+    into lines across chunks: a line that spans two chunks is matched once
+    both are read.
+
+    :param regex: compiled expression
+    :type regex: re.RegexObject
+    :param chunks: the stream
+    :type chunks: iterator over bytes
+    :returns: the matching lines, without their newline
+    :rtype: iterator over str
+    """
+
+    rest = b''
+    for chunk in chunks:
+        data = rest + chunk
+        end = data.rfind(b'\n')
+        if end == -1:
+            rest = data
+            continue
+
+        # a UTF-8 character never contains a newline byte, so complete
+        # lines are decoded on their own
+        rest = data[end + 1:]
+        for line in data[:end].decode('utf-8', 'replace').split('\n'):
+            if regex.search(line):
+                yield line
+
+    if rest:
+        line = rest.decode('utf-8', 'replace')
+        if regex.search(line):
+            yield line
+
+
+class _Printer(object):
+    """Prints the lines found in several files as they're found, under
+    the header of their file, like `dcoscli.log`
+
+    :param output_header: whether to print the headers
+    :type output_header: bool
+    """
+
+    def __init__(self, output_header):
+        self._output_header = output_header
+        self._header = None
+        self._lock = threading.Lock()
+
+    def publish(self, mesos_file, line):
+        """
+        :param mesos_file: file the line was found in
+        :type mesos_file: MesosFile
+        :param line: line found
+        :type line: str
+        :rtype: None
+        """
+
+        header = str(mesos_file)
+        with self._lock:
+            if self._output_header and header != self._header:
+                emitter.publish('===> {} <==='.format(header))
+                self._header = header
+            emitter.publish(line)
+
+
+def grep_files(mesos_files, pattern, count=False, files_with_matches=False,
+               max_count=None):
+    """Prints the lines of files that match a pattern.  The files are read
+    in parallel, and the lines are printed as they're found.  A file is
+    read no further than needed: up to its first match if only the files
+    with matches are printed, and up to `max_count` matches otherwise.
+
+    :param mesos_files: files to search
+    :type mesos_files: [MesosFile]
+    :param pattern: Python regular expression
+    :type pattern: str
+    :param count: whether to print the number of matching lines of each
+                  file, rather than the lines
+    :type count: bool
+    :param files_with_matches: whether to print the files that have a
+                               matching line, rather than the lines
+    :type files_with_matches: bool
+    :param max_count: number of matching lines after which a file isn't
+                      read anymore; None to read the files to their end
+    :type max_count: int | None
+    :returns: process return code, like grep's: 2 if a file couldn't be
+              read, otherwise 0 if a line matched and 1 if none did
+    :rtype: int
+    """
+
+    regex = compile_pattern(pattern)
+    if files_with_matches:
+        max_count = 1 if max_count is None else min(max_count, 1)
+    printer = _Printer(len(mesos_files) > 1)
+
+    def search(mesos_file):
+        lines = matching_lines(regex, read_chunks(mesos_file))
+        matched = 0
+        for line in itertools.islice(lines, max_count):
+            matched += 1
+            if not count and not files_with_matches:
+                printer.publish(mesos_file, line)
+        return matched
+
+    found = failed = False
+    for job, mesos_file in util.stream(search, mesos_files):
+        try:
+            matched = job.result()
+        except DCOSException as e:
+            emitter.publish(DefaultError(
+                'Error reading [{}]: {}'.format(mesos_file, e)))
+            failed = True
+            continue
+
+        if matched:
+            found = True
+        if count:
+            emitter.publish('{}:{}'.format(mesos_file, matched))
+        elif files_with_matches and matched:
+            emitter.publish(str(mesos_file))
+
+    if failed:
+        return 2
+    return 0 if found else 1
@@ -9,6 +9,12 @@ logger = util.get_logger(__name__)
 emitter = emitting.FlatEmitter()
 
 
+FOLLOW_GRACE_PERIOD = 60
+"""Seconds during which a followed file that can't be read is retried.  It
+is longer than the time after which an agent's open circuit is probed
+again."""
+
+
 def _no_file_exception():
     return DCOSException('No files exist. Exiting.')
 
@@ -31,6 +37,7 @@ def log_files(mesos_files, follow, lines):
     if not mesos_files:
         raise _no_file_exception()
 
+    failing_since = {}
     while follow:
         # This flush is needed only for testing, since stdout is fully
         # buffered (as opposed to line-buffered) when redirected to a
@@ -40,13 +47,14 @@ def log_files(mesos_files, follow, lines):
 
         curr_header, mesos_files = _stream_files(curr_header,
                                                  _read_rest,
-                                                 mesos_files)
+                                                 mesos_files,
+                                                 failing_since)
         if not mesos_files:
             raise _no_file_exception()
         time.sleep(1)
 
 
-def _stream_files(curr_header, fn, mesos_files):
+def _stream_files(curr_header, fn, mesos_files, failing_since=None):
     """Apply `fn` in parallel to each file in `mesos_files`.  `fn` must
     return a list of strings, and these strings are then printed
     serially as separate lines.
@@ -64,6 +72,11 @@ def _stream_files(curr_header, fn, mesos_files):
     :type fn: MesosFile -> [str]
     :param mesos_files: files to read
     :type mesos_files: [MesosFile]
+    :param failing_since: when following files, the time at which each
+        failing file started failing.  A file is only dropped once it has
+        failed for `FOLLOW_GRACE_PERIOD` seconds.  If None, files are
+        dropped on their first failure.
+    :type failing_since: {MesosFile: float} | None
     :returns: Returns the most recently printed header, and a list of
         files that are still reachable.  Once we detect a file is
         unreachable, we stop trying to read from it.
@@ -80,12 +93,21 @@ def _stream_files(curr_header, fn, mesos_files):
             # The read function might throw an exception if read.json
             # is unavailable, or if the file doesn't exist in the
             # sandbox.  In any case, we silently remove the file and
-            # continue.
+            # continue.  Followed files get a grace period, so that an
+            # agent that is briefly unreachable doesn't end the stream.
             logger.exception("Error reading file: {}".format(e))
 
+            if failing_since is not None:
+                since = failing_since.setdefault(mesos_file, time.time())
+                if time.time() - since < FOLLOW_GRACE_PERIOD:
+                    continue
+
             reachable_files.remove(mesos_file)
             continue
 
+        if failing_since is not None:
+            failing_since.pop(mesos_file, None)
+
         if lines:
             curr_header = _output(curr_header,
                                   len(reachable_files) > 1,
@@ -19,6 +19,9 @@ Options:
                                 warning, error and critical messages to stderr.
                                 Note: that this does not affect the output sent
                                 to stdout by the command.
+    --metrics=<format>          If set then print a summary of the HTTP
+                                requests sent by the command to stderr when it
+                                exits. The format is either table or json.
     --debug                     If set then enable further debug messages which
                                 are sent to stdout.
 
@@ -38,6 +41,37 @@ Environment Variables:
                                 for HTTPS, or the path to the certificate(s).
                                 Can also be configured by setting
                                 `core.ssl_config` in the config.
+
+    DCOS_METRICS                If set then print a summary of the HTTP
+                                requests in the given format. See the --metrics
+                                option for details.
+
+    DCOS_TRACE                  If set then write the time spent in each phase
+                                of the command to this file, in Chrome's trace
+                                event format. It can be opened with
+                                chrome://tracing.
+
+    DCOS_PROFILE                If set then profile each process of the command
+                                and write its stats to <DCOS_PROFILE>.<program>
+                                in Python's pstats format.
+
+    DCOS_HAR                    If set then archive the HTTP requests and
+                                responses of the command, with their timings,
+                                to the file <DCOS_HAR> in HAR format.
+                                Credentials are redacted.
+
+    DCOS_CASSETTE               If set then record the HTTP requests and
+                                responses of the command to this file, or
+                                replay them from it, depending on
+                                DCOS_CASSETTE_MODE. Credentials aren't
+                                recorded.
+
+    DCOS_CASSETTE_MODE          Either record or replay. [default: replay]
+
+    DCOS_CASSETTE_LATENCY       When a cassette is replayed, the factor by
+                                which the recorded latency of its responses is
+                                multiplied. 0 replays them immediately, 1 as
+                                recorded. [default: 0]
 """
 
 import os
@@ -48,7 +82,8 @@ from subprocess import PIPE, Popen
 
 import dcoscli
 import docopt
-from dcos import auth, constants, emitting, errors, http, subcommand, util
+from dcos import (auth, constants, emitting, errors, http, metrics,
+                  subcommand, tracing, util)
 from dcos.errors import DCOSException
 from dcoscli import analytics
 
@@ -78,11 +113,16 @@ def _main():
     if args['--debug']:
         os.environ[constants.DCOS_DEBUG_ENV] = 'true'
 
+    metrics_format = args['--metrics']
+    if metrics_format and not _config_metrics_environ(metrics_format):
+        return 1
+
     util.configure_process_from_environ()
 
-    if args['<command>'] != 'config' and \
-       not auth.check_if_user_authenticated():
-        auth.force_auth()
+    with tracing.span('auth check'):
+        if args['<command>'] not in ['config', 'completion', 'perf'] and \
+           not auth.check_if_user_authenticated():
+            auth.force_auth()
 
     config = util.get_config()
     set_ssl_info_env_vars(config)
@@ -95,12 +135,13 @@ def _main():
 
     executable = subcommand.command_executables(command)
 
-    subproc = Popen([executable,  command] + args['<args>'],
-                    stderr=PIPE)
-    if dcoscli.version != 'SNAPSHOT':
-        return analytics.wait_and_track(subproc)
-    else:
-        return analytics.wait_and_capture(subproc)[0]
+    with tracing.span('subcommand', command=command):
+        subproc = Popen([executable,  command] + args['<args>'],
+                        stderr=PIPE)
+        if dcoscli.version != 'SNAPSHOT':
+            return analytics.wait_and_track(subproc, command)
+        else:
+            return analytics.wait_and_capture(subproc)[0]
 
 
 def _config_log_level_environ(log_level):
@@ -123,6 +164,27 @@ def _config_log_level_environ(log_level):
     return False
 
 
+def _config_metrics_environ(metrics_format):
+    """
+    :param metrics_format: Format of the HTTP metrics report
+    :type metrics_format: str
+    :returns: True if the metrics format was configured correctly; False
+              otherwise.
+    :rtype: bool
+    """
+
+    metrics_format = metrics_format.lower()
+
+    if metrics_format in metrics.VALID_FORMATS:
+        os.environ[constants.DCOS_METRICS_ENV] = metrics_format
+        return True
+
+    msg = 'Metrics format set to an unknown value {!r}. Valid values are {!r}'
+    emitter.publish(msg.format(metrics_format, metrics.VALID_FORMATS))
+
+    return False
+
+
 def signal_handler(signal, frame):
     emitter.publish(
         errors.DefaultError("User interrupted command with Ctrl-C"))
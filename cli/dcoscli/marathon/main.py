@@ -366,19 +366,9 @@ def _add(app_resource):
     """
     application_resource = _get_resource(app_resource)
 
-    # Add application to marathon
+    # Add application to marathon.  Marathon rejects apps that already
+    # exist, so there is no need to check first.
     client = marathon.create_client()
-
-    # Check that the application doesn't exist
-    app_id = client.normalize_app_id(application_resource['id'])
-
-    try:
-        client.get_app(app_id)
-    except DCOSException as e:
-        logger.exception(e)
-    else:
-        raise DCOSException("Application '{}' already exists".format(app_id))
-
     client.add_app(application_resource)
 
     return 0
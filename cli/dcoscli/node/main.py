@@ -1,17 +1,22 @@
 import os
 import subprocess
+import time
 
 import dcoscli
 import docopt
 import pkg_resources
 from dcos import cmds, emitting, errors, mesos, util
 from dcos.errors import DCOSException, DefaultError
-from dcoscli import log, tables
+from dcoscli import log, tables, watch
 from dcoscli.main import decorate_docopt_usage
 
 logger = util.get_logger(__name__)
 emitter = emitting.FlatEmitter()
 
+STATS_INTERVAL = 1
+"""Seconds between the two samples from which `dcos node --stats` computes
+the cpus used"""
+
 
 def main():
     try:
@@ -66,7 +71,7 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['node'],
-            arg_keys=['--json'],
+            arg_keys=['--json', '--stats', '--watch'],
             function=_list),
     ]
 
@@ -82,28 +87,157 @@ def _info():
     return 0
 
 
-def _list(json_):
+def _list(json_, stats, watch_):
     """List DCOS nodes
 
     :param json_: If true, output json.
         Otherwise, output a human readable table.
     :type json_: bool
+    :param stats: If true, list the resources used by each node, read
+        from every node, and the resources allocated on it.
+    :type stats: bool
+    :param watch_: If true, print the changes of the nodes until
+        interrupted.
+    :type watch_: bool
     :returns: process return code
     :rtype: int
     """
 
     client = mesos.DCOSClient()
-    slaves = client.get_state_summary()['slaves']
+    if stats:
+        fields, table = tables.slave_stats_fields(), tables.slave_stats_table
+    else:
+        fields, table = tables.slave_fields(), tables.slave_table
+
+    if watch_:
+        def fetch():
+            if stats:
+                return _slave_stats(client)[0]
+            return client.get_state_summary()['slaves']
+
+        if json_:
+            watch.watch_json(fetch, _slave_id, lambda slave: slave)
+        else:
+            watch.watch_table(fetch, _slave_id, fields, table)
+        return 0
+
+    if stats:
+        slaves, failed = _slave_stats(client)
+    else:
+        slaves, failed = client.get_state_summary()['slaves'], 0
+
     if json_:
         emitter.publish(slaves)
     else:
-        table = tables.slave_table(slaves)
-        output = str(table)
+        output = str(table(slaves))
         if output:
             emitter.publish(output)
-        else:
+        elif not failed:
             emitter.publish(errors.DefaultError('No slaves found.'))
 
+    return 1 if failed else 0
+
+
+def _slave_stats(client):
+    """Samples the monitor/statistics.json of every slave twice, in
+    parallel, `STATS_INTERVAL` seconds apart.  The slaves that fail, or
+    don't answer in time, are reported and left out.
+
+    :param client: DCOS client
+    :type client: mesos.DCOSClient
+    :returns: the {"id": ..., "hostname": ..., "used": ...,
+              "allocated": ...} of the slaves that answered, and the number
+              of slaves that didn't
+    :rtype: ([dict], int)
+    """
+
+    slaves = [mesos.Slave(slave, None, None)
+              for slave in client.get_state_summary()['slaves']]
+
+    start = time.time()
+    first, failed = _sample_statistics(client, slaves)
+    time.sleep(max(STATS_INTERVAL - (time.time() - start), 0))
+    second, failed_again = _sample_statistics(
+        client, [slave for slave in slaves if slave['id'] in first])
+
+    stats = [{'id': slave['id'],
+              'hostname': slave['hostname'],
+              'used': _usage(first[slave['id']], second[slave['id']]),
+              'allocated': slave['used_resources']}
+             for slave in slaves if slave['id'] in second]
+    return stats, failed + failed_again
+
+
+def _sample_statistics(client, slaves):
+    """Reads the monitor/statistics.json of slaves, in parallel.  The slaves
+    that fail are reported.
+
+    :param client: DCOS client
+    :type client: mesos.DCOSClient
+    :param slaves: slaves to read
+    :type slaves: [mesos.Slave]
+    :returns: the statistics of the slaves that answered, by slave ID, and
+              the number of slaves that didn't
+    :rtype: ({str: [dict]}, int)
+    """
+
+    samples = {}
+    failed = 0
+    for job, slave in client.fan_out(slaves, 'monitor/statistics.json'):
+        try:
+            samples[slave['id']] = job.result()
+        except DCOSException as e:
+            failed += 1
+            emitter.publish(
+                DefaultError('Error accessing slave: {0}'.format(e)))
+    return samples, failed
+
+
+def _usage(before, after):
+    """Sums the resources used by a slave's executors.  The cpus used are
+    the cpu time the executors spent between two samples, per second.
+
+    :param before: the slave's earlier monitor/statistics.json
+    :type before: [dict]
+    :param after: the slave's later monitor/statistics.json
+    :type after: [dict]
+    :returns: the cpus, mem (MB) and disk (MB) used.  Disk is None unless
+              the slave isolates disk usage.
+    :rtype: dict
+    """
+
+    def key(executor):
+        return executor['framework_id'], executor['executor_id']
+
+    def cpu_time(statistics):
+        return statistics.get('cpus_user_time_secs', 0) + \
+            statistics.get('cpus_system_time_secs', 0)
+
+    earlier = dict((key(executor), executor['statistics'])
+                   for executor in before)
+
+    cpus = mem = 0.0
+    disk = None
+    for executor in after:
+        statistics = executor['statistics']
+        mem += statistics.get('mem_rss_bytes', 0)
+        if 'disk_used_bytes' in statistics:
+            disk = (disk or 0.0) + statistics['disk_used_bytes']
+
+        previous = earlier.get(key(executor))
+        if previous is not None and \
+                statistics['timestamp'] > previous['timestamp']:
+            cpus += (cpu_time(statistics) - cpu_time(previous)) / \
+                (statistics['timestamp'] - previous['timestamp'])
+
+    return {'cpus': max(cpus, 0.0),
+            'mem': mem / 2 ** 20,
+            'disk': None if disk is None else disk / 2 ** 20}
+
+
+def _slave_id(slave):
+    return slave['id']
+
 
 def _log(follow, lines, master, slave):
     """ Prints the contents of master and slave logs.
@@ -0,0 +1,110 @@
+"""Summarize the performance of DCOS CLI commands
+
+Usage:
+    dcos perf --info
+    dcos perf report [--json --command=<command> --cluster=<url>]
+
+Options:
+    -h, --help             Show this screen
+    --info                 Show a short description of this subcommand
+    --json                 Print json-formatted summaries
+    --command=<command>    Only summarize this command. E.g.
+                           "marathon app list"
+    --cluster=<url>        Only summarize commands sent to this DCOS URL
+    --version              Show version
+
+Commands are recorded in a local ledger, with their duration, HTTP
+requests and cluster size, when `core.perf_ledger` is set to true.
+The report shows the 50th, 95th and 99th percentiles of their duration.
+"""
+
+import dcoscli
+import docopt
+from dcos import cmds, emitting, perf, util
+from dcos.errors import DCOSException
+from dcoscli import tables
+from dcoscli.main import decorate_docopt_usage
+
+logger = util.get_logger(__name__)
+emitter = emitting.FlatEmitter()
+
+
+def main():
+    try:
+        return _main()
+    except DCOSException as e:
+        emitter.publish(e)
+        return 1
+
+
+@decorate_docopt_usage
+def _main():
+    util.configure_process_from_environ()
+
+    args = docopt.docopt(
+        __doc__,
+        version='dcos-perf version {}'.format(dcoscli.version))
+
+    return cmds.execute(_cmds(), args)
+
+
+def _cmds():
+    """
+    :returns: All of the supported commands
+    :rtype: [Command]
+    """
+
+    return [
+        cmds.Command(
+            hierarchy=['perf', '--info'],
+            arg_keys=[],
+            function=_info),
+
+        cmds.Command(
+            hierarchy=['perf', 'report'],
+            arg_keys=['--json', '--command', '--cluster'],
+            function=_report),
+    ]
+
+
+def _info():
+    """Print perf cli information.
+
+    :returns: process return code
+    :rtype: int
+    """
+
+    emitter.publish(__doc__.split('\n')[0])
+    return 0
+
+
+def _report(is_json, command, cluster):
+    """Summarize the performance ledger by command and cluster
+
+    :param is_json: If true, output json.
+        Otherwise, output a human readable table.
+    :type is_json: bool
+    :param command: only summarize this command
+    :type command: str | None
+    :param cluster: only summarize commands sent to this DCOS URL
+    :type cluster: str | None
+    :returns: process return code
+    :rtype: int
+    """
+
+    records = [record for record in perf.read_records()
+               if (command is None or record.get('command') == command) and
+               (cluster is None or record.get('cluster') == cluster)]
+
+    if not records and not is_json:
+        config = util.get_config()
+        if not config.get('core.perf_ledger', False):
+            raise DCOSException(
+                'The performance ledger is empty. Enable it with '
+                '`dcos config set core.perf_ledger true`')
+
+    emitting.publish_table(emitter,
+                           perf.summarize(records),
+                           tables.perf_table,
+                           is_json)
+    return 0
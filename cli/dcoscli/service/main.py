@@ -2,7 +2,7 @@
 
 Usage:
     dcos service --info
-    dcos service [--completed --inactive --json]
+    dcos service [--completed --inactive --json --watch]
     dcos service log [--follow --lines=N --ssh-config-file=<path>]
                      <service> [<file>]
     dcos service shutdown <service-id>
@@ -34,6 +34,10 @@ Options:
 
     --version                   Show version
 
+    --watch                     Print the services, and then the services
+                                that are added, changed or removed, every 2
+                                seconds.
+
 Positional Arguments:
     <file>                      Output this file. [default: stdout]
 
@@ -48,7 +52,7 @@ import dcoscli
 import docopt
 from dcos import cmds, emitting, marathon, mesos, package, util
 from dcos.errors import DCOSException, DefaultError
-from dcoscli import log, tables
+from dcoscli import log, tables, watch
 from dcoscli.main import decorate_docopt_usage
 
 logger = util.get_logger(__name__)
@@ -100,7 +104,7 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['service'],
-            arg_keys=['--inactive', '--completed', '--json'],
+            arg_keys=['--inactive', '--completed', '--json', '--watch'],
             function=_service),
     ]
 
@@ -116,7 +120,7 @@ def _info():
     return 0
 
 
-def _service(inactive, completed, is_json):
+def _service(inactive, completed, is_json, watch_):
     """List dcos services
 
     :param inactive: If True, include completed tasks
@@ -124,10 +128,28 @@ def _service(inactive, completed, is_json):
     :param is_json: If true, output json.
         Otherwise, output a human readable table.
     :type is_json: bool
+    :param watch_: If true, print the changes of the services until
+        interrupted.
+    :type watch_: bool
     :returns: process return code
     :rtype: int
     """
 
+    if watch_:
+        client = mesos.DCOSClient()
+
+        def fetch():
+            master = mesos.Master(client.get_master_state())
+            return master.frameworks(inactive=inactive, completed=completed)
+
+        if is_json:
+            watch.watch_json(fetch, _service_id,
+                             lambda service: service.dict())
+        else:
+            watch.watch_table(fetch, _service_id, tables.service_fields(),
+                              tables.service_table)
+        return 0
+
     services = mesos.get_master().frameworks(
         inactive=inactive,
         completed=completed)
@@ -143,6 +165,10 @@ def _service(inactive, completed, is_json):
     return 0
 
 
+def _service_id(service):
+    return service['id']
+
+
 def _shutdown(service_id):
     """Shuts down a service
 
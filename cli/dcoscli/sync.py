@@ -0,0 +1,253 @@
+import json
+import os
+import posixpath
+
+from dcos import emitting, mesos, util
+from dcos.errors import DCOSException, DCOSHTTPException, DefaultError
+
+logger = util.get_logger(__name__)
+emitter = emitting.FlatEmitter()
+
+MANIFEST = '.dcos-sync.json'
+"""Name of the manifest of a local copy of a sandbox.  It holds the size
+and mtime of the sandbox files when they were last copied."""
+
+CHUNK_SIZE = 1024 * 1024
+"""Number of bytes of a file read and written at a time"""
+
+
+def load_manifest(localdir):
+    """
+    :param localdir: local copy of a sandbox
+    :type localdir: str
+    :returns: the manifest of the copy; an empty one if there isn't any
+    :rtype: dict
+    """
+
+    try:
+        with open(os.path.join(localdir, MANIFEST)) as manifest_file:
+            return json.load(manifest_file)
+    except (IOError, OSError, ValueError):
+        return {'task': None, 'files': {}}
+
+
+def store_manifest(localdir, manifest):
+    """
+    :param localdir: local copy of a sandbox
+    :type localdir: str
+    :param manifest: manifest of the copy
+    :type manifest: dict
+    :rtype: None
+    """
+
+    util.write_file_atomic(
+        os.path.join(localdir, MANIFEST),
+        json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8'))
+
+
+def plan(files, manifest, localdir):
+    """Decides which files to transfer, and from which offset.  A file is
+    appended to if it grew since it was copied, and rewritten if it changed
+    in any other way.  Files that were cut short, e.g. by an interrupted
+    sync, are resumed.
+
+    :param files: sandbox files, by path relative to the sandbox.  Of the
+                  form returned from the mesos /files/browse.json endpoint.
+    :type files: {str: dict}
+    :param manifest: manifest of the local copy
+    :type manifest: dict
+    :param localdir: local copy of the sandbox
+    :type localdir: str
+    :returns: (path, file, offset) of the files to transfer
+    :rtype: [(str, dict, int)]
+    """
+
+    transfers = []
+    for path in sorted(files):
+        file_ = files[path]
+        copied = manifest['files'].get(path)
+        try:
+            local_size = os.path.getsize(
+                os.path.join(localdir, *path.split('/')))
+        except OSError:
+            local_size = None
+
+        if copied is None or local_size is None:
+            offset = 0
+        elif file_['size'] < copied['size'] or \
+                file_['mtime'] < copied['mtime'] or \
+                (file_['size'] == copied['size'] and
+                 file_['mtime'] != copied['mtime']):
+            # truncated, rotated or rewritten in place
+            offset = 0
+        elif local_size < file_['size'] and local_size >= copied['size']:
+            offset = local_size
+        elif local_size == file_['size']:
+            continue
+        else:
+            offset = 0
+
+        transfers.append((path, file_, offset))
+    return transfers
+
+
+def transfer(mesos_file, local_path, offset, size):
+    """Copies the bytes of a file from `offset` to `size`.  The local file
+    is truncated to `offset` first.  Files that aren't read from
+    files/download are copied from the start: the offsets of
+    files/read.json don't always match the file's bytes, see
+    `mesos.MesosFile.downloads`.
+
+    :param mesos_file: file to copy
+    :type mesos_file: mesos.MesosFile
+    :param local_path: path of the copy
+    :type local_path: str
+    :param offset: number of bytes that were copied already
+    :type offset: int
+    :param size: size of the file
+    :type size: int
+    :returns: the offset from which the file was copied, and the number of
+              bytes copied
+    :rtype: (int, int)
+    """
+
+    if not mesos_file.downloads():
+        offset = 0
+
+    util.ensure_dir_exists(os.path.dirname(local_path))
+    mode = 'r+b' if offset and os.path.exists(local_path) else 'wb'
+
+    copied = 0
+    with open(local_path, mode) as local_file:
+        local_file.seek(offset)
+        local_file.truncate()
+        mesos_file.seek(offset)
+        while offset + copied < size:
+            data = mesos_file.read_bytes(
+                min(CHUNK_SIZE, size - offset - copied))
+            if offset and not mesos_file.downloads():
+                # the host turned out to ignore Range requests
+                break
+            if not data:
+                break
+            local_file.write(data)
+            copied += len(data)
+
+    if offset and not mesos_file.downloads():
+        return transfer(mesos_file, local_path, 0, size)
+    return offset, copied
+
+
+def _walk(dcos_client, task, root):
+    """Lists the files of a sandbox directory tree
+
+    :param dcos_client: DCOS client
+    :type dcos_client: mesos.DCOSClient
+    :param task: task whose sandbox it is
+    :type task: mesos.Task
+    :param root: absolute path of the directory
+    :type root: str
+    :returns: the files, by path relative to `root`, and whether every
+              directory could be listed
+    :rtype: ({str: dict}, bool)
+    """
+
+    files = {}
+    complete = True
+    for job, (_, _, dir_, depth) in dcos_client.browse_tree(
+            [(task['id'], task.slave(), root)]):
+        try:
+            entries = job.result()
+        except DCOSHTTPException as e:
+            if depth == 0 and e.response.status_code == 404:
+                raise DCOSException(
+                    'Cannot access [{}]: No such file or directory'.format(
+                        dir_))
+            raise
+        except DCOSException as e:
+            if depth == 0:
+                raise
+            emitter.publish(DefaultError(
+                'Cannot list [{}]: {}'.format(dir_, e)))
+            complete = False
+            continue
+
+        for entry in entries:
+            if mesos.is_directory(entry):
+                continue
+
+            # the paths come from the agent: a file outside of `root`
+            # would be copied outside of the local directory
+            path = posixpath.relpath(entry['path'], root) \
+                if posixpath.isabs(entry['path']) else None
+            if path is None or path == '..' or path.startswith('../'):
+                emitter.publish(DefaultError(
+                    'Skipping [{}]: not below [{}]'.format(
+                        entry['path'], root)))
+                continue
+            files[path] = entry
+    return files, complete
+
+
+def sync(dcos_client, task, localdir):
+    """Copies the sandbox of a task to a local directory.  Only the files
+    that are new or changed since the last copy are transferred, and only
+    the bytes appended to the files that grew.  Files are transferred in
+    parallel.
+
+    :param dcos_client: DCOS client
+    :type dcos_client: mesos.DCOSClient
+    :param task: task whose sandbox is copied
+    :type task: mesos.Task
+    :param localdir: local copy of the sandbox
+    :type localdir: str
+    :returns: process return code
+    :rtype: int
+    """
+
+    root = posixpath.normpath(task.directory())
+    files, returncode = _walk(dcos_client, task, root)
+    returncode = 0 if returncode else 1
+
+    util.ensure_dir_exists(localdir)
+    manifest = load_manifest(localdir)
+    if manifest['task'] != task['id']:
+        manifest = {'task': task['id'], 'files': {}}
+
+    def copy(item):
+        path, file_, offset = item
+        mesos_file = mesos.MesosFile(path, task=task,
+                                     dcos_client=dcos_client)
+        local_path = os.path.join(localdir, *path.split('/'))
+        result = transfer(mesos_file, local_path, offset, file_['size'])
+        os.utime(local_path, (file_['mtime'], file_['mtime']))
+        return result
+
+    transfers = plan(files, manifest, localdir)
+    transferred = 0
+    try:
+        for job, (path, file_, _) in util.stream(copy, transfers):
+            try:
+                offset, copied = job.result()
+            except DCOSException as e:
+                emitter.publish(DefaultError(
+                    'Cannot copy [{}]: {}'.format(path, e)))
+                returncode = 1
+                continue
+
+            manifest['files'][path] = {'size': offset + copied,
+                                       'mtime': file_['mtime']}
+            transferred += copied
+            emitter.publish('{} ({} bytes{})'.format(
+                path, copied, ', appended' if offset else ''))
+    finally:
+        # files that are gone from the sandbox are kept, but forgotten
+        manifest['files'] = dict(
+            (path, copied) for path, copied in manifest['files'].items()
+            if path in files)
+        store_manifest(localdir, manifest)
+
+    emitter.publish(
+        'Transferred {} bytes in {} of {} files'.format(
+            transferred, len(transfers), len(files)))
+    return returncode
@@ -18,15 +18,13 @@ DEPLOYMENT_DISPLAY = {'ResolveArtifacts': 'artifacts',
 logger = util.get_logger(__name__)
 
 
-def task_table(tasks):
-    """Returns a PrettyTable representation of the provided mesos tasks.
-
-    :param tasks: tasks to render
-    :type tasks: [Task]
-    :rtype: PrettyTable
+def task_fields():
+    """
+    :returns: the columns of a table of mesos tasks, see `table`
+    :rtype: OrderedDict(str, function)
     """
 
-    fields = OrderedDict([
+    return OrderedDict([
         ("NAME", lambda t: t["name"]),
         ("HOST", lambda t: t.slave()["hostname"]),
         ("USER", lambda t: t.user()),
@@ -34,7 +32,16 @@ def task_table(tasks):
         ("ID", lambda t: t["id"]),
     ])
 
-    tb = table(fields, tasks, sortby="NAME")
+
+def task_table(tasks):
+    """Returns a PrettyTable representation of the provided mesos tasks.
+
+    :param tasks: tasks to render
+    :type tasks: [Task]
+    :rtype: PrettyTable
+    """
+
+    tb = table(task_fields(), tasks, sortby="NAME")
     tb.align["NAME"] = "l"
     tb.align["HOST"] = "l"
     tb.align["ID"] = "l"
@@ -183,15 +190,13 @@ def deployment_table(deployments):
     return tb
 
 
-def service_table(services):
-    """Returns a PrettyTable representation of the provided DCOS services.
-
-    :param services: services to render
-    :type services: [Framework]
-    :rtype: PrettyTable
+def service_fields():
+    """
+    :returns: the columns of a table of DCOS services, see `table`
+    :rtype: OrderedDict(str, function)
     """
 
-    fields = OrderedDict([
+    return OrderedDict([
         ("NAME", lambda s: s['name']),
         ("HOST", lambda s: s['hostname']),
         ("ACTIVE", lambda s: s['active']),
@@ -202,7 +207,16 @@ def service_table(services):
         ("ID", lambda s: s['id']),
     ])
 
-    tb = table(fields, services, sortby="NAME")
+
+def service_table(services):
+    """Returns a PrettyTable representation of the provided DCOS services.
+
+    :param services: services to render
+    :type services: [Framework]
+    :rtype: PrettyTable
+    """
+
+    tb = table(service_fields(), services, sortby="NAME")
     tb.align["ID"] = 'l'
     tb.align["NAME"] = 'l'
 
@@ -322,6 +336,19 @@ def package_search_table(search_results):
     return tb
 
 
+def slave_fields():
+    """
+    :returns: the columns of a table of DCOS slaves, see `table`
+    :rtype: OrderedDict(str, function)
+    """
+
+    return OrderedDict([
+        ('HOSTNAME', lambda s: s['hostname']),
+        ('IP', lambda s: mesos.parse_pid(s['pid'])[1]),
+        ('ID', lambda s: s['id'])
+    ])
+
+
 def slave_table(slaves):
     """Returns a PrettyTable representation of the provided DCOS slaves
 
@@ -330,13 +357,95 @@ def slave_table(slaves):
     :rtype: PrettyTable
     """
 
-    fields = OrderedDict([
+    tb = table(slave_fields(), slaves, sortby="HOSTNAME")
+    return tb
+
+
+def _format_usage(stats, resource):
+    """Formats the used and allocated amounts of a slave's resource
+
+    :param stats: the slave's "used" and "allocated" resources
+    :type stats: dict
+    :param resource: cpus, mem or disk
+    :type resource: str
+    :rtype: str
+    """
+
+    amount = '{:.2f}' if resource == 'cpus' else '{:.0f}'
+    used = stats['used'].get(resource)
+    allocated = stats['allocated'].get(resource)
+    return '{}/{}'.format(
+        EMPTY_ENTRY if used is None else amount.format(used),
+        EMPTY_ENTRY if allocated is None else amount.format(allocated))
+
+
+def slave_stats_fields():
+    """
+    :returns: the columns of a table of DCOS slaves' resources, see
+              `table`
+    :rtype: OrderedDict(str, function)
+    """
+
+    return OrderedDict([
         ('HOSTNAME', lambda s: s['hostname']),
-        ('IP', lambda s: mesos.parse_pid(s['pid'])[1]),
+        ('CPUS', lambda s: _format_usage(s, 'cpus')),
+        ('MEM (MB)', lambda s: _format_usage(s, 'mem')),
+        ('DISK (MB)', lambda s: _format_usage(s, 'disk')),
         ('ID', lambda s: s['id'])
     ])
 
-    tb = table(fields, slaves, sortby="HOSTNAME")
+
+def slave_stats_table(stats):
+    """Returns a PrettyTable representation of the used and allocated
+    resources of DCOS slaves
+
+    :param stats: {"id": ..., "hostname": ..., "used": ...,
+                  "allocated": ...} of each slave
+    :type stats: [dict]
+    :rtype: PrettyTable
+    """
+
+    tb = table(slave_stats_fields(), stats, sortby="HOSTNAME")
+    return tb
+
+
+def _format_seconds(seconds):
+    """Formats a duration in `dcos perf report` format.
+
+    :param seconds: duration in seconds
+    :type seconds: float | None
+    :rtype: str
+    """
+
+    if seconds is None:
+        return EMPTY_ENTRY
+    return '{:.2f}s'.format(seconds)
+
+
+def perf_table(summaries):
+    """Returns a PrettyTable representation of performance ledger summaries
+
+    :param summaries: summaries to render, from dcos.perf.summarize
+    :type summaries: [dict]
+    :rtype: PrettyTable
+    """
+
+    fields = OrderedDict([
+        ('COMMAND', lambda s: s['command']),
+        ('CLUSTER', lambda s: s['cluster'] or EMPTY_ENTRY),
+        ('COUNT', lambda s: s['count']),
+        ('P50', lambda s: _format_seconds(s['p50'])),
+        ('P95', lambda s: _format_seconds(s['p95'])),
+        ('P99', lambda s: _format_seconds(s['p99'])),
+        ('REQUESTS', lambda s: s['requests']),
+        ('RECEIVED', lambda s: util.humanize_bytes(s['bytes_received'])),
+        ('AGENTS', lambda s: s['agents'] or EMPTY_ENTRY),
+        ('TASKS', lambda s: s['tasks'] or EMPTY_ENTRY),
+    ])
+
+    tb = table(fields, summaries, sortby="COMMAND")
+    tb.align['COMMAND'] = 'l'
+    tb.align['CLUSTER'] = 'l'
     return tb
 
 
@@ -373,6 +482,24 @@ def ls_long_table(files):
     return tb
 
 
+def ls_long_line(file_, path):
+    """Returns a line of `dcos task ls --long --recursive`, which is
+    printed as soon as its directory is listed, so its columns have fixed
+    widths rather than the table's
+
+    :param file_: file to render.  Of the form returned from the mesos
+                  /files/browse.json endpoint.
+    :type file_: dict
+    :param path: path to print
+    :type path: str
+    :rtype: str
+    """
+
+    return '{} {:>3} {:>8} {:>8} {:>12} {} {}'.format(
+        file_['mode'], file_['nlink'], file_['uid'], file_['gid'],
+        file_['size'], _format_unix_timestamp(int(file_['mtime'])), path)
+
+
 def table(fields, objs, **kwargs):
     """Returns a PrettyTable.  `fields` represents the header schema of
     the table.  `objs` represents the objects to be rendered into
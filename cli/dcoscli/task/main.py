@@ -2,25 +2,47 @@
 
 Usage:
     dcos task --info
-    dcos task [--completed --json <task>]
+    dcos task [--completed --json --watch <task>]
+    dcos task grep [--completed --count --files-with-matches --max-count=N]
+                   <pattern> <task> [<file>]
     dcos task log [--completed --follow --lines=N] <task> [<file>]
-    dcos task ls [--long] <task> [<path>]
+    dcos task ls [--long --recursive --max-depth=N] <task> [<path>]
+    dcos task sync <task> <localdir>
 
 Options:
-    -h, --help    Show this screen
-    --info        Show a short description of this subcommand
-    --completed   Include completed tasks as well
-    --follow      Print data as the file grows
-    --json        Print json-formatted tasks
-    --lines=N     Print the last N lines [default: 10]
-    --long        Use a long listing format
-    --version     Show version
+    -h, --help         Show this screen
+    --info             Show a short description of this subcommand
+    --completed        Include completed tasks as well
+    -c, --count        Print the number of matching lines of each file,
+                       rather than the lines
+    -l, --files-with-matches
+                       Print the files that have a matching line, rather
+                       than the lines
+    --follow           Print data as the file grows
+    --json             Print json-formatted tasks
+    --lines=N          Print the last N lines [default: 10]
+    --long             Use a long listing format
+    -m, --max-count=N  Stop reading a file after N matching lines
+    --max-depth=N      Like --recursive, but descend at most N
+                       directories below <path>
+    -R, --recursive    List subdirectories recursively, in every task that
+                       matches <task>, and print the total size of the files
+    --version          Show version
+    --watch            Print the tasks, and then the tasks that are added,
+                       changed or removed, every 2 seconds
 
 Positional Arguments:
-    <file>        Print this file. [default: stdout]
-    <path>        List this directory. [default: '.']
-    <task>        Only match tasks whose ID matches <task>.  <task> may be
-                  a substring of the ID, or a unix glob pattern.
+    <file>             Print, or search, this file. [default: stdout]
+    <localdir>         Copy the task's sandbox to this directory.  Files
+                       copied by an earlier sync are only transferred again
+                       if they changed, and only their new bytes if they
+                       grew.
+    <path>             List this directory. [default: '.']
+    <pattern>          Print the lines that match this Python regular
+                       expression.  They are printed as they are found, in
+                       the files of every task that matches <task>.
+    <task>             Only match tasks whose ID matches <task>.  <task> may
+                       be a substring of the ID, or a unix glob pattern.
 """
 
 import posixpath
@@ -29,7 +51,7 @@ import dcoscli
 import docopt
 from dcos import cmds, emitting, mesos, util
 from dcos.errors import DCOSException, DCOSHTTPException, DefaultError
-from dcoscli import log, tables
+from dcoscli import grep, log, sync, tables, watch
 from dcoscli.main import decorate_docopt_usage
 
 logger = util.get_logger(__name__)
@@ -67,6 +89,12 @@ def _cmds():
             arg_keys=[],
             function=_info),
 
+        cmds.Command(
+            hierarchy=['task', 'grep'],
+            arg_keys=['--completed', '--count', '--files-with-matches',
+                      '--max-count', '<pattern>', '<task>', '<file>'],
+            function=_grep),
+
         cmds.Command(
             hierarchy=['task', 'log'],
             arg_keys=['--follow', '--completed', '--lines', '<task>',
@@ -75,12 +103,18 @@ def _cmds():
 
         cmds.Command(
             hierarchy=['task', 'ls'],
-            arg_keys=['<task>', '<path>', '--long'],
+            arg_keys=['<task>', '<path>', '--long', '--recursive',
+                      '--max-depth'],
             function=_ls),
 
+        cmds.Command(
+            hierarchy=['task', 'sync'],
+            arg_keys=['<task>', '<localdir>'],
+            function=_sync),
+
         cmds.Command(
             hierarchy=['task'],
-            arg_keys=['<task>', '--completed', '--json'],
+            arg_keys=['<task>', '--completed', '--json', '--watch'],
             function=_task),
     ]
 
@@ -96,7 +130,7 @@ def _info():
     return 0
 
 
-def _task(fltr, completed, json_):
+def _task(fltr, completed, json_, watch_):
     """List DCOS tasks
 
     :param fltr: task id filter
@@ -106,12 +140,29 @@ def _task(fltr, completed, json_):
     :param json_: If True, output json.  Otherwise, output a human
                   readable table.
     :type json_: bool
+    :param watch_: If True, print the changes of the tasks until
+                   interrupted
+    :type watch_: bool
     :returns: process return code
     """
 
     if fltr is None:
         fltr = ""
 
+    if watch_:
+        client = mesos.DCOSClient()
+
+        def fetch():
+            master = mesos.Master(client.get_master_state())
+            return master.tasks(completed=completed, fltr=fltr)
+
+        if json_:
+            watch.watch_json(fetch, _task_id, lambda task: task.dict())
+        else:
+            watch.watch_table(fetch, _task_id, tables.task_fields(),
+                              tables.task_table)
+        return 0
+
     tasks = sorted(mesos.get_master().tasks(completed=completed, fltr=fltr),
                    key=lambda task: task['name'])
 
@@ -182,7 +233,50 @@ def _log(follow, completed, lines, task, file_):
     return 0
 
 
-def _ls(task, path, long_):
+def _task_id(task):
+    return task['id']
+
+
+def _grep(completed, count, files_with_matches, max_count, pattern, task,
+          file_):
+    """ Search a file in the sandbox of the matching tasks.
+
+    :param completed: whether to include completed tasks
+    :type completed: bool
+    :param count: whether to print the number of matching lines
+    :type count: bool
+    :param files_with_matches: whether to print the files that match
+    :type files_with_matches: bool
+    :param max_count: number of matching lines after which a file isn't
+                      read anymore
+    :type max_count: str | None
+    :param pattern: regular expression to search for
+    :type pattern: str
+    :param task: task pattern to match
+    :type task: str
+    :param file_: file path to search
+    :type file_: str
+    :returns: process return code
+    :rtype: int
+    """
+
+    if file_ is None:
+        file_ = 'stdout'
+    if max_count is not None:
+        max_count = util.parse_int(max_count)
+    grep.compile_pattern(pattern)
+
+    client = mesos.DCOSClient()
+    tasks = mesos.get_master(client).tasks(completed=completed, fltr=task)
+    mesos_files = _mesos_files(tasks, file_, client)
+    if not mesos_files:
+        raise DCOSException('No matching tasks. Exiting.')
+
+    return grep.grep_files(mesos_files, pattern, count, files_with_matches,
+                           max_count)
+
+
+def _ls(task, path, long_, recursive, max_depth):
     """ List files in a task's sandbox.
 
     :param task: task pattern to match
@@ -191,6 +285,11 @@ def _ls(task, path, long_):
     :type path: str
     :param long_: whether to use a long listing format
     :type long_: bool
+    :param recursive: whether to list subdirectories, in every matching
+                      task
+    :type recursive: bool
+    :param max_depth: how many directories below `path` to list
+    :type max_depth: str | None
     :returns: process return code
     :rtype: int
     """
@@ -201,6 +300,11 @@ def _ls(task, path, long_):
         path = path[1:]
 
     dcos_client = mesos.DCOSClient()
+    if recursive or max_depth is not None:
+        if max_depth is not None:
+            max_depth = util.parse_int(max_depth)
+        return _ls_recursive(dcos_client, task, path, long_, max_depth)
+
     task_obj = mesos.get_master(dcos_client).task(task)
     dir_ = posixpath.join(task_obj.directory(), path)
 
@@ -222,6 +326,116 @@ def _ls(task, path, long_):
                           for file_ in files))
 
 
+def _ls_recursive(dcos_client, task, path, long_, max_depth):
+    """List the files below a directory of the sandbox of every matching
+    task.  The directories are listed in parallel, and their files are
+    printed as they're listed, followed by their number and total size.
+
+    :param dcos_client: DCOS client
+    :type dcos_client: mesos.DCOSClient
+    :param task: task pattern to match
+    :type task: str
+    :param path: directory to list, relative to the sandbox
+    :type path: str
+    :param long_: whether to use a long listing format
+    :type long_: bool
+    :param max_depth: how many directories below `path` to list; None for
+                      no limit
+    :type max_depth: int | None
+    :returns: process return code
+    :rtype: int
+    """
+
+    tasks = mesos.get_master(dcos_client).tasks(fltr=task)
+    if not tasks:
+        raise DCOSException(
+            'Cannot find a task with ID containing "{}"'.format(task))
+
+    slaves = _load_slaves_state(
+        dcos_client, set(task_obj.slave() for task_obj in tasks))
+    tasks = sorted((task_obj for task_obj in tasks
+                    if task_obj.slave() in slaves and task_obj.executor()),
+                   key=lambda task_obj: task_obj['id'])
+    if not tasks:
+        raise DCOSException('No matching tasks. Exiting.')
+
+    roots = dict((task_obj['id'], posixpath.normpath(
+        posixpath.join(task_obj.directory(), path))) for task_obj in tasks)
+    # files, directories and bytes below each root
+    totals = dict((task_obj['id'], [0, 0, 0]) for task_obj in tasks)
+    prefix = '{}:'.format if len(tasks) > 1 else lambda task_id: ''
+
+    returncode = 0
+    jobs = dcos_client.browse_tree(
+        [(task_obj['id'], task_obj.slave(), roots[task_obj['id']])
+         for task_obj in tasks],
+        max_depth)
+    for job, (task_id, _, dir_, depth) in jobs:
+        try:
+            files = job.result()
+        except DCOSException as e:
+            returncode = 1
+            if depth == 0 and isinstance(e, DCOSHTTPException) and \
+                    e.response.status_code == 404:
+                e = 'Cannot access [{}]: No such file or directory'.format(
+                    path)
+            emitter.publish(DefaultError('{}{}'.format(prefix(task_id), e)))
+            continue
+
+        for file_ in files:
+            name = prefix(task_id) + posixpath.relpath(file_['path'],
+                                                       roots[task_id])
+            if mesos.is_directory(file_):
+                totals[task_id][1] += 1
+            else:
+                totals[task_id][0] += 1
+                totals[task_id][2] += file_['size']
+
+            if long_:
+                emitter.publish(tables.ls_long_line(file_, name))
+            else:
+                emitter.publish(name)
+
+    if len(tasks) > 1:
+        for task_obj in tasks:
+            emitter.publish(_ls_total(task_obj['id'], totals[task_obj['id']]))
+    emitter.publish(_ls_total('total', [sum(counts) for counts
+                                        in zip(*totals.values())]))
+    return returncode
+
+
+def _ls_total(name, counts):
+    """
+    :param name: what the total is for
+    :type name: str
+    :param counts: number of files, number of directories, and bytes
+    :type counts: [int]
+    :returns: line that sums up the listing
+    :rtype: str
+    """
+
+    files, directories, size = counts
+    return '{}: {} file{}, {} director{}, {} bytes'.format(
+        name, files, '' if files == 1 else 's',
+        directories, 'y' if directories == 1 else 'ies', size)
+
+
+def _sync(task, localdir):
+    """ Copy a task's sandbox to a local directory.
+
+    :param task: task pattern to match
+    :type task: str
+    :param localdir: directory to copy the sandbox to
+    :type localdir: str
+    :returns: process return code
+    :rtype: int
+    """
+
+    dcos_client = mesos.DCOSClient()
+    task_obj = mesos.get_master(dcos_client).task(task)
+    return sync.sync(dcos_client, task_obj, localdir)
+
+
 def _mesos_files(tasks, file_, client):
     """Return MesosFile objects for the specified tasks and file name.
     Only include files that satisfy all of the following:
@@ -240,7 +454,7 @@ def _mesos_files(tasks, file_, client):
     """
 
     # load slave state in parallel
-    slaves = _load_slaves_state([task.slave() for task in tasks])
+    slaves = _load_slaves_state(client, set(task.slave() for task in tasks))
 
     # some completed tasks may have entries on the master, but none on
     # the slave.  since we need the slave entry to get the executor
@@ -253,10 +467,12 @@ def _mesos_files(tasks, file_, client):
             for task in available_tasks]
 
 
-def _load_slaves_state(slaves):
+def _load_slaves_state(dcos_client, slaves):
     """Fetch each slave's state.json in parallel, and return the reachable
     slaves.
 
+    :param dcos_client: client to fetch the states with
+    :type dcos_client: DCOSClient
     :param slaves: slaves to fetch
     :type slaves: [MesosSlave]
     :returns: MesosSlave objects that were successfully reached
@@ -265,7 +481,7 @@ def _load_slaves_state(slaves):
 
     reachable_slaves = []
 
-    for job, slave in util.stream(lambda slave: slave.state(), slaves):
+    for job, slave in dcos_client.load_slave_states(slaves):
         try:
             job.result()
             reachable_slaves.append(slave)
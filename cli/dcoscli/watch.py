@@ -0,0 +1,207 @@
+import json
+import sys
+import time
+from collections import OrderedDict
+
+from dcos import emitting, util
+from dcos.errors import DCOSException, DefaultError
+from dcoscli import tables
+
+logger = util.get_logger(__name__)
+emitter = emitting.FlatEmitter()
+
+INTERVAL = 2
+"""Number of seconds between two reads of a watched state"""
+
+ADDED = '+'
+CHANGED = '~'
+REMOVED = '-'
+
+
+class Differ(object):
+    """Computes the changes of a collection of objects from one version to
+    the next.  Only a hash of each object is kept, by ID, so that the
+    objects themselves can be dropped once they're compared.
+
+    :param key: returns the ID of an object
+    :type key: object -> str
+    :param digest: returns the value of an object that is compared; it
+                   must be hashable
+    :type digest: object -> object
+    """
+
+    def __init__(self, key, digest):
+        self._key = key
+        self._digest = digest
+        self._hashes = {}
+
+    def diff(self, objs):
+        """Compares objects with the previous version of the collection,
+        and remembers them as its current version
+
+        :param objs: current version of the collection
+        :type objs: [object]
+        :returns: the (change, ID, object) of the objects that were added,
+                  changed or removed, ordered by ID.  The object is None if
+                  it was removed.
+        :rtype: [(str, str, object)]
+        """
+
+        changes = []
+        hashes = {}
+        for obj in objs:
+            key = self._key(obj)
+            hashes[key] = hash(self._digest(obj))
+            previous = self._hashes.get(key)
+            if previous is None:
+                changes.append((ADDED, key, obj))
+            elif previous != hashes[key]:
+                changes.append((CHANGED, key, obj))
+
+        changes.extend((REMOVED, key, None)
+                       for key in self._hashes if key not in hashes)
+        self._hashes = hashes
+        return sorted(changes, key=lambda change: change[1])
+
+
+def watch(fetch, key, digest, publish, interval=INTERVAL, cycles=None):
+    """Reads a collection of objects every `interval` seconds, and
+    publishes its changes.  A read that fails is reported, and the
+    collection is read again after the next interval.
+
+    :param fetch: returns the current version of the collection
+    :type fetch: () -> [object]
+    :param key: returns the ID of an object
+    :type key: object -> str
+    :param digest: returns the value of an object that is compared
+    :type digest: object -> object
+    :param publish: prints the objects the first time, and then their
+                    changes, see `Differ.diff`
+    :type publish: ([object] | [(str, str, object)], bool) -> None
+    :param interval: number of seconds between two reads
+    :type interval: float
+    :param cycles: number of reads; None to read until interrupted
+    :type cycles: int | None
+    :rtype: None
+    """
+
+    differ = Differ(key, digest)
+    published = False
+    count = 0
+    while cycles is None or count < cycles:
+        if count:
+            time.sleep(interval)
+
+        count += 1
+        try:
+            objs = fetch()
+        except DCOSException as e:
+            # the next read is compared with the last one that succeeded
+            emitter.publish(DefaultError(str(e)))
+        else:
+            changes = differ.diff(objs)
+            if not published:
+                publish(objs, True)
+                published = True
+            elif changes:
+                publish(changes, False)
+
+        # stdout is fully buffered when it's redirected to a pipe
+        sys.stdout.flush()
+
+
+def watch_table(fetch, key, fields, table, interval=INTERVAL, cycles=None):
+    """Prints a table of a collection of objects, and then the rows that
+    are added, changed or removed as it's read again.  Rows are compared
+    by the values of their columns.
+
+    :param fetch: returns the current version of the collection
+    :type fetch: () -> [object]
+    :param key: returns the ID of an object
+    :type key: object -> str
+    :param fields: columns of the table, see `dcoscli.tables.table`
+    :type fields: OrderedDict(str, function)
+    :param table: renders the first version of the collection
+    :type table: [object] -> PrettyTable
+    :param interval: number of seconds between two reads
+    :type interval: float
+    :param cycles: number of reads; None to read until interrupted
+    :type cycles: int | None
+    :rtype: None
+    """
+
+    def digest(obj):
+        return tuple(fn(obj) for fn in fields.values())
+
+    def publish(objs, first):
+        output = str(table(objs) if first else change_table(fields, objs))
+        if output:
+            emitter.publish(output)
+
+    watch(fetch, key, digest, publish, interval, cycles)
+
+
+def watch_json(fetch, key, to_dict, interval=INTERVAL, cycles=None):
+    """Prints a collection of objects as JSON, and then the objects that
+    are added, changed or removed as it's read again, as
+    {"added": [object], "changed": [object], "removed": [ID]}
+
+    :param fetch: returns the current version of the collection
+    :type fetch: () -> [object]
+    :param key: returns the ID of an object
+    :type key: object -> str
+    :param to_dict: returns the JSON representation of an object
+    :type to_dict: object -> dict
+    :param interval: number of seconds between two reads
+    :type interval: float
+    :param cycles: number of reads; None to read until interrupted
+    :type cycles: int | None
+    :rtype: None
+    """
+
+    def digest(obj):
+        return json.dumps(to_dict(obj), sort_keys=True)
+
+    def publish(objs, first):
+        if first:
+            emitter.publish([to_dict(obj) for obj in objs])
+            return
+
+        emitter.publish({
+            'added': [to_dict(obj) for change, _, obj in objs
+                      if change == ADDED],
+            'changed': [to_dict(obj) for change, _, obj in objs
+                        if change == CHANGED],
+            'removed': [key for change, key, _ in objs if change == REMOVED],
+        })
+
+    watch(fetch, key, digest, publish, interval, cycles)
+
+
+def change_table(fields, changes):
+    """Returns a PrettyTable of changed rows, without a header.  Each row
+    starts with the change: + if it was added, ~ if it changed and - if it
+    was removed.  Removed rows only show their ID.
+
+    :param fields: columns of the table, see `dcoscli.tables.table`
+    :type fields: OrderedDict(str, function)
+    :param changes: changes, see `Differ.diff`
+    :type changes: [(str, str, object)]
+    :rtype: PrettyTable
+    """
+
+    def column(name, fn):
+        def value(change):
+            _, key, obj = change
+            if obj is not None:
+                return fn(obj)
+            return key if name == 'ID' else tables.EMPTY_ENTRY
+        return value
+
+    columns = [('', lambda change: change[0])]
+    columns.extend((name, column(name, fn)) for name, fn in fields.items())
+
+    tb = tables.table(OrderedDict(columns), changes)
+    tb.header = False
+    tb.align = 'l'
+    return tb
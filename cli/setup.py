@@ -70,7 +70,6 @@ setup(
         'pkginfo>=1.2, <2.0',
         'toml>=0.9, <1.0',
         'virtualenv>=13.0, <14.0',
-        'rollbar>=0.9, <1.0',
         'futures>=3.0, <4.0',
         'oauth2client>=1.4, <2.0',
     ],
@@ -99,7 +98,9 @@ setup(
             'dcos-package=dcoscli.package.main:main',
             'dcos-service=dcoscli.service.main:main',
             'dcos-task=dcoscli.task.main:main',
-            'dcos-node=dcoscli.node.main:main'
+            'dcos-node=dcoscli.node.main:main',
+            'dcos-completion=dcoscli.completion.main:main',
+            'dcos-perf=dcoscli.perf.main:main',
         ],
     },
 
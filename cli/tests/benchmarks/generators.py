@@ -0,0 +1,616 @@
+"""Generators of synthetic cluster state, shaped like the responses of the
+Mesos master, Mesos agents, Marathon and a package source index.  All of
+them are deterministic for a given `seed`, so that benchmark runs are
+comparable.
+"""
+
+import random
+
+FRAMEWORK_ID_PREFIX = '20150630-004309-1695027628-5050-1649'
+"""Prefix of the generated framework and agent IDs"""
+
+TASK_STATES = ['TASK_RUNNING'] * 18 + ['TASK_STAGING', 'TASK_FAILED']
+
+DEPLOYMENT_ACTIONS = ['ScaleApplication', 'StartApplication',
+                      'RestartApplication', 'StopApplication']
+
+
+def framework_id(index):
+    """
+    :param index: framework number
+    :type index: int
+    :rtype: str
+    """
+
+    return '{}-{:04d}'.format(FRAMEWORK_ID_PREFIX, index)
+
+
+def agent_id(index):
+    """
+    :param index: agent number
+    :type index: int
+    :rtype: str
+    """
+
+    return '{}-S{}'.format(FRAMEWORK_ID_PREFIX, index)
+
+
+def agent_hostname(index):
+    """
+    :param index: agent number
+    :type index: int
+    :rtype: str
+    """
+
+    return '10.0.{}.{}'.format(index // 250, index % 250 + 1)
+
+
+def app_id(index):
+    """Returns the ID of a marathon app, nested two groups deep
+
+    :param index: app number
+    :type index: int
+    :rtype: str
+    """
+
+    return '/group-{}/subgroup-{}/app-{}'.format(
+        index % 10, index % 100, index)
+
+
+def task_id(index):
+    """
+    :param index: task number
+    :type index: int
+    :rtype: str
+    """
+
+    return 'app-{}.{:08x}-0630-11e5-84a3-56847afe9799'.format(
+        index % 5000, index)
+
+
+def _resources(rng, scale=1.0):
+    return {
+        'cpus': round(rng.uniform(0.1, 4) * scale, 2),
+        'disk': float(rng.randint(0, 1024)),
+        'mem': float(rng.choice([16, 32, 128, 512, 2048])),
+        'ports': '[31000-32000]',
+    }
+
+
+def agent(index, rng):
+    """Returns an agent entry of the master's state.json
+
+    :param index: agent number
+    :type index: int
+    :param rng: random number generator
+    :type rng: random.Random
+    :rtype: dict
+    """
+
+    hostname = agent_hostname(index)
+    return {
+        'active': True,
+        'attributes': {'rack': 'rack-{}'.format(index % 40)},
+        'hostname': hostname,
+        'id': agent_id(index),
+        'pid': 'slave(1)@{}:5051'.format(hostname),
+        'registered_time': 1435625024.42234,
+        'resources': _resources(rng, 8),
+        'used_resources': _resources(rng),
+        'offered_resources': _resources(rng, 0),
+        'reserved_resources': {},
+        'unreserved_resources': _resources(rng, 8),
+    }
+
+
+def task(index, framework, agent_count, rng):
+    """Returns a task entry of the master's state.json
+
+    :param index: task number
+    :type index: int
+    :param framework: ID of the task's framework
+    :type framework: str
+    :param agent_count: number of agents in the cluster
+    :type agent_count: int
+    :param rng: random number generator
+    :type rng: random.Random
+    :rtype: dict
+    """
+
+    state = rng.choice(TASK_STATES)
+    return {
+        'executor_id': '',
+        'framework_id': framework,
+        'id': task_id(index),
+        'labels': [],
+        'name': 'app-{}'.format(index % 5000),
+        'resources': _resources(rng),
+        'slave_id': agent_id(index % agent_count),
+        'state': state,
+        'statuses': [{
+            'state': state,
+            'timestamp': 1431552866.52692 + index,
+            'container_status': {
+                'network_infos': [
+                    {'ip_address': '172.17.{}.{}'.format(
+                        index // 250 % 250, index % 250 + 1)}]},
+        }],
+    }
+
+
+def framework(index, tasks, rng):
+    """Returns a framework entry of the master's state.json
+
+    :param index: framework number
+    :type index: int
+    :param tasks: the framework's tasks
+    :type tasks: [dict]
+    :param rng: random number generator
+    :type rng: random.Random
+    :rtype: dict
+    """
+
+    name = 'marathon' if index == 0 else 'framework-{}'.format(index)
+    return {
+        'active': True,
+        'capabilities': [],
+        'checkpoint': True,
+        'completed_tasks': [],
+        'executors': [],
+        'failover_timeout': 604800.0,
+        'hostname': agent_hostname(index),
+        'id': framework_id(index),
+        'name': name,
+        'pid': 'scheduler-{}@10.0.0.1:55130'.format(index),
+        'registered_time': 1431543498.31955,
+        'resources': _resources(rng, len(tasks)),
+        'role': '*',
+        'tasks': tasks,
+        'unregistered_time': 0.0,
+        'used_resources': _resources(rng, len(tasks)),
+        'user': 'root',
+        'webui_url': 'http://{}:8080'.format(agent_hostname(index)),
+    }
+
+
+def master_state(agents=100, frameworks=10, tasks=2000, seed=0):
+    """Returns a master's state.json.  Tasks are spread evenly over the
+    frameworks and agents.
+
+    :param agents: number of agents
+    :type agents: int
+    :param frameworks: number of frameworks
+    :type frameworks: int
+    :param tasks: number of tasks
+    :type tasks: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: dict
+    """
+
+    rng = random.Random(seed)
+    task_lists = [[] for _ in range(frameworks)]
+    for i in range(tasks):
+        task_lists[i % frameworks].append(
+            task(i, framework_id(i % frameworks), agents, rng))
+
+    return {
+        'activated_slaves': agents,
+        'build_date': '2015-06-29 17:21:50',
+        'cluster': 'benchmark',
+        'completed_frameworks': [],
+        'frameworks': [framework(i, task_lists[i], rng)
+                       for i in range(frameworks)],
+        'hostname': 'master.mesos',
+        'id': '{}-master'.format(FRAMEWORK_ID_PREFIX),
+        'leader': 'master@10.0.0.1:5050',
+        'pid': 'master@10.0.0.1:5050',
+        'slaves': [agent(i, rng) for i in range(agents)],
+        'version': '0.22.1',
+    }
+
+
+def state_summary(state):
+    """Returns the master's state-summary matching a state.json
+
+    :param state: master's state.json
+    :type state: dict
+    :rtype: dict
+    """
+
+    def count(tasks, task_state):
+        return sum(1 for task_ in tasks if task_['state'] == task_state)
+
+    frameworks = []
+    for framework_ in state['frameworks']:
+        summary = {key: framework_[key]
+                   for key in ['active', 'id', 'name', 'pid', 'hostname',
+                               'webui_url', 'used_resources']}
+        summary['slave_ids'] = sorted(
+            {task_['slave_id'] for task_ in framework_['tasks']})
+        for task_state in set(TASK_STATES):
+            summary[task_state] = count(framework_['tasks'], task_state)
+        frameworks.append(summary)
+
+    return {
+        'cluster': state['cluster'],
+        'frameworks': frameworks,
+        'hostname': state['hostname'],
+        'slaves': [dict(slave, framework_ids=[])
+                   for slave in state['slaves']],
+    }
+
+
+def agent_state(state, agent_index):
+    """Returns the state.json of an agent, with one executor per task
+    running on it
+
+    :param state: master's state.json
+    :type state: dict
+    :param agent_index: agent number
+    :type agent_index: int
+    :rtype: dict
+    """
+
+    slave = state['slaves'][agent_index]
+    frameworks = []
+    for framework_ in state['frameworks']:
+        executors = []
+        for task_ in framework_['tasks']:
+            if task_['slave_id'] != slave['id']:
+                continue
+            directory = ('/var/lib/mesos/slave/slaves/{}/frameworks/{}/'
+                         'executors/{}/runs/latest').format(
+                             slave['id'], framework_['id'], task_['id'])
+            executors.append({
+                'completed_tasks': [],
+                'container': task_['id'].split('.')[-1],
+                'directory': directory,
+                'id': task_['id'],
+                'name': 'Command Executor',
+                'queued_tasks': [],
+                'resources': task_['resources'],
+                'source': task_['id'],
+                'tasks': [task_],
+            })
+        if executors:
+            frameworks.append({
+                'checkpoint': True,
+                'completed_executors': [],
+                'executors': executors,
+                'id': framework_['id'],
+                'name': framework_['name'],
+                'user': framework_['user'],
+            })
+
+    return {
+        'completed_frameworks': [],
+        'frameworks': frameworks,
+        'hostname': slave['hostname'],
+        'id': slave['id'],
+        'pid': slave['pid'],
+        'resources': slave['resources'],
+    }
+
+
+def agent_statistics(slave, tasks, timestamp, uptime):
+    """Returns the monitor/statistics.json of an agent.  Each running task
+    has its own executor.  Together, the executors use half of the cpus and
+    mem allocated on the agent, and a quarter of its allocated disk.
+
+    :param slave: the agent's entry in the master's state.json
+    :type slave: dict
+    :param tasks: the agent's tasks
+    :type tasks: [dict]
+    :param timestamp: time of the sample
+    :type timestamp: float
+    :param uptime: seconds for which the executors have been running
+    :type uptime: float
+    :rtype: [dict]
+    """
+
+    running = [task for task in tasks if task['state'] == 'TASK_RUNNING']
+    share = dict((resource, slave['used_resources'][resource] /
+                  max(len(running), 1))
+                 for resource in ['cpus', 'mem', 'disk'])
+
+    statistics = []
+    for task in running:
+        cpu_time = share['cpus'] / 2 * uptime
+        statistics.append({
+            'executor_id': task['id'],
+            'executor_name': 'Command Executor',
+            'framework_id': task['framework_id'],
+            'source': task['id'],
+            'statistics': {
+                'timestamp': timestamp,
+                'cpus_limit': share['cpus'],
+                'cpus_user_time_secs': cpu_time * 0.8,
+                'cpus_system_time_secs': cpu_time * 0.2,
+                'mem_limit_bytes': int(share['mem'] * 2 ** 20),
+                'mem_rss_bytes': int(share['mem'] / 2 * 2 ** 20),
+                'disk_limit_bytes': int(share['disk'] * 2 ** 20),
+                'disk_used_bytes': int(share['disk'] / 4 * 2 ** 20),
+            },
+        })
+    return statistics
+
+
+def apps(count=200, seed=0):
+    """Returns marathon's v2/apps
+
+    :param count: number of apps
+    :type count: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: [dict]
+    """
+
+    rng = random.Random(seed)
+    result = []
+    for i in range(count):
+        instances = rng.randint(0, 10)
+        health_checks = [{'protocol': 'HTTP', 'path': '/health'}] \
+            if i % 3 == 0 else []
+        result.append({
+            'args': None,
+            'backoffFactor': 1.15,
+            'backoffSeconds': 1,
+            'cmd': 'sleep {}'.format(1000 + i),
+            'constraints': [],
+            'container': {'type': 'DOCKER'} if i % 2 else None,
+            'cpus': round(rng.uniform(0.1, 2), 2),
+            'dependencies': [],
+            'deployments': [],
+            'disk': 0.0,
+            'env': {},
+            'executor': '',
+            'healthChecks': health_checks,
+            'id': app_id(i),
+            'instances': instances,
+            'labels': {},
+            'mem': float(rng.choice([16, 32, 128, 512])),
+            'ports': [10000 + i],
+            'requirePorts': False,
+            'tasksHealthy': instances if health_checks else 0,
+            'tasksRunning': instances,
+            'tasksStaged': 0,
+            'tasksUnhealthy': 0,
+            'uris': [],
+            'user': None,
+            'version': '2015-05-28T21:21:05.064Z',
+        })
+    return result
+
+
+def deployments(apps_, count=50, seed=0):
+    """Returns marathon's v2/deployments, for a subset of `apps_`.  The
+    apps are updated to reference their deployment.
+
+    :param apps_: marathon apps
+    :type apps_: [dict]
+    :param count: number of deployments
+    :type count: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: [dict]
+    """
+
+    rng = random.Random(seed)
+    result = []
+    for i in range(min(count, len(apps_))):
+        app = apps_[i * len(apps_) // count]
+        action = rng.choice(DEPLOYMENT_ACTIONS)
+        deployment = {
+            'affectedApps': [app['id']],
+            'currentActions': [{'action': action, 'app': app['id']}],
+            'currentStep': 1,
+            'id': '{:08x}-118e-4067-8fcb-d19e44126911'.format(i),
+            'steps': [[{'action': action, 'app': app['id']}]],
+            'totalSteps': 1,
+            'version': '2015-05-29T01:13:47.694Z',
+        }
+        app['deployments'] = [{'id': deployment['id']}]
+        result.append(deployment)
+    return result
+
+
+def groups(apps_):
+    """Returns marathon's v2/groups nesting `apps_` by their IDs
+
+    :param apps_: marathon apps
+    :type apps_: [dict]
+    :rtype: dict
+    """
+
+    root = {'id': '/', 'apps': [], 'groups': [], 'dependencies': [],
+            'version': '2015-05-29T23:12:46.187Z'}
+    index = {'/': root}
+
+    for app in apps_:
+        parent = root
+        path = ''
+        for name in app['id'].strip('/').split('/')[:-1]:
+            path += '/' + name
+            if path not in index:
+                group = {'id': path, 'apps': [], 'groups': [],
+                         'dependencies': [],
+                         'version': '2015-05-29T23:12:46.187Z'}
+                parent['groups'].append(group)
+                index[path] = group
+            parent = index[path]
+        parent['apps'].append(app)
+
+    return root
+
+
+def universe_index(count=200, seed=0):
+    """Returns a package source's repo/meta/index.json
+
+    :param count: number of packages
+    :type count: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: dict
+    """
+
+    rng = random.Random(seed)
+    words = ['cassandra', 'kafka', 'spark', 'hdfs', 'chronos', 'jenkins',
+             'storage', 'database', 'streaming', 'scheduler', 'framework',
+             'mesosphere', 'example', 'bigdata', 'monitoring']
+    packages = []
+    for i in range(count):
+        tags = rng.sample(words, 3)
+        versions = {'0.{}.{}'.format(i % 10, v): str(v) for v in range(3)}
+        packages.append({
+            'currentVersion': sorted(versions)[-1],
+            'description': 'Package {} for {} and {}'.format(
+                i, tags[0], tags[1]),
+            'framework': i % 2 == 0,
+            'name': '{}-{}'.format(rng.choice(words), i),
+            'tags': tags,
+            'versions': versions,
+        })
+    return {'version': '1.0.0-rc1', 'packages': packages}
+
+
+def log_lines(count=10000, seed=0):
+    """Returns the content of a sandbox log file
+
+    :param count: number of lines
+    :type count: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: str
+    """
+
+    rng = random.Random(seed)
+    return ''.join(
+        'I0630 00:43:{:02d}.{:06d} {} line {} {}\n'.format(
+            i % 60, i, rng.randint(1000, 9999), i,
+            'x' * rng.randint(10, 150))
+        for i in range(count))
+
+
+def config_toml(keys=100):
+    """Returns the content of a dcos.toml with `keys` additional properties
+
+    :param keys: number of additional properties
+    :type keys: int
+    :rtype: str
+    """
+
+    lines = ['[core]',
+             'dcos_url = "http://dcos.snakeoil.mesosphere.com"',
+             'email = "test@mail.com"',
+             'reporting = false',
+             'timeout = 5',
+             '[package]',
+             'cache = "tmp/cache"',
+             'sources = ["https://github.com/mesosphere/universe/archive/'
+             'master.zip"]']
+    for i in range(keys):
+        if i % 20 == 0:
+            lines.append('[section{}]'.format(i // 20))
+        lines.append('key{} = "value {}"'.format(i, i))
+    return '\n'.join(lines) + '\n'
+
+
+class InMemoryFile(object):
+    """Stand-in for `dcos.mesos.MesosFile` backed by a string
+
+    :param data: file content
+    :type data: str
+    """
+
+    def __init__(self, data):
+        self._data = data
+        self._cursor = 0
+
+    def size(self):
+        return len(self._data)
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self._cursor = offset
+        elif whence == 1:
+            self._cursor += offset
+        else:
+            self._cursor = len(self._data) + offset
+
+    def tell(self):
+        return self._cursor
+
+    def read(self, length=None):
+        end = len(self._data) if length is None else self._cursor + length
+        data = self._data[self._cursor:end]
+        self._cursor += len(data)
+        return data
+
+
+def app_tasks(state):
+    """Returns marathon's v2/tasks for the tasks of a master's state.json
+
+    :param state: master's state.json
+    :type state: dict
+    :rtype: [dict]
+    """
+
+    hostnames = {slave['id']: slave['hostname'] for slave in state['slaves']}
+    return [{
+        'appId': '/' + task_['name'],
+        'healthCheckResults': [{'alive': task_['state'] == 'TASK_RUNNING'}],
+        'host': hostnames[task_['slave_id']],
+        'id': task_['id'],
+        'ports': [31000],
+        'servicePorts': [10000],
+        'stagedAt': '2015-05-29T19:58:00.907Z',
+        'startedAt': '2015-05-29T19:58:01.114Z',
+        'version': '2015-05-29T18:50:58.941Z',
+    } for framework_ in state['frameworks'] for task_ in framework_['tasks']]
+
+
+def browse(directory, count=100):
+    """Returns an agent's files/browse.json for a sandbox directory
+
+    :param directory: sandbox directory
+    :type directory: str
+    :param count: number of files
+    :type count: int
+    :rtype: [dict]
+    """
+
+    return [{
+        'gid': 'root',
+        'mode': '-rw-r--r--',
+        'mtime': 1437089500 + i,
+        'nlink': 1,
+        'path': '{}/file-{}.log'.format(directory, i),
+        'size': 4507 * i,
+        'uid': 'root',
+    } for i in range(count)]
+
+
+def ledger_records(count=1000, seed=0):
+    """Returns performance ledger records, as written by dcos.perf
+
+    :param count: number of records
+    :type count: int
+    :param seed: random seed
+    :type seed: int
+    :rtype: [dict]
+    """
+
+    rng = random.Random(seed)
+    commands = ['task', 'service', 'node', 'marathon app list',
+                'package search', 'task log']
+    return [{
+        'agents': rng.randint(1, 10000),
+        'bytes_received': rng.randint(0, 1 << 24),
+        'cluster': 'http://cluster-{}'.format(i % 3),
+        'command': rng.choice(commands),
+        'requests': rng.randint(1, 20),
+        'tasks': rng.randint(0, 200000),
+        'time': 1443568911 + i,
+        'wall': rng.uniform(0.2, 5),
+    } for i in range(count)]
@@ -0,0 +1,460 @@
+"""Run the DCOS CLI microbenchmarks against synthetic cluster state
+
+Usage:
+    run [options]
+
+Options:
+    -h, --help             Show this screen
+    --compare=<path>       Compare the results with the results saved in
+                           this file
+    --filter=<pattern>     Only run the benchmarks whose name contains
+                           <pattern>
+    --repeat=<n>           Number of timed runs of each benchmark
+                           [default: 5]
+    --save                 Save the results to
+                           tests/benchmarks/results/<scale>.json, so that
+                           changes show up in diffs
+    --scale=<scale>        Size of the synthetic cluster. One of small,
+                           medium or large [default: small]
+    --threshold=<ratio>    Slowdown, compared to the saved results, that is
+                           reported as a regression [default: 1.25]
+
+Run with `python -m tests.benchmarks.run` from the cli directory.  Exits
+with 1 if any benchmark regressed.
+"""
+
+import io
+import json
+import os
+import platform
+import sys
+import timeit
+from collections import OrderedDict
+
+import docopt
+from dcos import config, emitting, mesos, package, perf, util
+from dcoscli import log, tables
+
+from . import generators
+
+SCALES = {
+    'small': {'agents': 100, 'frameworks': 10, 'tasks': 2000,
+              'apps': 200, 'deployments': 20, 'packages': 200,
+              'log_lines': 10000, 'config_keys': 100, 'files': 100},
+    'medium': {'agents': 1000, 'frameworks': 20, 'tasks': 20000,
+               'apps': 1000, 'deployments': 100, 'packages': 1000,
+               'log_lines': 100000, 'config_keys': 1000, 'files': 1000},
+    'large': {'agents': 10000, 'frameworks': 50, 'tasks': 200000,
+              'apps': 5000, 'deployments': 500, 'packages': 5000,
+              'log_lines': 1000000, 'config_keys': 5000, 'files': 10000},
+}
+"""Sizes of the synthetic cluster state for each scale"""
+
+MIN_RUN_SECONDS = 0.05
+"""Fast benchmarks are looped until one timed run lasts this long"""
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+BENCHMARKS = OrderedDict()
+"""Benchmark name -> function that takes a `Fixtures` and returns the
+function to time"""
+
+
+def benchmark(name):
+    """Registers a benchmark
+
+    :param name: name of the benchmark
+    :type name: str
+    :returns: decorator
+    :rtype: function
+    """
+
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class Fixtures(object):
+    """Synthetic cluster state for one scale, generated on first use
+
+    :param sizes: sizes of the generated objects. See `SCALES`
+    :type sizes: dict
+    :param tmpdir: directory for generated files
+    :type tmpdir: str
+    """
+
+    def __init__(self, sizes, tmpdir):
+        self.sizes = sizes
+        self.tmpdir = tmpdir
+        self._cache = {}
+
+    def _get(self, name, fn):
+        if name not in self._cache:
+            self._cache[name] = fn()
+        return self._cache[name]
+
+    @property
+    def state(self):
+        return self._get('state', lambda: generators.master_state(
+            self.sizes['agents'], self.sizes['frameworks'],
+            self.sizes['tasks']))
+
+    @property
+    def summary(self):
+        return self._get('summary',
+                         lambda: generators.state_summary(self.state))
+
+    @property
+    def apps(self):
+        return self._get('apps', lambda: generators.apps(self.sizes['apps']))
+
+    @property
+    def deployments(self):
+        return self._get('deployments', lambda: generators.deployments(
+            self.apps, self.sizes['deployments']))
+
+    @property
+    def index(self):
+        return self._get('index', lambda: generators.universe_index(
+            self.sizes['packages']))
+
+
+def _without_tty(fn):
+    """Returns `fn` wrapped to run with a stdout that isn't a terminal, so
+    that output formatting doesn't depend on where the benchmarks run.
+    """
+
+    def run():
+        stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            return fn()
+        finally:
+            sys.stdout = stdout
+    return run
+
+
+@benchmark('mesos.Master.tasks')
+def _master_tasks(fixtures):
+    state = fixtures.state
+    return lambda: mesos.Master(state).tasks()
+
+
+@benchmark('mesos.Master.slave')
+def _master_slave(fixtures):
+    state = fixtures.state
+    slave_id = state['slaves'][-1]['id']
+    return lambda: mesos.Master(state).slave(slave_id)
+
+
+@benchmark('mesos.Master.framework')
+def _master_framework(fixtures):
+    state = fixtures.state
+    framework_id = state['frameworks'][-1]['id']
+    return lambda: mesos.Master(state).framework(framework_id)
+
+
+@benchmark('mesos.Task.directory')
+def _task_directory(fixtures):
+    state = fixtures.state
+    master = mesos.Master(state)
+    for index, slave in enumerate(state['slaves'][:10]):
+        master._slaves[slave['id']] = mesos.Slave(
+            slave, generators.agent_state(state, index), master)
+    tasks = [task for task in master.tasks()
+             if task['slave_id'] in master._slaves][:50]
+
+    return lambda: [task.directory() for task in tasks]
+
+
+@benchmark('tables.task_table')
+def _task_table(fixtures):
+    tasks = mesos.Master(fixtures.state).tasks()
+    return lambda: str(tables.task_table(tasks))
+
+
+@benchmark('tables.app_table')
+def _app_table(fixtures):
+    apps, deployments = fixtures.apps, fixtures.deployments
+    return lambda: str(tables.app_table(apps, deployments))
+
+
+@benchmark('tables.app_task_table')
+def _app_task_table(fixtures):
+    tasks = generators.app_tasks(fixtures.state)
+    return lambda: str(tables.app_task_table(tasks))
+
+
+@benchmark('tables.deployment_table')
+def _deployment_table(fixtures):
+    deployments = fixtures.deployments
+    return lambda: str(tables.deployment_table(deployments))
+
+
+@benchmark('tables.service_table')
+def _service_table(fixtures):
+    services = mesos.Master(fixtures.state).frameworks()
+    return lambda: str(tables.service_table(services))
+
+
+@benchmark('tables.group_table')
+def _group_table(fixtures):
+    groups = [generators.groups(fixtures.apps)]
+    return lambda: str(tables.group_table(groups))
+
+
+@benchmark('tables.package_table')
+def _package_table(fixtures):
+    packages = [dict(pkg, version=pkg['currentVersion'], apps=['/' + name])
+                for pkg in fixtures.index['packages']
+                for name in [pkg['name']]]
+    return lambda: str(tables.package_table(packages))
+
+
+@benchmark('tables.package_search_table')
+def _package_search_table(fixtures):
+    results = [{'source': 'https://universe/repo.zip',
+                'packages': fixtures.index['packages']}]
+    return lambda: str(tables.package_search_table(results))
+
+
+@benchmark('tables.slave_table')
+def _slave_table(fixtures):
+    slaves = fixtures.summary['slaves']
+    return lambda: str(tables.slave_table(slaves))
+
+
+@benchmark('tables.ls_long_table')
+def _ls_long_table(fixtures):
+    files = generators.browse('/sandbox', fixtures.sizes['files'])
+    return lambda: str(tables.ls_long_table(files))
+
+
+@benchmark('tables.perf_table')
+def _perf_table(fixtures):
+    summaries = perf.summarize(generators.ledger_records())
+    return lambda: str(tables.perf_table(summaries))
+
+
+@benchmark('emitting._process_json.state')
+def _process_json_state(fixtures):
+    state = fixtures.state
+    return _without_tty(lambda: emitting._process_json(state, None))
+
+
+@benchmark('emitting._highlight_json.summary')
+def _highlight_json_summary(fixtures):
+    output = json.dumps(fixtures.summary, sort_keys=True, indent=2)
+    return lambda: emitting._highlight_json(output)
+
+
+def _package_config(fixtures):
+    """Writes the package index to a local package cache
+
+    :returns: configuration using the package cache
+    :rtype: Toml
+    """
+
+    source = 'https://universe.example.com/repo.zip'
+    cfg = config.Toml({'package': {
+        'cache': os.path.join(fixtures.tmpdir, 'cache'),
+        'sources': [source]}})
+
+    registry, = package.registries(cfg)
+    index_dir = os.path.join(registry._base_path, 'repo', 'meta')
+    util.ensure_dir_exists(index_dir)
+    with open(os.path.join(index_dir, 'index.json'), 'w') as index_file:
+        json.dump(fixtures.index, index_file)
+
+    return cfg
+
+
+@benchmark('package.search')
+def _package_search(fixtures):
+    cfg = _package_config(fixtures)
+    return lambda: package.search('spark', cfg)
+
+
+@benchmark('package.search.wildcard')
+def _package_search_wildcard(fixtures):
+    cfg = _package_config(fixtures)
+    return lambda: package.search('ka*', cfg)
+
+
+@benchmark('log._read_last_lines')
+def _read_last_lines(fixtures):
+    mesos_file = generators.InMemoryFile(
+        generators.log_lines(fixtures.sizes['log_lines']))
+    return lambda: log._read_last_lines(1000, mesos_file)
+
+
+@benchmark('config.load_from_path')
+def _load_config(fixtures):
+    path = os.path.join(fixtures.tmpdir, 'dcos.toml')
+    with open(path, 'w') as config_file:
+        config_file.write(
+            generators.config_toml(fixtures.sizes['config_keys']))
+    return lambda: config.load_from_path(path)
+
+
+def time_benchmark(fn, repeat):
+    """Times `fn`.  Fast functions are looped, so that each timed run lasts
+    at least `MIN_RUN_SECONDS`.
+
+    :param fn: function to time
+    :type fn: function
+    :param repeat: number of timed runs
+    :type repeat: int
+    :returns: median and minimum seconds per call
+    :rtype: (float, float)
+    """
+
+    loops = 1
+    while True:
+        start = timeit.default_timer()
+        for _ in range(loops):
+            fn()
+        elapsed = timeit.default_timer() - start
+        if elapsed >= MIN_RUN_SECONDS or loops >= 1 << 16:
+            break
+        loops *= 2
+
+    runs = []
+    for _ in range(repeat):
+        start = timeit.default_timer()
+        for _ in range(loops):
+            fn()
+        runs.append((timeit.default_timer() - start) / loops)
+
+    runs.sort()
+    return runs[len(runs) // 2], runs[0]
+
+
+def run(scale, repeat, name_filter=None):
+    """Runs the benchmarks
+
+    :param scale: one of `SCALES`
+    :type scale: str
+    :param repeat: number of timed runs of each benchmark
+    :type repeat: int
+    :param name_filter: only run benchmarks whose name contains it
+    :type name_filter: str | None
+    :returns: results, in the format saved by `save`
+    :rtype: dict
+    """
+
+    results = OrderedDict()
+    with util.tempdir() as tmpdir:
+        fixtures = Fixtures(SCALES[scale], tmpdir)
+        for name, setup in BENCHMARKS.items():
+            if name_filter and name_filter not in name:
+                continue
+            median, minimum = time_benchmark(setup(fixtures), repeat)
+            results[name] = {'median': _round(median), 'min': _round(minimum)}
+
+    return {
+        'scale': scale,
+        'sizes': SCALES[scale],
+        'python': platform.python_version(),
+        'benchmarks': results,
+    }
+
+
+def _round(seconds):
+    """Rounds to 3 significant digits, to keep saved results readable
+
+    :param seconds: duration
+    :type seconds: float
+    :rtype: float
+    """
+
+    return float('{:.3g}'.format(seconds))
+
+
+def save(results, path):
+    """
+    :param results: benchmark results
+    :type results: dict
+    :param path: path of the results file
+    :type path: str
+    :rtype: None
+    """
+
+    util.ensure_dir_exists(os.path.dirname(path))
+    with open(path, 'w') as results_file:
+        json.dump(results, results_file, indent=2, sort_keys=True)
+        results_file.write('\n')
+
+
+def compare(results, baseline, threshold):
+    """Compares benchmark results with a baseline
+
+    :param results: benchmark results
+    :type results: dict
+    :param baseline: saved benchmark results
+    :type baseline: dict
+    :param threshold: slowdown ratio reported as a regression
+    :type threshold: float
+    :returns: one row per benchmark, and whether any regressed
+    :rtype: ([dict], bool)
+    """
+
+    rows = []
+    regressed = False
+    for name, result in results['benchmarks'].items():
+        row = {'name': name, 'median': result['median'],
+               'baseline': None, 'ratio': None, 'regression': False}
+        base = baseline['benchmarks'].get(name)
+        if base and base['median']:
+            row['baseline'] = base['median']
+            row['ratio'] = result['median'] / base['median']
+            row['regression'] = row['ratio'] > threshold
+            regressed = regressed or row['regression']
+        rows.append(row)
+    return rows, regressed
+
+
+def _table(rows):
+    fields = OrderedDict([
+        ('BENCHMARK', lambda r: r['name']),
+        ('MEDIAN', lambda r: '{:.6f}s'.format(r['median'])),
+        ('BASELINE', lambda r: tables.EMPTY_ENTRY if r['baseline'] is None
+         else '{:.6f}s'.format(r['baseline'])),
+        ('RATIO', lambda r: tables.EMPTY_ENTRY if r['ratio'] is None
+         else '{:.2f}{}'.format(r['ratio'],
+                                ' REGRESSION' if r['regression'] else '')),
+    ])
+    tb = tables.table(fields, rows)
+    tb.align['BENCHMARK'] = 'l'
+    return tb
+
+
+def main():
+    args = docopt.docopt(__doc__)
+
+    scale = args['--scale']
+    if scale not in SCALES:
+        print('Unknown scale {!r}. Valid scales are {!r}'.format(
+            scale, sorted(SCALES)))
+        return 1
+
+    results = run(scale, int(args['--repeat']), args['--filter'])
+
+    baseline = {'benchmarks': {}}
+    if args['--compare']:
+        with open(args['--compare']) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    rows, regressed = compare(results, baseline,
+                              float(args['--threshold']))
+    print(_table(rows))
+
+    if args['--save']:
+        save(results, os.path.join(RESULTS_DIR, '{}.json'.format(scale)))
+
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,1365 @@
+"""Serve a simulated DCOS cluster for end-to-end load testing
+
+Usage:
+    simulator [options]
+
+Options:
+    -h, --help                 Show this screen
+    --agents=<count>           Number of agents. Overrides --scale
+    --apps=<count>             Number of Marathon apps. Overrides --scale
+    --credentials=<user:pwd>   Answer requests without these basic auth
+                               credentials with a 401 challenge
+    --deployment-time=<secs>   How long Marathon deployments stay listed
+                               [default: 0]
+    --error-rate=<ratio>       Fraction of the requests answered with the
+                               error status [default: 0]
+    --error-status=<status>    Status of the injected errors [default: 503]
+    --fault-paths=<regex>      Only inject latency and errors into requests
+                               whose path matches <regex>
+    --file-growth=<bytes>      Bytes per second appended to every sandbox
+                               file [default: 1024]
+    --file-size=<bytes>        Initial size of the sandbox files
+                               [default: 65536]
+    --frameworks=<count>       Number of frameworks. Overrides --scale
+    --latency=<secs>           Delay added to every request [default: 0]
+    --jitter=<secs>            Random delay, between 0 and <secs>, added to
+                               every request [default: 0]
+    --leader=<host:port>       Redirect the Mesos master requests to the
+                               leading master at <host:port>
+    --no-ranges                Answer files/download requests with the whole
+                               file, ignoring their Range header
+    --port=<port>              Port to listen on.  0 picks a free port
+                               [default: 0]
+    --scale=<scale>            Size of the cluster, as in the benchmarks.
+                               One of small, medium or large
+                               [default: small]
+    --tasks=<count>            Number of tasks. Overrides --scale
+
+Run with `python -m tests.benchmarks.simulator` from the cli directory,
+then point the CLI at the printed URL with
+`dcos config set core.dcos_url <url>`.
+
+The server answers the Mesos master (state.json, state-summary,
+teardown, files/read.json, files/download and files/browse.json) under
+/mesos/, the agents (state.json, monitor/statistics.json and files) under
+/slave/<id>/, Marathon's v2 API under /marathon/, Mesos-DNS under
+/mesos_dns/ and /metadata.  Sandbox files grow while it runs, and
+files/download honors Range requests.
+Successful GETs carry an ETag, and If-None-Match is answered with a 304.
+A simulator started with --leader=<host:port> acts as a non-leading
+master: it redirects master requests but state-summary to <host:port>.
+"""
+
+import base64
+import hashlib
+import json
+import posixpath
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import docopt
+
+from six.moves import BaseHTTPServer, socketserver, urllib
+
+from . import generators, run
+
+MAX_READ_LENGTH = 16 * 4096
+"""Largest chunk returned by files/read.json, like the Mesos agents"""
+
+SANDBOX_FILES = ['stdout', 'stderr', 'logs/app.log']
+"""Files of every task sandbox, relative to the sandbox directory"""
+
+MARATHON_VERSION = '0.11.0'
+
+
+class SandboxFile(object):
+    """Synthetic log file that grows over time.  Its content is made of
+    fixed width lines, so that any byte range is generated without
+    generating the bytes before it.
+
+    :param name: text repeated on every line
+    :type name: str
+    :param size: initial size
+    :type size: int
+    :param growth: bytes per second appended to the file
+    :type growth: int
+    :param start: time at which the file had its initial size
+    :type start: float
+    """
+
+    def __init__(self, name, size, growth, start):
+        self._name = name
+        self._size = size
+        self._growth = growth
+        self._start = start
+        self._width = len(self._line(0))
+
+    def _line(self, index):
+        return '{:010d} {}\n'.format(index, self._name)
+
+    def size(self):
+        """
+        :returns: current size of the file
+        :rtype: int
+        """
+
+        return self._size + int(self._growth * (time.time() - self._start))
+
+    def mtime(self):
+        """
+        :returns: time at which the file was last written to
+        :rtype: int
+        """
+
+        return int(time.time() if self._growth else self._start)
+
+    def read(self, offset, length):
+        """
+        :param offset: start of the range
+        :type offset: int
+        :param length: length of the range
+        :type length: int
+        :returns: the bytes of the range that exist
+        :rtype: str
+        """
+
+        end = min(offset + length, self.size())
+        if end <= offset:
+            return ''
+
+        first = offset // self._width
+        last = (end - 1) // self._width
+        data = ''.join(self._line(i) for i in range(first, last + 1))
+        skip = offset - first * self._width
+        return data[skip:skip + end - offset]
+
+
+class Cluster(object):
+    """State of a simulated cluster
+
+    :param agents: number of agents
+    :type agents: int
+    :param frameworks: number of frameworks
+    :type frameworks: int
+    :param tasks: number of tasks
+    :type tasks: int
+    :param apps: number of Marathon apps
+    :type apps: int
+    :param file_size: initial size of the sandbox files
+    :type file_size: int
+    :param file_growth: bytes per second appended to the sandbox files
+    :type file_growth: int
+    :param deployment_time: seconds during which deployments are listed
+    :type deployment_time: float
+    """
+
+    def __init__(self, agents, frameworks, tasks, apps, file_size=65536,
+                 file_growth=1024, deployment_time=0):
+        self._lock = threading.RLock()
+        self._start = time.time()
+        self._file_size = file_size
+        self._file_growth = file_growth
+        self._deployment_time = deployment_time
+
+        self._state = generators.master_state(agents, frameworks, tasks)
+        self._state_json = None
+        self._summary_json = None
+        self._agent_index = dict((slave['id'], index) for index, slave
+                                 in enumerate(self._state['slaves']))
+        self._agent_tasks = {}
+        for framework in self._state['frameworks']:
+            for task in framework['tasks']:
+                self._agent_tasks.setdefault(
+                    (task['slave_id'], framework['id']), []).append(task)
+        self._agent_states = {}
+        self._files = {}
+
+        self._apps = OrderedDict()
+        self._versions = {}
+        for app in generators.apps(apps):
+            self._store_app(app)
+        self._deployments = OrderedDict()
+        self._deployment_count = 0
+
+    # Mesos
+
+    def state_json(self):
+        """
+        :returns: the master's state.json, encoded
+        :rtype: bytes
+        """
+
+        with self._lock:
+            if self._state_json is None:
+                self._state_json = _encode(self._state)
+            return self._state_json
+
+    def summary_json(self):
+        """
+        :returns: the master's state-summary, encoded
+        :rtype: bytes
+        """
+
+        with self._lock:
+            if self._summary_json is None:
+                self._summary_json = _encode(
+                    generators.state_summary(self._state))
+            return self._summary_json
+
+    def agent_state(self, agent_id):
+        """
+        :param agent_id: agent ID
+        :type agent_id: str
+        :returns: the agent's state.json; None if there is no such agent
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            if agent_id not in self._agent_index:
+                return None
+            if agent_id not in self._agent_states:
+                self._agent_states[agent_id] = self._build_agent_state(
+                    agent_id)
+            return self._agent_states[agent_id]
+
+    def agent_statistics(self, agent_id):
+        """
+        :param agent_id: agent ID
+        :type agent_id: str
+        :returns: the agent's monitor/statistics.json; None if there is no
+                  such agent
+        :rtype: [dict] | None
+        """
+
+        with self._lock:
+            if agent_id not in self._agent_index:
+                return None
+            tasks = [task for (slave_id, _), tasks
+                     in self._agent_tasks.items() if slave_id == agent_id
+                     for task in tasks]
+            slave = self._state['slaves'][self._agent_index[agent_id]]
+            now = time.time()
+            return generators.agent_statistics(slave, tasks, now,
+                                               now - self._start)
+
+    def _build_agent_state(self, agent_id):
+        index = self._agent_index[agent_id]
+        slave = self._state['slaves'][index]
+        frameworks = [
+            dict(framework,
+                 tasks=self._agent_tasks.get((agent_id, framework['id']), []))
+            for framework in self._state['frameworks']]
+        state = generators.agent_state(
+            {'slaves': [slave], 'frameworks': frameworks}, 0)
+
+        for framework in state['frameworks']:
+            for executor in framework['executors']:
+                for path in SANDBOX_FILES:
+                    name = '{} {}'.format(executor['id'], path)
+                    self._files[(agent_id,
+                                 executor['directory'] + '/' + path)] = \
+                        SandboxFile(name, self._file_size, self._file_growth,
+                                    self._start)
+        return state
+
+    def file(self, agent_id, path):
+        """
+        :param agent_id: ID of the agent that has the file; None for the
+                         master
+        :type agent_id: str | None
+        :param path: absolute path of the file
+        :type path: str
+        :returns: the file; None if it doesn't exist
+        :rtype: SandboxFile | None
+        """
+
+        path = posixpath.normpath(path)
+        with self._lock:
+            if agent_id is None:
+                if path != '/master/log':
+                    return None
+            elif path == '/slave/log':
+                if agent_id not in self._agent_index:
+                    return None
+            elif self.agent_state(agent_id) is None:
+                return None
+
+            key = (agent_id, path)
+            if key not in self._files and path in ['/master/log',
+                                                   '/slave/log']:
+                self._files[key] = SandboxFile(
+                    '{} {}'.format(agent_id or 'master', path),
+                    self._file_size, self._file_growth, self._start)
+            return self._files.get(key)
+
+    def browse(self, agent_id, path):
+        """
+        :param agent_id: agent ID
+        :type agent_id: str
+        :param path: absolute path of a directory
+        :type path: str
+        :returns: files/browse.json entries; None if the directory
+                  doesn't exist
+        :rtype: [dict] | None
+        """
+
+        path = posixpath.normpath(path)
+        with self._lock:
+            if self.agent_state(agent_id) is None:
+                return None
+
+            entries = {}
+            for (agent, file_path), sandbox_file in self._files.items():
+                if agent != agent_id or \
+                   not file_path.startswith(path + '/'):
+                    continue
+                name = file_path[len(path) + 1:].split('/')[0]
+                entry_path = path + '/' + name
+                if entry_path == file_path:
+                    entries[name] = _browse_entry(
+                        entry_path, '-rw-r--r--', sandbox_file.size(),
+                        sandbox_file.mtime())
+                else:
+                    entries[name] = _browse_entry(
+                        entry_path, 'drwxr-xr-x', 4096)
+
+        if not entries:
+            return None
+        return [entries[name] for name in sorted(entries)]
+
+    def teardown(self, framework_id):
+        """Moves a framework to the completed frameworks
+
+        :param framework_id: framework ID
+        :type framework_id: str
+        :returns: whether the framework existed
+        :rtype: bool
+        """
+
+        with self._lock:
+            for framework in self._state['frameworks']:
+                if framework['id'] == framework_id:
+                    self._state['frameworks'].remove(framework)
+                    self._state['completed_frameworks'].append(
+                        dict(framework, active=False,
+                             completed_tasks=framework['tasks'], tasks=[]))
+                    self._state_json = None
+                    self._summary_json = None
+                    return True
+        return False
+
+    # Marathon
+
+    def _store_app(self, app):
+        self._apps[app['id']] = app
+        self._versions.setdefault(app['id'], OrderedDict())[
+            app['version']] = app
+
+    def _deploy(self, app_ids):
+        """Records a deployment of `app_ids`
+
+        :param app_ids: IDs of the affected apps
+        :type app_ids: [str]
+        :returns: deployment ID and version
+        :rtype: dict
+        """
+
+        self._deployment_count += 1
+        version = _timestamp()
+        deployment_id = '{:08x}-0000-4000-8000-000000000000'.format(
+            self._deployment_count)
+        actions = [{'action': 'ScaleApplication', 'app': app_id}
+                   for app_id in app_ids]
+        self._deployments[deployment_id] = {
+            'affectedApps': list(app_ids),
+            'currentActions': actions,
+            'currentStep': 1,
+            'id': deployment_id,
+            'steps': [actions],
+            'totalSteps': 1,
+            'version': version,
+            'created': time.time(),
+        }
+        for app_id in app_ids:
+            if app_id in self._apps:
+                self._apps[app_id]['deployments'] = [{'id': deployment_id}]
+        return {'deploymentId': deployment_id, 'version': version}
+
+    def deployments(self):
+        """Returns the deployments that haven't finished
+
+        :rtype: [dict]
+        """
+
+        with self._lock:
+            now = time.time()
+            for deployment_id, deployment in list(self._deployments.items()):
+                if now - deployment['created'] >= self._deployment_time:
+                    self._finish_deployment(deployment_id)
+            return [dict((key, value) for key, value in deployment.items()
+                         if key != 'created')
+                    for deployment in self._deployments.values()]
+
+    def _finish_deployment(self, deployment_id):
+        deployment = self._deployments.pop(deployment_id)
+        for app_id in deployment['affectedApps']:
+            if app_id in self._apps:
+                self._apps[app_id]['deployments'] = []
+
+    def cancel_deployment(self, deployment_id, force):
+        """
+        :param deployment_id: deployment ID
+        :type deployment_id: str
+        :param force: if false, a rollback deployment is started
+        :type force: bool
+        :returns: the rollback deployment; {} if forced; None if there is
+                  no such deployment
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            if deployment_id not in self._deployments:
+                return None
+            deployment = self._deployments[deployment_id]
+            self._finish_deployment(deployment_id)
+            if force:
+                return {}
+            return self._deploy(deployment['affectedApps'])
+
+    def apps(self):
+        """
+        :rtype: [dict]
+        """
+
+        self.deployments()
+        with self._lock:
+            return list(self._apps.values())
+
+    def app(self, app_id, version=None):
+        """
+        :param app_id: app ID
+        :type app_id: str
+        :param version: app version; None for the latest version
+        :type version: str | None
+        :returns: the app; None if it doesn't exist
+        :rtype: dict | None
+        """
+
+        self.deployments()
+        with self._lock:
+            if version is None:
+                return self._apps.get(app_id)
+            return self._versions.get(app_id, {}).get(version)
+
+    def app_versions(self, app_id):
+        """
+        :param app_id: app ID
+        :type app_id: str
+        :returns: the app's versions, newest first; None if the app
+                  doesn't exist
+        :rtype: [str] | None
+        """
+
+        with self._lock:
+            if app_id not in self._apps:
+                return None
+            return list(reversed(self._versions[app_id]))
+
+    def add_app(self, app):
+        """
+        :param app: app definition
+        :type app: dict
+        :returns: the app; None if an app with the same ID exists
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            app = self._app_defaults(app)
+            if app['id'] in self._apps:
+                return None
+            self._store_app(app)
+            self._deploy([app['id']])
+            return app
+
+    def _app_defaults(self, app):
+        defaults = {'args': None, 'backoffFactor': 1.15,
+                    'backoffSeconds': 1, 'cmd': None, 'constraints': [],
+                    'container': None, 'cpus': 1.0, 'dependencies': [],
+                    'deployments': [], 'disk': 0.0, 'env': {},
+                    'executor': '', 'healthChecks': [], 'instances': 1,
+                    'labels': {}, 'mem': 128.0, 'ports': [0],
+                    'requirePorts': False, 'tasksHealthy': 0,
+                    'tasksRunning': 0, 'tasksStaged': 0, 'tasksUnhealthy': 0,
+                    'uris': [], 'user': None}
+        defaults.update(app)
+        defaults['id'] = '/' + defaults['id'].strip('/')
+        defaults['version'] = _timestamp()
+        return defaults
+
+    def update_app(self, app_id, payload):
+        """Updates an app, creating it if it doesn't exist
+
+        :param app_id: app ID
+        :type app_id: str
+        :param payload: properties to update
+        :type payload: dict
+        :returns: deployment ID and version
+        :rtype: dict
+        """
+
+        with self._lock:
+            app = dict(self._apps.get(app_id) or {'id': app_id})
+            app.update(payload)
+            app['id'] = app_id
+            app = self._app_defaults(app)
+            app['tasksRunning'] = app['instances']
+            self._store_app(app)
+            return self._deploy([app_id])
+
+    def remove_app(self, app_id):
+        """
+        :param app_id: app ID
+        :type app_id: str
+        :returns: deployment ID and version; None if the app doesn't
+                  exist
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            if app_id not in self._apps:
+                return None
+            del self._apps[app_id]
+            del self._versions[app_id]
+            return self._deploy([app_id])
+
+    def restart_app(self, app_id):
+        """
+        :param app_id: app ID
+        :type app_id: str
+        :returns: deployment ID and version; None if the app doesn't
+                  exist
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            if app_id not in self._apps:
+                return None
+            return self._deploy([app_id])
+
+    def tasks(self, app_id=None):
+        """Returns Marathon's tasks, one per instance of every app
+
+        :param app_id: only return the tasks of this app
+        :type app_id: str | None
+        :rtype: [dict]
+        """
+
+        with self._lock:
+            apps = list(self._apps.values())
+            agents = self._state['slaves']
+
+        tasks = []
+        for app_index, app in enumerate(apps):
+            if app_id is not None and app['id'] != app_id:
+                continue
+            for instance in range(app['instances']):
+                agent = agents[(app_index * 7 + instance) % len(agents)]
+                tasks.append({
+                    'appId': app['id'],
+                    'healthCheckResults': [],
+                    'host': agent['hostname'],
+                    'id': '{}.{:08x}-{:04x}-11e5-84a3-56847afe9799'.format(
+                        app['id'].strip('/').replace('/', '_'),
+                        app_index, instance),
+                    'ports': [31000 + instance],
+                    'servicePorts': app['ports'],
+                    'slaveId': agent['id'],
+                    'stagedAt': '2015-05-29T19:58:00.907Z',
+                    'startedAt': '2015-05-29T19:58:01.114Z',
+                    'version': app['version'],
+                })
+        return tasks
+
+    def groups(self):
+        """
+        :returns: the root group
+        :rtype: dict
+        """
+
+        return generators.groups(self.apps())
+
+    def group(self, group_id):
+        """
+        :param group_id: group ID
+        :type group_id: str
+        :returns: the group; None if it doesn't exist
+        :rtype: dict | None
+        """
+
+        groups = [self.groups()]
+        while groups:
+            group = groups.pop()
+            if group['id'] == group_id:
+                return group
+            groups.extend(group['groups'])
+        return None
+
+    def add_group(self, group):
+        """Adds the apps of a group
+
+        :param group: group definition
+        :type group: dict
+        :returns: deployment ID and version; None if one of its apps
+                  already exists
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            apps = [self._app_defaults(app) for app in _group_apps(group)]
+            if any(app['id'] in self._apps for app in apps):
+                return None
+            for app in apps:
+                self._store_app(app)
+            return self._deploy([app['id'] for app in apps])
+
+    def update_group(self, group_id, payload):
+        """Scales the apps of a group with 'scaleBy', or updates them with
+        the group's apps
+
+        :param group_id: group ID
+        :type group_id: str
+        :param payload: group properties
+        :type payload: dict
+        :returns: deployment ID and version
+        :rtype: dict
+        """
+
+        with self._lock:
+            if 'scaleBy' in payload:
+                app_ids = [app_id for app_id in self._apps
+                           if app_id.startswith(group_id.rstrip('/') + '/')]
+                for app_id in app_ids:
+                    app = dict(self._apps[app_id])
+                    app['instances'] = int(
+                        app['instances'] * payload['scaleBy'])
+                    app['version'] = _timestamp()
+                    self._store_app(app)
+                return self._deploy(app_ids)
+
+            apps = [self._app_defaults(app)
+                    for app in _group_apps(dict(payload, id=group_id))]
+            for app in apps:
+                self._store_app(app)
+            return self._deploy([app['id'] for app in apps])
+
+    def remove_group(self, group_id):
+        """
+        :param group_id: group ID
+        :type group_id: str
+        :returns: deployment ID and version; None if the group doesn't
+                  exist
+        :rtype: dict | None
+        """
+
+        with self._lock:
+            prefix = group_id.rstrip('/') + '/'
+            app_ids = [app_id for app_id in self._apps
+                       if app_id.startswith(prefix)]
+            if not app_ids:
+                return None
+            for app_id in app_ids:
+                del self._apps[app_id]
+                del self._versions[app_id]
+            return self._deploy(app_ids)
+
+    def marathon_framework_id(self):
+        """
+        :rtype: str
+        """
+
+        return generators.framework_id(0)
+
+
+class Faults(object):
+    """Latency, errors and authentication challenges injected into the
+    simulator's responses
+
+    :param latency: delay added to every request
+    :type latency: float
+    :param jitter: upper bound of a random delay added to every request
+    :type jitter: float
+    :param error_rate: fraction of the requests that fail
+    :type error_rate: float
+    :param error_status: status of the failed requests
+    :type error_status: int
+    :param credentials: 'user:password' required by every request; None
+                        to not require authentication
+    :type credentials: str | None
+    :param paths: only delay and fail the requests whose path matches
+                  this regex
+    :type paths: str | None
+    :param seed: random seed
+    :type seed: int
+    """
+
+    def __init__(self, latency=0, jitter=0, error_rate=0, error_status=503,
+                 credentials=None, paths=None, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.credentials = credentials
+        self.paths = re.compile(paths) if paths else None
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def applies_to(self, path):
+        """
+        :param path: request path
+        :type path: str
+        :rtype: bool
+        """
+
+        return self.paths is None or bool(self.paths.search(path))
+
+    def delay(self):
+        """
+        :returns: seconds to wait before answering
+        :rtype: float
+        """
+
+        with self._lock:
+            return self.latency + self._rng.uniform(0, self.jitter)
+
+    def fail(self):
+        """
+        :returns: whether the request should fail
+        :rtype: bool
+        """
+
+        with self._lock:
+            return self._rng.random() < self.error_rate
+
+    def authorized(self, header):
+        """
+        :param header: Authorization header of the request
+        :type header: str | None
+        :rtype: bool
+        """
+
+        if self.credentials is None:
+            return True
+        expected = 'Basic ' + base64.b64encode(
+            self.credentials.encode('utf-8')).decode('ascii')
+        return header == expected
+
+
+ROUTES = [
+    ('GET', r'^(?:/mesos)?/master/state(?:\.json)?$', '_master_state'),
+    ('GET', r'^(?:/mesos)?/master/state-summary$', '_state_summary'),
+    ('POST', r'^(?:/mesos)?/master/(?:teardown|shutdown)$', '_teardown'),
+    ('GET', r'^(?:/mesos)?/files/read\.json$', '_master_read'),
+    ('GET', r'^(?:/mesos)?/files/download$', '_master_download'),
+    ('GET', r'^/slave/(?P<agent_id>[^/]+)/state(?:\.json)?$', '_agent_state'),
+    ('GET', r'^/slave/(?P<agent_id>[^/]+)/files/read\.json$', '_agent_read'),
+    ('GET', r'^/slave/(?P<agent_id>[^/]+)/files/download$',
+     '_agent_download'),
+    ('GET', r'^/slave/(?P<agent_id>[^/]+)/files/browse\.json$', '_browse'),
+    ('GET', r'^/slave/(?P<agent_id>[^/]+)/monitor/statistics(?:\.json)?$',
+     '_agent_statistics'),
+    ('GET', r'^/metadata$', '_metadata'),
+    ('GET', r'^/mesos_dns/v1/hosts/(?P<host>[^/]+)$', '_dns_hosts'),
+    ('GET', r'^/marathon/v2/info$', '_marathon_info'),
+    ('GET', r'^/marathon/v2/leader$', '_marathon_leader'),
+    ('GET', r'^/marathon/v2/schemas/app$', '_marathon_schema'),
+    ('GET', r'^/marathon/v2/apps$', '_get_apps'),
+    ('POST', r'^/marathon/v2/apps$', '_add_app'),
+    ('GET', r'^/marathon/v2/apps(?P<app_id>/.+)/versions/(?P<version>[^/]+)$',
+     '_get_app_version'),
+    ('GET', r'^/marathon/v2/apps(?P<app_id>/.+)/versions$',
+     '_get_app_versions'),
+    ('DELETE', r'^/marathon/v2/apps(?P<app_id>/.+)/tasks$', '_kill_tasks'),
+    ('POST', r'^/marathon/v2/apps(?P<app_id>/.+)/restart$', '_restart_app'),
+    ('GET', r'^/marathon/v2/apps(?P<app_id>/.+)$', '_get_app'),
+    ('PUT', r'^/marathon/v2/apps(?P<app_id>/.+)$', '_update_app'),
+    ('DELETE', r'^/marathon/v2/apps(?P<app_id>/.+)$', '_remove_app'),
+    ('GET', r'^/marathon/v2/groups$', '_get_groups'),
+    ('POST', r'^/marathon/v2/groups$', '_add_group'),
+    ('GET', r'^/marathon/v2/groups(?P<group_id>/.+)$', '_get_group'),
+    ('PUT', r'^/marathon/v2/groups(?P<group_id>/.+)$', '_update_group'),
+    ('DELETE', r'^/marathon/v2/groups(?P<group_id>/.+)$', '_remove_group'),
+    ('GET', r'^/marathon/v2/deployments$', '_get_deployments'),
+    ('DELETE', r'^/marathon/v2/deployments/(?P<deployment_id>[^/]+)$',
+     '_cancel_deployment'),
+    ('GET', r'^/marathon/v2/tasks$', '_get_tasks'),
+]
+"""(method, path regex, handler method) of the simulated endpoints"""
+
+_ROUTES = [(method, re.compile(path), handler)
+           for method, path, handler in ROUTES]
+
+_MASTER_PATH = re.compile(
+    r'^(?:/mesos)?/(?:master/|files/read\.json$|files/download$)')
+"""Paths that a non-leading master redirects to the leader"""
+
+_STANDBY_PATH = re.compile(r'^(?:/mesos)?/master/state-summary$')
+"""Path that a non-leading master answers itself"""
+
+_MASTER_REDIRECT = re.compile(r'^(?:/mesos)?/master/redirect$')
+"""Path that names the leading master"""
+
+_RANGE = re.compile(r'^bytes=(\d+)-(\d*)$')
+"""Range header of a files/download request"""
+
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    """Answers the requests sent to a `Simulator`"""
+
+    server_version = 'dcos-simulator'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            BaseHTTPServer.BaseHTTPRequestHandler.log_message(
+                self, format, *args)
+
+    def do_GET(self):
+        self._dispatch('GET')
+
+    def do_POST(self):
+        self._dispatch('POST')
+
+    def do_PUT(self):
+        self._dispatch('PUT')
+
+    def do_DELETE(self):
+        self._dispatch('DELETE')
+
+    def _dispatch(self, method):
+        parsed = urllib.parse.urlparse(self.path)
+        path = urllib.parse.unquote(parsed.path)
+        self.query = dict((key, values[-1]) for key, values in
+                          urllib.parse.parse_qs(parsed.query).items())
+        length = int(self.headers.get('content-length') or 0)
+        self.body = self.rfile.read(length) if length else b''
+
+        faults = self.server.faults
+        self.server.count_request(method, path)
+
+        if faults.applies_to(path):
+            delay = faults.delay()
+            if delay:
+                time.sleep(delay)
+
+        if not faults.authorized(self.headers.get('authorization')):
+            self._send(401, {'message': 'Unauthorized'},
+                       {'WWW-Authenticate': 'Basic realm="simulator"'})
+            return
+
+        if faults.applies_to(path) and faults.fail():
+            self._send(faults.error_status,
+                       {'message': 'Injected error'})
+            return
+
+        leader = self.server.leader
+        if method == 'GET' and _MASTER_REDIRECT.match(path):
+            self._send(307, {}, {'Location': '//{}/master'.format(
+                leader or self._leader())})
+            return
+        if leader is not None and _MASTER_PATH.match(path) and \
+                not _STANDBY_PATH.match(path):
+            self._send(307, {}, {'Location': '//{}{}'.format(leader,
+                                                             self.path)})
+            return
+
+        for route_method, regex, handler in _ROUTES:
+            match = regex.match(path)
+            if match and route_method == method:
+                result = getattr(self, handler)(**match.groupdict())
+                if result is None:
+                    # the handler sent its response
+                    return
+                status, body = result
+                if method == 'GET' and status == 200:
+                    self._send_validated(body)
+                else:
+                    self._send(status, body)
+                return
+
+        self._send(404, {'message': 'Not found: {} {}'.format(method, path)})
+
+    def _send(self, status, body, headers=None,
+              content_type='application/json'):
+        if not isinstance(body, bytes):
+            body = _encode(body)
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_validated(self, body):
+        """Sends a body with an ETag, or a 304 if the client already has
+        it"""
+
+        if not isinstance(body, bytes):
+            body = _encode(body)
+        etag = '"{}"'.format(hashlib.md5(body).hexdigest())
+        if self.headers.get('if-none-match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+        else:
+            self._send(200, body, {'ETag': etag})
+
+    def _json_body(self):
+        return json.loads(self.body.decode('utf-8') or '{}')
+
+    @property
+    def cluster(self):
+        return self.server.cluster
+
+    # Mesos
+
+    def _master_state(self):
+        return 200, self.cluster.state_json()
+
+    def _state_summary(self):
+        return 200, self.cluster.summary_json()
+
+    def _teardown(self):
+        form = urllib.parse.parse_qs(self.body.decode('utf-8'))
+        framework_id = form.get('frameworkId', [None])[-1]
+        if self.cluster.teardown(framework_id):
+            return 200, {}
+        return 400, {'message': 'No framework found with specified ID'}
+
+    def _read(self, agent_id):
+        sandbox_file = self.cluster.file(agent_id,
+                                         self.query.get('path', ''))
+        if sandbox_file is None:
+            return 404, {'message': 'File not found'}
+
+        offset = int(self.query.get('offset', -1))
+        length = int(self.query.get('length', -1))
+        size = sandbox_file.size()
+        if offset == -1 or offset >= size:
+            return 200, {'data': '', 'offset': size if offset == -1
+                         else offset}
+
+        if length == -1 or length > MAX_READ_LENGTH:
+            length = MAX_READ_LENGTH
+        return 200, {'data': sandbox_file.read(offset, length),
+                     'offset': offset}
+
+    def _master_read(self):
+        return self._read(None)
+
+    def _download(self, agent_id):
+        sandbox_file = self.cluster.file(agent_id,
+                                         self.query.get('path', ''))
+        if sandbox_file is None:
+            return 404, {'message': 'File not found'}
+
+        size = sandbox_file.size()
+        match = _RANGE.match(self.headers.get('range') or '')
+        if match is None or not self.server.ranges:
+            start, end, headers = 0, size, {}
+        else:
+            start = int(match.group(1))
+            end = size if not match.group(2) else \
+                min(int(match.group(2)) + 1, size)
+            if start >= size:
+                self._send(416, b'',
+                           {'Content-Range': 'bytes */{}'.format(size)})
+                return None
+            headers = {'Content-Range': 'bytes {}-{}/{}'.format(
+                start, end - 1, size)}
+
+        self._send(206 if headers else 200,
+                   sandbox_file.read(start, end - start).encode('utf-8'),
+                   headers, content_type='application/octet-stream')
+        return None
+
+    def _master_download(self):
+        return self._download(None)
+
+    def _agent_download(self, agent_id):
+        return self._download(agent_id)
+
+    def _agent_state(self, agent_id):
+        state = self.cluster.agent_state(agent_id)
+        if state is None:
+            return 404, {'message': 'No agent with ID {}'.format(agent_id)}
+        return 200, state
+
+    def _agent_statistics(self, agent_id):
+        statistics = self.cluster.agent_statistics(agent_id)
+        if statistics is None:
+            return 404, {'message': 'No agent with ID {}'.format(agent_id)}
+        return 200, statistics
+
+    def _agent_read(self, agent_id):
+        return self._read(agent_id)
+
+    def _browse(self, agent_id):
+        entries = self.cluster.browse(agent_id, self.query.get('path', ''))
+        if entries is None:
+            return 404, {'message': 'Directory not found'}
+        return 200, entries
+
+    def _metadata(self):
+        return 200, {'CLUSTER_ID': 'simulator-{}'.format(
+                         self.server.server_address[1]),
+                     'PUBLIC_IPV4': self.server.server_address[0]}
+
+    def _dns_hosts(self, host):
+        return 200, [{'host': host, 'ip': self.server.server_address[0]}]
+
+    # Marathon
+
+    def _marathon_info(self):
+        return 200, {'frameworkId': self.cluster.marathon_framework_id(),
+                     'leader': self._leader(),
+                     'name': 'marathon',
+                     'version': MARATHON_VERSION}
+
+    def _leader(self):
+        return '{}:{}'.format(*self.server.server_address[:2])
+
+    def _marathon_leader(self):
+        return 200, {'leader': self._leader()}
+
+    def _marathon_schema(self):
+        return 200, {'$schema': 'http://json-schema.org/schema#',
+                     'type': 'object'}
+
+    def _get_apps(self):
+        return 200, {'apps': self.cluster.apps()}
+
+    def _add_app(self):
+        body = self._json_body()
+        app = self.cluster.add_app(body)
+        if app is None:
+            return 409, {'message': 'An app with id [/{}] already '
+                                    'exists.'.format(body['id'].strip('/'))}
+        return 201, app
+
+    def _get_app(self, app_id):
+        app = self.cluster.app(app_id)
+        if app is None:
+            return 404, _no_app(app_id)
+        return 200, {'app': app}
+
+    def _get_app_version(self, app_id, version):
+        app = self.cluster.app(app_id, version)
+        if app is None:
+            return 404, _no_app(app_id)
+        return 200, app
+
+    def _get_app_versions(self, app_id):
+        versions = self.cluster.app_versions(app_id)
+        if versions is None:
+            return 404, _no_app(app_id)
+        return 200, {'versions': versions}
+
+    def _update_app(self, app_id):
+        return 200, self.cluster.update_app(app_id, self._json_body())
+
+    def _remove_app(self, app_id):
+        deployment = self.cluster.remove_app(app_id)
+        if deployment is None:
+            return 404, _no_app(app_id)
+        return 200, deployment
+
+    def _restart_app(self, app_id):
+        deployment = self.cluster.restart_app(app_id)
+        if deployment is None:
+            return 404, _no_app(app_id)
+        return 200, deployment
+
+    def _kill_tasks(self, app_id):
+        if self.cluster.app(app_id) is None:
+            return 404, _no_app(app_id)
+        return 200, {'tasks': self.cluster.tasks(app_id)}
+
+    def _get_groups(self):
+        return 200, self.cluster.groups()
+
+    def _add_group(self):
+        deployment = self.cluster.add_group(self._json_body())
+        if deployment is None:
+            return 409, {'message': 'An app of this group already exists.'}
+        return 201, deployment
+
+    def _get_group(self, group_id):
+        group = self.cluster.group(group_id)
+        if group is None:
+            return 404, _no_group(group_id)
+        return 200, group
+
+    def _update_group(self, group_id):
+        return 200, self.cluster.update_group(group_id, self._json_body())
+
+    def _remove_group(self, group_id):
+        deployment = self.cluster.remove_group(group_id)
+        if deployment is None:
+            return 404, _no_group(group_id)
+        return 200, deployment
+
+    def _get_deployments(self):
+        return 200, self.cluster.deployments()
+
+    def _cancel_deployment(self, deployment_id):
+        force = self.query.get('force') == 'true'
+        deployment = self.cluster.cancel_deployment(deployment_id, force)
+        if deployment is None:
+            return 404, {'message': 'Unknown deployment'}
+        return (202, deployment) if force else (200, deployment)
+
+    def _get_tasks(self):
+        return 200, {'tasks': self.cluster.tasks()}
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    # the accept backlog of nginx, which fronts DCOS as admin-router
+    request_queue_size = 511
+
+    def __init__(self, address, cluster, faults, verbose):
+        BaseHTTPServer.HTTPServer.__init__(self, address, Handler)
+        self.cluster = cluster
+        self.faults = faults
+        self.verbose = verbose
+        self.leader = None
+        self.ranges = True
+        self.requests = {}
+        self._lock = threading.Lock()
+
+    def count_request(self, method, path):
+        with self._lock:
+            key = (method, path)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+
+class Simulator(object):
+    """Simulated DCOS cluster served over HTTP from a background thread
+
+    :param cluster: cluster state
+    :type cluster: Cluster
+    :param faults: injected faults; None to not inject any
+    :type faults: Faults | None
+    :param host: address to listen on
+    :type host: str
+    :param port: port to listen on; 0 picks a free port
+    :type port: int
+    :param verbose: whether to log every request to stderr
+    :type verbose: bool
+    """
+
+    def __init__(self, cluster, faults=None, host='127.0.0.1', port=0,
+                 verbose=False):
+        self.cluster = cluster
+        self._server = _Server((host, port), cluster, faults or Faults(),
+                               verbose)
+        self._thread = None
+
+    @property
+    def faults(self):
+        return self._server.faults
+
+    @faults.setter
+    def faults(self, faults):
+        self._server.faults = faults
+
+    @property
+    def leader(self):
+        """
+        :returns: host:port of the leading master, if this simulator isn't
+                  the leader
+        :rtype: str | None
+        """
+
+        return self._server.leader
+
+    @leader.setter
+    def leader(self, leader):
+        self._server.leader = leader
+
+    @property
+    def ranges(self):
+        """
+        :returns: whether files/download requests honor their Range header
+        :rtype: bool
+        """
+
+        return self._server.ranges
+
+    @ranges.setter
+    def ranges(self, ranges):
+        self._server.ranges = ranges
+
+    @property
+    def address(self):
+        """
+        :returns: host:port the simulator listens on
+        :rtype: str
+        """
+
+        return '{}:{}'.format(*self._server.server_address[:2])
+
+    @property
+    def url(self):
+        """
+        :returns: the URL to use as `core.dcos_url`
+        :rtype: str
+        """
+
+        return 'http://{}:{}/'.format(*self._server.server_address[:2])
+
+    @property
+    def requests(self):
+        """
+        :returns: number of requests received, by (method, path)
+        :rtype: {(str, str): int}
+        """
+
+        with self._server._lock:
+            return dict(self._server.requests)
+
+    def start(self):
+        """Starts serving in a background thread
+
+        :rtype: None
+        """
+
+        self._thread = threading.Thread(target=self._server.serve_forever)
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """Stops serving
+
+        :rtype: None
+        """
+
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+    def serve_forever(self):
+        """Serves in the current thread until interrupted
+
+        :rtype: None
+        """
+
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _encode(obj):
+    return json.dumps(obj).encode('utf-8')
+
+
+def _timestamp():
+    now = time.time()
+    return time.strftime('%Y-%m-%dT%H:%M:%S', time.gmtime(now)) + \
+        '.{:03d}Z'.format(int(now * 1000) % 1000)
+
+
+def _browse_entry(path, mode, size, mtime=None):
+    return {'gid': 'root', 'mode': mode,
+            'mtime': int(time.time()) if mtime is None else mtime,
+            'nlink': 1, 'path': path, 'size': size, 'uid': 'root'}
+
+
+def _group_apps(group):
+    """Returns the apps of a group definition and its subgroups, with
+    absolute IDs
+
+    :param group: group definition
+    :type group: dict
+    :rtype: [dict]
+    """
+
+    prefix = '/' + group.get('id', '').strip('/')
+    apps = []
+    for app in group.get('apps', []):
+        app_id = app['id']
+        if not app_id.startswith('/'):
+            app_id = prefix.rstrip('/') + '/' + app_id
+        apps.append(dict(app, id=app_id))
+    for subgroup in group.get('groups', []):
+        subgroup_id = subgroup['id']
+        if not subgroup_id.startswith('/'):
+            subgroup_id = prefix.rstrip('/') + '/' + subgroup_id
+        apps.extend(_group_apps(dict(subgroup, id=subgroup_id)))
+    return apps
+
+
+def _no_app(app_id):
+    return {'message': "App '{}' does not exist".format(app_id)}
+
+
+def _no_group(group_id):
+    return {'message': "Group '{}' does not exist".format(group_id)}
+
+
+def main():
+    args = docopt.docopt(__doc__)
+
+    scale = args['--scale']
+    if scale not in run.SCALES:
+        print('Unknown scale {!r}. Valid scales are {!r}'.format(
+            scale, sorted(run.SCALES)))
+        return 1
+
+    sizes = run.SCALES[scale]
+    for key in ['agents', 'apps', 'frameworks', 'tasks']:
+        if args['--' + key] is not None:
+            sizes = dict(sizes, **{key: int(args['--' + key])})
+
+    cluster = Cluster(sizes['agents'], sizes['frameworks'], sizes['tasks'],
+                      sizes['apps'],
+                      file_size=int(args['--file-size']),
+                      file_growth=int(args['--file-growth']),
+                      deployment_time=float(args['--deployment-time']))
+    faults = Faults(latency=float(args['--latency']),
+                    jitter=float(args['--jitter']),
+                    error_rate=float(args['--error-rate']),
+                    error_status=int(args['--error-status']),
+                    credentials=args['--credentials'],
+                    paths=args['--fault-paths'])
+    simulator = Simulator(cluster, faults, port=int(args['--port']),
+                          verbose=True)
+    simulator.leader = args['--leader']
+    simulator.ranges = not args['--no-ranges']
+
+    print('Serving a simulated cluster with {agents} agents, {tasks} tasks '
+          'and {apps} apps at {url}'.format(url=simulator.url, **sizes))
+    print('Run: dcos config set core.dcos_url {}'.format(simulator.url))
+    sys.stdout.flush()
+
+    simulator.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
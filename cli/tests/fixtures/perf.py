@@ -0,0 +1,19 @@
+def perf_summary_fixture():
+    """ Performance ledger summary fixture.
+
+    :rtype: dict
+    """
+
+    return {
+        "agents": 3,
+        "bytes_received": 1452987,
+        "cluster": "http://dcos.snakeoil.mesosphere.com",
+        "command": "marathon app list",
+        "count": 42,
+        "last": 1443568911.351,
+        "p50": 0.8521,
+        "p95": 1.9374,
+        "p99": 2.4301,
+        "requests": 2,
+        "tasks": 17
+    }
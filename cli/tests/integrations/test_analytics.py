@@ -1,19 +1,18 @@
 import os
+import tempfile
 from functools import wraps
 
 import dcoscli.analytics
-import rollbar
 from dcos import constants, http, util
+from dcos.errors import DCOSException
 from dcoscli.analytics import _base_properties
 from dcoscli.config.main import main as config_main
-from dcoscli.constants import (SEGMENT_IO_CLI_ERROR_EVENT,
+from dcoscli.constants import (ROLLBAR_URL, SEGMENT_IO_CLI_ERROR_EVENT,
                                SEGMENT_IO_CLI_EVENT, SEGMENT_URL)
 from dcoscli.main import main
 
 from mock import patch
 
-from .common import mock_called_some_args
-
 ANON_ID = 0
 USER_ID = 'test@mail.com'
 
@@ -21,11 +20,13 @@ USER_ID = 'test@mail.com'
 def _mock(fn):
     @wraps(fn)
     def wrapper(*args, **kwargs):
-        with patch('rollbar.init'), \
-                patch('rollbar.report_message'), \
-                patch('dcos.http.post'), \
+        with patch('dcos.http.post'), \
                 patch('dcos.http.get'), \
-                patch('dcoscli.analytics.session_id'):
+                patch('dcoscli.analytics.session_id'), \
+                patch('dcoscli.analytics.start_flusher',
+                      side_effect=dcoscli.analytics.flush), \
+                patch.dict(os.environ,
+                           {constants.DCOS_CACHE_DIR_ENV: tempfile.mkdtemp()}):
 
             dcoscli.analytics.session_id = ANON_ID
             fn()
@@ -33,6 +34,38 @@ def _mock(fn):
     return wrapper
 
 
+def _segment_batch():
+    """Returns the events of all the batches sent to segment.io, without
+    their timestamps.
+
+    :rtype: [dict]
+    """
+
+    events = []
+    for call_args, call_kwargs in http.post.call_args_list:
+        if call_args == ('{}/batch'.format(SEGMENT_URL),):
+            assert call_kwargs['timeout'] == (1, 1)
+            for event in call_kwargs['json']['batch']:
+                event = dict(event)
+                assert event.pop('timestamp')
+                events.append(event)
+    return events
+
+
+def _rollbar_messages():
+    """Returns the messages of all the items sent to rollbar.
+
+    :rtype: [dict]
+    """
+
+    messages = []
+    for call_args, call_kwargs in http.post.call_args_list:
+        if call_args == (ROLLBAR_URL,):
+            assert call_kwargs['timeout'] == (1, 1)
+            messages.append(call_kwargs['json']['data']['body']['message'])
+    return messages
+
+
 @_mock
 def test_config_set():
     '''Tests that a `dcos config set core.email <email>` makes a
@@ -45,10 +78,8 @@ def test_config_set():
         assert config_main() == 0
 
         # segment.io
-        assert mock_called_some_args(http.post,
-                                     '{}/identify'.format(SEGMENT_URL),
-                                     json={'userId': 'test@mail.com'},
-                                     timeout=(1, 1))
+        assert _segment_batch() == [{'type': 'identify',
+                                     'userId': 'test@mail.com'}]
 
 
 @_mock
@@ -58,22 +89,44 @@ def test_cluster_id_sent():
     args = [util.which('dcos')]
     env = _env_reporting_with_url()
     version = 'release'
+    http.get.return_value.json.return_value = {'CLUSTER_ID': 'cluster-id'}
 
     with patch('sys.argv', args), \
             patch.dict(os.environ, env), \
             patch('dcoscli.version', version):
         assert main() == 0
 
-        props = _base_properties()
+        props = _base_properties(command='help')
+        props['CLUSTER_ID'] = 'cluster-id'
         # segment.io
         data = {'userId': USER_ID,
+                'type': 'track',
                 'event': SEGMENT_IO_CLI_EVENT,
                 'properties': props}
-        assert props.get('CLUSTER_ID')
-        assert mock_called_some_args(http.post,
-                                     '{}/track'.format(SEGMENT_URL),
-                                     json=data,
-                                     timeout=(1, 1))
+        assert _segment_batch() == [data]
+
+        # the cluster id is cached for the next command
+        assert _base_properties(command='help') == props
+
+
+@_mock
+def test_command_does_not_wait_on_network():
+    '''Tests that analytics events are spooled rather than sent while the
+    command runs'''
+
+    args = [util.which('dcos')]
+    env = _env_reporting_with_url()
+    version = 'release'
+
+    with patch('sys.argv', args), \
+            patch.dict(os.environ, env), \
+            patch('dcoscli.version', version), \
+            patch('dcoscli.analytics.start_flusher') as start_flusher:
+        assert main() == 0
+
+        assert start_flusher.call_count == 1
+        assert http.post.call_count == 0
+        assert http.get.call_count == 0
 
 
 @_mock
@@ -94,15 +147,13 @@ def test_no_exc():
 
         # segment.io
         data = {'userId': USER_ID,
+                'type': 'track',
                 'event': SEGMENT_IO_CLI_EVENT,
-                'properties': _base_properties()}
-        assert mock_called_some_args(http.post,
-                                     '{}/track'.format(SEGMENT_URL),
-                                     json=data,
-                                     timeout=(1, 1))
+                'properties': _base_properties(command='help')}
+        assert _segment_batch() == [data]
 
         # rollbar
-        assert rollbar.report_message.call_count == 0
+        assert _rollbar_messages() == []
 
 
 @_mock
@@ -123,24 +174,63 @@ def test_exc():
         assert main() == 1
 
         # segment.io
-        props = _base_properties()
+        props = _base_properties(command='help')
         props['err'] = 'Traceback'
         props['exit_code'] = 1
         data = {'userId': USER_ID,
+                'type': 'track',
                 'event': SEGMENT_IO_CLI_ERROR_EVENT,
                 'properties': props}
 
-        assert mock_called_some_args(http.post,
-                                     '{}/track'.format(SEGMENT_URL),
-                                     json=data,
-                                     timeout=(1, 1))
+        assert data in _segment_batch()
 
         # rollbar
-        props = _base_properties()
+        props = _base_properties(command='help')
         props['exit_code'] = 1
         props['stderr'] = 'Traceback'
-        rollbar.report_message.assert_called_with('Traceback', 'error',
-                                                  extra_data=props)
+        props['body'] = 'Traceback'
+        assert _rollbar_messages() == [props]
+
+
+@_mock
+def test_failed_reports_are_respooled():
+    '''Tests that an error report that rollbar doesn't receive is sent
+    again by the next flush.'''
+
+    args = [util.which('dcos')]
+    env = _env_reporting()
+    version = 'release'
+    http.post.side_effect = DCOSException('unreachable')
+    with patch('sys.argv', args), \
+            patch('dcoscli.version', version), \
+            patch.dict(os.environ, env), \
+            patch('dcoscli.analytics.wait_and_capture',
+                  return_value=(1, 'Traceback')):
+        assert main() == 1
+        assert len(_rollbar_messages()) == 1
+
+        http.post.reset_mock()
+        http.post.side_effect = None
+        dcoscli.analytics.flush()
+        assert [m['body'] for m in _rollbar_messages()] == ['Traceback']
+
+
+def test_flusher_env_is_scrubbed():
+    '''Tests that the flusher doesn't record its requests in the files
+    of the command that started it.'''
+
+    env = {constants.DCOS_HAR_ENV: 'session.har',
+           constants.DCOS_CASSETTE_ENV: 'cassette.json',
+           constants.DCOS_TRACE_ENV: '1',
+           constants.DCOS_METRICS_ENV: '1',
+           constants.DCOS_PROFILE_ENV: 'profile.out'}
+    with patch.dict(os.environ, env), \
+            patch('subprocess.Popen') as popen:
+        dcoscli.analytics.start_flusher()
+
+    flusher_env = popen.call_args[1]['env']
+    assert flusher_env
+    assert not set(env) & set(flusher_env)
 
 
 @_mock
@@ -159,7 +249,6 @@ def test_config_reporting_false():
 
         assert main() == 1
 
-        assert rollbar.report_message.call_count == 0
         assert http.post.call_count == 0
         assert http.get.call_count == 0
 
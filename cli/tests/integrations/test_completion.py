@@ -0,0 +1,65 @@
+import os
+
+from dcos import constants
+
+from .common import assert_command, exec_command
+
+
+def test_help():
+    with open('tests/data/help/completion.txt') as content:
+        assert_command(['dcos', 'completion', '--help'],
+                       stdout=content.read().encode('utf-8'))
+
+
+def test_info():
+    stdout = b'Generate shell completion scripts and query completion data\n'
+    assert_command(['dcos', 'completion', '--info'], stdout=stdout)
+
+
+def test_version():
+    assert_command(['dcos', 'completion', '--version'],
+                   stdout=b'dcos-completion version SNAPSHOT\n')
+
+
+def test_bash():
+    returncode, stdout, stderr = exec_command(['dcos', 'completion', 'bash'])
+
+    assert returncode == 0
+    assert b'complete -o default -F _dcos dcos' in stdout
+    assert b'"task") verbs="grep log ls sync"' in stdout
+    assert b'"task sync") kind=task' in stdout
+    assert b'"node") verbs="log ssh"; options="--json --stats --watch"' in \
+        stdout
+    assert stderr == b''
+
+
+def test_zsh():
+    returncode, stdout, stderr = exec_command(['dcos', 'completion', 'zsh'])
+
+    assert returncode == 0
+    assert b'bashcompinit' in stdout
+    assert stderr == b''
+
+
+def test_query_after_refresh(tmpdir):
+    env = os.environ.copy()
+    env[constants.DCOS_CACHE_DIR_ENV] = str(tmpdir)
+
+    assert_command(['dcos', 'completion', 'query', 'service', 'marath'],
+                   env=env)
+
+    returncode, stdout, stderr = exec_command(
+        ['dcos', 'completion', 'refresh'], env=env)
+    assert returncode == 0
+
+    assert_command(['dcos', 'completion', 'query', 'service', 'marath'],
+                   stdout=b'marathon\n',
+                   env=env)
+
+
+def test_query_unknown_kind():
+    stderr = (b"Unknown completion kind [unknown]. Valid kinds are "
+              b"['app', 'framework', 'node', 'service', 'task']\n")
+    assert_command(['dcos', 'completion', 'query', 'unknown'],
+                   returncode=1,
+                   stderr=stderr)
@@ -13,11 +13,13 @@ for easy management of a DCOS installation.
 
 Available DCOS commands:
 
+\tcompletion     \tGenerate shell completion scripts and query completion data
 \tconfig         \tGet and set DCOS CLI configuration properties
 \thelp           \tDisplay command line usage information
 \tmarathon       \tDeploy and manage applications on the DCOS
 \tnode           \tManage DCOS nodes
 \tpackage        \tInstall and manage DCOS packages
+\tperf           \tSummarize the performance of DCOS CLI commands
 \tservice        \tManage DCOS services
 \ttask           \tManage DCOS tasks
 
@@ -48,6 +50,9 @@ Options:
                                 warning, error and critical messages to stderr.
                                 Note: that this does not affect the output sent
                                 to stdout by the command.
+    --metrics=<format>          If set then print a summary of the HTTP
+                                requests sent by the command to stderr when it
+                                exits. The format is either table or json.
     --debug                     If set then enable further debug messages which
                                 are sent to stdout.
 
@@ -67,6 +72,37 @@ Environment Variables:
                                 for HTTPS, or the path to the certificate(s).
                                 Can also be configured by setting
                                 `core.ssl_config` in the config.
+
+    DCOS_METRICS                If set then print a summary of the HTTP
+                                requests in the given format. See the --metrics
+                                option for details.
+
+    DCOS_TRACE                  If set then write the time spent in each phase
+                                of the command to this file, in Chrome's trace
+                                event format. It can be opened with
+                                chrome://tracing.
+
+    DCOS_PROFILE                If set then profile each process of the command
+                                and write its stats to <DCOS_PROFILE>.<program>
+                                in Python's pstats format.
+
+    DCOS_HAR                    If set then archive the HTTP requests and
+                                responses of the command, with their timings,
+                                to the file <DCOS_HAR> in HAR format.
+                                Credentials are redacted.
+
+    DCOS_CASSETTE               If set then record the HTTP requests and
+                                responses of the command to this file, or
+                                replay them from it, depending on
+                                DCOS_CASSETTE_MODE. Credentials aren't
+                                recorded.
+
+    DCOS_CASSETTE_MODE          Either record or replay. [default: replay]
+
+    DCOS_CASSETTE_LATENCY       When a cassette is replayed, the factor by
+                                which the recorded latency of its responses is
+                                multiplied. 0 replays them immediately, 1 as
+                                recorded. [default: 0]
 """
 
     assert_command(['dcos', '--help'],
@@ -103,3 +139,13 @@ def test_invalid_log_level_flag():
         ['dcos', '--log-level=blah', 'config', '--info'],
         returncode=1,
         stdout=stdout)
+
+
+def test_invalid_metrics_flag():
+    stdout = (b"Metrics format set to an unknown value 'blah'. Valid "
+              b"values are ['json', 'table']\n")
+
+    assert_command(
+        ['dcos', '--metrics=blah', 'config', '--info'],
+        returncode=1,
+        stdout=stdout)
@@ -37,11 +37,13 @@ for easy management of a DCOS installation.
 
 Available DCOS commands:
 
+\tcompletion     \tGenerate shell completion scripts and query completion data
 \tconfig         \tGet and set DCOS CLI configuration properties
 \thelp           \tDisplay command line usage information
 \tmarathon       \tDeploy and manage applications on the DCOS
 \tnode           \tManage DCOS nodes
 \tpackage        \tInstall and manage DCOS packages
+\tperf           \tSummarize the performance of DCOS CLI commands
 \tservice        \tManage DCOS services
 \ttask           \tManage DCOS tasks
 
@@ -52,6 +54,12 @@ Get detailed command description with 'dcos <command> --help'.
                    stdout=stdout)
 
 
+def test_help_completion():
+    with open('tests/data/help/completion.txt') as content:
+        assert_command(['dcos', 'help', 'completion'],
+                       stdout=content.read().encode('utf-8'))
+
+
 def test_help_config():
     with open('tests/data/help/config.txt') as content:
         assert_command(['dcos', 'help', 'config'],
@@ -76,6 +84,12 @@ def test_help_package():
                        stdout=content.read().encode('utf-8'))
 
 
+def test_help_perf():
+    with open('tests/data/help/perf.txt') as content:
+        assert_command(['dcos', 'help', 'perf'],
+                       stdout=content.read().encode('utf-8'))
+
+
 def test_help_service():
     with open('tests/data/help/service.txt') as content:
         assert_command(['dcos', 'help', 'service'],
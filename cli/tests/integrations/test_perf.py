@@ -0,0 +1,59 @@
+import json
+import os
+
+from dcos import constants, perf
+
+from .common import assert_command, exec_command
+
+
+def test_help():
+    with open('tests/data/help/perf.txt') as content:
+        assert_command(['dcos', 'perf', '--help'],
+                       stdout=content.read().encode('utf-8'))
+
+
+def test_info():
+    stdout = b'Summarize the performance of DCOS CLI commands\n'
+    assert_command(['dcos', 'perf', '--info'], stdout=stdout)
+
+
+def test_version():
+    assert_command(['dcos', 'perf', '--version'],
+                   stdout=b'dcos-perf version SNAPSHOT\n')
+
+
+def test_report_disabled(tmpdir):
+    env = os.environ.copy()
+    env[constants.DCOS_CACHE_DIR_ENV] = str(tmpdir)
+
+    stderr = (b'The performance ledger is empty. Enable it with '
+              b'`dcos config set core.perf_ledger true`\n')
+    assert_command(['dcos', 'perf', 'report'],
+                   returncode=1,
+                   stderr=stderr,
+                   env=env)
+
+
+def test_report(tmpdir):
+    env = os.environ.copy()
+    env[constants.DCOS_CACHE_DIR_ENV] = str(tmpdir)
+
+    path = str(tmpdir.join(perf.LEDGER_SUBDIR, 'ledger.jsonl'))
+    for wall in [1.0, 2.0, 3.0]:
+        perf.append({'command': 'task', 'cluster': 'http://dcos',
+                     'wall': wall, 'requests': 1, 'agents': 2}, path)
+    perf.append({'command': 'service', 'cluster': 'http://dcos',
+                 'wall': 0.5}, path)
+
+    returncode, stdout, stderr = exec_command(
+        ['dcos', 'perf', 'report', '--json', '--command=task'], env=env)
+
+    assert returncode == 0
+    assert stderr == b''
+
+    [summary] = json.loads(stdout.decode('utf-8'))
+    assert summary['command'] == 'task'
+    assert summary['count'] == 3
+    assert summary['p50'] == 2.0
+    assert summary['p99'] == 3.0
+    assert summary['agents'] == 2
@@ -0,0 +1,23 @@
+import os
+
+from dcos import util
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+
+@pytest.fixture
+def server(cluster):
+    """Serves the `cluster` fixture of the test module, a simulator.Cluster,
+    with a configuration that points the CLI at it"""
+
+    with simulator.Simulator(cluster) as server, util.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'dcos.toml')
+        with open(path, 'w') as config_file:
+            config_file.write('[core]\ndcos_url = "{}"\n'.format(server.url))
+
+        env = {'DCOS_CONFIG': path, 'DCOS_CACHE_DIR': tmpdir}
+        with mock.patch.dict(os.environ, env):
+            yield server
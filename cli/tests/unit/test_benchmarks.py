@@ -0,0 +1,32 @@
+from dcos import util
+
+import pytest
+
+from ..benchmarks import run
+
+TINY = {'agents': 12, 'frameworks': 2, 'tasks': 50, 'apps': 10,
+        'deployments': 3, 'packages': 20, 'log_lines': 2000,
+        'config_keys': 10, 'files': 10}
+
+
+@pytest.mark.parametrize('name', list(run.BENCHMARKS))
+def test_benchmark(name):
+    with util.tempdir() as tmpdir:
+        fixtures = run.Fixtures(TINY, tmpdir)
+        run.BENCHMARKS[name](fixtures)()
+
+
+def test_compare():
+    baseline = {'benchmarks': {'a': {'median': 1.0, 'min': 1.0},
+                               'b': {'median': 1.0, 'min': 1.0}}}
+    results = {'benchmarks': {'a': {'median': 1.1, 'min': 1.0},
+                              'b': {'median': 2.0, 'min': 2.0},
+                              'c': {'median': 1.0, 'min': 1.0}}}
+
+    rows, regressed = run.compare(results, baseline, 1.25)
+    rows = dict((row['name'], row) for row in rows)
+
+    assert regressed
+    assert not rows['a']['regression']
+    assert rows['b']['regression']
+    assert rows['c']['ratio'] is None
@@ -0,0 +1,104 @@
+import re
+
+from dcos.errors import DCOSException
+from dcoscli import grep
+from dcoscli.task import main
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+TASK_ID = 'app-1.00000001-0630-11e5-84a3-56847afe9799'
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=2, frameworks=1, tasks=4, apps=1,
+                             file_size=1000, file_growth=0)
+
+
+def _grep(*args):
+    with mock.patch('sys.argv', ['dcos-task', 'task', 'grep'] + list(args)):
+        return main.main()
+
+
+def test_grep_across_tasks(server, capsys):
+    assert _grep('^0000000003 ', 'app-*') == 0
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4 * 2
+    assert '===> task:{}:stdout <==='.format(TASK_ID) in lines
+    assert '0000000003 {} stdout'.format(TASK_ID) in lines
+
+
+def test_grep_count(server, capsys):
+    assert _grep('--count', 'stderr$', TASK_ID, 'stderr') == 0
+
+    # the last line of the file is cut short
+    width = len('0000000000 {} stderr\n'.format(TASK_ID))
+    out, _ = capsys.readouterr()
+    assert out.splitlines() == [
+        'task:{}:stderr:{}'.format(TASK_ID, 1000 // width)]
+
+
+def test_grep_files_with_matches(server, capsys):
+    assert _grep('-l', re.escape(TASK_ID), 'app-*') == 0
+
+    out, _ = capsys.readouterr()
+    assert out == 'task:{}:stdout\n'.format(TASK_ID)
+
+
+def test_grep_reads_chunks_ahead(server, capsys):
+    with mock.patch.object(grep, 'CHUNK_SIZE', 100):
+        assert _grep('--count', 'stderr$', TASK_ID, 'stderr') == 0
+
+    width = len('0000000000 {} stderr\n'.format(TASK_ID))
+    out, _ = capsys.readouterr()
+    assert out.splitlines() == [
+        'task:{}:stderr:{}'.format(TASK_ID, 1000 // width)]
+
+
+def test_grep_max_count_stops_reading(server, capsys):
+    with mock.patch.object(grep, 'CHUNK_SIZE', 100), \
+            mock.patch.object(grep, 'PREFETCH_CHUNKS', 1):
+        assert _grep('-m', '2', 'stdout', TASK_ID) == 0
+
+    out, _ = capsys.readouterr()
+    assert out.splitlines() == [
+        '000000000{} {} stdout'.format(i, TASK_ID) for i in range(2)]
+
+    downloads = sum(count for (_, path), count in server.requests.items()
+                    if path.endswith('/files/download'))
+    assert downloads == 2
+
+
+def test_grep_without_matches(server, capsys):
+    assert _grep('Exception', TASK_ID) == 1
+    assert capsys.readouterr() == ('', '')
+
+
+def test_grep_invalid_pattern(server, capsys):
+    assert _grep('(', TASK_ID) == 1
+
+    _, err = capsys.readouterr()
+    assert err.startswith('Invalid pattern [(]: ')
+
+
+def test_matching_lines_span_chunks():
+    chunks = [b'first li', b'ne\nsecond', b' line\nthi', b'rd line']
+    regex = re.compile(r'\w+ line$')
+
+    assert list(grep.matching_lines(regex, iter(chunks))) == \
+        ['first line', 'second line', 'third line']
+
+
+def test_grep_unreadable_file(capsys):
+    unreadable = mock.MagicMock(**{'size.side_effect': DCOSException('gone'),
+                                   '__str__.return_value': 'task:gone:stdout'})
+
+    assert grep.grep_files([unreadable], 'stdout') == 2
+
+    _, err = capsys.readouterr()
+    assert err == 'Error reading [task:gone:stdout]: gone\n'
@@ -0,0 +1,59 @@
+from dcos.errors import DCOSException
+from dcoscli import log
+
+import mock
+
+
+class _FlakyFile(object):
+    """A followed file whose reads fail a given number of times"""
+
+    def __init__(self, failures):
+        self.failures = failures
+
+    def read(self):
+        if self.failures:
+            self.failures -= 1
+            raise DCOSException('URL [agent] is unreachable')
+        return 'line\n'
+
+    def __str__(self):
+        return 'flaky'
+
+
+def test_followed_file_survives_transient_errors(capsys):
+    flaky = _FlakyFile(failures=2)
+    failing_since = {}
+
+    for _ in range(2):
+        _, files = log._stream_files(None, log._read_rest, [flaky],
+                                     failing_since)
+        assert files == [flaky]
+
+    _, files = log._stream_files(None, log._read_rest, [flaky],
+                                 failing_since)
+    assert files == [flaky]
+    assert failing_since == {}
+    assert capsys.readouterr()[0] == 'line\n'
+
+
+def test_followed_file_is_dropped_after_grace_period():
+    flaky = _FlakyFile(failures=2)
+    failing_since = {}
+
+    with mock.patch('time.time', return_value=1000):
+        _, files = log._stream_files(None, log._read_rest, [flaky],
+                                     failing_since)
+    assert files == [flaky]
+
+    with mock.patch('time.time',
+                    return_value=1000 + log.FOLLOW_GRACE_PERIOD):
+        _, files = log._stream_files(None, log._read_rest, [flaky],
+                                     failing_since)
+    assert files == []
+
+
+def test_unreadable_file_is_dropped_without_follow():
+    flaky = _FlakyFile(failures=1)
+
+    _, files = log._stream_files(None, log._read_rest, [flaky])
+    assert files == []
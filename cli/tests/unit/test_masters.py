@@ -0,0 +1,158 @@
+import os
+import threading
+import time
+
+from dcos import masters, mesos, retry, util
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=3, frameworks=1, tasks=6, apps=1,
+                             file_size=1000, file_growth=0)
+
+
+@pytest.fixture
+def servers(cluster):
+    """Three masters of one cluster; the first one leads"""
+
+    servers = [simulator.Simulator(cluster) for _ in range(3)]
+    for server in servers:
+        server.start()
+    for server in servers[1:]:
+        server.leader = servers[0].address
+
+    with util.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'dcos.toml')
+        with open(path, 'w') as config_file:
+            config_file.write('[core]\nhttp_retries = 0\n')
+
+        env = {'DCOS_CONFIG': path, 'DCOS_CACHE_DIR': tmpdir}
+        with mock.patch.dict(os.environ, env):
+            masters.reset()
+            retry.reset()
+            yield servers
+            masters.reset()
+            retry.reset()
+
+    for server in servers:
+        if server._thread.is_alive():
+            server.stop()
+
+
+def _masters(servers, **kwargs):
+    return masters.Masters([server.url for server in servers], **kwargs)
+
+
+def test_parse_urls():
+    assert masters.parse_urls('http://m1:5050, http://m2:5050/') == \
+        ['http://m1:5050/', 'http://m2:5050/']
+
+
+def test_finds_and_remembers_the_leader(servers):
+    pool = _masters(servers[::-1])
+    assert pool.leader() == servers[0].url
+
+    # another process reads the leader from the cache
+    masters.reset()
+    with mock.patch.object(masters.http, 'get') as get:
+        assert _masters(servers).leader() == servers[0].url
+    assert not get.called
+
+
+def test_follows_redirects_to_a_new_leader(servers):
+    pool = _masters(servers)
+    pool.remember(servers[2].url)
+
+    state = pool.get('master/state.json').json()
+    assert len(state['slaves']) == 3
+    assert pool.leader() == servers[0].url
+    assert servers[0].requests[('GET', '/master/state.json')] == 1
+
+
+def test_fails_over_to_the_new_leader(servers):
+    pool = _masters(servers)
+    assert pool.leader() == servers[0].url
+
+    servers[0].stop()
+    servers[1].leader = None
+    servers[2].leader = servers[1].address
+
+    assert pool.get('master/state-summary').json()['slaves']
+    assert pool.leader() == servers[1].url
+
+
+def test_hedges_slow_reads(servers):
+    # the leader hangs, while a standby answers the read itself
+    servers[0].faults = simulator.Faults(latency=2)
+
+    pool = _masters(servers[:2], hedge_after=0.1)
+    pool.remember(servers[0].url)
+
+    # the slower read is abandoned when the process exits
+    get = pool._get
+    daemons = []
+
+    def _get(url, **kwargs):
+        daemons.append(threading.current_thread().daemon)
+        return get(url, **kwargs)
+
+    start = time.time()
+    with mock.patch.object(pool, '_get', _get):
+        assert pool.get('master/state-summary').json()['slaves']
+    assert time.time() - start < 1
+    assert servers[1].requests[('GET', '/master/state-summary')] == 1
+    assert daemons == [True, True]
+    assert pool.leader() == servers[0].url
+
+
+def test_does_not_hedge_reads_of_the_leader(servers):
+    servers[0].faults = simulator.Faults(latency=0.5)
+
+    pool = _masters(servers[:2], hedge_after=0.1)
+    pool.remember(servers[0].url)
+
+    assert pool.get('master/state.json').json()['slaves']
+    assert servers[0].requests[('GET', '/master/state.json')] == 1
+    assert servers[1].requests.get(('GET', '/master/state.json'), 0) == 0
+
+
+def test_hedges_do_not_follow_redirects(servers):
+    servers[0].faults = simulator.Faults(latency=0.5)
+
+    pool = _masters(servers[:2], hedge_after=0.1)
+    pool.remember(servers[0].url)
+
+    # the standby redirects the hedge to the slow leader
+    with mock.patch.object(masters, 'STANDBY_READABLE_PATHS',
+                           ['master/state.json']):
+        assert pool.get('master/state.json').json()['slaves']
+    assert servers[1].requests[('GET', '/master/state.json')] == 1
+    assert servers[0].requests[('GET', '/master/state.json')] == 1
+
+
+def test_leaders_file_is_replaced_atomically(servers):
+    pool = _masters(servers)
+    with mock.patch.object(masters.util, 'write_file_atomic',
+                           wraps=util.write_file_atomic) as write:
+        pool.remember(servers[1].url)
+    assert write.call_count == 1
+
+    masters.reset()
+    assert _masters(servers).leader() == servers[1].url
+
+
+def test_client_reads_from_the_leader(servers):
+    config = 'mesos_master_url = "{}"\n'.format(
+        ','.join(server.url for server in servers[::-1]))
+    with open(os.environ['DCOS_CONFIG'], 'a') as config_file:
+        config_file.write(config)
+
+    client = mesos.DCOSClient()
+    assert client.master_url('master/teardown') == \
+        servers[0].url + 'master/teardown'
+    assert len(mesos.get_master(client).tasks()) == 6
@@ -0,0 +1,165 @@
+import threading
+import time
+
+from dcos import mesos, ratelimit
+from dcos.errors import DCOSException
+from dcoscli.node import main
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=6, frameworks=1, tasks=12, apps=1)
+
+
+def _node(*args):
+    with mock.patch('sys.argv', ['dcos-node', 'node'] + list(args)):
+        return main.main()
+
+
+def _slaves():
+    client = mesos.DCOSClient()
+    return client, [mesos.Slave(slave, None, None)
+                    for slave in client.get_state_summary()['slaves']]
+
+
+def test_node_stats(server, capsys):
+    assert _node('--stats') == 0
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert lines[0].split() == ['HOSTNAME', 'CPUS', 'MEM', '(MB)', 'DISK',
+                                '(MB)', 'ID']
+    assert len(lines) == 1 + 6
+    for line in lines[1:]:
+        for usage in line.split()[1:4]:
+            used, allocated = usage.split('/')
+            assert float(used) >= 0 and float(allocated) >= 0
+
+    samples = sum(count for (_, path), count in server.requests.items()
+                  if path.endswith('/monitor/statistics.json'))
+    assert samples == 2 * 6
+
+
+def test_usage():
+    def executor(executor_id, timestamp, cpu_time, **statistics):
+        statistics.update(timestamp=timestamp,
+                          cpus_user_time_secs=cpu_time * 0.75,
+                          cpus_system_time_secs=cpu_time * 0.25)
+        return {'framework_id': 'F', 'executor_id': executor_id,
+                'statistics': statistics}
+
+    before = [executor('E1', 100, 10), executor('E2', 100, 50)]
+    after = [executor('E1', 102, 13, mem_rss_bytes=2 ** 30),
+             executor('E2', 101, 50.5, mem_rss_bytes=2 ** 29),
+             executor('E3', 101, 1, mem_rss_bytes=2 ** 20)]
+
+    assert main._usage(before, after) == \
+        {'cpus': 2.0, 'mem': 1024 + 512 + 1, 'disk': None}
+
+    after[0]['statistics']['disk_used_bytes'] = 3 * 2 ** 20
+    assert main._usage(before, after)['disk'] == 3
+
+
+def test_node_stats_partial_results(server, capsys):
+    _, slaves = _slaves()
+    failing = slaves[0]
+    server.faults = simulator.Faults(
+        error_rate=1,
+        paths='^/slave/{}/monitor/'.format(failing['id']))
+
+    assert _node('--stats') == 1
+
+    out, err = capsys.readouterr()
+    assert len(out.splitlines()) == 1 + 5
+    assert failing['id'] not in out
+    assert err.startswith('Error accessing slave: ')
+
+
+def test_fan_out_deadline(server):
+    client, slaves = _slaves()
+    slow = slaves[0]
+    server.faults = simulator.Faults(
+        latency=2, paths='^/slave/{}/monitor/'.format(slow['id']))
+
+    start = time.time()
+    results = dict((slave['id'], job) for job, slave
+                   in client.fan_out(slaves, 'monitor/statistics.json',
+                                     deadline=0.5))
+    assert time.time() - start < 1.5
+
+    assert sorted(results) == sorted(slave['id'] for slave in slaves)
+    with pytest.raises(DCOSException) as exc_info:
+        results[slow['id']].result()
+    assert 'did not answer' in str(exc_info.value)
+    assert all(isinstance(job.result(), list)
+               for slave_id, job in results.items() if slave_id != slow['id'])
+
+
+def test_fan_out_timeout_is_the_deadline(server):
+    client, slaves = _slaves()
+    sent = []
+
+    def get(slave_id, private_url, path, **kwargs):
+        sent.append(kwargs['timeout'])
+        return mock.Mock(**{'json.return_value': []})
+
+    def url(slave_id, private_url, path):
+        return 'http://dcos.example.com/slave/{}/{}'.format(slave_id, path)
+
+    with mock.patch.object(client, '_agents', mock.Mock(get=get, url=url)):
+        list(client.fan_out(slaves, 'monitor/statistics.json', deadline=2))
+
+    assert sent == [(2, 2)] * len(slaves)
+
+
+def test_fan_out_bounds_concurrency(server):
+    client, slaves = _slaves()
+    slaves = [mesos.Slave(dict(slaves[0]._short_state, id='S{}'.format(i)),
+                          None, None)
+              for i in range(2000)]
+    lock = threading.Lock()
+    in_flight = [0, 0]  # current, maximum
+
+    def get(slave_id, private_url, path, **kwargs):
+        assert threading.current_thread().daemon
+        with lock:
+            in_flight[0] += 1
+            in_flight[1] = max(in_flight)
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return mock.Mock(**{'json.return_value': {'id': slave_id}})
+
+    def url(slave_id, private_url, path):
+        return 'http://dcos.example.com/slave/{}/{}'.format(slave_id, path)
+
+    # the process' rate limit would pace the 2000 agents over 10 seconds
+    start = time.time()
+    with mock.patch.object(client, '_agents', mock.Mock(get=get, url=url)), \
+            mock.patch.object(ratelimit, 'DEFAULT_RATE', 0):
+        ratelimit.reset()
+        results = [job.result()['id'] for job, _ in client.fan_out(
+            slaves, 'monitor/statistics.json', concurrency=50)]
+    ratelimit.reset()
+    assert time.time() - start < 5
+
+    assert sorted(results) == sorted(slave['id'] for slave in slaves)
+    assert 1 < in_flight[1] <= 50
+
+
+def test_load_slave_states(server):
+    client, slaves = _slaves()
+    missing = mesos.Slave(dict(slaves[0]._short_state, id='missing'),
+                          None, None)
+
+    jobs = list(client.load_slave_states(slaves + [missing]))
+    reachable = [slave for job, slave in jobs if job.exception() is None]
+
+    assert len(reachable) == 6
+    assert all(slave._state['id'] == slave['id'] for slave in reachable)
+    assert missing._state is None
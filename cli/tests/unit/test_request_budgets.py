@@ -0,0 +1,160 @@
+"""Request budgets of CLI commands, measured against a simulated cluster.
+Every scenario runs a command in-process and fails if it sends more HTTP
+requests, or receives more bytes, than its budget.  When a change
+legitimately needs more requests, raise the budget in the same change.
+"""
+
+import base64
+import importlib
+import json
+import os
+
+from dcos import metrics, util
+
+import mock
+import pytest
+import six
+
+from ..benchmarks import simulator
+
+AGENTS = 20
+TASKS = 200
+APPS = 20
+PACKAGED_APPS = 10
+
+TASK_ID = 'app-7.00000007-0630-11e5-84a3-56847afe9799'
+APP_ID = '/group-1/subgroup-1/app-1'
+STOPPED_APP_ID = '/group-0/subgroup-0/app-0'
+
+SCENARIOS = [
+    # (command, stdin, requests, KiB received)
+    ('task', None, 1, 135),
+    ('task --json {}'.format(TASK_ID), None, 1, 135),
+    ('task ls {}'.format(TASK_ID), None, 3, 150),
+    ('task ls -R {}'.format(TASK_ID), None, 4, 150),
+    ('task ls -R app-1?.*', None, 31, 280),
+    ('task log --lines=10 {}'.format(TASK_ID), None, 4, 150),
+    ('node', None, 1, 20),
+    ('node --stats', None, 41, 230),
+    ('node log --master --lines=10', None, 2, 5),
+    ('service', None, 1, 135),
+    ('marathon app list', None, 3, 25),
+    ('marathon app show {}'.format(APP_ID), None, 2, 2),
+    ('marathon app add', json.dumps({'id': 'new-app', 'cmd': 'sleep 1'}),
+     2, 2),
+    ('marathon app update {} instances=3'.format(APP_ID), None, 3, 2),
+    ('marathon app start {}'.format(STOPPED_APP_ID), None, 3, 2),
+    ('marathon app stop {}'.format(APP_ID), None, 3, 2),
+    ('marathon app restart {}'.format(APP_ID), None, 3, 2),
+    ('marathon app remove {}'.format(APP_ID), None, 2, 1),
+    ('marathon group list', None, 2, 30),
+    ('marathon deployment list', None, 2, 10),
+    ('marathon task list', None, 2, 55),
+    ('package list --endpoints', None, 3, 75),
+]
+"""Commands and their budgets.  The byte budgets have about 25% headroom
+over what the commands received when the budgets were set."""
+
+
+def _packaged_app(index):
+    """
+    :param index: app number
+    :type index: int
+    :returns: a Marathon app installed from a package
+    :rtype: dict
+    """
+
+    metadata = {'name': 'package-{}'.format(index), 'version': '1.0',
+                'description': 'Package {}'.format(index)}
+    encoded = base64.b64encode(json.dumps(metadata).encode('utf-8'))
+    return {
+        'id': '/package-{}'.format(index),
+        'instances': 2,
+        'labels': {
+            'DCOS_PACKAGE_METADATA': encoded.decode('ascii'),
+            'DCOS_PACKAGE_NAME': metadata['name'],
+            'DCOS_PACKAGE_VERSION': metadata['version'],
+            'DCOS_PACKAGE_SOURCE': 'https://universe.example.com/repo.zip',
+            'DCOS_PACKAGE_RELEASE': '0',
+        },
+    }
+
+
+@pytest.fixture
+def cluster_url():
+    cluster = simulator.Cluster(AGENTS, 2, TASKS, APPS, file_size=4096,
+                                file_growth=0, deployment_time=3600)
+    cluster.update_app(APP_ID, {'instances': 2})
+    cluster.update_app(STOPPED_APP_ID, {'instances': 0})
+    for index in range(PACKAGED_APPS):
+        cluster.add_app(_packaged_app(index))
+
+    with simulator.Simulator(cluster) as server, util.tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'dcos.toml')
+        with open(path, 'w') as config_file:
+            config_file.write('[core]\ndcos_url = "{}"\n'.format(server.url))
+
+        env = {'DCOS_CONFIG': path, 'DCOS_CACHE_DIR': tmpdir,
+               'DCOS_DIR': tmpdir}
+        with mock.patch.dict(os.environ, env):
+            yield server.url
+
+
+def _run(command, stdin):
+    """Runs a subcommand in-process, like the dcos executable does
+
+    :param command: command line, without the leading `dcos`
+    :type command: str
+    :param stdin: standard input of the command
+    :type stdin: str | None
+    :returns: the command's return code
+    :rtype: int
+    """
+
+    argv = command.split()
+    module = importlib.import_module('dcoscli.{}.main'.format(argv[0]))
+
+    with mock.patch('sys.argv', ['dcos-' + argv[0]] + argv), \
+            mock.patch('sys.stdin', six.StringIO(stdin or '')):
+        return module.main()
+
+
+def _describe(snapshot):
+    return '\n'.join(
+        '{count:4d} {method} {path} ({bytes_received} bytes)'.format(**entry)
+        for entry in snapshot)
+
+
+@pytest.mark.parametrize('command,stdin,requests,kib', SCENARIOS)
+def test_request_budget(cluster_url, capsys, command, stdin, requests, kib):
+    metrics.registry.reset()
+
+    assert not _run(command, stdin)
+
+    snapshot = metrics.registry.snapshot()
+    totals = metrics.registry.totals()
+    assert totals['errors'] == 0, _describe(snapshot)
+    assert totals['count'] <= requests, \
+        '{!r} sent {} requests, over its budget of {}:\n{}'.format(
+            command, totals['count'], requests, _describe(snapshot))
+    assert totals['bytes_received'] <= kib * 1024, \
+        '{!r} received {} bytes, over its budget of {} KiB:\n{}'.format(
+            command, totals['bytes_received'], kib, _describe(snapshot))
+
+
+def test_http_cache_revalidates(cluster_url, capsys):
+    with open(os.environ['DCOS_CONFIG'], 'a') as config_file:
+        config_file.write('http_cache = true\n')
+
+    metrics.registry.reset()
+    assert not _run('marathon app list', None)
+    uncached = metrics.registry.totals()
+
+    metrics.registry.reset()
+    assert not _run('marathon app list', None)
+    cached = metrics.registry.totals()
+
+    # v2/apps and v2/deployments are revalidated; v2/info isn't cached
+    assert cached['count'] == uncached['count']
+    assert cached['cache_hits'] == 2, _describe(metrics.registry.snapshot())
+    assert cached['bytes_received'] < uncached['bytes_received'] / 10
@@ -0,0 +1,139 @@
+import os
+
+from dcos import marathon, mesos
+from dcos.errors import DCOSException
+
+import pytest
+import requests
+
+from ..benchmarks import simulator
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=12, frameworks=2, tasks=60, apps=10,
+                             file_size=1000, file_growth=0)
+
+
+@pytest.fixture
+def dcos_url(server):
+    return server.url
+
+
+def test_master_state(dcos_url):
+    master = mesos.get_master()
+
+    assert len(master.slaves()) == 12
+    assert len(master.tasks()) == 60
+
+
+def test_task_sandbox(dcos_url):
+    task = mesos.get_master().tasks()[-1]
+
+    browse = mesos.DCOSClient().browse(task.slave(), task.directory())
+    assert [os.path.basename(entry['path']) for entry in browse] == \
+        ['logs', 'stderr', 'stdout']
+
+    mesos_file = mesos.MesosFile('stdout', task=task)
+    assert mesos_file.size() == 1000
+
+    data = mesos_file.read()
+    assert len(data) == 1000
+    assert data.startswith('0000000000 {} stdout\n'.format(task['id']))
+
+
+def test_file_download(server):
+    task = mesos.get_master().tasks()[-1]
+    mesos_file = mesos.MesosFile('stdout', task=task)
+
+    expected = simulator.SandboxFile(
+        '{} stdout'.format(task['id']), 1000, 0, 0).read(990, 10)
+
+    mesos_file.seek(990)
+    assert mesos_file.read_bytes(20) == expected.encode('utf-8')
+    assert mesos_file.tell() == 1000
+    assert mesos_file.read_bytes() == b''
+
+    paths = [path for _, path in server.requests]
+    assert '/slave/{}/files/download'.format(task.slave()['id']) in paths
+    assert not [path for path in paths if path.endswith('read.json')]
+
+
+def test_file_download_without_ranges(server):
+    server.ranges = False
+    dcos_client = mesos.DCOSClient()
+    task = mesos.get_master(dcos_client).tasks()[-1]
+    mesos_file = mesos.MesosFile('stdout', task=task,
+                                 dcos_client=dcos_client)
+
+    expected = simulator.SandboxFile(
+        '{} stdout'.format(task['id']), 1000, 0, 0).read(990, 10)
+
+    mesos_file.seek(990)
+    assert mesos_file.read(20) == expected
+    assert not dcos_client.downloads(task.slave()['id'])
+    assert ('GET', '/slave/{}/files/read.json'.format(task.slave()['id'])) \
+        in server.requests
+
+
+def test_sandbox_file_range():
+    sandbox_file = simulator.SandboxFile('name', 100, 0, 0)
+
+    assert sandbox_file.read(0, 100) == \
+        sandbox_file.read(0, 37) + sandbox_file.read(37, 63)
+    assert sandbox_file.read(90, 20) == sandbox_file.read(0, 100)[90:]
+
+
+def test_marathon_app(dcos_url):
+    client = marathon.create_client()
+
+    client.add_app({'id': 'simulated', 'cmd': 'sleep 10'})
+    assert client.get_app('/simulated')['instances'] == 1
+
+    client.scale_app('/simulated', 3)
+    assert len(client.get_tasks('/simulated')) == 3
+
+    client.remove_app('/simulated')
+    with pytest.raises(DCOSException):
+        client.get_app('/simulated')
+
+
+def test_injected_faults(cluster):
+    faults = simulator.Faults(error_rate=1, paths='^/marathon/')
+    with simulator.Simulator(cluster, faults) as server:
+        assert requests.get(server.url + 'metadata').status_code == 200
+        assert requests.get(
+            server.url + 'marathon/v2/apps').status_code == 503
+
+
+def test_authentication_challenge(cluster):
+    faults = simulator.Faults(credentials='user:password')
+    with simulator.Simulator(cluster, faults) as server:
+        response = requests.get(server.url + 'metadata')
+        assert response.status_code == 401
+        assert response.headers['www-authenticate'] == \
+            'Basic realm="simulator"'
+
+        response = requests.get(server.url + 'metadata',
+                                auth=('user', 'password'))
+        assert response.status_code == 200
+
+
+def test_file_download_missing(server):
+    server.faults = simulator.Faults(error_rate=1, error_status=404,
+                                     paths='/files/download$')
+    dcos_client = mesos.DCOSClient()
+    task = mesos.get_master(dcos_client).tasks()[-1]
+    mesos_file = mesos.MesosFile('stdout', task=task,
+                                 dcos_client=dcos_client)
+
+    expected = simulator.SandboxFile(
+        '{} stdout'.format(task['id']), 1000, 0, 0).read(0, 20)
+
+    assert mesos_file.read_bytes(10) == expected[:10].encode('utf-8')
+    assert mesos_file.read_bytes(10) == expected[10:].encode('utf-8')
+
+    # files/download isn't tried again for every read
+    download = '/slave/{}/files/download'.format(task.slave()['id'])
+    assert server.requests[('GET', download)] == 1
+    assert not dcos_client.downloads(task.slave()['id'])
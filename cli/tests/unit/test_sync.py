@@ -0,0 +1,141 @@
+import json
+import os
+
+import concurrent.futures
+from dcos import util
+from dcoscli import sync
+from dcoscli.task import main
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+TASK_ID = 'app-1.00000001-0630-11e5-84a3-56847afe9799'
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=1, frameworks=1, tasks=2, apps=1,
+                             file_size=1000, file_growth=0)
+
+
+def _sync(localdir):
+    argv = ['dcos-task', 'task', 'sync', TASK_ID, localdir]
+    with mock.patch('sys.argv', argv):
+        return main.main()
+
+
+def test_sync_transfers_only_changes(server, capsys):
+    with util.tempdir() as localdir:
+        assert _sync(localdir) == 0
+        out, _ = capsys.readouterr()
+        assert sorted(out.splitlines()) == [
+            'Transferred 3000 bytes in 3 of 3 files',
+            'logs/app.log (1000 bytes)',
+            'stderr (1000 bytes)',
+            'stdout (1000 bytes)']
+
+        with open(os.path.join(localdir, 'logs', 'app.log')) as log_file:
+            lines = log_file.read().splitlines()
+        assert lines[0] == '0000000000 {} logs/app.log'.format(TASK_ID)
+
+        with open(os.path.join(localdir, sync.MANIFEST)) as manifest_file:
+            manifest = json.load(manifest_file)
+        assert manifest['task'] == TASK_ID
+        assert sorted(manifest['files']) == ['logs/app.log', 'stderr',
+                                             'stdout']
+
+        assert _sync(localdir) == 0
+        out, _ = capsys.readouterr()
+        assert out == 'Transferred 0 bytes in 0 of 3 files\n'
+
+
+def test_sync_resumes_interrupted_transfers(server, capsys):
+    with util.tempdir() as localdir:
+        assert _sync(localdir) == 0
+        capsys.readouterr()
+
+        # an append from byte 500 was interrupted at byte 600
+        manifest_path = os.path.join(localdir, sync.MANIFEST)
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest['files']['stdout']['size'] = 500
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+
+        path = os.path.join(localdir, 'stdout')
+        with open(path, 'rb') as stdout:
+            expected = stdout.read()
+        with open(path, 'r+b') as stdout:
+            stdout.truncate(600)
+
+        assert _sync(localdir) == 0
+        out, _ = capsys.readouterr()
+        assert out.splitlines() == ['stdout (400 bytes, appended)',
+                                    'Transferred 400 bytes in 1 of 3 files']
+        with open(path, 'rb') as stdout:
+            assert stdout.read() == expected
+
+
+def test_sync_without_downloads_copies_whole_files(server, capsys):
+    with util.tempdir() as localdir:
+        assert _sync(localdir) == 0
+        capsys.readouterr()
+
+        manifest_path = os.path.join(localdir, sync.MANIFEST)
+        with open(manifest_path) as manifest_file:
+            manifest = json.load(manifest_file)
+        manifest['files']['stdout']['size'] = 500
+        with open(manifest_path, 'w') as manifest_file:
+            json.dump(manifest, manifest_file)
+        with open(os.path.join(localdir, 'stdout'), 'r+b') as stdout:
+            stdout.truncate(600)
+
+        server.ranges = False
+        assert _sync(localdir) == 0
+        out, _ = capsys.readouterr()
+        assert out.splitlines() == ['stdout (1000 bytes)',
+                                    'Transferred 1000 bytes in 1 of 3 files']
+        assert os.path.getsize(os.path.join(localdir, 'stdout')) == 1000
+
+
+def test_plan():
+    with util.tempdir() as localdir:
+        for name, size in [('grown', 100), ('rewritten', 100),
+                           ('truncated', 100), ('same', 100)]:
+            with open(os.path.join(localdir, name), 'wb') as local_file:
+                local_file.write(b'x' * size)
+
+        files = {'grown': {'size': 150, 'mtime': 2},
+                 'rewritten': {'size': 100, 'mtime': 2},
+                 'truncated': {'size': 50, 'mtime': 2},
+                 'same': {'size': 100, 'mtime': 1},
+                 'new': {'size': 10, 'mtime': 2}}
+        manifest = {'task': TASK_ID,
+                    'files': dict((name, {'size': 100, 'mtime': 1})
+                                  for name in files if name != 'new')}
+
+        assert [(path, offset) for path, _, offset
+                in sync.plan(files, manifest, localdir)] == [
+            ('grown', 100), ('new', 0), ('rewritten', 0), ('truncated', 0)]
+
+
+def test_walk_skips_paths_outside_root(capsys):
+    root = '/sandbox'
+    entries = [simulator._browse_entry(path, '-rw-r--r--', 10)
+               for path in ['/sandbox/stdout', '/sandbox/../etc/passwd',
+                            '/etc/shadow', 'relative']]
+    job = concurrent.futures.Future()
+    job.set_result(entries)
+    dcos_client = mock.Mock(**{'browse_tree.return_value': [
+        (job, (TASK_ID, None, root, 0))]})
+
+    files, complete = sync._walk(dcos_client, mock.MagicMock(), root)
+
+    assert sorted(files) == ['stdout']
+    assert complete
+    _, err = capsys.readouterr()
+    assert err.splitlines() == [
+        'Skipping [{}]: not below [/sandbox]'.format(path)
+        for path in ['/sandbox/../etc/passwd', '/etc/shadow', 'relative']]
@@ -9,6 +9,7 @@ from ..fixtures.marathon import (app_fixture, app_task_fixture,
                                  deployment_fixture, group_fixture)
 from ..fixtures.node import slave_fixture
 from ..fixtures.package import package_fixture, search_result_fixture
+from ..fixtures.perf import perf_summary_fixture
 from ..fixtures.service import framework_fixture
 from ..fixtures.task import browse_fixture, task_fixture
 
@@ -63,6 +64,12 @@ def test_package_search_table():
                 'tests/unit/data/package_search.txt')
 
 
+def test_perf_table():
+    _test_table(tables.perf_table,
+                [perf_summary_fixture()],
+                'tests/unit/data/perf.txt')
+
+
 def test_node_table():
     _test_table(tables.slave_table,
                 [slave_fixture()],
@@ -0,0 +1,56 @@
+from dcoscli.task import main
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+TASK_ID = 'app-1.00000001-0630-11e5-84a3-56847afe9799'
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=2, frameworks=1, tasks=4, apps=1,
+                             file_size=1000, file_growth=0)
+
+
+def _ls(*args):
+    with mock.patch('sys.argv', ['dcos-task', 'task', 'ls'] + list(args)):
+        return main.main()
+
+
+def test_ls_recursive(server, capsys):
+    assert _ls('-R', TASK_ID) == 0
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert sorted(lines[:-1]) == ['logs', 'logs/app.log', 'stderr',
+                                  'stdout']
+    assert lines[-1] == 'total: 3 files, 1 directory, 3000 bytes'
+
+
+def test_ls_max_depth(server, capsys):
+    assert _ls('--long', '--max-depth=0', TASK_ID, 'logs') == 0
+
+    out, _ = capsys.readouterr()
+    [line, total] = out.splitlines()
+    assert line.startswith('-rw-r--r--') and line.endswith(' app.log')
+    assert total == 'total: 1 file, 0 directories, 1000 bytes'
+
+
+def test_ls_recursive_across_tasks(server, capsys):
+    assert _ls('-R', 'app-*', 'logs') == 0
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    assert len(lines) == 4 + 4 + 1
+    assert '{}:app.log'.format(TASK_ID) in lines
+    assert '{}: 1 file, 0 directories, 1000 bytes'.format(TASK_ID) in lines
+    assert lines[-1] == 'total: 4 files, 0 directories, 4000 bytes'
+
+
+def test_ls_recursive_missing_directory(server, capsys):
+    assert _ls('-R', TASK_ID, 'bogus') == 1
+
+    _, err = capsys.readouterr()
+    assert err == 'Cannot access [bogus]: No such file or directory\n'
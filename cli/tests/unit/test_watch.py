@@ -0,0 +1,119 @@
+from collections import OrderedDict
+
+from dcos.errors import DCOSException
+from dcoscli import tables, watch
+from dcoscli.node import main
+
+import mock
+import pytest
+
+from ..benchmarks import simulator
+
+FIELDS = OrderedDict([
+    ('NAME', lambda obj: obj['name']),
+    ('STATE', lambda obj: obj['state']),
+    ('ID', lambda obj: obj['id']),
+])
+
+
+def _obj(id_, state):
+    return {'id': id_, 'name': 'name-' + id_, 'state': state}
+
+
+def _id(obj):
+    return obj['id']
+
+
+def test_differ():
+    differ = watch.Differ(_id, lambda obj: obj['state'])
+
+    assert differ.diff([_obj('b', 'R'), _obj('a', 'R')]) == [
+        (watch.ADDED, 'a', _obj('a', 'R')),
+        (watch.ADDED, 'b', _obj('b', 'R'))]
+    assert differ.diff([_obj('a', 'R'), _obj('b', 'R')]) == []
+    assert differ.diff([_obj('a', 'F'), _obj('c', 'R')]) == [
+        (watch.CHANGED, 'a', _obj('a', 'F')),
+        (watch.REMOVED, 'b', None),
+        (watch.ADDED, 'c', _obj('c', 'R'))]
+
+
+def test_watch_table(capsys):
+    versions = iter([
+        [_obj('a', 'R'), _obj('b', 'R')],
+        [_obj('a', 'R'), _obj('b', 'R')],
+        [_obj('a', 'F')],
+    ])
+
+    with mock.patch('time.sleep') as sleep:
+        watch.watch_table(lambda: next(versions), _id, FIELDS,
+                          lambda objs: tables.table(FIELDS, objs),
+                          cycles=3)
+    assert sleep.call_count == 2
+
+    out, _ = capsys.readouterr()
+    assert [line.split() for line in out.splitlines()] == [
+        ['NAME', 'STATE', 'ID'],
+        ['name-a', 'R', 'a'],
+        ['name-b', 'R', 'b'],
+        ['~', 'name-a', 'F', 'a'],
+        ['-', '---', '---', 'b'],
+    ]
+
+
+def test_watch_survives_failed_reads(capsys):
+    def unavailable():
+        raise DCOSException('Error while fetching [state-summary]')
+
+    versions = iter([
+        lambda: [_obj('a', 'R')],
+        unavailable,
+        lambda: [_obj('a', 'F')],
+    ])
+
+    with mock.patch('time.sleep'):
+        watch.watch_table(lambda: next(versions)(), _id, FIELDS,
+                          lambda objs: tables.table(FIELDS, objs),
+                          cycles=3)
+
+    out, err = capsys.readouterr()
+    assert [line.split() for line in out.splitlines()] == [
+        ['NAME', 'STATE', 'ID'],
+        ['name-a', 'R', 'a'],
+        ['~', 'name-a', 'F', 'a'],
+    ]
+    assert err == 'Error while fetching [state-summary]\n'
+
+
+def test_watch_json():
+    versions = iter([[_obj('a', 'R')], [_obj('b', 'R')]])
+
+    published = []
+    with mock.patch('time.sleep'), \
+            mock.patch.object(watch.emitter, 'publish', published.append):
+        watch.watch_json(lambda: next(versions), _id, dict, cycles=2)
+
+    assert published == [
+        [_obj('a', 'R')],
+        {'added': [_obj('b', 'R')], 'changed': [], 'removed': ['a']}]
+
+
+@pytest.fixture(scope='module')
+def cluster():
+    return simulator.Cluster(agents=3, frameworks=1, tasks=3, apps=1)
+
+
+class _Interrupt(Exception):
+    pass
+
+
+def test_node_watch(server, capsys):
+    with mock.patch('sys.argv', ['dcos-node', 'node', '--watch']), \
+            mock.patch('time.sleep', side_effect=[None, _Interrupt()]), \
+            pytest.raises(_Interrupt):
+        main.main()
+
+    out, _ = capsys.readouterr()
+    lines = out.splitlines()
+    # the nodes don't change after the first read
+    assert len(lines) == 1 + 3
+    assert lines[0].split() == ['HOSTNAME', 'IP', 'ID']
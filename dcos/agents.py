@@ -0,0 +1,282 @@
+import atexit
+import json
+import os
+import socket
+import threading
+import time
+
+import portalocker
+from dcos import http, util
+from dcos.errors import DCOSException, DCOSHTTPException
+
+from six.moves import urllib
+
+logger = util.get_logger(__name__)
+
+PROBE_SUBDIR = 'agents'
+"""Cache subdirectory that holds the reachability of agents"""
+
+PROBE_TTL = 300
+"""Number of seconds for which the reachability of an agent is remembered"""
+
+PROBE_TIMEOUT = 1
+"""Number of seconds to wait for a connection to an agent when probing it"""
+
+_lock = threading.Lock()
+_probes = None  # private URL -> {'reachable': bool, 'expires': float}
+_observed = {}
+_path = None
+
+
+def probes_path():
+    """
+    :returns: path of the file that remembers the reachability of agents
+    :rtype: str
+    """
+
+    return util.get_cache_path(PROBE_SUBDIR, 'probes.json')
+
+
+def _load(path):
+    try:
+        with open(path) as probes_file:
+            return json.load(probes_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def address(private_url):
+    """
+    :param private_url: the agent's private URL, derived from its pid
+    :type private_url: str
+    :returns: host and port of the agent
+    :rtype: (str, int)
+    """
+
+    parsed = urllib.parse.urlparse(private_url)
+    return parsed.hostname, parsed.port or 80
+
+
+def lookup(private_url):
+    """
+    :param private_url: the agent's private URL, derived from its pid
+    :type private_url: str
+    :returns: whether the agent was reachable when it was last probed; None
+              if it wasn't probed in the last `PROBE_TTL` seconds
+    :rtype: bool | None
+    """
+
+    global _probes
+
+    with _lock:
+        if _probes is None:
+            _probes = _load(probes_path())
+        entry = _observed.get(private_url) or _probes.get(private_url)
+
+    if entry is None or entry['expires'] <= time.time():
+        return None
+    return entry['reachable']
+
+
+def remember(private_url, reachable):
+    """Remembers whether an agent is reachable for `PROBE_TTL` seconds
+
+    :param private_url: the agent's private URL, derived from its pid
+    :type private_url: str
+    :param reachable: whether the agent is reachable
+    :type reachable: bool
+    :rtype: None
+    """
+
+    logger.info('Agent [%s] is %s', private_url,
+                'reachable' if reachable else 'unreachable')
+    with _lock:
+        _observed[private_url] = {'reachable': reachable,
+                                  'expires': time.time() + PROBE_TTL}
+
+
+def probe(private_url):
+    """Tries to connect to an agent, and remembers whether it could
+
+    :param private_url: the agent's private URL, derived from its pid
+    :type private_url: str
+    :returns: whether the agent is reachable
+    :rtype: bool
+    """
+
+    try:
+        socket.create_connection(address(private_url), PROBE_TIMEOUT).close()
+        reachable = True
+    except (socket.error, socket.timeout):
+        reachable = False
+
+    remember(private_url, reachable)
+    return reachable
+
+
+class Router(object):
+    """Routes requests to Mesos agents.  Through DCOS, they go through the
+    admin router of `core.dcos_url`, unless `direct` is set: they're then
+    sent to the agents themselves, if they can be reached.  Whether an agent
+    can be reached is probed once, and remembered for `PROBE_TTL` seconds,
+    across processes.  Requests to agents that turn out to be unreachable
+    are sent through the admin router.
+
+    :param dcos_url: URL of DCOS; None if Mesos is accessed directly
+    :type dcos_url: str | None
+    :param direct: whether to send requests directly to the agents
+    :type direct: bool
+    :param timeout: request timeout
+    :type timeout: float | None
+    """
+
+    def __init__(self, dcos_url, direct=False, timeout=None):
+        self.dcos_url = dcos_url
+        self.direct = direct
+        self._timeout = timeout
+
+    def proxy_url(self, slave_id, path):
+        """
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param path: the path suffix of the desired URL
+        :type path: str
+        :returns: URL that reaches the agent through the admin router; None
+                  if Mesos is accessed directly
+        :rtype: str | None
+        """
+
+        if not self.dcos_url:
+            return None
+        return urllib.parse.urljoin(self.dcos_url,
+                                    'slave/{}/{}'.format(slave_id, path))
+
+    def is_direct(self, private_url):
+        """
+        :param private_url: the agent's private URL, derived from its pid
+        :type private_url: str
+        :returns: whether requests to the agent are sent directly to it.
+                  The agent is probed if it wasn't recently.
+        :rtype: bool
+        """
+
+        if not self.dcos_url:
+            return True
+        if not self.direct:
+            return False
+
+        reachable = lookup(private_url)
+        if reachable is None:
+            reachable = probe(private_url)
+        return reachable
+
+    def url(self, slave_id, private_url, path):
+        """
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: the agent's private URL, derived from its pid
+        :type private_url: str
+        :param path: the path suffix of the desired URL
+        :type path: str
+        :returns: URL that reaches the agent
+        :rtype: str
+        """
+
+        if self.is_direct(private_url):
+            return urllib.parse.urljoin(private_url, path)
+        return self.proxy_url(slave_id, path)
+
+    def get(self, slave_id, private_url, path, **kwargs):
+        """Reads from an agent.  If it can't be reached directly, it's read
+        through the admin router.
+
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: the agent's private URL, derived from its pid
+        :type private_url: str
+        :param path: the path suffix of the desired URL
+        :type path: str
+        :param kwargs: arguments to `dcos.http.get`
+        :type kwargs: dict
+        :rtype: requests.Response
+        """
+
+        kwargs.setdefault('timeout', self._timeout)
+        url = self.url(slave_id, private_url, path)
+        proxy_url = self.proxy_url(slave_id, path)
+        try:
+            return http.get(url, **kwargs)
+        except DCOSHTTPException:
+            raise
+        except DCOSException as e:
+            if proxy_url is None or url == proxy_url:
+                raise
+            logger.info('Reading [%s] through the admin router: %s', path, e)
+
+        # the rate limits of the admin router weren't waited for
+        kwargs.pop('reserved', None)
+        remember(private_url, False)
+        return http.get(proxy_url, **kwargs)
+
+
+def flush():
+    """Adds the reachability of the agents probed by this process to the
+    file that remembers it
+
+    :rtype: None
+    """
+
+    global _observed
+
+    with _lock:
+        observed, _observed = _observed, {}
+
+    if not observed or _path is None:
+        return
+
+    path = _path
+    try:
+        util.ensure_dir_exists(os.path.dirname(path))
+        with open(path + '.lock', 'a') as lock_file:
+            portalocker.lock(lock_file, portalocker.LOCK_EX)
+            try:
+                now = time.time()
+                probes = dict((url, entry)
+                              for url, entry in _load(path).items()
+                              if entry['expires'] > now)
+                probes.update(observed)
+                with open(path, 'w') as probes_file:
+                    json.dump(probes, probes_file)
+            finally:
+                portalocker.unlock(lock_file)
+    except (IOError, OSError):
+        logger.exception('Unable to write the agent probes [%s]', path)
+
+
+def configure():
+    """Remembers the reachability of the agents probed by the process when
+    it exits
+
+    :rtype: None
+    """
+
+    global _path
+
+    if _path is not None:
+        return
+
+    _path = probes_path()
+    atexit.register(flush)
+
+
+def reset():
+    """Forgets the reachability of agents remembered by the process
+
+    :rtype: None
+    """
+
+    global _probes, _observed
+
+    with _lock:
+        _probes = None
+        _observed = {}
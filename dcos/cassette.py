@@ -0,0 +1,338 @@
+"""Records the HTTP requests of commands and their responses to a cassette
+file, and replays them instead of sending the requests.  Replayed
+commands don't need a cluster, so their CPU cost can be measured apart from
+the cluster's latency.
+
+Requests are matched on their method and URL, so the configuration used to
+replay a cassette must point to the cluster it was recorded from.  The
+responses to a request are replayed in the order they were recorded, and
+the last one is repeated once they're exhausted, e.g. when a log is
+followed.  Credentials are never recorded.
+"""
+
+import atexit
+import base64
+import datetime
+import json
+import threading
+
+import portalocker
+import requests
+from dcos import util, wire
+from dcos.errors import DCOSException
+
+logger = util.get_logger(__name__)
+
+RECORD = 'record'
+REPLAY = 'replay'
+VALID_MODES = [RECORD, REPLAY]
+
+VERSION = 1
+"""Version of the cassette format"""
+
+STRIPPED_HEADERS = wire.SENSITIVE_HEADERS + [
+    'content-encoding', 'transfer-encoding']
+"""Headers that aren't recorded: credentials, and encodings of the body,
+which is recorded decoded"""
+
+_lock = threading.Lock()
+_path = None
+_mode = None
+_latency = 0
+_recorded = []
+_interactions = None  # (METHOD, url) -> [interaction]
+_cursors = {}  # (METHOD, url) -> index of the next interaction
+
+
+def recording():
+    """
+    :returns: whether the process records its HTTP requests
+    :rtype: bool
+    """
+
+    return _mode == RECORD
+
+
+def replaying():
+    """
+    :returns: whether the process replays its HTTP requests
+    :rtype: bool
+    """
+
+    return _mode == REPLAY
+
+
+def empty_cassette():
+    """
+    :returns: cassette without interactions
+    :rtype: dict
+    """
+
+    return {'version': VERSION, 'interactions': []}
+
+
+def load(path):
+    """
+    :param path: path of a cassette
+    :type path: str
+    :returns: the cassette; an empty one if it's missing or malformed
+    :rtype: dict
+    """
+
+    try:
+        with open(path) as cassette_file:
+            return json.load(cassette_file)
+    except (IOError, OSError, ValueError):
+        return empty_cassette()
+
+
+def _headers(headers):
+    """
+    :param headers: HTTP headers
+    :type headers: dict
+    :returns: the headers that are recorded, sorted
+    :rtype: [[str, str]]
+    """
+
+    return sorted([name, value] for name, value in headers.items()
+                  if name.lower() not in STRIPPED_HEADERS)
+
+
+def _recorded_response(response):
+    """
+    :param response: HTTP response, or a redirect that led to it
+    :type response: requests.Response
+    :rtype: dict
+    """
+
+    return {'status': response.status_code,
+            'reason': response.reason or '',
+            'url': response.url,
+            'headers': _headers(response.headers)}
+
+
+def prepare(method, url, auth=None, **kwargs):
+    """Prepares a request like `requests.request` does, to look up its
+    interaction
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param auth: authentication
+    :type auth: AuthBase | None
+    :param kwargs: arguments to requests.request; those that don't shape
+                   the request, such as `stream`, are ignored
+    :type kwargs: dict
+    :rtype: requests.PreparedRequest
+    """
+
+    fields = dict((name, value) for name, value in kwargs.items()
+                  if name in ['headers', 'params', 'data', 'json', 'files'])
+    return requests.Request(method.upper(), url, auth=auth,
+                            **fields).prepare()
+
+
+def record(request, response, seconds):
+    """Records a request and its response, if the process records its
+    requests.  The body of the response is read, even if it's streamed.
+
+    :param request: prepared request, as sent before any redirect
+    :type request: requests.PreparedRequest
+    :param response: HTTP response
+    :type response: requests.Response
+    :param seconds: time it took to get the response
+    :type seconds: float
+    :rtype: None
+    """
+
+    if not recording():
+        return
+
+    recorded = _recorded_response(response)
+    recorded['headers'] = [
+        header for header in recorded['headers']
+        if header[0].lower() != 'content-length'
+    ] + [['Content-Length', str(len(response.content))]]
+    recorded['content'] = wire._har_content(
+        response.content, response.headers.get('content-type', ''))
+    recorded['history'] = [_recorded_response(redirect)
+                           for redirect in response.history]
+
+    interaction = {
+        'request': {'method': request.method,
+                    'url': request.url,
+                    'headers': _headers(request.headers)},
+        'response': recorded,
+        'seconds': seconds,
+    }
+    with _lock:
+        _recorded.append(interaction)
+
+
+def _load_interactions():
+    """Indexes the interactions of the cassette
+
+    :returns: interactions by method and URL
+    :rtype: dict
+    """
+
+    interactions = {}
+    for interaction in load(_path)['interactions']:
+        request = interaction['request']
+        interactions.setdefault(
+            (request['method'], request['url']), []).append(interaction)
+    return interactions
+
+
+def _response(recorded, request, seconds):
+    """
+    :param recorded: recorded response
+    :type recorded: dict
+    :param request: the request it answers
+    :type request: requests.PreparedRequest
+    :param seconds: time it took to get the response
+    :type seconds: float
+    :rtype: requests.Response
+    """
+
+    response = requests.Response()
+    response.status_code = recorded['status']
+    response.reason = recorded['reason']
+    response.url = recorded['url']
+    response.headers.update(dict(recorded['headers']))
+    response.encoding = requests.utils.get_encoding_from_headers(
+        response.headers)
+    response.request = request
+    response.elapsed = datetime.timedelta(seconds=seconds)
+
+    content = recorded.get('content', {})
+    if content.get('encoding') == 'base64':
+        response._content = base64.b64decode(content['text'])
+    else:
+        response._content = content.get('text', '').encode('utf-8')
+    response._content_consumed = True
+    return response
+
+
+def replay(request):
+    """Looks up the response to a request
+
+    :param request: prepared request
+    :type request: requests.PreparedRequest
+    :returns: the recorded response, and the number of seconds to wait
+              before it's returned
+    :rtype: (requests.Response, float)
+    """
+
+    global _interactions
+
+    key = (request.method, request.url)
+    with _lock:
+        if _interactions is None:
+            _interactions = _load_interactions()
+        recorded = _interactions.get(key)
+        if not recorded:
+            raise DCOSException(
+                'No response to [{} {}] was recorded in cassette '
+                '[{}]'.format(request.method, request.url, _path))
+        index = _cursors.get(key, 0)
+        _cursors[key] = min(index + 1, len(recorded) - 1)
+
+    interaction = recorded[index]
+    response = _response(interaction['response'], request,
+                         interaction['seconds'])
+    response.history = [
+        _response(redirect, request, 0)
+        for redirect in interaction['response'].get('history', [])
+    ]
+    return response, interaction['seconds'] * _latency
+
+
+def flush():
+    """Adds the recorded interactions to the cassette.  The processes of a
+    command share the cassette, so it's read and rewritten under a lock.
+
+    :rtype: None
+    """
+
+    global _recorded
+
+    if not recording():
+        return
+
+    with _lock:
+        interactions, _recorded = _recorded, []
+
+    if not interactions:
+        return
+
+    try:
+        with open(_path + '.lock', 'a') as lock_file:
+            portalocker.lock(lock_file, portalocker.LOCK_EX)
+            try:
+                cassette = load(_path)
+                cassette['interactions'].extend(interactions)
+                with open(_path, 'w') as cassette_file:
+                    json.dump(cassette, cassette_file, indent=2,
+                              sort_keys=True)
+            finally:
+                portalocker.unlock(lock_file)
+    except (IOError, OSError):
+        logger.exception('Unable to write cassette [%s]', _path)
+
+
+def configure(path, mode=None, latency=None):
+    """Records the process' HTTP requests to a cassette, or replays them
+    from it.  Recorded interactions are added to the cassette.
+
+    :param path: path of the cassette; None to send requests
+    :type path: str | None
+    :param mode: one of `VALID_MODES`; `REPLAY` by default
+    :type mode: str | None
+    :param latency: factor by which the recorded latency of replayed
+                    responses is multiplied; 0 by default
+    :type latency: str | float | None
+    :rtype: None
+    """
+
+    global _path, _mode, _latency
+
+    if not path or _mode is not None:
+        return
+
+    mode = mode or REPLAY
+    if mode not in VALID_MODES:
+        logger.warning('Unknown cassette mode %r. Valid modes are %r',
+                       mode, VALID_MODES)
+        return
+
+    try:
+        latency = float(latency or 0)
+    except ValueError:
+        logger.warning('Invalid cassette latency factor %r', latency)
+        return
+
+    _path = path
+    _mode = mode
+    _latency = latency
+    if mode == RECORD:
+        atexit.register(flush)
+
+
+def reset():
+    """Stops recording or replaying, without writing the recorded
+    interactions
+
+    :rtype: None
+    """
+
+    global _path, _mode, _latency, _recorded, _interactions
+
+    with _lock:
+        _path = None
+        _mode = None
+        _latency = 0
+        _recorded = []
+        _interactions = None
+        _cursors.clear()
@@ -1,5 +1,6 @@
 import collections
 
+from dcos import perf
 from dcos.errors import DCOSException
 
 Command = collections.namedtuple(
@@ -39,6 +40,7 @@ def execute(cmds, args):
                 match = False
 
         if match:
+            perf.set_command(hierarchy)
             params = [args[name] for name in arg_keys]
             return function(*params)
 
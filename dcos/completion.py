@@ -0,0 +1,208 @@
+import atexit
+import bisect
+import hashlib
+import os
+import threading
+import time
+
+from dcos import util
+from dcos.errors import DCOSException
+
+logger = util.get_logger(__name__)
+
+KINDS = ['app', 'framework', 'node', 'service', 'task']
+"""Kinds of objects that can be completed from the local index."""
+
+INDEX_SUBDIR = 'completion'
+"""Cache subdirectory that holds one index file per kind."""
+
+UPDATE_INTERVAL = 60
+"""Seconds during which an index update isn't run again by the same
+process, e.g. on every cycle of `--watch`"""
+
+EXIT_TIMEOUT = 1
+"""Seconds for which a process that exits waits for its index updates"""
+
+_lock = threading.Lock()
+_digests = {}  # index path -> digest of the IDs last written
+_updates = {}  # update function -> (time it started, thread)
+
+
+def index_path(kind):
+    """Returns the path of the index file for `kind`.  The file holds one
+    ID per line, sorted, so that shell completion scripts can read it
+    without starting a python interpreter.
+
+    :param kind: kind of object. One of `KINDS`
+    :type kind: str
+    :returns: path to the index file
+    :rtype: str
+    """
+
+    if kind not in KINDS:
+        raise DCOSException(
+            'Unknown completion kind [{}]. Valid kinds are {!r}'.format(
+                kind, KINDS))
+
+    return util.get_cache_path(INDEX_SUBDIR, kind)
+
+
+def query(kind, prefix=''):
+    """Returns the indexed IDs of `kind` that start with `prefix`.  Only
+    reads the local index; it never touches the network.
+
+    :param kind: kind of object. One of `KINDS`
+    :type kind: str
+    :param prefix: prefix to match
+    :type prefix: str
+    :returns: matching IDs, sorted
+    :rtype: [str]
+    """
+
+    path = index_path(kind)
+    try:
+        with open(path) as index_file:
+            ids = index_file.read().splitlines()
+    except IOError:
+        return []
+
+    start = bisect.bisect_left(ids, prefix)
+    matches = []
+    for id_ in ids[start:]:
+        if not id_.startswith(prefix):
+            break
+        matches.append(id_)
+    return matches
+
+
+def update(kind, ids):
+    """Replaces the index of `kind` with `ids`.  The file is only rewritten
+    if its contents change, and not read again once this process wrote
+    the same IDs.
+
+    :param kind: kind of object. One of `KINDS`
+    :type kind: str
+    :param ids: IDs to index
+    :type ids: iterable of str
+    :rtype: None
+    """
+
+    path = index_path(kind)
+    data = ''.join(id_ + '\n' for id_ in sorted(set(ids)) if id_)
+    data = data.encode('utf-8')
+
+    digest = hashlib.sha1(data).hexdigest()
+    with _lock:
+        written = _digests.get(path) == digest
+        _digests[path] = digest
+
+    try:
+        if written:
+            # touch the index, so that it isn't considered stale
+            os.utime(path, None)
+            return
+        with open(path, 'rb') as index_file:
+            if index_file.read() == data:
+                os.utime(path, None)
+                return
+    except (IOError, OSError):
+        pass
+
+    util.write_file_atomic(path, data)
+
+
+def update_from_master_state(state):
+    """Indexes the tasks, frameworks and nodes of a master's state.json or
+    state-summary.
+
+    :param state: master's state.json or state-summary
+    :type state: dict
+    :rtype: None
+    """
+
+    update_from_state_summary(state)
+
+    # state-summary doesn't include tasks
+    frameworks = state.get('frameworks', [])
+    if any('tasks' in framework for framework in frameworks):
+        update('task', (task['id']
+                        for framework in frameworks
+                        for task in framework.get('tasks', [])))
+
+
+def update_from_state_summary(summary):
+    """Indexes the frameworks and nodes of a master's state-summary or
+    state.json.
+
+    :param summary: master's state-summary or state.json
+    :type summary: dict
+    :rtype: None
+    """
+
+    frameworks = summary.get('frameworks', [])
+    update('framework', (framework['id'] for framework in frameworks))
+    update('service', (framework['name'] for framework in frameworks))
+    update('node', (slave['id'] for slave in summary.get('slaves', [])))
+
+
+def update_from_apps(apps):
+    """Indexes marathon applications.
+
+    :param apps: marathon applications, as returned by v2/apps
+    :type apps: [dict]
+    :rtype: None
+    """
+
+    update('app', (app['id'] for app in apps))
+
+
+def update_in_background(fn, *args):
+    """Runs the index update `fn` in a separate daemon thread, so that the
+    command that fetched the state doesn't wait for it.  The update is
+    skipped if `fn` is still running, or started less than
+    `UPDATE_INTERVAL` seconds ago.  An exiting process waits at most
+    `EXIT_TIMEOUT` seconds for it.  Errors are only logged: completion
+    data is best-effort.
+
+    :param fn: index update function
+    :type fn: function
+    :param args: arguments for `fn`
+    :type args: [object]
+    :returns: the thread that runs the update; None if it is skipped
+    :rtype: threading.Thread | None
+    """
+
+    def run():
+        try:
+            fn(*args)
+        except Exception:
+            logger.exception('Unable to update the completion index')
+
+    with _lock:
+        started, thread = _updates.get(fn, (None, None))
+        if thread is not None and (
+                thread.is_alive() or
+                time.time() - started < UPDATE_INTERVAL):
+            return None
+
+        if not _updates:
+            atexit.register(_join_updates)
+        thread = threading.Thread(target=run, name='completion-index')
+        thread.daemon = True
+        _updates[fn] = (time.time(), thread)
+        thread.start()
+    return thread
+
+
+def _join_updates():
+    """Waits, up to `EXIT_TIMEOUT` seconds in total, for the index updates
+    that are still running
+
+    :rtype: None
+    """
+
+    deadline = time.time() + EXIT_TIMEOUT
+    with _lock:
+        threads = [thread for _, thread in _updates.values()]
+    for thread in threads:
+        thread.join(max(deadline - time.time(), 0))
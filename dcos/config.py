@@ -5,6 +5,7 @@ from dcos import util
 from dcos.errors import DCOSException
 
 
+@util.duration
 def load_from_path(path, mutable=False):
     """Loads a TOML file from the path
 
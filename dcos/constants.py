@@ -1,6 +1,9 @@
 DCOS_DIR = ".dcos"
 """DCOS data directory.  Can store subcommands and the config file."""
 
+DCOS_CACHE_SUBDIR = 'cache'
+"""In the DCOS data directory, this is the subdirectory for cached state."""
+
 DCOS_SUBCOMMAND_VIRTUALENV_SUBDIR = 'env'
 """In a package's directory, this is the virtualenv subdirectory."""
 
@@ -11,12 +14,53 @@ relative to the location of the executable."""
 DCOS_CONFIG_ENV = 'DCOS_CONFIG'
 """Name of the environment variable pointing to the DCOS config."""
 
+DCOS_CACHE_DIR_ENV = 'DCOS_CACHE_DIR'
+"""Name of the environment variable pointing to the DCOS cache directory."""
+
 DCOS_LOG_LEVEL_ENV = 'DCOS_LOG_LEVEL'
 """Name of the environment variable for the DCOS log level"""
 
 DCOS_DEBUG_ENV = 'DCOS_DEBUG'
 """Name of the environment variable to enable DCOS debug messages"""
 
+DCOS_METRICS_ENV = 'DCOS_METRICS'
+"""Name of the environment variable to print HTTP metrics on exit"""
+
+DCOS_TRACE_ENV = 'DCOS_TRACE'
+"""Name of the environment variable pointing to the file where spans are
+written in Chrome's trace event format"""
+
+DCOS_TRACE_PARENT_ENV = 'DCOS_TRACE_PARENT'
+"""Name of the environment variable holding the pid of the traced process
+that started the current one"""
+
+DCOS_PROFILE_ENV = 'DCOS_PROFILE'
+"""Name of the environment variable with the path prefix of cProfile stats"""
+
+DCOS_HAR_ENV = 'DCOS_HAR'
+"""Name of the environment variable pointing to the file where HTTP requests
+and responses are archived in HAR format"""
+
+DCOS_HAR_PARENT_ENV = 'DCOS_HAR_PARENT'
+"""Name of the environment variable holding the pid of the process that
+started the HAR archive"""
+
+DCOS_CASSETTE_ENV = 'DCOS_CASSETTE'
+"""Name of the environment variable pointing to the cassette to which HTTP
+requests and responses are recorded, or from which they're replayed"""
+
+DCOS_CASSETTE_MODE_ENV = 'DCOS_CASSETTE_MODE'
+"""Name of the environment variable that says whether the cassette is
+recorded or replayed"""
+
+DCOS_CASSETTE_LATENCY_ENV = 'DCOS_CASSETTE_LATENCY'
+"""Name of the environment variable holding the factor by which recorded
+latencies are multiplied when a cassette is replayed"""
+
+DCOS_PERF_START_ENV = 'DCOS_PERF_START'
+"""Name of the environment variable holding the time at which the command
+started, as recorded in the performance ledger"""
+
 DCOS_PAGER_COMMAND_ENV = 'PAGER'
 """Command to use to page long command output (e.g. 'less -R')"""
 
@@ -0,0 +1,227 @@
+import json
+import os
+import threading
+import time
+
+import portalocker
+from dcos import util
+from requests.auth import AuthBase, HTTPBasicAuth, _basic_auth_str
+
+from six.moves.urllib.parse import urlparse
+
+CREDENTIALS_SUBDIR = 'auth'
+"""Cache subdirectory that holds the HTTP credentials"""
+
+DEFAULT_TTL = 3600
+"""Default number of seconds for which credentials are remembered"""
+
+logger = util.get_logger(__name__)
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_lock = threading.Lock()
+_ttls = {}
+
+
+class AuthorizationHeader(AuthBase):
+    """Authenticates requests with a stored Authorization header
+
+    :param value: value of the Authorization header
+    :type value: str
+    """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __eq__(self, other):
+        return isinstance(other, AuthorizationHeader) and \
+            self.value == other.value
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __call__(self, request):
+        request.headers['Authorization'] = self.value
+        return request
+
+
+def origin(url):
+    """Returns the origin of a URL, that credentials are remembered for.
+    Credentials of a host aren't sent to it over another scheme or port,
+    where they could be sent in the clear.
+
+    :param url: request URL
+    :type url: str
+    :returns: <scheme>://<hostname>[:<port>]; the port is left out if it's
+              the scheme's default
+    :rtype: str
+    """
+
+    parsed = urlparse(url)
+    scheme = parsed.scheme.lower()
+    netloc = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != _DEFAULT_PORTS.get(scheme):
+        netloc += ':{}'.format(parsed.port)
+    return '{}://{}'.format(scheme, netloc)
+
+
+def _credentials_path():
+    """
+    :returns: path of the credentials file
+    :rtype: str
+    """
+
+    return util.get_cache_path(CREDENTIALS_SUBDIR, 'credentials.json')
+
+
+def _ttl():
+    """
+    :returns: how long credentials are remembered, from `core.auth_cache_ttl`;
+              0 if they aren't
+    :rtype: int
+    """
+
+    # the config is read once per process, not once per request
+    path = util.get_config_path()
+    if path not in _ttls:
+        _ttls[path] = util.get_config().get('core.auth_cache_ttl',
+                                            DEFAULT_TTL)
+    return _ttls[path]
+
+
+def _read(path):
+    """
+    :param path: path of the credentials file
+    :type path: str
+    :returns: the credentials that haven't expired, keyed by
+              '<origin> <realm>'
+    :rtype: dict
+    """
+
+    try:
+        with open(path) as credentials_file:
+            entries = json.load(credentials_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+    now = time.time()
+    return dict((key, entry) for key, entry in entries.items()
+                if entry.get('expires', 0) > now)
+
+
+def _update(update):
+    """Rewrites the credentials file under a lock.  The file is only
+    readable by its owner.
+
+    :param update: function that modifies the credentials in place
+    :type update: dict -> None
+    :rtype: None
+    """
+
+    path = _credentials_path()
+    try:
+        util.ensure_dir_exists(os.path.dirname(path))
+        with open(path + '.lock', 'a') as lock_file:
+            portalocker.lock(lock_file, portalocker.LOCK_EX)
+            try:
+                entries = _read(path)
+                update(entries)
+
+                fd = os.open(path + '.tmp',
+                             os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                with os.fdopen(fd, 'w') as credentials_file:
+                    json.dump(entries, credentials_file)
+                if os.path.exists(path):
+                    os.remove(path)
+                os.rename(path + '.tmp', path)
+            finally:
+                portalocker.unlock(lock_file)
+    except (IOError, OSError):
+        logger.exception('Unable to update the credentials file [%s]', path)
+
+
+def _key(origin, realm):
+    return '{} {}'.format(origin, realm)
+
+
+def lookup(origin):
+    """Returns the remembered credentials of an origin, to be sent before
+    the host asks for them.  The realm isn't known until the host answers
+    with a challenge, so the most recently stored credentials of any realm
+    are used.
+
+    :param origin: origin of the request, see `origin`
+    :type origin: str
+    :returns: credentials; None if there are none, or if they aren't
+              remembered
+    :rtype: AuthorizationHeader | None
+    """
+
+    if not _ttl():
+        return None
+
+    with _lock:
+        entries = _read(_credentials_path())
+
+    matches = sorted((entry['expires'], entry['authorization'])
+                     for entry in entries.values()
+                     if entry.get('origin') == origin)
+    if not matches:
+        return None
+    return AuthorizationHeader(matches[-1][1])
+
+
+def store(origin, realm, auth):
+    """Remembers valid credentials of an origin for `core.auth_cache_ttl`
+    seconds
+
+    :param origin: origin of the request, see `origin`
+    :type origin: str
+    :param realm: authentication realm
+    :type realm: str
+    :param auth: credentials
+    :type auth: HTTPBasicAuth | AuthorizationHeader
+    :rtype: None
+    """
+
+    ttl = _ttl()
+    if not ttl:
+        return
+
+    if isinstance(auth, HTTPBasicAuth):
+        authorization = _basic_auth_str(auth.username, auth.password)
+    elif isinstance(auth, AuthorizationHeader):
+        authorization = auth.value
+    else:
+        return
+
+    def add(entries):
+        entries[_key(origin, realm)] = {
+            'origin': origin,
+            'realm': realm,
+            'authorization': authorization,
+            'expires': time.time() + ttl,
+        }
+
+    with _lock:
+        _update(add)
+
+
+def forget(origin, auth):
+    """Forgets credentials that a host rejected
+
+    :param origin: origin of the request, see `origin`
+    :type origin: str
+    :param auth: rejected credentials
+    :type auth: AuthorizationHeader
+    :rtype: None
+    """
+
+    def remove(entries):
+        for key, entry in list(entries.items()):
+            if entry.get('origin') == origin and \
+                    entry['authorization'] == auth.value:
+                del entries[key]
+
+    with _lock:
+        _update(remove)
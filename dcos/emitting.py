@@ -92,6 +92,7 @@ def print_handler(event):
         _page(event, pager_command)
 
 
+@util.duration
 def publish_table(emitter, objs, table_fn, json_):
     """Publishes a json representation of `objs` if `json_` is True,
     otherwise, publishes a table representation.
@@ -116,6 +117,7 @@ def publish_table(emitter, objs, table_fn, json_):
             emitter.publish(output)
 
 
+@util.duration
 def _process_json(event, pager_command):
     """Conditionally highlights the supplied JSON value.
 
@@ -151,6 +153,7 @@ def _process_json(event, pager_command):
     return json_output
 
 
+@util.duration
 def _page(output, pager_command=None):
     """Conditionally pipes the supplied output through a pager.
 
@@ -2,9 +2,11 @@ import getpass
 import os
 import sys
 import threading
+import time
 
 import requests
-from dcos import constants, util
+from dcos import (cassette, constants, credentials, httpcache, metrics,
+                  ratelimit, retry, timeouts, util, wire)
 from dcos.errors import DCOSException, DCOSHTTPException
 from requests.auth import HTTPBasicAuth
 
@@ -16,7 +18,14 @@ lock = threading.Lock()
 DEFAULT_TIMEOUT = 5
 
 # only accessed from _request_with_auth
-AUTH_CREDS = {}  # (hostname, realm) -> AuthBase()
+AUTH_CREDS = {}  # (origin, realm) -> AuthBase()
+
+# credentials sent before the host asks for them
+PREEMPTIVE_AUTH = {}  # origin -> AuthBase() | None
+
+# requests in flight, shared by identical concurrent requests
+_flights = {}  # _flight_key() -> _Flight()
+_flights_lock = threading.Lock()
 
 
 def _default_is_success(status_code):
@@ -38,8 +47,15 @@ def _request(method,
              timeout=DEFAULT_TIMEOUT,
              auth=None,
              verify=None,
+             reserved=False,
              **kwargs):
-    """Sends an HTTP request.
+    """Sends an HTTP request.  Requests with idempotent methods are retried
+    with exponential backoff if the host can't be reached or a proxy
+    answers with a 502, 503 or 504.  Requests to a host that is known to
+    be down fail immediately.  Unless `timeout` is a (connect, read) tuple,
+    the timeouts are chosen by `dcos.timeouts` from the endpoint's latency
+    history.  Every attempt waits for the process' rate limits, see
+    `dcos.ratelimit`.
 
     :param method: method for the new Request object
     :type method: str
@@ -53,6 +69,76 @@ def _request(method,
     :type auth: AuthBase
     :param verify: whether to verify SSL certs or path to cert(s)
     :type verify: bool | str
+    :param reserved: whether the caller already waited for the rate limits
+        of the first attempt, see `dcos.ratelimit.acquire`
+    :type reserved: bool
+    :param kwargs: Additional arguments to requests.request
+        (see http://docs.python-requests.org/en/latest/api/#requests.request)
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    breaker = retry.get_breaker(url)
+    retries = retry.max_retries(method)
+
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise DCOSException(
+                'URL [{0}] is unreachable: {1} is down. It will be retried '
+                'in {2:.0f} seconds.'.format(url, breaker.host,
+                                             breaker.retry_in()))
+
+        ratelimit.acquire(method, url, reserved=reserved and attempt == 0)
+        attempt_timeout = timeouts.choose(method, url, timeout)
+        try:
+            response = _send_request(method, url, attempt_timeout, auth,
+                                     verify, **kwargs)
+        except requests.exceptions.RequestException as e:
+            unreachable = isinstance(e, (requests.exceptions.ConnectionError,
+                                         requests.exceptions.Timeout))
+            if unreachable:
+                breaker.record_failure()
+            else:
+                breaker.release()
+            if isinstance(e, requests.exceptions.ReadTimeout):
+                timeouts.observe_timeout(method, url, attempt_timeout)
+            if not unreachable or attempt >= retries:
+                raise _to_exception(e)
+        except BaseException:
+            # a probe must not keep the circuit of the host open
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            if response.elapsed is not None:
+                timeouts.observe(method, url,
+                                 response.elapsed.total_seconds())
+            if response.status_code not in retry.RETRY_STATUSES or \
+                    attempt >= retries:
+                return response
+            response.close()
+
+        metrics.registry.record_retry(method, url)
+        time.sleep(retry.backoff(attempt))
+        attempt += 1
+
+
+def _send_request(method, url, timeout, auth, verify, **kwargs):
+    """Sends an HTTP request once, and logs and records it.  If a cassette
+    is replayed, its recorded response is returned instead, see
+    `dcos.cassette`.
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param timeout: (connect, read) timeouts
+    :type timeout: (float, float)
+    :param auth: authentication
+    :type auth: AuthBase
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
     :param kwargs: Additional arguments to requests.request
         (see http://docs.python-requests.org/en/latest/api/#requests.request)
     :type kwargs: dict
@@ -63,33 +149,124 @@ def _request(method,
         'Sending HTTP [%r] to [%r]: %r',
         method,
         url,
-        kwargs.get('headers'))
+        wire.redact_headers(kwargs.get('headers')))
 
+    start = time.time()
     try:
-        response = requests.request(
-            method=method,
-            url=url,
-            timeout=timeout,
-            auth=auth,
-            verify=verify,
-            **kwargs)
-    except requests.exceptions.ConnectionError as e:
+        if cassette.replaying():
+            response = _replay(method, url, auth, **kwargs)
+        else:
+            response = requests.request(
+                method=method,
+                url=url,
+                timeout=timeout,
+                auth=auth,
+                verify=verify,
+                **kwargs)
+    except requests.exceptions.RequestException as e:
+        seconds = time.time() - start
+        metrics.registry.record_request(
+            method, url, None, seconds, bytes_sent=_body_size(e.request))
+        wire.record(e.request, None, start, seconds, error=e)
+        raise
+
+    if cassette.recording():
+        first = response.history[0] if response.history else response
+        cassette.record(first.request, response, time.time() - start)
+
+    # the body is only read and formatted if the message is logged
+    logger.info('Received HTTP response [%r]: %s',
+                response.status_code,
+                wire.LoggedBody(response, kwargs.get('stream')))
+
+    seconds = time.time() - start
+    metrics.registry.record_request(
+        method, url, response.status_code, seconds,
+        bytes_sent=_body_size(response.request),
+        bytes_received=_content_size(response, kwargs.get('stream')))
+    wire.record(response.request, response, start, seconds,
+                kwargs.get('stream'))
+
+    return response
+
+
+def _replay(method, url, auth, **kwargs):
+    """Returns the response recorded in the cassette, after its simulated
+    latency
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param auth: authentication
+    :type auth: AuthBase
+    :param kwargs: Additional arguments to requests.request
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    response, delay = cassette.replay(
+        cassette.prepare(method, url, auth, **kwargs))
+    if delay > 0:
+        time.sleep(delay)
+    return response
+
+
+def _to_exception(e):
+    """Converts an error raised by requests to a DCOSException
+
+    :param e: requests' error
+    :type e: requests.exceptions.RequestException
+    :rtype: DCOSException
+    """
+
+    if isinstance(e, requests.exceptions.ConnectionError):
         logger.exception("HTTP Connection Error")
-        raise DCOSException('URL [{0}] is unreachable: {1}'.format(
+        return DCOSException('URL [{0}] is unreachable: {1}'.format(
             e.request.url, e))
-    except requests.exceptions.Timeout as e:
+    elif isinstance(e, requests.exceptions.Timeout):
         logger.exception("HTTP Timeout")
-        raise DCOSException('Request to URL [{0}] timed out.'.format(
+        return DCOSException('Request to URL [{0}] timed out.'.format(
             e.request.url))
-    except requests.exceptions.RequestException as e:
+    else:
         logger.exception("HTTP Exception")
-        raise DCOSException('HTTP Exception: {}'.format(e))
+        return DCOSException('HTTP Exception: {}'.format(e))
 
-    logger.info('Received HTTP response [%r]: %r',
-                response.status_code,
-                response.text)
 
-    return response
+def _body_size(request):
+    """Returns the size of a request's body
+
+    :param request: prepared request, if one was built
+    :type request: requests.PreparedRequest | None
+    :returns: body size in bytes; 0 if unknown
+    :rtype: int
+    """
+
+    body = getattr(request, 'body', None)
+    if isinstance(body, (bytes, str)):
+        return len(body)
+    return 0
+
+
+def _content_size(response, stream):
+    """Returns the size of a response's body, without consuming it if
+    the response is streamed
+
+    :param response: HTTP response
+    :type response: requests.Response
+    :param stream: whether the response body is streamed
+    :type stream: bool
+    :returns: body size in bytes; 0 if unknown
+    :rtype: int
+    """
+
+    if not stream:
+        return len(response.content)
+
+    try:
+        return int(response.headers.get('content-length', 0))
+    except ValueError:
+        return 0
 
 
 def _request_with_auth(response,
@@ -98,6 +275,7 @@ def _request_with_auth(response,
                        is_success=_default_is_success,
                        timeout=None,
                        verify=None,
+                       reserved=False,
                        **kwargs):
     """Try request (3 times) with credentials if 401 returned from server
 
@@ -113,6 +291,9 @@ def _request_with_auth(response,
     :type timeout: int
     :param verify: whether to verify SSL certs or path to cert(s)
     :type verify: bool | str
+    :param reserved: ignored; the retries with credentials wait for the
+        rate limits
+    :type reserved: bool
     :param kwargs: Additional arguments to requests.request
         (see http://docs.python-requests.org/en/latest/api/#requests.request)
     :type kwargs: dict
@@ -120,8 +301,8 @@ def _request_with_auth(response,
     """
     i = 0
     while i < 3 and response.status_code == 401:
-        hostname = urlparse(response.url).hostname
-        creds = (hostname, _get_realm(response))
+        origin = credentials.origin(response.url)
+        creds = (origin, _get_realm(response))
 
         with lock:
             if creds not in AUTH_CREDS:
@@ -130,6 +311,7 @@ def _request_with_auth(response,
                 auth = AUTH_CREDS[creds]
 
         # try request again, with auth
+        metrics.registry.record_reauth(method, url)
         response = _request(method, url, is_success, timeout, auth,
                             verify, **kwargs)
 
@@ -137,6 +319,8 @@ def _request_with_auth(response,
         with lock:
             if creds not in AUTH_CREDS and response.status_code == 200:
                 AUTH_CREDS[creds] = auth
+                PREEMPTIVE_AUTH[origin] = auth
+                credentials.store(origin, creds[1], auth)
 
         i += 1
 
@@ -154,6 +338,8 @@ def request(method,
             **kwargs):
     """Sends an HTTP request. If the server responds with a 401, ask the
     user for their credentials, and try request again (up to 3 times).
+    Identical GETs sent concurrently, e.g. from `util.stream` workers,
+    share a single request and its response.
 
     :param method: method for the new Request object
     :type method: str
@@ -185,17 +371,237 @@ def request(method,
     if verify is not None:
         silence_requests_warnings()
 
-    response = _request(method, url, is_success, timeout,
+    key = _flight_key(method, url, timeout, verify, kwargs)
+    if key is None:
+        response = _fetch(method, url, is_success, timeout, verify, **kwargs)
+    else:
+        response = _single_flight(
+            key,
+            lambda: _fetch(method, url, is_success, timeout, verify,
+                           **kwargs))
+
+    if is_success(response.status_code):
+        return response
+    else:
+        raise DCOSHTTPException(response)
+
+
+class _Flight(object):
+    """A request in flight, whose outcome is shared by identical requests
+    sent while it's running"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.response = None
+        self.error = None
+
+
+def _flight_key(method, url, timeout, verify, kwargs):
+    """Returns the key under which identical concurrent requests are
+    coalesced
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param timeout: request timeout
+    :type timeout: int
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param kwargs: Additional arguments to requests.request
+    :type kwargs: dict
+    :returns: the key; None if the request can't be coalesced, because it
+              isn't a GET, it has a body or its response is streamed
+    :rtype: tuple | None
+    """
+
+    if method.upper() != 'GET' or \
+            set(kwargs) - set(['headers', 'params', 'auth', 'reserved']):
+        return None
+
+    params = kwargs.get('params')
+    if isinstance(params, dict):
+        params = sorted(params.items())
+
+    auth = kwargs.get('auth')
+    if isinstance(auth, HTTPBasicAuth):
+        auth = (auth.username, auth.password)
+    elif auth is not None:
+        auth = id(auth)
+
+    headers = sorted((kwargs.get('headers') or {}).items())
+    return (url, repr(params), auth, repr(headers), timeout, repr(verify))
+
+
+def _single_flight(key, send):
+    """Sends a request, unless an identical one is in flight, in which case
+    its response is shared.  Its error, if it fails, is raised in every
+    thread that waited for it.
+
+    :param key: key of the request, from `_flight_key`
+    :type key: tuple
+    :param send: function that sends the request
+    :type send: () -> Response
+    :rtype: Response
+    """
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        is_leader = flight is None
+        if is_leader:
+            flight = _flights[key] = _Flight()
+
+    if not is_leader:
+        logger.info('Waiting for the identical request to [%r] in flight',
+                    key[0])
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.response
+
+    try:
+        flight.response = send()
+    except Exception as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            del _flights[key]
+        flight.done.set()
+
+    return flight.response
+
+
+def _fetch(method, url, is_success, timeout, verify, **kwargs):
+    """Sends an HTTP request, through the HTTP cache if it's enabled and
+    the response is cacheable
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param timeout: request timeout
+    :type timeout: int
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param kwargs: Additional arguments to requests.request
+        (see http://docs.python-requests.org/en/latest/api/#requests.request)
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    cache = None
+    if httpcache.is_cacheable(method, url, kwargs.get('stream')):
+        cache = httpcache.create_cache()
+
+    if cache is None:
+        return _send(method, url, is_success, timeout, verify, **kwargs)
+    return _send_with_cache(cache, method, url, is_success, timeout, verify,
+                            **kwargs)
+
+
+def _send(method, url, is_success, timeout, verify, **kwargs):
+    """Sends an HTTP request, asking the user for their credentials if
+    the server responds with a 401
+
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param timeout: request timeout
+    :type timeout: int
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param kwargs: Additional arguments to requests.request
+        (see http://docs.python-requests.org/en/latest/api/#requests.request)
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    origin = credentials.origin(url)
+    auth = kwargs.pop('auth', None) or _preemptive_auth(origin)
+    response = _request(method, url, is_success, timeout, auth,
                         verify=verify, **kwargs)
 
     if response.status_code == 401:
+        if isinstance(auth, credentials.AuthorizationHeader):
+            with lock:
+                PREEMPTIVE_AUTH.pop(origin, None)
+            credentials.forget(origin, auth)
+
         response = _request_with_auth(response, method, url, is_success,
                                       timeout, verify, **kwargs)
 
-    if is_success(response.status_code):
-        return response
+    return response
+
+
+def _preemptive_auth(origin):
+    """Returns the credentials to send to an origin before it asks for
+    them: those it accepted earlier in this process, or remembered ones
+
+    :param origin: origin of the request, see `credentials.origin`
+    :type origin: str
+    :rtype: AuthBase | None
+    """
+
+    with lock:
+        if origin not in PREEMPTIVE_AUTH:
+            PREEMPTIVE_AUTH[origin] = credentials.lookup(origin)
+        return PREEMPTIVE_AUTH[origin]
+
+
+def _send_with_cache(cache, method, url, is_success, timeout, verify,
+                     **kwargs):
+    """Sends an HTTP request that revalidates the cached response, if there
+    is one.  If the server responds with a 304, the cached response is
+    returned.
+
+    :param cache: HTTP cache
+    :type cache: dcos.httpcache.HTTPCache
+    :param method: method for the new Request object
+    :type method: str
+    :param url: URL for the new Request object
+    :type url: str
+    :param is_success: Defines successful status codes for the request
+    :type is_success: Function from int to bool
+    :param timeout: request timeout
+    :type timeout: int
+    :param verify: whether to verify SSL certs or path to cert(s)
+    :type verify: bool | str
+    :param kwargs: Additional arguments to requests.request
+        (see http://docs.python-requests.org/en/latest/api/#requests.request)
+    :type kwargs: dict
+    :rtype: Response
+    """
+
+    headers = kwargs.pop('headers') or {}
+    key = cache.key(url, kwargs.get('params'), headers)
+    meta = cache.lookup(key)
+
+    if meta is None:
+        response = _send(method, url, is_success, timeout, verify,
+                         headers=headers, **kwargs)
     else:
-        raise DCOSHTTPException(response)
+        conditional = dict(headers, **cache.conditional_headers(meta))
+        response = _send(method, url, is_success, timeout, verify,
+                         headers=conditional, **kwargs)
+        if response.status_code == 304:
+            if cache.serve(key, meta, response) is not None:
+                metrics.registry.record_cache_hit(method, url)
+                return response
+
+            # the entry was evicted since it was looked up
+            response = _send(method, url, is_success, timeout, verify,
+                             headers=headers, **kwargs)
+
+    if response.status_code == 200:
+        cache.store(key, response)
+
+    return response
 
 
 def head(url, **kwargs):
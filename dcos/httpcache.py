@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import re
+
+from dcos import util
+from dcos.errors import DCOSException
+
+from six.moves.urllib.parse import urlencode, urlparse
+
+logger = util.get_logger(__name__)
+
+CACHE_SUBDIR = 'http'
+"""Cache subdirectory that holds the HTTP responses"""
+
+DEFAULT_MAX_SIZE = 64
+"""Default size of the HTTP cache, in MiB"""
+
+CACHEABLE_PATHS = [
+    re.compile(r'/v2/(?:apps|groups|deployments)(?:/|$)'),
+    re.compile(r'^/metadata$'),
+    re.compile(r'\.zip$'),
+    re.compile(r'^(?:/slave/[^/]+)?/state(?:\.json)?$'),
+]
+"""Paths of the GET requests whose responses are cached.  They are
+revalidated with the server on every request, so a stale response is never
+served."""
+
+STORED_HEADERS = ['Content-Type', 'Content-Encoding', 'ETag',
+                  'Last-Modified']
+"""Response headers that are stored with the body"""
+
+_caches = {}
+
+
+def is_cacheable(method, url, stream=False):
+    """Returns whether the response to a request may be cached
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param stream: whether the response body is streamed
+    :type stream: bool
+    :rtype: bool
+    """
+
+    if method.upper() != 'GET' or stream:
+        return False
+
+    path = urlparse(url).path
+    return any(regex.search(path) for regex in CACHEABLE_PATHS)
+
+
+def create_cache():
+    """Returns the HTTP cache, if it's enabled with `core.http_cache`
+
+    :returns: the HTTP cache; None if it's disabled
+    :rtype: HTTPCache | None
+    """
+
+    # the config is read once per process, not once per request
+    path = util.get_config_path()
+    if path not in _caches:
+        config = util.get_config()
+        if config.get('core.http_cache', False):
+            max_size = config.get('core.http_cache_size', DEFAULT_MAX_SIZE)
+            _caches[path] = HTTPCache(util.get_cache_path(CACHE_SUBDIR),
+                                      max_size << 20)
+        else:
+            _caches[path] = None
+    return _caches[path]
+
+
+def reset():
+    """Forgets the configured caches
+
+    :rtype: None
+    """
+
+    _caches.clear()
+
+
+class HTTPCache(object):
+    """On-disk cache of HTTP responses, revalidated with conditional
+    requests.  Every entry is a body file and a metadata file; the least
+    recently used entries are evicted when the bodies exceed `max_bytes`.
+
+    :param directory: directory of the cache entries
+    :type directory: str
+    :param max_bytes: size of the cache
+    :type max_bytes: int
+    """
+
+    def __init__(self, directory, max_bytes):
+        self._directory = directory
+        self._max_bytes = max_bytes
+
+    def _path(self, key, extension):
+        return os.path.join(self._directory, key + extension)
+
+    @staticmethod
+    def key(url, params=None, headers=None):
+        """Returns the cache key of a request
+
+        :param url: request URL
+        :type url: str
+        :param params: query parameters
+        :type params: dict | None
+        :param headers: request headers
+        :type headers: dict | None
+        :rtype: str
+        """
+
+        accept = (headers or {}).get('Accept', '')
+        query = urlencode(sorted((params or {}).items()))
+        data = '\n'.join([url, query, accept])
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def lookup(self, key):
+        """Returns the stored metadata of a response
+
+        :param key: cache key
+        :type key: str
+        :returns: the metadata; None if no complete entry is stored
+        :rtype: dict | None
+        """
+
+        try:
+            with open(self._path(key, '.json')) as meta_file:
+                meta = json.load(meta_file)
+            if os.path.getsize(self._path(key, '.body')) != meta['size']:
+                return None
+        except (IOError, OSError, ValueError, KeyError):
+            return None
+
+        return meta
+
+    @staticmethod
+    def conditional_headers(meta):
+        """Returns the headers that revalidate a stored response
+
+        :param meta: metadata of the stored response
+        :type meta: dict
+        :rtype: dict
+        """
+
+        headers = {}
+        if meta['headers'].get('ETag'):
+            headers['If-None-Match'] = meta['headers']['ETag']
+        if meta['headers'].get('Last-Modified'):
+            headers['If-Modified-Since'] = meta['headers']['Last-Modified']
+        return headers
+
+    def serve(self, key, meta, response):
+        """Turns a 304 Not Modified response into the stored response
+
+        :param key: cache key
+        :type key: str
+        :param meta: metadata of the stored response
+        :type meta: dict
+        :param response: 304 response
+        :type response: requests.Response
+        :returns: `response`, with the stored status, headers and body;
+                  None if the body can't be read
+        :rtype: requests.Response | None
+        """
+
+        body_path = self._path(key, '.body')
+        try:
+            with open(body_path, 'rb') as body_file:
+                content = body_file.read()
+            # bump the entry in the LRU order
+            os.utime(body_path, None)
+        except (IOError, OSError):
+            return None
+
+        response.status_code = meta['status']
+        response.headers.update(meta['headers'])
+        response.headers['Content-Length'] = str(len(content))
+        response._content = content
+        response._content_consumed = True
+        return response
+
+    def store(self, key, response):
+        """Stores a response, if it has validators
+
+        :param key: cache key
+        :type key: str
+        :param response: HTTP response
+        :type response: requests.Response
+        :rtype: None
+        """
+
+        if 'no-store' in response.headers.get('Cache-Control', ''):
+            return
+
+        headers = dict((name, response.headers[name])
+                       for name in STORED_HEADERS if name in response.headers)
+        if 'ETag' not in headers and 'Last-Modified' not in headers:
+            return
+
+        content = response.content
+        if len(content) > self._max_bytes:
+            return
+
+        meta = {'url': response.url, 'status': response.status_code,
+                'headers': headers, 'size': len(content)}
+        try:
+            # the body is written first: lookup ignores an entry whose
+            # metadata doesn't match its body
+            util.write_file_atomic(self._path(key, '.body'), content)
+            util.write_file_atomic(self._path(key, '.json'),
+                                   json.dumps(meta).encode('utf-8'))
+            self._evict()
+        except (DCOSException, IOError, OSError):
+            logger.exception('Unable to store the response to [%s]',
+                             response.url)
+
+    def _evict(self):
+        """Removes the least recently used entries until the bodies fit
+        in the cache
+
+        :rtype: None
+        """
+
+        bodies = []
+        for name in os.listdir(self._directory):
+            if name.endswith('.body'):
+                stat = os.stat(os.path.join(self._directory, name))
+                bodies.append((stat.st_mtime, stat.st_size, name[:-5]))
+
+        total = sum(size for _, size, _ in bodies)
+        for _, size, key in sorted(bodies):
+            if total <= self._max_bytes:
+                break
+            for extension in ['.json', '.body']:
+                try:
+                    os.remove(self._path(key, extension))
+                except OSError:
+                    pass
+            total -= size
@@ -1,7 +1,7 @@
 import json
 from distutils.version import LooseVersion
 
-from dcos import http, util
+from dcos import completion, http, util
 from dcos.errors import DCOSException, DCOSHTTPException
 
 from six.moves import urllib
@@ -101,6 +101,20 @@ def _to_exception(response):
     return DCOSException('Error: {}'.format(message))
 
 
+def _response_message(response):
+    """
+    :param response: HTTP response object
+    :type response: requests.Response
+    :returns: the message of Marathon's JSON error; '' if there isn't one
+    :rtype: str
+    """
+
+    try:
+        return response.json().get('message') or ''
+    except Exception:
+        return ''
+
+
 def _http_req(fn, *args, **kwargs):
     """Make an HTTP request, and raise a marathon-specific exception for
     HTTP error codes.
@@ -271,7 +285,9 @@ class Client(object):
 
         url = self._create_url('v2/apps')
         response = _http_req(http.get, url, timeout=self._timeout)
-        return response.json()['apps']
+        apps = response.json()['apps']
+        completion.update_in_background(completion.update_from_apps, apps)
+        return apps
 
     def add_app(self, app_resource):
         """Add a new application.
@@ -290,9 +306,15 @@ class Client(object):
         else:
             app_json = app_resource
 
-        response = _http_req(http.post, url,
-                             json=app_json,
-                             timeout=self._timeout)
+        try:
+            response = http.post(url, json=app_json, timeout=self._timeout)
+        except DCOSHTTPException as e:
+            if e.response.status_code == 409 and \
+               'already exists' in _response_message(e.response):
+                raise DCOSException(
+                    "Application '{}' already exists".format(
+                        self.normalize_app_id(app_json['id'])))
+            raise _to_exception(e.response)
 
         return response.json()
 
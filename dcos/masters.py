@@ -0,0 +1,281 @@
+import json
+import os
+import threading
+import time
+
+import concurrent.futures
+import portalocker
+from dcos import http, util
+from dcos.errors import DCOSException, DCOSHTTPException
+
+from six.moves import urllib
+
+logger = util.get_logger(__name__)
+
+LEADER_SUBDIR = 'mesos'
+"""Cache subdirectory that holds the leading masters"""
+
+LEADER_TTL = 60
+"""Number of seconds for which the leading master is remembered"""
+
+DEFAULT_HEDGE_AFTER = 0
+"""Default number of seconds after which a read is also sent to another
+master; 0 to never send it"""
+
+STANDBY_READABLE_PATHS = ['master/state-summary']
+"""Endpoints that a standby master answers itself.  The other endpoints
+are redirected to the leader, so only these reads are hedged."""
+
+_lock = threading.Lock()
+_leaders = {}
+
+
+def parse_urls(value):
+    """
+    :param value: a master URL, or comma-separated master URLs, as in
+                  `core.mesos_master_url`
+    :type value: str
+    :returns: the master URLs, each ending with a slash
+    :rtype: [str]
+    """
+
+    return [url.strip().rstrip('/') + '/'
+            for url in value.split(',') if url.strip()]
+
+
+def base_url(url):
+    """
+    :param url: URL of a master endpoint
+    :type url: str
+    :returns: URL of the master itself
+    :rtype: str
+    """
+
+    parsed = urllib.parse.urlparse(url)
+    return '{}://{}/'.format(parsed.scheme, parsed.netloc)
+
+
+def _leaders_path():
+    """
+    :returns: path of the file that remembers the leading masters
+    :rtype: str
+    """
+
+    return util.get_cache_path(LEADER_SUBDIR, 'leaders.json')
+
+
+def _read(path):
+    try:
+        with open(path) as leaders_file:
+            return json.load(leaders_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+class Masters(object):
+    """Mesos masters of a cluster.  Requests are sent to the leading
+    master, which is remembered for `LEADER_TTL` seconds, across processes.
+    A master that redirects a request names the new leader.  Reads of
+    `STANDBY_READABLE_PATHS` that take longer than `hedge_after` seconds are
+    also sent to another master, and the first good answer is used.
+
+    :param urls: master URLs
+    :type urls: [str]
+    :param hedge_after: seconds after which reads are also sent to another
+                        master; 0 to not send them
+    :type hedge_after: float
+    :param timeout: request timeout
+    :type timeout: float | None
+    """
+
+    def __init__(self, urls, hedge_after=DEFAULT_HEDGE_AFTER, timeout=None):
+        self.urls = urls
+        self.hedge_after = hedge_after
+        self._timeout = timeout
+        self._key = ','.join(sorted(urls))
+
+    def leader(self):
+        """Returns the URL of the leading master, asking the masters for it
+        if it isn't remembered
+
+        :rtype: str
+        """
+
+        if len(self.urls) == 1:
+            return self.urls[0]
+
+        with _lock:
+            if self._key not in _leaders:
+                _leaders[self._key] = _read(_leaders_path()).get(self._key)
+            entry = _leaders[self._key]
+
+        if entry is not None and entry['expires'] > time.time():
+            return entry['url']
+        return self.find_leader()
+
+    def find_leader(self):
+        """Asks the masters for the leader with master/redirect, and
+        remembers it
+
+        :rtype: str
+        """
+
+        for url in self.urls:
+            try:
+                response = http.get(
+                    urllib.parse.urljoin(url, 'master/redirect'),
+                    is_success=lambda status: 300 <= status < 400,
+                    timeout=self._timeout,
+                    allow_redirects=False)
+            except DCOSException as e:
+                logger.info('Master [%s] did not name the leader: %s',
+                            url, e)
+                continue
+
+            location = urllib.parse.urlparse(
+                response.headers.get('location', ''))
+            if location.netloc:
+                scheme = urllib.parse.urlparse(url).scheme
+                leader = '{}://{}/'.format(scheme, location.netloc)
+                self.remember(leader)
+                return leader
+
+        raise DCOSException(
+            'None of the Mesos masters [{}] could be reached'.format(
+                ', '.join(self.urls)))
+
+    def remember(self, url):
+        """Remembers the leading master for `LEADER_TTL` seconds
+
+        :param url: URL of the leading master
+        :type url: str
+        :rtype: None
+        """
+
+        entry = {'url': url, 'expires': time.time() + LEADER_TTL}
+        logger.info('Leading Mesos master is [%s]', url)
+        with _lock:
+            _leaders[self._key] = entry
+            self._store(entry)
+
+    def forget(self):
+        """Forgets the leading master, e.g. after it failed
+
+        :rtype: None
+        """
+
+        with _lock:
+            _leaders[self._key] = None
+            self._store(None)
+
+    def _store(self, entry):
+        path = _leaders_path()
+        try:
+            util.ensure_dir_exists(os.path.dirname(path))
+            with open(path + '.lock', 'a') as lock_file:
+                portalocker.lock(lock_file, portalocker.LOCK_EX)
+                try:
+                    leaders = _read(path)
+                    if entry is None:
+                        leaders.pop(self._key, None)
+                    else:
+                        leaders[self._key] = entry
+                    # `_read` doesn't take the lock, so it must never see
+                    # a partial write
+                    util.write_file_atomic(
+                        path, json.dumps(leaders).encode('utf-8'))
+                finally:
+                    portalocker.unlock(lock_file)
+        except (DCOSException, IOError, OSError):
+            logger.exception('Unable to write the leading masters [%s]',
+                             path)
+
+    def get(self, path, **kwargs):
+        """Reads from the leading master.  If it can't be reached, the
+        leader is looked up again and the read is sent to it.
+
+        :param path: path of the endpoint, relative to the master
+        :type path: str
+        :param kwargs: arguments to `dcos.http.get`
+        :type kwargs: dict
+        :rtype: requests.Response
+        """
+
+        leader = self.leader()
+        try:
+            return self._hedged_get(leader, path, **kwargs)
+        except DCOSHTTPException:
+            raise
+        except DCOSException as e:
+            if len(self.urls) == 1:
+                raise
+            error = e
+
+        self.forget()
+        new_leader = self.find_leader()
+        if new_leader == leader:
+            raise error
+        return self._hedged_get(new_leader, path, **kwargs)
+
+    def _get(self, url, **kwargs):
+        """Reads a URL, remembering the leader named by redirects
+
+        :rtype: requests.Response
+        """
+
+        response = http.get(url, timeout=self._timeout, **kwargs)
+        if response.history and len(self.urls) > 1:
+            self.remember(base_url(response.url))
+        return response
+
+    def _hedged_get(self, leader, path, **kwargs):
+        """Reads from the leader and, if it takes longer than `hedge_after`
+        seconds and a standby can answer it, from another master as well.
+        The other master's redirects aren't followed, since they lead back
+        to the slow leader.
+
+        :param leader: URL of the leading master
+        :type leader: str
+        :param path: path of the endpoint, relative to the master
+        :type path: str
+        :param kwargs: arguments to `dcos.http.get`
+        :type kwargs: dict
+        :returns: the first good answer
+        :rtype: requests.Response
+        """
+
+        others = [url for url in self.urls if url != leader]
+        if not self.hedge_after or not others or \
+                path not in STANDBY_READABLE_PATHS:
+            return self._get(urllib.parse.urljoin(leader, path), **kwargs)
+
+        # the reads run on daemon threads, so that the slower one doesn't
+        # hold up the exit of the process
+        futures = [util.submit_daemon(self._get,
+                                      urllib.parse.urljoin(leader, path),
+                                      **kwargs)]
+        done, _ = concurrent.futures.wait(futures, timeout=self.hedge_after)
+        if not done:
+            logger.info('Hedging the read of [%s] after %ss', path,
+                        self.hedge_after)
+            futures.append(util.submit_daemon(
+                self._get, urllib.parse.urljoin(others[0], path),
+                **dict(kwargs, allow_redirects=False)))
+
+        error = None
+        for future in concurrent.futures.as_completed(futures):
+            try:
+                return future.result()
+            except DCOSException as e:
+                error = error or e
+        raise error
+
+
+def reset():
+    """Forgets the leading masters remembered by the process
+
+    :rtype: None
+    """
+
+    with _lock:
+        _leaders.clear()
@@ -1,14 +1,26 @@
+import codecs
+import copy
 import fnmatch
 import itertools
 import os
+import time
 
-from dcos import http, util
+import concurrent.futures
+from dcos import (agents, completion, http, masters, perf, ratelimit,
+                  timeouts, util)
 from dcos.errors import DCOSException, DCOSHTTPException
 
 from six.moves import urllib
 
 logger = util.get_logger(__name__)
 
+FANOUT_CONCURRENCY = 64
+"""Maximum number of concurrent requests of a query sent to every
+slave"""
+
+FANOUT_DEADLINE = 5
+"""Number of seconds a slave has to answer a query sent to every slave"""
+
 
 def get_master(dcos_client=None):
     """Create a Master object using the url stored in the
@@ -26,20 +38,41 @@ def get_master(dcos_client=None):
 
 
 class DCOSClient(object):
-    """Client for communicating with DCOS"""
+    """Client for communicating with DCOS.  `core.mesos_master_url` may list
+    several masters, separated by commas, in which case requests go to the
+    leading master; see `dcos.masters`.  Requests to agents go through the
+    admin router, unless `core.mesos_agent_direct` is set; see
+    `dcos.agents`.  Files are read as raw bytes from files/download, with
+    Range requests, unless `core.mesos_file_download` is false or Mesos
+    ignores the Range header."""
 
     def __init__(self):
         config = util.get_config()
         self._dcos_url = None
         self._mesos_master_url = None
+        self._timeout = config.get('core.timeout')
 
         mesos_master_url = config.get('core.mesos_master_url')
         if mesos_master_url is None:
             self._dcos_url = util.get_config_vals(['core.dcos_url'], config)[0]
+            self._masters = masters.Masters(
+                [urllib.parse.urljoin(self._dcos_url, 'mesos/')],
+                timeout=self._timeout)
         else:
             self._mesos_master_url = mesos_master_url
+            self._masters = masters.Masters(
+                masters.parse_urls(mesos_master_url),
+                config.get('core.mesos_hedge_after',
+                           masters.DEFAULT_HEDGE_AFTER),
+                timeout=self._timeout)
 
-        self._timeout = config.get('core.timeout')
+        self._agents = agents.Router(
+            self._dcos_url,
+            config.get('core.mesos_agent_direct', False),
+            timeout=self._timeout)
+
+        self._downloads = config.get('core.mesos_file_download', True)
+        self._ranges = {}  # slave ID, or None for the master -> bool
 
     def get_dcos_url(self, path):
         """ Create a DCOS URL
@@ -63,9 +96,7 @@ class DCOSClient(object):
         :rtype: str
         """
 
-        base_url = (self._mesos_master_url or
-                    urllib.parse.urljoin(self._dcos_url, 'mesos/'))
-        return urllib.parse.urljoin(base_url, path)
+        return urllib.parse.urljoin(self._masters.leader(), path)
 
     def slave_url(self, slave_id, private_url, path):
         """Create a slave URL
@@ -78,17 +109,14 @@ class DCOSClient(object):
         :type private_url: str
         :param path: the path suffix of the desired URL
         :type path: str
-        :returns: URL that hits the master
+        :returns: URL that hits the slave
         :rtype: str
 
         """
 
-        if self._dcos_url:
-            return urllib.parse.urljoin(self._dcos_url,
-                                        'slave/{}/{}'.format(slave_id, path))
-        else:
-            return urllib.parse.urljoin(private_url, path)
+        return self._agents.url(slave_id, private_url, path)
 
+    @util.duration
     def get_master_state(self):
         """Get the Mesos master state json object
 
@@ -96,9 +124,13 @@ class DCOSClient(object):
         :rtype: dict
         """
 
-        url = self.master_url('master/state.json')
-        return http.get(url, timeout=self._timeout).json()
+        state = self._masters.get('master/state.json').json()
+        perf.observe_master_state(state)
+        completion.update_in_background(
+            completion.update_from_master_state, state)
+        return state
 
+    @util.duration
     def get_slave_state(self, slave_id, private_url):
         """Get the Mesos slave state json object
 
@@ -113,9 +145,9 @@ class DCOSClient(object):
 
         """
 
-        url = self.slave_url(slave_id, private_url, 'state.json')
-        return http.get(url, timeout=self._timeout).json()
+        return self._agents.get(slave_id, private_url, 'state.json').json()
 
+    @util.duration
     def get_state_summary(self):
         """Get the Mesos master state summary json object
 
@@ -123,8 +155,11 @@ class DCOSClient(object):
         :rtype: dict
         """
 
-        url = self.master_url('master/state-summary')
-        return http.get(url, timeout=self._timeout).json()
+        summary = self._masters.get('master/state-summary').json()
+        perf.observe_master_state(summary)
+        completion.update_in_background(
+            completion.update_from_state_summary, summary)
+        return summary
 
     def slave_file_read(self, slave_id, private_url, path, offset, length):
         """See the master_file_read() docs
@@ -149,13 +184,11 @@ class DCOSClient(object):
 
         """
 
-        url = self.slave_url(slave_id,
-                             private_url,
-                             'files/read.json')
         params = {'path': path,
                   'length': length,
                   'offset': offset}
-        return http.get(url, params=params, timeout=self._timeout).json()
+        return self._agents.get(slave_id, private_url, 'files/read.json',
+                                params=params).json()
 
     def master_file_read(self, path, length, offset):
         """This endpoint isn't well documented anywhere, so here is the spec
@@ -195,11 +228,130 @@ class DCOSClient(object):
         :rtype: dict
         """
 
-        url = self.master_url('files/read.json')
         params = {'path': path,
                   'length': length,
                   'offset': offset}
-        return http.get(url, params=params, timeout=self._timeout).json()
+        return self._masters.get('files/read.json', params=params).json()
+
+    def downloads(self, slave_id):
+        """
+        :param slave_id: ID of the slave that has the files; None for the
+                         master
+        :type slave_id: str | None
+        :returns: whether the files are read from files/download.  They're
+                  not if `core.mesos_file_download` is false, or if the
+                  host turned out to ignore Range requests or to lack
+                  files/download.
+        :rtype: bool
+        """
+
+        return self._downloads and self._ranges.get(slave_id, True)
+
+    def slave_file_download(self, slave_id, private_url, path, offset,
+                            length):
+        """See the master_file_download() docs
+
+        :param slave_id: slave ID
+        :type slave_id: str
+        :param private_url: The slave's private URL derived from its
+                            pid.  Used when we're accessing mesos
+                            directly, rather than through DCOS.
+        :type private_url: str
+        :param path: absolute path to read
+        :type path: str
+        :param offset: start byte location
+        :type offset: int
+        :param length: number of bytes to read, or -1 to read the rest of
+                       the file
+        :type length: int
+        :returns: data read; None if it can't be read from files/download
+        :rtype: bytes | None
+        """
+
+        if length == 0:
+            return b''
+
+        try:
+            response = self._agents.get(
+                slave_id, private_url, 'files/download',
+                params={'path': path}, headers=range_headers(offset, length),
+                is_success=is_range_success, stream=True)
+        except DCOSHTTPException as e:
+            if e.response.status_code == 404:
+                self._ranges[slave_id] = False
+                return None
+            raise
+        return self.range_content(slave_id, response, offset, length)
+
+    def master_file_download(self, path, offset, length):
+        """GET files/download, with a Range request.  Unlike
+        files/read.json, the data isn't wrapped in JSON, and its length
+        isn't bounded by the server.
+
+        Responses are interpreted by `range_content`.  A 404 may mean that
+        the endpoint doesn't exist, so the data is then read from
+        files/read.json, which tells whether the file exists.  The host's
+        files aren't read from files/download anymore, so that every read
+        doesn't cost two requests.
+
+        :param path: absolute path to read
+        :type path: str
+        :param offset: start byte location
+        :type offset: int
+        :param length: number of bytes to read, or -1 to read the rest of
+                       the file
+        :type length: int
+        :returns: data read; None if it can't be read from files/download
+        :rtype: bytes | None
+        """
+
+        if length == 0:
+            return b''
+
+        try:
+            response = self._masters.get(
+                'files/download', params={'path': path},
+                headers=range_headers(offset, length),
+                is_success=is_range_success, stream=True)
+        except DCOSHTTPException as e:
+            if e.response.status_code == 404:
+                self._ranges[None] = False
+                return None
+            raise
+        return self.range_content(None, response, offset, length)
+
+    def range_content(self, slave_id, response, offset, length):
+        """Returns the data of a files/download response.  A 206 holds the
+        requested range, and a 416 means that it starts at the end of the
+        file.  A 200 holds the whole file: the host ignores Range requests,
+        so its files aren't read from files/download anymore.
+
+        :param slave_id: ID of the slave that sent the response; None for
+                         the master
+        :type slave_id: str | None
+        :param response: files/download response
+        :type response: requests.Response
+        :param offset: start byte location of the range
+        :type offset: int
+        :param length: length of the range, or -1
+        :type length: int
+        :returns: data of the range; None if the response doesn't hold it
+        :rtype: bytes | None
+        """
+
+        if response.status_code == 206:
+            return response.content
+        elif response.status_code == 416:
+            response.close()
+            return b''
+        elif offset == 0 and length < 0:
+            return response.content
+
+        logger.info('Files of [%s] are read from files/read.json, since it '
+                    'ignores Range requests', slave_id or 'the master')
+        response.close()
+        self._ranges[slave_id] = False
+        return None
 
     def shutdown_framework(self, framework_id):
         """Shuts down a Mesos framework
@@ -260,10 +412,162 @@ class DCOSClient(object):
         :rtype: dict
         """
 
-        url = self.slave_url(slave['id'],
-                             slave.http_url(),
-                             'files/browse.json')
-        return http.get(url, params={'path': path}).json()
+        return self._agents.get(slave['id'], slave.http_url(),
+                                'files/browse.json',
+                                params={'path': path}).json()
+
+    def browse_tree(self, roots, max_depth=None):
+        """Lists directory trees, with up to `util.STREAM_CONCURRENCY`
+        concurrent files/browse.json requests across directories and
+        slaves.  Like `util.stream`, it yields a (Future, obj) as each
+        directory is listed; the Future's result is the directory's
+        /files/browse.json response.  The subdirectories of a directory
+        are listed after it is, unless it's `max_depth` directories below
+        its root.
+
+        :param roots: (key, slave, path) of the directories to list; the
+                      key identifies the tree, e.g. the task whose sandbox
+                      it is
+        :type roots: [(object, Slave, str)]
+        :param max_depth: how many directories below its root to descend
+                          into; None for no limit
+        :type max_depth: int | None
+        :returns: iterator over (Future, (key, slave, path, depth))
+        :rtype: iterator over (Future, (object, Slave, str, int))
+        """
+
+        pool = concurrent.futures.ThreadPoolExecutor(util.STREAM_CONCURRENCY)
+        jobs = {}
+
+        def submit(key, slave, path, depth):
+            job = pool.submit(self.browse, slave, path)
+            jobs[job] = (key, slave, path, depth)
+
+        try:
+            for key, slave, path in roots:
+                submit(key, slave, path, 0)
+
+            while jobs:
+                done, _ = concurrent.futures.wait(
+                    jobs, return_when=concurrent.futures.FIRST_COMPLETED)
+                for job in done:
+                    key, slave, path, depth = jobs.pop(job)
+                    if job.exception() is None and \
+                            (max_depth is None or depth < max_depth):
+                        for file_ in job.result():
+                            if is_directory(file_):
+                                submit(key, slave, file_['path'], depth + 1)
+                    yield job, (key, slave, path, depth)
+        finally:
+            # directories that weren't listed yet aren't when the caller
+            # stops early
+            for job in jobs:
+                job.cancel()
+            pool.shutdown(wait=False)
+
+    def fan_out(self, slaves, path, deadline=FANOUT_DEADLINE,
+                concurrency=FANOUT_CONCURRENCY):
+        """Reads an endpoint of every slave, e.g. monitor/statistics.json, with up
+        to `concurrency` concurrent requests.  Like `util.stream`, it yields
+        a (Future, slave) as each slave answers; the Future's result is the
+        slave's JSON response.  A slave that hasn't answered `deadline`
+        seconds after its request was sent fails with a DCOSException, and
+        isn't waited for, so that one slow slave doesn't hold up the
+        results of the others.  Each slave has its own
+        `core.http_rate_limit_per_host`, also through the admin router.
+
+        :param slaves: slaves to query
+        :type slaves: [Slave]
+        :param path: path of the endpoint, relative to the slave
+        :type path: str
+        :param deadline: number of seconds each slave has to answer; None
+                         to wait for the request timeout
+        :type deadline: float | None
+        :param concurrency: maximum number of concurrent requests
+        :type concurrency: int
+        :returns: iterator over (Future, slave)
+        :rtype: iterator over (Future, Slave)
+        """
+
+        started = {}
+        kwargs = {}
+        if deadline is not None:
+            # an explicit (connect, read) timeout isn't adapted by
+            # `dcos.timeouts`, so no request outlives its deadline
+            kwargs['timeout'] = (min(timeouts.CONNECT_TIMEOUT, deadline),
+                                 deadline)
+
+        def query(slave):
+            # the deadline starts once the request may be sent under the
+            # rate limits
+            url = self._agents.url(slave['id'], slave.http_url(), path)
+            ratelimit.acquire('GET', url)
+            started[slave['id']] = time.time()
+            response = self._agents.get(slave['id'], slave.http_url(), path,
+                                        reserved=True, **kwargs)
+            try:
+                return response.json()
+            except ValueError:
+                raise DCOSException(
+                    'Slave [{}] returned an invalid [{}]'.format(
+                        slave['id'], path))
+
+        # only `concurrency` requests are in flight at a time, so that each
+        # wait is over a bounded number of jobs.  They run on daemon
+        # threads: the expired requests, and the ones the caller stopped
+        # waiting for, don't hold up the exit of the process.
+        slaves = iter(slaves)
+        jobs = {}
+
+        def submit():
+            for slave in itertools.islice(slaves, concurrency - len(jobs)):
+                jobs[util.submit_daemon(query, slave)] = slave
+
+        submit()
+        while jobs:
+            # wake up when the earliest pending request expires
+            timeout = deadline
+            expiries = [started[slave['id']] + deadline
+                        for slave in jobs.values()
+                        if deadline is not None and slave['id'] in started]
+            if expiries:
+                timeout = max(min(expiries) - time.time(), 0)
+
+            done, _ = concurrent.futures.wait(
+                jobs, timeout, return_when=concurrent.futures.FIRST_COMPLETED)
+            for job in done:
+                yield job, jobs.pop(job)
+
+            now = time.time()
+            for job, slave in list(jobs.items()):
+                start = started.get(slave['id'])
+                if deadline is None or start is None or \
+                        now - start < deadline:
+                    continue
+                del jobs[job]
+                expired = concurrent.futures.Future()
+                expired.set_exception(DCOSException(
+                    'Slave [{}] did not answer [{}] within {} '
+                    'seconds'.format(slave['id'], path, deadline)))
+                yield expired, slave
+
+            submit()
+
+    def load_slave_states(self, slaves):
+        """Fetches the state.json of slaves in parallel, see `fan_out`.
+        Their `Slave.state` is then returned without another request.
+
+        :param slaves: slaves whose state to fetch
+        :type slaves: [Slave]
+        :returns: iterator over (Future, slave).  The Future's result is
+                  the slave's state.json.
+        :rtype: iterator over (Future, Slave)
+        """
+
+        for job, slave in self.fan_out(slaves, 'state.json', deadline=None):
+            if job.exception() is None:
+                slave._state = job.result()
+            yield job, slave
 
 
 class MesosDNSClient(object):
@@ -309,6 +613,7 @@ class Master(object):
         self._state = state
         self._frameworks = {}
         self._slaves = {}
+        self._slave_dicts = None
 
     def state(self):
         """Returns master's master/state.json.
@@ -336,7 +641,8 @@ class Master(object):
 
     def slave(self, fltr):
         """Returns the slave that has `fltr` in its ID.  Raises a
-        DCOSException if there is not exactly one such slave.
+        DCOSException if there is not exactly one such slave, unless one
+        of them has exactly `fltr` as its ID.
 
         :param fltr: filter string
         :type fltr: str
@@ -345,6 +651,9 @@ class Master(object):
         """
 
         slaves = self.slaves(fltr)
+        exact = [slave for slave in slaves if slave['id'] == fltr]
+        if exact:
+            return exact[0]
 
         if len(slaves) == 0:
             raise DCOSException('No slave found with ID "{}".'.format(fltr))
@@ -478,6 +787,26 @@ class Master(object):
             self._slaves[slave['id']] = Slave(slave, None, self)
         return self._slaves[slave['id']]
 
+    def _slave_by_id(self, slave_id):
+        """Returns the slave with exactly this ID.  Unlike `slave`, an ID
+        that is a prefix of other IDs, e.g. S1 and S10, isn't ambiguous.
+
+        :param slave_id: the slave's ID
+        :type slave_id: str
+        :returns: the slave
+        :rtype: Slave
+        """
+
+        if self._slave_dicts is None:
+            self._slave_dicts = dict((slave['id'], slave)
+                                     for slave in self.state()['slaves'])
+
+        slave = self._slave_dicts.get(slave_id)
+        if slave is None:
+            raise DCOSException('No slave found with ID "{}".'.format(
+                slave_id))
+        return self._slave_obj(slave)
+
     def _framework_obj(self, framework):
         """Returns the Framework object corresponding to the provided `framework`
         dict.  Creates it if it doesn't exist already.
@@ -678,7 +1007,7 @@ class Task(object):
         :rtype: Slave
         """
 
-        return self._master.slave(self["slave_id"])
+        return self._master._slave_by_id(self["slave_id"])
 
     def user(self):
         """Task owner
@@ -762,6 +1091,7 @@ class MesosFile(object):
         self._path = path
         self._dcos_client = dcos_client or DCOSClient()
         self._cursor = 0
+        self._decoder = _utf8_decoder()
 
     def size(self):
         """Size of the file
@@ -797,6 +1127,10 @@ class MesosFile(object):
             raise ValueError(
                 "Unexpected value for `whence`: {}".format(whence))
 
+        # the bytes of a character cut by the previous read don't belong to
+        # the next one
+        self._decoder.reset()
+
     def tell(self):
         """ The current cursor position.
 
@@ -808,6 +1142,9 @@ class MesosFile(object):
 
     def read(self, length=None):
         """Reads up to `length` bytes, or the entire file if `length` is None.
+        Bytes read from files/download are decoded as UTF-8.  A character
+        cut at the end of the data is returned by the next read, unless the
+        file is seeked in between.
 
         :param length: number of bytes to read
         :type length: int | None
@@ -815,6 +1152,9 @@ class MesosFile(object):
         :rtype: str
         """
 
+        if self.downloads():
+            return self._decoder.decode(self.read_bytes(length))
+
         data = ''
         while length is None or length - len(data) > 0:
             chunk_length = -1 if length is None else length - len(data)
@@ -825,6 +1165,63 @@ class MesosFile(object):
 
         return data
 
+    def read_bytes(self, length=None):
+        """Reads up to `length` bytes, or the entire file if `length` is None,
+        as raw bytes.  They're read from files/download if Mesos supports
+        it, see `DCOSClient.downloads`, and from files/read.json otherwise,
+        see `_fetch_bytes`.
+
+        :param length: number of bytes to read
+        :type length: int | None
+        :returns: data read
+        :rtype: bytes
+        """
+
+        data = b''
+        while length is None or length - len(data) > 0:
+            chunk_length = -1 if length is None else length - len(data)
+            chunk = self._download_chunk(chunk_length)
+            if chunk is not None:
+                data += chunk
+                if chunk == b'' or chunk_length == -1:
+                    # the rest of the file was read
+                    break
+                continue
+
+            chunk = self._fetch_bytes(chunk_length)
+            if chunk == b'':
+                break
+            data += chunk
+
+        return data
+
+    def read_bytes_at(self, offset, length):
+        """Reads like `read_bytes`, at `offset`, without moving the file's
+        cursor.  Several reads of a file may run concurrently.
+
+        :param offset: start location
+        :type offset: int
+        :param length: number of bytes to read
+        :type length: int
+        :returns: data read
+        :rtype: bytes
+        """
+
+        reader = copy.copy(self)
+        reader._decoder = _utf8_decoder()
+        reader.seek(offset)
+        return reader.read_bytes(length)
+
+    def downloads(self):
+        """
+        :returns: whether the file is read from files/download, whose
+                  offsets are exact byte offsets, see `_fetch_bytes`
+        :rtype: bool
+        """
+
+        return self._dcos_client.downloads(
+            self._slave['id'] if self._slave else None)
+
     def _host_path(self):
         """ The absolute path to the file on slave.
 
@@ -880,7 +1277,52 @@ class MesosFile(object):
 
         params = self._params(length)
         data = self._fetch(params)["data"]
-        self.seek(len(data), os.SEEK_CUR)
+        self._cursor += len(data)
+        return data
+
+    def _fetch_bytes(self, length):
+        """Fetch the bytes of the file from files/read.json, at the file's
+        cursor.  Mesos escapes every byte above 0x7f as a \\u00XX
+        character, so each character is a byte, and the data is encoded
+        back as latin-1.  Data with other characters comes from a server
+        that sends the file as UTF-8 text: it's encoded as UTF-8, but the
+        cursor still moves by one byte per character, so it no longer
+        matches the offsets of the file's bytes.
+
+        :param length: number of bytes to fetch, or -1
+        :type length: int
+        :returns: data read
+        :rtype: bytes
+        """
+
+        data = self._fetch_chunk(length)
+        try:
+            return data.encode('latin-1')
+        except UnicodeEncodeError:
+            return data.encode('utf-8')
+
+    def _download_chunk(self, length):
+        """Fetch raw data from files/download, at the file's cursor
+
+        :param length: number of bytes to fetch, or -1
+        :type length: int
+        :returns: data read; None if it can't be read from files/download
+        :rtype: bytes | None
+        """
+
+        if not self.downloads():
+            return None
+
+        if self._slave:
+            data = self._dcos_client.slave_file_download(
+                self._slave['id'], self._slave.http_url(), self._host_path(),
+                self._cursor, length)
+        else:
+            data = self._dcos_client.master_file_download(
+                self._host_path(), self._cursor, length)
+
+        if data is not None:
+            self._cursor += len(data)
         return data
 
     def _fetch(self, params):
@@ -914,6 +1356,53 @@ class MesosFile(object):
             return "master:{0}".format(self._path)
 
 
+def _utf8_decoder():
+    """
+    :returns: a UTF-8 decoder that keeps the bytes of a character cut at
+              the end of its input until the next input, and replaces
+              invalid bytes
+    :rtype: codecs.IncrementalDecoder
+    """
+
+    return codecs.getincrementaldecoder('utf-8')('replace')
+
+
+def range_headers(offset, length):
+    """
+    :param offset: start byte location
+    :type offset: int
+    :param length: number of bytes, or -1 for the rest of the file
+    :type length: int
+    :returns: headers of a request for a byte range
+    :rtype: dict
+    """
+
+    end = '' if length < 0 else offset + length - 1
+    return {'Range': 'bytes={}-{}'.format(offset, end)}
+
+
+def is_range_success(status_code):
+    """
+    :param status_code: status of a files/download response
+    :type status_code: int
+    :returns: whether it's interpreted by `DCOSClient.range_content`
+    :rtype: bool
+    """
+
+    return status_code in [200, 206, 416]
+
+
+def is_directory(file_):
+    """
+    :param file_: entry of a /files/browse.json response
+    :type file_: dict
+    :returns: whether the entry is a directory
+    :rtype: bool
+    """
+
+    return file_['mode'].startswith('d')
+
+
 def parse_pid(pid):
     """ Parse the mesos pid string,
 
@@ -0,0 +1,386 @@
+import atexit
+import bisect
+import json
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+import prettytable
+from dcos import util
+
+from six.moves.urllib.parse import urlparse
+
+logger = util.get_logger(__name__)
+
+VALID_FORMATS = ['json', 'table']
+"""Formats of the report printed on exit"""
+
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0]
+"""Upper bounds, in seconds, of the latency histogram buckets.  Slower
+requests are counted in an extra overflow bucket."""
+
+PATH_TEMPLATES = [
+    (re.compile(r'^(.*/v2/(?:apps|groups))/.+?/versions/[^/]+$'),
+     r'\1/{id}/versions/{version}'),
+    (re.compile(r'^(.*/v2/(?:apps|groups))/.+?'
+                r'((?:/versions|/tasks|/restart)?)$'),
+     r'\1/{id}\2'),
+    (re.compile(r'^(.*/v2/deployments)/[^/]+$'), r'\1/{id}'),
+    (re.compile(r'^(.*?/slave)/[^/]+'), r'\1/{id}'),
+]
+"""Rules that replace the IDs in a URL path, so that requests to the same
+endpoint are counted together.  Only the first matching rule is applied."""
+
+
+def path_template(path):
+    """Returns `path` with its object IDs replaced by placeholders.
+    E.g. /marathon/v2/apps/my/app/versions becomes
+    /marathon/v2/apps/{id}/versions.
+
+    :param path: URL path
+    :type path: str
+    :returns: path template
+    :rtype: str
+    """
+
+    for regex, template in PATH_TEMPLATES:
+        if regex.match(path):
+            return regex.sub(template, path, count=1)
+    return path
+
+
+class Histogram(object):
+    """Latency histogram with fixed buckets
+
+    :param buckets: sorted upper bounds of the buckets
+    :type buckets: [float]
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self._buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value):
+        """Records one observation
+
+        :param value: observed value
+        :type value: float
+        :rtype: None
+        """
+
+        self._counts[bisect.bisect_left(self._buckets, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, p):
+        """Estimates a percentile as the upper bound of the bucket that
+        holds it, capped at the largest observed value.
+
+        :param p: percentile, between 0 and 100
+        :type p: float
+        :returns: estimated percentile; None if nothing was observed
+        :rtype: float | None
+        """
+
+        if self.count == 0:
+            return None
+
+        rank = p / 100.0 * self.count
+        seen = 0
+        for bound, count in zip(self._buckets, self._counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class EndpointStats(object):
+    """Statistics of the requests sent to one endpoint"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.retries = 0
+        self.reauths = 0
+        self.cache_hits = 0
+        self.throttled = 0.0
+        self.latency = Histogram()
+
+
+class Registry(object):
+    """Thread-safe registry of HTTP request metrics, keyed by
+    (method, host, path template)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def _endpoint(self, method, url):
+        """Returns the stats of the endpoint for `url`.  Must be called
+        with the lock held.
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :rtype: EndpointStats
+        """
+
+        parsed = urlparse(url)
+        key = (method.upper(), parsed.netloc, path_template(parsed.path))
+        if key not in self._stats:
+            self._stats[key] = EndpointStats()
+        return self._stats[key]
+
+    def record_request(self, method, url, status_code, seconds,
+                       bytes_sent=0, bytes_received=0):
+        """Records a completed request
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param status_code: response status; None if no response was
+                            received
+        :type status_code: int | None
+        :param seconds: time spent on the request
+        :type seconds: float
+        :param bytes_sent: size of the request body
+        :type bytes_sent: int
+        :param bytes_received: size of the response body
+        :type bytes_received: int
+        :rtype: None
+        """
+
+        with self._lock:
+            stats = self._endpoint(method, url)
+            stats.count += 1
+            if status_code is None or status_code >= 400:
+                stats.errors += 1
+            status = str(status_code) if status_code else 'error'
+            stats.statuses[status] = stats.statuses.get(status, 0) + 1
+            stats.bytes_sent += bytes_sent
+            stats.bytes_received += bytes_received
+            stats.latency.observe(seconds)
+
+    def record_retry(self, method, url):
+        """Records that a request is being retried
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :rtype: None
+        """
+
+        with self._lock:
+            self._endpoint(method, url).retries += 1
+
+    def record_reauth(self, method, url):
+        """Records that a request is being resent with credentials after
+        a 401 response
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :rtype: None
+        """
+
+        with self._lock:
+            self._endpoint(method, url).reauths += 1
+
+    def record_cache_hit(self, method, url):
+        """Records a response that was served from a local cache
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :rtype: None
+        """
+
+        with self._lock:
+            self._endpoint(method, url).cache_hits += 1
+
+    def record_throttle(self, method, url, seconds):
+        """Records that a request waited for the rate limiter
+
+        :param method: HTTP method
+        :type method: str
+        :param url: request URL
+        :type url: str
+        :param seconds: time spent waiting
+        :type seconds: float
+        :rtype: None
+        """
+
+        with self._lock:
+            self._endpoint(method, url).throttled += seconds
+
+    def snapshot(self):
+        """Returns the recorded metrics, one entry per endpoint
+
+        :rtype: [dict]
+        """
+
+        with self._lock:
+            items = sorted(self._stats.items())
+
+        return [OrderedDict([
+            ('method', method),
+            ('host', host),
+            ('path', path),
+            ('count', stats.count),
+            ('errors', stats.errors),
+            ('statuses', dict(stats.statuses)),
+            ('retries', stats.retries),
+            ('reauths', stats.reauths),
+            ('cache_hits', stats.cache_hits),
+            ('throttled', round(stats.throttled, 4)),
+            ('bytes_sent', stats.bytes_sent),
+            ('bytes_received', stats.bytes_received),
+            ('latency', OrderedDict([
+                ('total', stats.latency.total),
+                ('p50', stats.latency.percentile(50)),
+                ('p95', stats.latency.percentile(95)),
+                ('p99', stats.latency.percentile(99)),
+                ('max', stats.latency.max),
+            ])),
+        ]) for (method, host, path), stats in items]
+
+    def totals(self):
+        """Returns the metrics summed over all endpoints
+
+        :rtype: dict
+        """
+
+        keys = ['count', 'errors', 'retries', 'reauths', 'cache_hits',
+                'throttled', 'bytes_sent', 'bytes_received']
+        totals = OrderedDict((key, 0) for key in keys)
+        for entry in self.snapshot():
+            for key in keys:
+                totals[key] += entry[key]
+        return totals
+
+    def reset(self):
+        """Forgets all recorded metrics
+
+        :rtype: None
+        """
+
+        with self._lock:
+            self._stats = {}
+
+
+registry = Registry()
+"""Process wide registry updated by `dcos.http`"""
+
+
+def _format_seconds(seconds):
+    """
+    :param seconds: duration in seconds
+    :type seconds: float | None
+    :returns: duration in milliseconds
+    :rtype: str
+    """
+
+    if seconds is None:
+        return '---'
+    return '{:.0f}ms'.format(seconds * 1000)
+
+
+def report_table(registry):
+    """Returns a table with one row per endpoint
+
+    :param registry: metrics registry
+    :type registry: Registry
+    :rtype: PrettyTable
+    """
+
+    fields = OrderedDict([
+        ('METHOD', lambda e: e['method']),
+        ('HOST', lambda e: e['host']),
+        ('PATH', lambda e: e['path']),
+        ('COUNT', lambda e: e['count']),
+        ('ERRORS', lambda e: e['errors']),
+        ('RETRIES', lambda e: e['retries'] + e['reauths']),
+        ('P50', lambda e: _format_seconds(e['latency']['p50'])),
+        ('P95', lambda e: _format_seconds(e['latency']['p95'])),
+        ('MAX', lambda e: _format_seconds(e['latency']['max'])),
+        ('SENT', lambda e: util.humanize_bytes(e['bytes_sent'])),
+        ('RECEIVED', lambda e: util.humanize_bytes(e['bytes_received'])),
+    ])
+
+    tb = prettytable.PrettyTable(
+        list(fields.keys()),
+        border=False,
+        hrules=prettytable.NONE,
+        vrules=prettytable.NONE,
+        left_padding_width=0,
+        right_padding_width=1)
+
+    for entry in registry.snapshot():
+        tb.add_row([fn(entry) for fn in fields.values()])
+
+    for field in ['HOST', 'PATH']:
+        tb.align[field] = 'l'
+
+    return tb
+
+
+def report(registry, fmt, out=None):
+    """Writes the metrics in `registry` to `out`
+
+    :param registry: metrics registry
+    :type registry: Registry
+    :param fmt: report format. One of `VALID_FORMATS`
+    :type fmt: str
+    :param out: where to write the report; defaults to stderr
+    :type out: file
+    :rtype: None
+    """
+
+    out = out or sys.stderr
+    if fmt == 'json':
+        out.write(json.dumps(
+            {'endpoints': registry.snapshot(), 'totals': registry.totals()},
+            sort_keys=True))
+        out.write('\n')
+    else:
+        out.write('{}\n'.format(report_table(registry)))
+    out.flush()
+
+
+def configure(fmt):
+    """Prints the process' HTTP metrics when it exits, if any requests were
+    sent.
+
+    :param fmt: report format. One of `VALID_FORMATS`; None to disable the
+                report
+    :type fmt: str | None
+    :rtype: None
+    """
+
+    if fmt is None:
+        return
+
+    if fmt not in VALID_FORMATS:
+        logger.warning('Unknown metrics format %r. Valid formats are %r',
+                       fmt, VALID_FORMATS)
+        return
+
+    def report_on_exit():
+        if registry.snapshot():
+            report(registry, fmt)
+
+    atexit.register(report_on_exit)
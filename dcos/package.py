@@ -437,10 +437,15 @@ def installed_apps(init_client, endpoints=False):
         valid_apps.append(decoded)
 
     if endpoints:
+        # v2/tasks returns the tasks of every app, so fetch it only once
+        tasks = collections.defaultdict(list)
+        for task in init_client.get_tasks(None):
+            tasks[task['appId']].append(task)
+
         for app in valid_apps:
-            tasks = init_client.get_tasks(app["appId"])
+            app_id = init_client.normalize_app_id(app["appId"])
             app['endpoints'] = [{"host": t["host"], "ports": t["ports"]}
-                                for t in tasks]
+                                for t in tasks[app_id]]
 
     return valid_apps
 
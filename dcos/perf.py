@@ -0,0 +1,238 @@
+import atexit
+import json
+import os
+import time
+from collections import OrderedDict
+
+import portalocker
+from dcos import constants, metrics, util
+
+logger = util.get_logger(__name__)
+
+LEDGER_SUBDIR = 'perf'
+"""Cache subdirectory that holds the performance ledger."""
+
+LEDGER_MAX_BYTES = 4 << 20
+"""Size after which the ledger is rotated.  One rotated file is kept."""
+
+_start = None
+_command = None
+_cluster_size = {}
+
+
+def ledger_path():
+    """Returns the path of the performance ledger
+
+    :rtype: str
+    """
+
+    return util.get_cache_path(LEDGER_SUBDIR, 'ledger.jsonl')
+
+
+def set_command(hierarchy):
+    """Sets the name of the command being run, as recorded in the ledger.
+
+    :param hierarchy: noun and verbs of the command. E.g.
+                      ['marathon', 'app', 'list']
+    :type hierarchy: [str]
+    :rtype: None
+    """
+
+    global _command
+
+    _command = ' '.join(word for word in hierarchy
+                        if not word.startswith('-'))
+
+
+def observe_master_state(state):
+    """Records the size of the cluster from a master's state.json or
+    state-summary.
+
+    :param state: master's state.json or state-summary
+    :type state: dict
+    :rtype: None
+    """
+
+    frameworks = state.get('frameworks', [])
+    _cluster_size['agents'] = len(state.get('slaves', []))
+    _cluster_size['frameworks'] = len(frameworks)
+
+    # state-summary doesn't include tasks
+    if any('tasks' in framework for framework in frameworks):
+        _cluster_size['tasks'] = sum(len(framework.get('tasks', []))
+                                     for framework in frameworks)
+
+
+def append(record, path=None):
+    """Appends a record to the ledger, rotating it when it grows too large.
+
+    :param record: ledger record
+    :type record: dict
+    :param path: path of the ledger; defaults to `ledger_path()`
+    :type path: str
+    :rtype: None
+    """
+
+    path = path or ledger_path()
+    util.ensure_dir_exists(os.path.dirname(path))
+
+    with open(path + '.lock', 'a') as lock_file:
+        portalocker.lock(lock_file, portalocker.LOCK_EX)
+        try:
+            if os.path.exists(path) and \
+               os.path.getsize(path) > LEDGER_MAX_BYTES:
+                rotated = path + '.1'
+                if os.path.exists(rotated):
+                    os.remove(rotated)
+                os.rename(path, rotated)
+
+            with open(path, 'a') as ledger:
+                ledger.write(json.dumps(record) + '\n')
+        finally:
+            portalocker.unlock(lock_file)
+
+
+def read_records(path=None):
+    """Returns the records of the ledger, oldest first.  Malformed lines
+    are skipped.
+
+    :param path: path of the ledger; defaults to `ledger_path()`
+    :type path: str
+    :rtype: [dict]
+    """
+
+    path = path or ledger_path()
+
+    records = []
+    for ledger_file in [path + '.1', path]:
+        try:
+            with open(ledger_file) as ledger:
+                lines = ledger.readlines()
+        except IOError:
+            continue
+
+        for line in lines:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning('Skipping malformed ledger line %r', line)
+
+    return records
+
+
+def percentile(values, p):
+    """Returns a percentile of `values` using the nearest-rank method
+
+    :param values: sorted values
+    :type values: [float]
+    :param p: percentile, between 0 and 100
+    :type p: float
+    :returns: the percentile; None if `values` is empty
+    :rtype: float | None
+    """
+
+    if not values:
+        return None
+
+    rank = max(1, int(-(-p * len(values) // 100)))
+    return values[rank - 1]
+
+
+def summarize(records):
+    """Summarizes the wall time of ledger records by command and cluster
+
+    :param records: ledger records
+    :type records: [dict]
+    :returns: one summary per (command, cluster), sorted
+    :rtype: [OrderedDict]
+    """
+
+    groups = OrderedDict()
+    for record in records:
+        key = (record.get('command'), record.get('cluster'))
+        groups.setdefault(key, []).append(record)
+
+    summaries = []
+    for (command, cluster), group in sorted(groups.items(),
+                                            key=lambda item: str(item[0])):
+        walls = sorted(record['wall'] for record in group)
+        requests = sorted(record.get('requests', 0) for record in group)
+        received = sorted(record.get('bytes_received', 0)
+                          for record in group)
+        summaries.append(OrderedDict([
+            ('command', command),
+            ('cluster', cluster),
+            ('count', len(group)),
+            ('p50', percentile(walls, 50)),
+            ('p95', percentile(walls, 95)),
+            ('p99', percentile(walls, 99)),
+            ('requests', percentile(requests, 50)),
+            ('bytes_received', percentile(received, 50)),
+            ('agents', max(record.get('agents') or 0 for record in group)),
+            ('tasks', max(record.get('tasks') or 0 for record in group)),
+            ('last', max(record.get('time', 0) for record in group)),
+        ]))
+
+    return summaries
+
+
+def _record():
+    """Returns the ledger record of the current process
+
+    :rtype: OrderedDict
+    """
+
+    config = util.get_config()
+    totals = metrics.registry.totals()
+
+    return OrderedDict([
+        ('time', round(_start, 3)),
+        ('command', _command),
+        ('wall', round(time.time() - _start, 4)),
+        ('requests', totals['count']),
+        ('errors', totals['errors']),
+        ('bytes_sent', totals['bytes_sent']),
+        ('bytes_received', totals['bytes_received']),
+        ('cache_hits', totals['cache_hits']),
+        ('throttled', round(totals['throttled'], 4)),
+        ('cluster', config.get('core.dcos_url')),
+        ('agents', _cluster_size.get('agents')),
+        ('frameworks', _cluster_size.get('frameworks')),
+        ('tasks', _cluster_size.get('tasks')),
+    ])
+
+
+def _write_record():
+    """Appends the record of the current process to the ledger, if it ran
+    a command and the ledger is enabled with `core.perf_ledger`.
+
+    :rtype: None
+    """
+
+    if _command is None:
+        return
+
+    try:
+        if not util.get_config().get('core.perf_ledger', False):
+            return
+        append(_record())
+    except Exception:
+        logger.exception('Unable to write the performance ledger')
+
+
+def configure():
+    """Starts timing the process.  The wall time is measured from the start
+    of the first process of the command, which is passed to subcommands in
+    the environment.
+
+    :rtype: None
+    """
+
+    global _start
+
+    if _start is not None:
+        return
+
+    _start = float(os.environ.setdefault(constants.DCOS_PERF_START_ENV,
+                                         str(time.time())))
+    atexit.register(_write_record)
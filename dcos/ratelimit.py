@@ -0,0 +1,162 @@
+import re
+import threading
+import time
+
+from dcos import metrics, util
+
+from six.moves.urllib.parse import urlparse
+
+logger = util.get_logger(__name__)
+
+DEFAULT_RATE = 200
+"""Default number of requests per second sent by a process.  It only
+paces fan-outs over hundreds of agents, which the per-host limit doesn't
+bound; 0 is unlimited."""
+
+DEFAULT_HOST_RATE = 50
+"""Default number of requests per second sent by a process to each host"""
+
+AGENT_PATH = re.compile(r'^/slave/[^/]+')
+"""Path prefix of the requests that the admin router forwards to an
+agent"""
+
+_lock = threading.Lock()
+_buckets = {}
+_rates = {}
+
+
+class TokenBucket(object):
+    """Token bucket rate limiter.  It holds up to `burst` tokens and gains
+    `rate` tokens per second; every request takes a token, waiting for it if
+    the bucket is empty.
+
+    :param rate: tokens per second
+    :type rate: float
+    :param burst: capacity of the bucket; defaults to one second of tokens
+    :type burst: float
+    """
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.burst = float(burst or max(rate, 1))
+        self._tokens = self.burst
+        self._updated = time.time()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Takes a token, possibly ahead of time
+
+        :returns: seconds to wait until the token is available
+        :rtype: float
+        """
+
+        with self._lock:
+            now = time.time()
+            self._tokens = min(
+                self.burst,
+                self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            # a negative balance queues the callers behind each other
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0
+            return -self._tokens / self.rate
+
+
+def _limits():
+    """
+    :returns: requests per second sent by the process, overall and to each
+              host, from `core.http_rate_limit` and
+              `core.http_rate_limit_per_host`
+    :rtype: (float, float)
+    """
+
+    # the config is read once per process, not once per request
+    path = util.get_config_path()
+    if path not in _rates:
+        config = util.get_config()
+        _rates[path] = (
+            config.get('core.http_rate_limit', DEFAULT_RATE),
+            config.get('core.http_rate_limit_per_host', DEFAULT_HOST_RATE))
+    return _rates[path]
+
+
+def host_key(url):
+    """
+    :param url: request URL
+    :type url: str
+    :returns: the host whose bucket limits the requests to `url`.  Each
+              agent behind the admin router counts as a host, so that
+              reading every agent isn't paced like reading one.
+    :rtype: str
+    """
+
+    parsed = urlparse(url)
+    agent = AGENT_PATH.match(parsed.path)
+    if agent:
+        return parsed.netloc + agent.group(0)
+    return parsed.netloc
+
+
+def get_buckets(url):
+    """Returns the buckets that limit the requests to a URL: the process'
+    overall bucket, and the bucket of the URL's host, see `host_key`
+
+    :param url: request URL
+    :type url: str
+    :returns: the buckets that limit requests to `url`
+    :rtype: [TokenBucket]
+    """
+
+    rate, host_rate = _limits()
+    keys = []
+    if rate:
+        keys.append((None, rate))
+    if host_rate:
+        keys.append((host_key(url), host_rate))
+
+    with _lock:
+        for key in keys:
+            if key not in _buckets:
+                _buckets[key] = TokenBucket(key[1])
+        return [_buckets[key] for key in keys]
+
+
+def acquire(method, url, reserved=False):
+    """Waits until a request may be sent under the process' overall and
+    per-host rate limits.  The time spent waiting is recorded in the HTTP
+    metrics.
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param reserved: whether the caller already waited for this request
+        with an earlier call, e.g. to time the request without the wait.
+        The request then doesn't wait again.
+    :type reserved: bool
+    :returns: seconds spent waiting
+    :rtype: float
+    """
+
+    if reserved:
+        return 0
+
+    delay = max([bucket.reserve() for bucket in get_buckets(url)] or [0])
+    if delay > 0:
+        logger.info('Throttling request to [%s] for %.3fs', url, delay)
+        time.sleep(delay)
+        metrics.registry.record_throttle(method, url, delay)
+    return delay
+
+
+def reset():
+    """Forgets the rate limits and their buckets
+
+    :rtype: None
+    """
+
+    with _lock:
+        _buckets.clear()
+        _rates.clear()
@@ -0,0 +1,198 @@
+import random
+import re
+import threading
+import time
+
+from dcos import util
+
+from six.moves.urllib.parse import urlparse
+
+logger = util.get_logger(__name__)
+
+IDEMPOTENT_METHODS = ['DELETE', 'GET', 'HEAD', 'OPTIONS', 'PUT']
+"""Methods whose requests are retried"""
+
+RETRY_STATUSES = [502, 503, 504]
+"""Statuses of the responses, typically from a proxy, that are retried"""
+
+DEFAULT_RETRIES = 2
+"""Default number of times a request is retried"""
+
+BACKOFF_BASE = 0.25
+"""Maximum delay, in seconds, before the first retry.  It doubles with every
+retry."""
+
+BACKOFF_MAX = 4.0
+"""Maximum delay, in seconds, between two attempts"""
+
+FAILURE_THRESHOLD = 3
+"""Number of consecutive connection failures that open a circuit"""
+
+RESET_TIMEOUT = 30.0
+"""Time, in seconds, after which an open circuit lets a probe request
+through"""
+
+_AGENT_PATH = re.compile(r'^/slave/[^/]+')
+
+_lock = threading.Lock()
+_breakers = {}
+_retries = {}
+
+
+def max_retries(method):
+    """Returns how many times a request may be retried.  Only requests with
+    idempotent methods are retried, `core.http_retries` times.
+
+    :param method: HTTP method
+    :type method: str
+    :rtype: int
+    """
+
+    if method.upper() not in IDEMPOTENT_METHODS:
+        return 0
+
+    # the config is read once per process, not once per request
+    path = util.get_config_path()
+    if path not in _retries:
+        _retries[path] = util.get_config().get('core.http_retries',
+                                               DEFAULT_RETRIES)
+    return _retries[path]
+
+
+def backoff(attempt):
+    """Returns the delay before a retry: a random time between 0 and an
+    exponentially growing cap, so that clients that failed together don't
+    retry together
+
+    :param attempt: number of the attempt that failed, starting at 0
+    :type attempt: int
+    :returns: delay in seconds
+    :rtype: float
+    """
+
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+def circuit_key(url):
+    """Returns the host that a URL's circuit breaker protects.  Agents that
+    are reached through admin-router, under /slave/<id>, have circuits of
+    their own.
+
+    :param url: request URL
+    :type url: str
+    :rtype: str
+    """
+
+    parsed = urlparse(url)
+    match = _AGENT_PATH.match(parsed.path)
+    return parsed.netloc + (match.group(0) if match else '')
+
+
+def get_breaker(url):
+    """Returns the circuit breaker of a URL's host
+
+    :param url: request URL
+    :type url: str
+    :rtype: CircuitBreaker
+    """
+
+    key = circuit_key(url)
+    with _lock:
+        if key not in _breakers:
+            _breakers[key] = CircuitBreaker(key)
+        return _breakers[key]
+
+
+def reset():
+    """Closes every circuit and forgets the configured retries
+
+    :rtype: None
+    """
+
+    with _lock:
+        _breakers.clear()
+        _retries.clear()
+
+
+class CircuitBreaker(object):
+    """Fails requests to a host fast once it's known to be down.  The
+    circuit opens after `FAILURE_THRESHOLD` consecutive connection failures.
+    After `RESET_TIMEOUT` seconds, one probe request is let through: the
+    circuit closes if it succeeds, and stays open otherwise.
+
+    :param host: host protected by the circuit
+    :type host: str
+    """
+
+    def __init__(self, host):
+        self.host = host
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def allow(self):
+        """Returns whether a request may be sent to the host
+
+        :rtype: bool
+        """
+
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._probing or \
+                    time.time() - self._opened_at < RESET_TIMEOUT:
+                return False
+
+            logger.info('Probing [%s] after %d failures',
+                        self.host, self._failures)
+            self._probing = True
+            return True
+
+    def retry_in(self):
+        """
+        :returns: seconds until the next probe of an open circuit
+        :rtype: float
+        """
+
+        with self._lock:
+            if self._opened_at is None:
+                return 0
+            return max(0, RESET_TIMEOUT - (time.time() - self._opened_at))
+
+    def record_success(self):
+        """Records that the host answered a request
+
+        :rtype: None
+        """
+
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._probing = False
+
+    def release(self):
+        """Ends a probe whose request failed for a reason other than the
+        host being unreachable, e.g. an invalid URL or too many redirects.
+        The circuit stays open, and the next request probes the host
+        again.
+
+        :rtype: None
+        """
+
+        with self._lock:
+            self._probing = False
+
+    def record_failure(self):
+        """Records that the host could not be reached
+
+        :rtype: None
+        """
+
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= FAILURE_THRESHOLD:
+                if self._opened_at is None:
+                    logger.info('Opening the circuit of [%s]', self.host)
+                self._opened_at = time.time()
+            self._probing = False
@@ -0,0 +1,256 @@
+import atexit
+import json
+import os
+import re
+import threading
+
+import portalocker
+from dcos import metrics, perf, util
+
+from six.moves.urllib.parse import urlparse
+
+logger = util.get_logger(__name__)
+
+HISTORY_SUBDIR = 'latency'
+"""Cache subdirectory that holds the latency history"""
+
+CONNECT_TIMEOUT = 3.05
+"""Time, in seconds, allowed to establish a connection.  Slightly more than a
+multiple of 3, the TCP retransmission window."""
+
+HISTORY_SIZE = 50
+"""Number of latencies remembered per endpoint"""
+
+MIN_SAMPLES = 5
+"""Number of latencies needed before an endpoint's timeout adapts"""
+
+P99_MULTIPLIER = 4
+"""An endpoint's read timeout is this multiple of its p99 latency"""
+
+ADAPTIVE_METHODS = ['GET', 'HEAD']
+"""Methods whose read timeouts adapt.  Other requests may take effect on
+the server even if they time out, so they keep the caller's timeout."""
+
+
+class EndpointClass(object):
+    """Read timeouts of a class of endpoints
+
+    :param name: name of the class
+    :type name: str
+    :param paths: regexes of the URL paths in the class
+    :type paths: [str]
+    :param minimum: lowest adapted read timeout, in seconds
+    :type minimum: float
+    :param maximum: highest adapted read timeout, in seconds
+    :type maximum: float
+    :param default: read timeout of endpoints without history; None to use
+                    the caller's timeout
+    :type default: float | None
+    """
+
+    def __init__(self, name, paths, minimum, maximum, default=None):
+        self.name = name
+        self.paths = [re.compile(path) for path in paths]
+        self.minimum = minimum
+        self.maximum = maximum
+        self.default = default
+
+    def matches(self, path):
+        return any(regex.search(path) for regex in self.paths)
+
+
+ENDPOINT_CLASSES = [
+    EndpointClass('bulk',
+                  [r'/master/state(?:\.json)?$', r'/master/state-summary$',
+                   r'^(?:/slave/[^/]+)?/state(?:\.json)?$',
+                   r'/v2/(?:apps|groups|tasks)$', r'\.zip$'],
+                  minimum=5, maximum=120, default=30),
+    EndpointClass('file',
+                  [r'/files/(?:read|browse|download)(?:\.json)?$'],
+                  minimum=2, maximum=30, default=10),
+    EndpointClass('default', [r''], minimum=1, maximum=30),
+]
+"""Classes of endpoints, by URL path.  The first matching class applies."""
+
+_lock = threading.Lock()
+_history = None
+_observed = {}
+_path = None
+
+
+def endpoint_class(url):
+    """
+    :param url: request URL
+    :type url: str
+    :returns: the class of the URL's endpoint
+    :rtype: EndpointClass
+    """
+
+    path = urlparse(url).path
+    return next(cls for cls in ENDPOINT_CLASSES if cls.matches(path))
+
+
+def _key(url):
+    parsed = urlparse(url)
+    return '{} {}'.format(parsed.netloc, metrics.path_template(parsed.path))
+
+
+def history_path():
+    """
+    :returns: path of the latency history
+    :rtype: str
+    """
+
+    return util.get_cache_path(HISTORY_SUBDIR, 'history.json')
+
+
+def _load(path):
+    try:
+        with open(path) as history_file:
+            return json.load(history_file)
+    except (IOError, OSError, ValueError):
+        return {}
+
+
+def _samples(key):
+    """
+    :param key: endpoint key
+    :type key: str
+    :returns: the remembered latencies of the endpoint, and those observed
+              by this process
+    :rtype: [float]
+    """
+
+    global _history
+
+    with _lock:
+        if _history is None:
+            _history = _load(history_path())
+        samples = _history.get(key, []) + _observed.get(key, [])
+    return samples[-HISTORY_SIZE:]
+
+
+def choose(method, url, timeout):
+    """Returns the connect and read timeouts of a request.  The read timeout
+    of a GET is a multiple of the endpoint's p99 latency, within the limits
+    of its class.  Endpoints without enough history get their class'
+    default.  A timeout from the caller is never exceeded.
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param timeout: the caller's timeout.  A (connect, read) tuple is used
+                    as is; a number caps the read timeout; None lets it
+                    adapt freely.
+    :type timeout: float | (float, float) | None
+    :returns: (connect, read) timeouts, in seconds
+    :rtype: (float, float)
+    """
+
+    if isinstance(timeout, tuple):
+        return timeout
+    if method.upper() not in ADAPTIVE_METHODS:
+        return (CONNECT_TIMEOUT, timeout)
+
+    cls = endpoint_class(url)
+    samples = sorted(_samples(_key(url)))
+    if len(samples) >= MIN_SAMPLES:
+        read = perf.percentile(samples, 99) * P99_MULTIPLIER
+        read = min(cls.maximum, max(cls.minimum, read))
+        if timeout is not None:
+            read = min(read, timeout)
+    elif timeout is not None:
+        read = timeout
+    else:
+        read = cls.default
+
+    return (CONNECT_TIMEOUT, read)
+
+
+def observe(method, url, seconds):
+    """Records the latency of a request, i.e. the time until its response
+    headers arrived.  If the process was configured with `configure`, the
+    latencies are added to the history when it exits.
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param seconds: latency
+    :type seconds: float
+    :rtype: None
+    """
+
+    if method.upper() not in ADAPTIVE_METHODS:
+        return
+
+    with _lock:
+        samples = _observed.setdefault(_key(url), [])
+        samples.append(round(seconds, 4))
+        del samples[:-HISTORY_SIZE]
+
+
+def observe_timeout(method, url, timeout):
+    """Records that a request timed out.  It counts as a latency of twice
+    the read timeout, so that the timeout grows until the endpoint answers.
+
+    :param method: HTTP method
+    :type method: str
+    :param url: request URL
+    :type url: str
+    :param timeout: timeouts of the request
+    :type timeout: (float, float)
+    :rtype: None
+    """
+
+    if isinstance(timeout, tuple) and timeout[1]:
+        observe(method, url, timeout[1] * 2)
+
+
+def flush():
+    """Adds the latencies observed by this process to the history
+
+    :rtype: None
+    """
+
+    global _observed
+
+    with _lock:
+        observed, _observed = _observed, {}
+
+    if not observed or _path is None:
+        return
+
+    path = _path
+    try:
+        util.ensure_dir_exists(os.path.dirname(path))
+        with open(path + '.lock', 'a') as lock_file:
+            portalocker.lock(lock_file, portalocker.LOCK_EX)
+            try:
+                history = _load(path)
+                for key, samples in observed.items():
+                    history[key] = \
+                        (history.get(key, []) + samples)[-HISTORY_SIZE:]
+                with open(path, 'w') as history_file:
+                    json.dump(history, history_file)
+            finally:
+                portalocker.unlock(lock_file)
+    except (IOError, OSError):
+        logger.exception('Unable to write the latency history [%s]', path)
+
+
+def configure():
+    """Adds the latencies observed by the process to the history when it
+    exits
+
+    :rtype: None
+    """
+
+    global _path
+
+    if _path is not None:
+        return
+
+    _path = history_path()
+    atexit.register(flush)
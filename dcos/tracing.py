@@ -0,0 +1,231 @@
+import atexit
+import contextlib
+import cProfile
+import json
+import os
+import sys
+import threading
+import time
+
+import portalocker
+from dcos import constants, util
+
+logger = util.get_logger(__name__)
+
+_lock = threading.Lock()
+_events = []
+_path = None
+_start = None
+
+
+def program_name():
+    """Returns the name of the running program. E.g. dcos or dcos-task
+
+    :rtype: str
+    """
+
+    return os.path.basename(sys.argv[0]) or 'python'
+
+
+def start(path):
+    """Starts recording spans, to be written to `path` in Chrome's trace
+    event format.  The first process of a command truncates the file; the
+    processes it starts inherit the environment and append to it, so that
+    `dcos` and `dcos-<command>` share one timeline.
+
+    :param path: path of the trace file
+    :type path: str
+    :rtype: None
+    """
+
+    global _path, _start
+
+    is_root = constants.DCOS_TRACE_PARENT_ENV not in os.environ
+    parent = os.environ.get(constants.DCOS_TRACE_PARENT_ENV)
+    os.environ[constants.DCOS_TRACE_PARENT_ENV] = str(os.getpid())
+
+    if is_root:
+        with open(path, 'w') as trace_file:
+            trace_file.write('[\n')
+
+    _path = path
+    _start = time.time()
+
+    args = {'name': program_name()}
+    if parent:
+        args['parent_pid'] = int(parent)
+    _append({'name': 'process_name', 'ph': 'M', 'pid': os.getpid(),
+             'tid': 0, 'args': args})
+
+
+def record(name, start, end, category='dcos', args=None):
+    """Records a completed span
+
+    :param name: name of the span
+    :type name: str
+    :param start: start time, in seconds since the epoch
+    :type start: float
+    :param end: end time, in seconds since the epoch
+    :type end: float
+    :param category: category of the span
+    :type category: str
+    :param args: additional values to show with the span
+    :type args: dict | None
+    :rtype: None
+    """
+
+    if _path is None:
+        return
+
+    event = {
+        'name': name,
+        'cat': category,
+        'ph': 'X',
+        'ts': int(start * 1e6),
+        'dur': int((end - start) * 1e6),
+        'pid': os.getpid(),
+        'tid': threading.current_thread().ident,
+    }
+    if args:
+        event['args'] = args
+    _append(event)
+
+
+@contextlib.contextmanager
+def span(name, category='dcos', **args):
+    """Context manager that records a span around its body.  Spans opened
+    inside it are nested under it.
+
+    :param name: name of the span
+    :type name: str
+    :param category: category of the span
+    :type category: str
+    :param args: additional values to show with the span
+    :type args: dict
+    """
+
+    start = time.time()
+    try:
+        yield
+    finally:
+        record(name, start, time.time(), category, args)
+
+
+def _append(event):
+    """
+    :param event: trace event
+    :type event: dict
+    :rtype: None
+    """
+
+    with _lock:
+        _events.append(event)
+
+
+def flush():
+    """Appends the recorded events to the trace file
+
+    :rtype: None
+    """
+
+    global _events
+
+    if _path is None:
+        return
+
+    with _lock:
+        events, _events = _events, []
+
+    if not events:
+        return
+
+    data = ''.join(json.dumps(event, sort_keys=True) + ',\n'
+                   for event in events)
+    try:
+        with open(_path, 'a') as trace_file:
+            portalocker.lock(trace_file, portalocker.LOCK_EX)
+            try:
+                trace_file.write(data)
+            finally:
+                portalocker.unlock(trace_file)
+    except (IOError, OSError):
+        logger.exception('Unable to write trace file [%s]', _path)
+
+
+def load(path):
+    """Loads the events of a trace file.  The file is a JSON array whose
+    closing bracket is omitted, so that processes can append to it.
+
+    :param path: path of the trace file
+    :type path: str
+    :returns: trace events
+    :rtype: [dict]
+    """
+
+    with open(path) as trace_file:
+        data = trace_file.read().rstrip()
+
+    if data.endswith(','):
+        data = data[:-1]
+    if not data.endswith(']'):
+        data += ']'
+
+    return json.loads(data)
+
+
+def _finish():
+    """Records a span covering the whole process and writes the trace
+
+    :rtype: None
+    """
+
+    record(program_name(), _start, time.time(), 'process',
+           {'argv': sys.argv[1:]})
+    flush()
+
+
+def _start_profiler(path):
+    """Profiles the process with cProfile.  The stats are written in
+    pstats format to `<path>.<program>` when the process exits.
+
+    :param path: path prefix of the stats file
+    :type path: str
+    :rtype: None
+    """
+
+    profiler = cProfile.Profile()
+
+    def dump():
+        profiler.disable()
+        stats_path = '{}.{}'.format(path, program_name())
+        try:
+            profiler.dump_stats(stats_path)
+        except (IOError, OSError):
+            logger.exception('Unable to write profile [%s]', stats_path)
+
+    atexit.register(dump)
+    profiler.enable()
+
+
+def configure(trace_path, profile_path):
+    """Configures tracing and profiling of the process
+
+    :param trace_path: trace file to append spans to; None to disable
+                       tracing
+    :type trace_path: str | None
+    :param profile_path: path prefix of the cProfile stats; None to disable
+                         profiling
+    :type profile_path: str | None
+    :rtype: None
+    """
+
+    if trace_path and _path is None:
+        try:
+            start(trace_path)
+        except (IOError, OSError):
+            logger.exception('Unable to create trace file [%s]', trace_path)
+        else:
+            atexit.register(_finish)
+
+    if profile_path:
+        _start_profiler(profile_path)
@@ -9,6 +9,7 @@ import re
 import shutil
 import sys
 import tempfile
+import threading
 import time
 
 import concurrent.futures
@@ -138,6 +139,55 @@ def get_config_path():
     return os.environ.get(constants.DCOS_CONFIG_ENV, default)
 
 
+def get_cache_path(*paths):
+    """ Returns a path inside the DCOS cache directory.
+
+    :param paths: path components relative to the cache directory
+    :type paths: [str]
+    :returns: path inside the DCOS cache directory
+    :rtype: str
+    """
+
+    default = os.path.expanduser(
+        os.path.join("~",
+                     constants.DCOS_DIR,
+                     constants.DCOS_CACHE_SUBDIR))
+
+    cache_dir = os.environ.get(constants.DCOS_CACHE_DIR_ENV, default)
+    return os.path.join(cache_dir, *paths)
+
+
+def write_file_atomic(path, data):
+    """Replace the contents of the file at `path` with `data`.  Readers
+    see either the old or the new contents, never a partial write.
+
+    :param path: path to the file
+    :type path: str
+    :param data: new contents of the file
+    :type data: bytes
+    :rtype: None
+    """
+
+    directory = os.path.dirname(path)
+    ensure_dir_exists(directory)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as tmp_file:
+            tmp_file.write(data)
+
+        if is_windows_platform() and os.path.exists(path):
+            os.remove(path)
+        os.rename(tmp_path, path)
+    except EnvironmentError as e:
+        logger.exception('Unable to write file: %s', path)
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+        raise DCOSException(
+            'Error writing file [{}]: {}'.format(path, e.strerror))
+
+
 def get_config(mutable=False):
     """ Returns the DCOS configuration object
 
@@ -230,14 +280,27 @@ def dcos_bin_path():
 
 
 def configure_process_from_environ():
-    """Configure the program's logger and debug messages using the environment
-    variable
+    """Configure the program's logger, debug messages, metrics report,
+    tracing, HAR capture, HTTP cassette, performance ledger, latency
+    history and agent probes using the environment variables
 
     :rtype: None
     """
 
+    from dcos import agents, cassette, metrics, perf, timeouts, tracing, wire
+
     configure_logger(os.environ.get(constants.DCOS_LOG_LEVEL_ENV))
     configure_debug(os.environ.get(constants.DCOS_DEBUG_ENV))
+    metrics.configure(os.environ.get(constants.DCOS_METRICS_ENV))
+    tracing.configure(os.environ.get(constants.DCOS_TRACE_ENV),
+                      os.environ.get(constants.DCOS_PROFILE_ENV))
+    wire.configure(os.environ.get(constants.DCOS_HAR_ENV))
+    cassette.configure(os.environ.get(constants.DCOS_CASSETTE_ENV),
+                       os.environ.get(constants.DCOS_CASSETTE_MODE_ENV),
+                       os.environ.get(constants.DCOS_CASSETTE_LATENCY_ENV))
+    perf.configure()
+    timeouts.configure()
+    agents.configure()
 
 
 def configure_debug(is_debug):
@@ -531,7 +594,8 @@ class CustomJsonRenderer(pystache.Renderer):
 
 
 def duration(fn):
-    """ Decorator to log the duration of a function.
+    """ Decorator to log the duration of a function.  The call is also
+    recorded as a span when tracing is enabled.
 
     :param fn: function to measure
     :type fn: function
@@ -539,16 +603,22 @@ def duration(fn):
     :rtype: function
     """
 
+    # avoid circular import
+    from dcos import tracing
+
+    name = '{0}.{1}'.format(fn.__module__, fn.__name__)
+
     @functools.wraps(fn)
     def timer(*args, **kwargs):
         start = time.time()
         try:
             return fn(*args, **kwargs)
         finally:
-            logger.debug("duration: {0}.{1}: {2:2.2f}s".format(
-                fn.__module__,
-                fn.__name__,
-                time.time() - start))
+            end = time.time()
+            logger.debug("duration: {0}: {1:2.2f}s".format(
+                name,
+                end - start))
+            tracing.record(name, start, end)
 
     return timer
 
@@ -637,6 +707,40 @@ def stream(fn, objs):
             yield job, jobs[job]
 
 
+def submit_daemon(fn, *args, **kwargs):
+    """Calls `fn` on a daemon thread.  Unlike the workers of a
+    ThreadPoolExecutor, which are joined when the interpreter exits, the
+    thread doesn't keep the process alive: a call that is no longer waited
+    for is abandoned.
+
+    :param fn: function
+    :type fn: function
+    :param args: positional arguments of `fn`
+    :type args: list
+    :param kwargs: keyword arguments of `fn`
+    :type kwargs: dict
+    :returns: the result of the call
+    :rtype: Future
+    """
+
+    future = concurrent.futures.Future()
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = fn(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    thread = threading.Thread(target=run)
+    thread.daemon = True
+    thread.start()
+    return future
+
+
 def get_ssh_options(config_file, options):
     """Returns the SSH arguments for the given parameters.  Used by
     commands that wrap SSH.
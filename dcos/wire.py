@@ -0,0 +1,337 @@
+import atexit
+import base64
+import datetime
+import json
+import os
+import re
+import threading
+
+import dcos
+import portalocker
+from dcos import constants, util
+
+from six.moves.urllib.parse import parse_qsl, urlparse
+
+logger = util.get_logger(__name__)
+
+MAX_LOGGED_BODY = 2048
+"""Number of bytes of a response body written to the log.  HAR archives
+capture whole bodies."""
+
+REDACTED = '<redacted>'
+
+SENSITIVE_HEADERS = ['authorization', 'proxy-authorization', 'cookie',
+                     'set-cookie']
+"""Headers whose values are never logged or captured"""
+
+SENSITIVE_FIELDS = [
+    (re.compile(r'("(?:password|passwd|secret|token|access_token|'
+                r'refresh_token|private_key)"\s*:\s*)"(?:[^"\\]|\\.)*("|$)',
+                re.IGNORECASE),
+     r'\1"' + REDACTED + r'\2'),
+    (re.compile(r'((?:^|[&?])(?:password|secret|token)=)[^&\s]*',
+                re.IGNORECASE),
+     r'\1' + REDACTED),
+]
+"""Rules that redact credentials from logged bodies, as JSON properties or
+form fields.  A value cut by `MAX_LOGGED_BODY` is redacted too."""
+
+_lock = threading.Lock()
+_entries = []
+_har_path = None
+
+
+def redact_headers(headers):
+    """Returns a copy of `headers` without credentials
+
+    :param headers: HTTP headers
+    :type headers: dict | None
+    :rtype: dict | None
+    """
+
+    if headers is None:
+        return None
+
+    return dict((name, REDACTED if name.lower() in SENSITIVE_HEADERS
+                 else value)
+                for name, value in headers.items())
+
+
+def redact_body(text):
+    """Returns `text` without credentials
+
+    :param text: request or response body
+    :type text: str
+    :rtype: str
+    """
+
+    for regex, replacement in SENSITIVE_FIELDS:
+        text = regex.sub(replacement, text)
+    return text
+
+
+class LoggedBody(object):
+    """Response body that is decoded, capped and redacted only when it is
+    formatted, i.e. when the log message is emitted.
+
+    :param response: HTTP response
+    :type response: requests.Response
+    :param stream: whether the response body is streamed.  Streamed bodies
+                   aren't logged: reading them would consume them.
+    :type stream: bool
+    """
+
+    def __init__(self, response, stream):
+        self._response = response
+        self._stream = stream
+
+    def __str__(self):
+        if self._stream:
+            return '<streamed body>'
+
+        content = self._response.content or b''
+        text = content[:MAX_LOGGED_BODY].decode(
+            self._response.encoding or 'utf-8', 'replace')
+        text = redact_body(text)
+        if len(content) > MAX_LOGGED_BODY:
+            text += '... [{} bytes]'.format(len(content))
+        return text
+
+
+def _timestamp(seconds):
+    """
+    :param seconds: time in seconds since the epoch
+    :type seconds: float
+    :returns: ISO 8601 representation of the time, in UTC
+    :rtype: str
+    """
+
+    return datetime.datetime.utcfromtimestamp(seconds).strftime(
+        '%Y-%m-%dT%H:%M:%S.%fZ')
+
+
+def _name_values(pairs):
+    return [{'name': name, 'value': value} for name, value in pairs]
+
+
+def _har_content(content, mime_type):
+    """Captures a whole body, without credentials
+
+    :param content: body
+    :type content: bytes | str | None
+    :param mime_type: MIME type of the body
+    :type mime_type: str
+    :returns: HAR content object
+    :rtype: dict
+    """
+
+    if content is None:
+        content = b''
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+
+    har = {'size': len(content), 'mimeType': mime_type}
+    try:
+        har['text'] = redact_body(content.decode('utf-8'))
+    except UnicodeDecodeError:
+        har['text'] = base64.b64encode(content).decode('ascii')
+        har['encoding'] = 'base64'
+    return har
+
+
+def _har_request(request):
+    """
+    :param request: prepared request
+    :type request: requests.PreparedRequest
+    :returns: HAR request object
+    :rtype: dict
+    """
+
+    headers = redact_headers(dict(request.headers))
+    body = request.body
+    har = {
+        'method': request.method,
+        'url': request.url,
+        'httpVersion': 'HTTP/1.1',
+        'cookies': [],
+        'headers': _name_values(sorted(headers.items())),
+        'queryString': _name_values(parse_qsl(urlparse(request.url).query)),
+        'headersSize': -1,
+        'bodySize': len(body) if isinstance(body, (bytes, str)) else 0,
+    }
+    if isinstance(body, (bytes, str)):
+        content = _har_content(body, headers.get('Content-Type', ''))
+        har['postData'] = {'mimeType': content['mimeType'],
+                           'text': content['text']}
+    return har
+
+
+def _har_response(response, stream):
+    """
+    :param response: HTTP response; None if no response was received
+    :type response: requests.Response | None
+    :param stream: whether the response body is streamed
+    :type stream: bool
+    :returns: HAR response object
+    :rtype: dict
+    """
+
+    if response is None:
+        return {'status': 0, 'statusText': '', 'httpVersion': '',
+                'cookies': [], 'headers': [], 'redirectURL': '',
+                'headersSize': -1, 'bodySize': -1,
+                'content': {'size': 0, 'mimeType': ''}}
+
+    headers = redact_headers(dict(response.headers))
+    mime_type = headers.get('Content-Type', '')
+    if stream:
+        content = {'size': -1, 'mimeType': mime_type,
+                   'comment': 'streamed body, not captured'}
+    else:
+        content = _har_content(response.content, mime_type)
+
+    return {
+        'status': response.status_code,
+        'statusText': response.reason or '',
+        'httpVersion': 'HTTP/1.1',
+        'cookies': [],
+        'headers': _name_values(sorted(headers.items())),
+        'content': content,
+        'redirectURL': headers.get('Location', ''),
+        'headersSize': -1,
+        'bodySize': content['size'],
+    }
+
+
+def record(request, response, start, seconds, stream=False, error=None):
+    """Records a request and its response in the HAR archive, if HAR
+    capture is enabled
+
+    :param request: prepared request
+    :type request: requests.PreparedRequest | None
+    :param response: HTTP response; None if no response was received
+    :type response: requests.Response | None
+    :param start: time at which the request was sent, in seconds since the
+                  epoch
+    :type start: float
+    :param seconds: time spent on the request
+    :type seconds: float
+    :param stream: whether the response body is streamed
+    :type stream: bool
+    :param error: error that prevented a response
+    :type error: Exception | None
+    :rtype: None
+    """
+
+    if _har_path is None or request is None:
+        return
+
+    total = seconds * 1000
+    wait = total
+    if response is not None and response.elapsed is not None:
+        wait = min(total, response.elapsed.total_seconds() * 1000)
+
+    entry = {
+        'startedDateTime': _timestamp(start),
+        'time': total,
+        'request': _har_request(request),
+        'response': _har_response(response, stream),
+        'cache': {},
+        'timings': {'blocked': -1, 'dns': -1, 'connect': -1, 'ssl': -1,
+                    'send': 0, 'wait': wait, 'receive': total - wait},
+        '_pid': os.getpid(),
+    }
+    if error is not None:
+        entry['_error'] = str(error)
+
+    with _lock:
+        _entries.append(entry)
+
+
+def empty_har():
+    """
+    :returns: HAR archive without entries
+    :rtype: dict
+    """
+
+    return {'log': {'version': '1.2',
+                    'creator': {'name': 'dcos-cli', 'version': dcos.version},
+                    'pages': [],
+                    'entries': []}}
+
+
+def load(path):
+    """
+    :param path: path of a HAR archive
+    :type path: str
+    :returns: the archive; an empty one if it's missing or malformed
+    :rtype: dict
+    """
+
+    try:
+        with open(path) as har_file:
+            return json.load(har_file)
+    except (IOError, OSError, ValueError):
+        return empty_har()
+
+
+def flush():
+    """Adds the recorded entries to the HAR archive.  The processes of a
+    command share the archive, so it's read and rewritten under a lock.
+
+    :rtype: None
+    """
+
+    global _entries
+
+    if _har_path is None:
+        return
+
+    with _lock:
+        entries, _entries = _entries, []
+
+    if not entries:
+        return
+
+    try:
+        with open(_har_path + '.lock', 'a') as lock_file:
+            portalocker.lock(lock_file, portalocker.LOCK_EX)
+            try:
+                har = load(_har_path)
+                har['log']['entries'].extend(entries)
+                har['log']['entries'].sort(
+                    key=lambda entry: entry['startedDateTime'])
+                with open(_har_path, 'w') as har_file:
+                    json.dump(har, har_file, indent=2, sort_keys=True)
+            finally:
+                portalocker.unlock(lock_file)
+    except (IOError, OSError):
+        logger.exception('Unable to write HAR archive [%s]', _har_path)
+
+
+def configure(har_path):
+    """Enables HAR capture of the process' HTTP requests.  The first
+    process of a command starts a new archive; the processes it starts
+    inherit the environment and add their entries to it.
+
+    :param har_path: path of the HAR archive; None to disable HAR capture
+    :type har_path: str | None
+    :rtype: None
+    """
+
+    global _har_path
+
+    if not har_path or _har_path is not None:
+        return
+
+    if constants.DCOS_HAR_PARENT_ENV not in os.environ:
+        try:
+            with open(har_path, 'w') as har_file:
+                json.dump(empty_har(), har_file, indent=2)
+        except (IOError, OSError):
+            logger.exception('Unable to create HAR archive [%s]', har_path)
+            return
+    os.environ[constants.DCOS_HAR_PARENT_ENV] = str(os.getpid())
+
+    _har_path = har_path
+    atexit.register(flush)
@@ -0,0 +1,87 @@
+import socket
+
+from dcos import agents, http
+from dcos.errors import DCOSException
+
+import pytest
+
+DCOS_URL = 'http://dcos.example.com/'
+
+
+@pytest.fixture
+def probes(tmpdir, monkeypatch):
+    monkeypatch.setenv('DCOS_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(agents, '_path', None)
+    agents.reset()
+    yield tmpdir
+    agents.reset()
+
+
+@pytest.fixture
+def agent():
+    """URL of a listening agent"""
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(5)
+    yield 'http://127.0.0.1:{}'.format(listener.getsockname()[1])
+    listener.close()
+
+
+@pytest.fixture
+def down():
+    """URL of an agent that refuses connections"""
+
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    url = 'http://127.0.0.1:{}'.format(listener.getsockname()[1])
+    listener.close()
+    return url
+
+
+def test_probes_are_remembered(probes, agent, down, monkeypatch):
+    agents.configure()
+    assert agents.lookup(agent) is None
+    assert agents.probe(agent)
+    assert not agents.probe(down)
+    agents.flush()
+
+    # another process reads the probes
+    agents.reset()
+    assert agents.lookup(agent) is True
+    assert agents.lookup(down) is False
+
+    monkeypatch.setattr(agents.time, 'time',
+                        lambda: 2 * agents.PROBE_TTL + 1e10)
+    assert agents.lookup(agent) is None
+
+
+def test_routes(probes, agent, down):
+    assert agents.Router(None).url('S1', agent, 'state.json') == \
+        agent + '/state.json'
+    assert agents.Router(DCOS_URL).url('S1', agent, 'state.json') == \
+        DCOS_URL + 'slave/S1/state.json'
+
+    router = agents.Router(DCOS_URL, direct=True)
+    assert router.url('S1', agent, 'state.json') == agent + '/state.json'
+    assert router.url('S2', down, 'state.json') == \
+        DCOS_URL + 'slave/S2/state.json'
+
+
+def test_falls_back_to_the_proxy(probes, agent, monkeypatch):
+    urls = []
+
+    def get(url, **kwargs):
+        urls.append(url)
+        if url.startswith(agent):
+            raise DCOSException('URL [{}] is unreachable'.format(url))
+        return url
+
+    monkeypatch.setattr(http, 'get', get)
+
+    router = agents.Router(DCOS_URL, direct=True)
+    assert router.get('S1', agent, 'files/read.json') == \
+        DCOS_URL + 'slave/S1/files/read.json'
+    assert urls == [agent + '/files/read.json',
+                    DCOS_URL + 'slave/S1/files/read.json']
+    assert agents.lookup(agent) is False
@@ -0,0 +1,111 @@
+import datetime
+import json
+
+import requests
+from dcos import cassette, http, metrics, ratelimit, retry, timeouts
+from dcos.errors import DCOSException
+
+import pytest
+
+URL = 'http://dcos.example.com/marathon/v2/apps'
+
+
+@pytest.fixture
+def cassette_path(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\nhttp_retries = 0\nhttp_rate_limit_per_host = 0\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+    monkeypatch.setenv('DCOS_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(timeouts, '_history', None)
+    monkeypatch.setattr(timeouts, '_observed', {})
+    monkeypatch.setattr(timeouts, '_path', None)
+    monkeypatch.setattr(http, 'PREEMPTIVE_AUTH', {})
+    for module in [cassette, metrics.registry, ratelimit, retry]:
+        module.reset()
+
+    yield str(tmpdir.join('cassette.json'))
+
+    for module in [cassette, ratelimit, retry]:
+        module.reset()
+
+
+class _Cluster(object):
+    """Answers requests.request with a count of the requests"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, method, url, params=None, headers=None, auth=None,
+                 **kwargs):
+        self.count += 1
+        request = requests.Request(method.upper(), url, params=params,
+                                   headers=headers, auth=auth).prepare()
+
+        response = requests.Response()
+        response.status_code = 200
+        response.reason = 'OK'
+        response.url = request.url
+        response.request = request
+        response.headers.update({'Content-Type': 'application/json',
+                                 'Set-Cookie': 'session=secret'})
+        response.elapsed = datetime.timedelta(seconds=0.5)
+        response._content = json.dumps({'count': self.count}).encode()
+        return response
+
+
+def _record(cassette_path, monkeypatch, requests_to_send):
+    monkeypatch.setattr(requests, 'request', _Cluster())
+    cassette.configure(cassette_path, cassette.RECORD)
+    for url, kwargs in requests_to_send:
+        http.get(url, **kwargs)
+    cassette.flush()
+    cassette.reset()
+    metrics.registry.reset()
+
+
+def test_records_without_credentials(cassette_path, monkeypatch):
+    _record(cassette_path, monkeypatch, [
+        (URL, {'headers': {'Authorization': 'token=secret'}}),
+        (URL, {'params': {'embed': 'apps.tasks'}}),
+    ])
+
+    interactions = cassette.load(cassette_path)['interactions']
+    assert [interaction['request']['url'] for interaction in interactions] \
+        == [URL, URL + '?embed=apps.tasks']
+    assert 'secret' not in json.dumps(interactions)
+    assert interactions[0]['response']['content']['text'] == '{"count": 1}'
+
+
+def test_replays_in_order(cassette_path, monkeypatch):
+    _record(cassette_path, monkeypatch, [(URL, {}), (URL, {})])
+    monkeypatch.setattr(requests, 'request', None)
+
+    cassette.configure(cassette_path)
+    assert [http.get(URL).json()['count'] for _ in range(3)] == [1, 2, 2]
+
+    with pytest.raises(DCOSException) as exc_info:
+        http.get(URL, params={'embed': 'apps.tasks'})
+    assert str(exc_info.value) == (
+        'No response to [GET {}?embed=apps.tasks] was recorded in '
+        'cassette [{}]'.format(URL, cassette_path))
+
+
+def test_replays_with_simulated_latency(cassette_path, monkeypatch):
+    _record(cassette_path, monkeypatch, [(URL, {})])
+
+    delays = []
+    monkeypatch.setattr(http.time, 'sleep', delays.append)
+    cassette.configure(cassette_path, cassette.REPLAY, '2')
+
+    [interaction] = cassette.load(cassette_path)['interactions']
+    assert http.get(URL).json() == {'count': 1}
+    assert delays == [2 * interaction['seconds']]
+    [entry] = metrics.registry.snapshot()
+    assert entry['count'] == 1
+
+
+def test_invalid_mode(cassette_path):
+    cassette.configure(cassette_path, 'rewind')
+
+    assert not cassette.recording()
+    assert not cassette.replaying()
@@ -0,0 +1,106 @@
+import os
+
+from dcos import completion, constants
+from dcos.errors import DCOSException
+
+import pytest
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    monkeypatch.setenv(constants.DCOS_CACHE_DIR_ENV, str(tmpdir))
+    monkeypatch.setattr(completion, '_digests', {})
+    monkeypatch.setattr(completion, '_updates', {})
+    return tmpdir
+
+
+def test_query_missing_index(cache_dir):
+    assert completion.query('task', 'abc') == []
+
+
+def test_query_prefix(cache_dir):
+    completion.update('task', ['b.2', 'a.1', 'b.1', 'c.1', 'b.1'])
+
+    assert completion.query('task', 'b') == ['b.1', 'b.2']
+    assert completion.query('task', '') == ['a.1', 'b.1', 'b.2', 'c.1']
+    assert completion.query('task', 'd') == []
+
+
+def test_index_is_plain_text(cache_dir):
+    completion.update('app', ['/b', '/a'])
+
+    with open(completion.index_path('app')) as index_file:
+        assert index_file.read() == '/a\n/b\n'
+
+
+def test_unknown_kind(cache_dir):
+    with pytest.raises(DCOSException):
+        completion.query('unknown', '')
+
+
+def test_update_from_master_state(cache_dir):
+    state = {
+        'frameworks': [
+            {'id': 'framework-1',
+             'name': 'marathon',
+             'tasks': [{'id': 'sleep.1'}, {'id': 'sleep.2'}]},
+            {'id': 'framework-2',
+             'name': 'chronos',
+             'tasks': []},
+        ],
+        'slaves': [{'id': 'S0'}, {'id': 'S1'}]
+    }
+
+    completion.update_from_master_state(state)
+
+    assert completion.query('task') == ['sleep.1', 'sleep.2']
+    assert completion.query('framework') == ['framework-1', 'framework-2']
+    assert completion.query('service') == ['chronos', 'marathon']
+    assert completion.query('node') == ['S0', 'S1']
+
+
+def test_state_summary_keeps_tasks(cache_dir):
+    completion.update('task', ['sleep.1'])
+
+    summary = {'frameworks': [{'id': 'framework-1', 'name': 'marathon'}],
+               'slaves': []}
+    completion.update_from_master_state(summary)
+
+    assert completion.query('task') == ['sleep.1']
+
+
+def test_update_in_background(cache_dir):
+    thread = completion.update_in_background(
+        completion.update_from_apps, [{'id': '/sleep'}])
+    assert thread.daemon
+    thread.join()
+
+    assert completion.query('app', '/s') == ['/sleep']
+    assert os.path.isdir(str(cache_dir.join(completion.INDEX_SUBDIR)))
+
+
+def test_updates_are_debounced(cache_dir, monkeypatch):
+    thread = completion.update_in_background(
+        completion.update_from_apps, [{'id': '/sleep'}])
+    thread.join()
+
+    # run again within the interval, e.g. by the next --watch cycle
+    assert completion.update_in_background(
+        completion.update_from_apps, [{'id': '/other'}]) is None
+    assert completion.query('app') == ['/sleep']
+
+    monkeypatch.setattr(completion, 'UPDATE_INTERVAL', 0)
+    completion.update_in_background(
+        completion.update_from_apps, [{'id': '/other'}]).join()
+    assert completion.query('app') == ['/other']
+
+
+def test_unchanged_ids_are_not_read_again(cache_dir, monkeypatch):
+    completion.update('app', ['/b', '/a'])
+
+    def fail(*args):
+        raise AssertionError('the index was read or written')
+
+    monkeypatch.setattr(completion, 'open', fail, raising=False)
+    monkeypatch.setattr(completion.util, 'write_file_atomic', fail)
+    completion.update('app', ['/a', '/b'])
@@ -0,0 +1,138 @@
+import datetime
+import os
+import stat
+
+import requests
+from dcos import credentials, http
+from requests.auth import HTTPBasicAuth
+
+import pytest
+
+URL = 'http://dcos.example.com/marathon/v2/apps'
+ORIGIN = 'http://dcos.example.com'
+
+
+@pytest.fixture
+def cache_dir(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\nauth_cache_ttl = 60\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+    monkeypatch.setenv('DCOS_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(credentials, '_ttls', {})
+    monkeypatch.setattr(http, 'AUTH_CREDS', {})
+    monkeypatch.setattr(http, 'PREEMPTIVE_AUTH', {})
+    return tmpdir
+
+
+class _Server(object):
+    """Answers requests.request, challenging requests without the expected
+    Authorization header"""
+
+    def __init__(self, username, password):
+        self.authorization = credentials._basic_auth_str(username, password)
+        self.received = []
+
+    def __call__(self, method, url, auth=None, **kwargs):
+        request = requests.Request(method, url, auth=auth).prepare()
+        self.received.append(request.headers.get('Authorization'))
+
+        response = requests.Response()
+        response.url = url
+        response.request = request
+        response.elapsed = datetime.timedelta(0)
+        response._content = b'{}'
+        if request.headers.get('Authorization') == self.authorization:
+            response.status_code = 200
+        else:
+            response.status_code = 401
+            response.headers['WWW-Authenticate'] = 'Basic realm="dcos"'
+        return response
+
+
+def _new_process(monkeypatch):
+    monkeypatch.setattr(http, 'AUTH_CREDS', {})
+    monkeypatch.setattr(http, 'PREEMPTIVE_AUTH', {})
+
+
+def test_credentials_are_sent_preemptively(cache_dir, monkeypatch):
+    server = _Server('user', 'pwd')
+    monkeypatch.setattr(requests, 'request', server)
+    monkeypatch.setattr(http, '_get_http_auth_credentials',
+                        lambda response: HTTPBasicAuth('user', 'pwd'))
+
+    http.get(URL)
+    http.get(URL)
+    assert server.received == [None, server.authorization,
+                               server.authorization]
+
+    _new_process(monkeypatch)
+    http.get(URL)
+    assert server.received[-1] == server.authorization
+    assert len(server.received) == 4
+
+    path = str(cache_dir.join(credentials.CREDENTIALS_SUBDIR,
+                              'credentials.json'))
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_rejected_credentials_are_forgotten(cache_dir, monkeypatch):
+    credentials.store(ORIGIN, 'dcos',
+                      HTTPBasicAuth('user', 'old'))
+
+    server = _Server('user', 'new')
+    monkeypatch.setattr(requests, 'request', server)
+    monkeypatch.setattr(http, '_get_http_auth_credentials',
+                        lambda response: HTTPBasicAuth('user', 'new'))
+
+    http.get(URL)
+    assert server.received == [credentials._basic_auth_str('user', 'old'),
+                               server.authorization]
+    assert credentials.lookup(ORIGIN) == \
+        credentials.AuthorizationHeader(server.authorization)
+
+
+def test_origin():
+    assert credentials.origin(URL) == ORIGIN
+    assert credentials.origin('HTTPS://DCOS.example.com:443/') == \
+        'https://dcos.example.com'
+    assert credentials.origin('https://dcos.example.com:8443/acs') == \
+        'https://dcos.example.com:8443'
+
+
+def test_credentials_are_only_sent_to_their_origin(cache_dir, monkeypatch):
+    credentials.store('https://dcos.example.com', 'dcos',
+                      HTTPBasicAuth('user', 'pwd'))
+
+    server = _Server('user', 'pwd')
+    monkeypatch.setattr(requests, 'request', server)
+    monkeypatch.setattr(http, '_get_http_auth_credentials',
+                        lambda response: HTTPBasicAuth('user', 'pwd'))
+
+    # neither in the clear, nor to another port
+    for url in [URL, 'https://dcos.example.com:8443/marathon/v2/apps']:
+        http.get(url)
+        assert server.received[-2] is None
+    http.get('https://dcos.example.com/marathon/v2/apps')
+    assert server.received[-1] == server.authorization
+    assert len(server.received) == 5
+
+
+def test_credentials_expire(cache_dir, monkeypatch):
+    credentials.store(ORIGIN, 'dcos',
+                      HTTPBasicAuth('user', 'pwd'))
+    assert credentials.lookup(ORIGIN) is not None
+    assert credentials.lookup('http://other.example.com') is None
+
+    now = credentials.time.time()
+    monkeypatch.setattr(credentials.time, 'time', lambda: now + 61)
+    assert credentials.lookup(ORIGIN) is None
+
+
+def test_credentials_are_not_remembered_when_disabled(cache_dir,
+                                                      monkeypatch):
+    cache_dir.join('dcos.toml').write('[core]\nauth_cache_ttl = 0\n')
+
+    credentials.store(ORIGIN, 'dcos',
+                      HTTPBasicAuth('user', 'pwd'))
+    assert credentials.lookup(ORIGIN) is None
+    assert not cache_dir.join(credentials.CREDENTIALS_SUBDIR).check()
@@ -0,0 +1,121 @@
+import datetime
+import threading
+import time
+
+import requests
+from dcos import http, metrics
+from dcos.errors import DCOSException
+
+import pytest
+
+URL = 'http://dcos.example.com/slave/S1/state.json'
+
+
+class _SlowServer(object):
+    """Answers requests.request once `release` is set"""
+
+    def __init__(self, error=None):
+        self.release = threading.Event()
+        self.error = error
+        self.count = 0
+
+    def __call__(self, method, url, **kwargs):
+        self.count += 1
+        self.release.wait()
+        if self.error is not None:
+            raise self.error
+
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        response.elapsed = datetime.timedelta(0)
+        response._content = b'{"id": "S1"}'
+        return response
+
+
+def _concurrently(fn, count):
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = fn()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(index,))
+               for index in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def _wait_for_flight():
+    while not http._flights:
+        time.sleep(0.01)
+    # let the other threads join the flight
+    time.sleep(0.1)
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    return registry
+
+
+def test_identical_gets_share_a_request(monkeypatch, registry):
+    server = _SlowServer()
+    monkeypatch.setattr(requests, 'request', server)
+
+    threads, results = _concurrently(lambda: http.get(URL), 5)
+    _wait_for_flight()
+    server.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert server.count == 1
+    assert registry.totals()['count'] == 1
+    assert all(result.json() == {'id': 'S1'} for result in results)
+    assert http._flights == {}
+
+
+def test_errors_are_shared(monkeypatch, registry):
+    server = _SlowServer(requests.exceptions.InvalidURL('bad'))
+    monkeypatch.setattr(requests, 'request', server)
+
+    threads, results = _concurrently(lambda: http.get(URL), 3)
+    _wait_for_flight()
+    server.release.set()
+    for thread in threads:
+        thread.join()
+
+    assert server.count == 1
+    assert all(isinstance(result, DCOSException) for result in results)
+
+
+def test_different_requests_are_not_coalesced(monkeypatch, registry):
+    server = _SlowServer()
+    server.release.set()
+    monkeypatch.setattr(requests, 'request', server)
+
+    http.get(URL)
+    http.get(URL)
+    http.get(URL, params={'path': '/'})
+    http.post(URL)
+
+    assert server.count == 4
+
+
+def test_flight_key():
+    key = http._flight_key('GET', URL, 5, None,
+                           {'params': {'b': 1, 'a': 2}})
+    assert key == http._flight_key('GET', URL, 5, None,
+                                   {'params': {'a': 2, 'b': 1}})
+    assert key != http._flight_key(
+        'GET', URL, 5, None,
+        {'params': {'a': 2, 'b': 1},
+         'auth': requests.auth.HTTPBasicAuth('user', 'pwd')})
+
+    assert http._flight_key('POST', URL, 5, None, {}) is None
+    assert http._flight_key('GET', URL, 5, None, {'stream': True}) is None
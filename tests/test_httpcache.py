@@ -0,0 +1,145 @@
+import datetime
+import os
+
+import requests
+from dcos import http, httpcache, metrics, util
+
+import pytest
+
+APPS_URL = 'http://dcos.example.com/marathon/v2/apps'
+
+
+@pytest.fixture
+def cache(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\nhttp_cache = true\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+    monkeypatch.setenv('DCOS_CACHE_DIR', str(tmpdir))
+    metrics.registry.reset()
+    return httpcache.create_cache()
+
+
+class _Server(object):
+    """Answers requests.request like a server that sends ETags"""
+
+    def __init__(self, body):
+        self.body = body
+        self.received = []
+
+    def __call__(self, method, url, headers=None, **kwargs):
+        self.received.append(headers)
+
+        response = requests.Response()
+        response.url = url
+        response.request = requests.Request(method, url).prepare()
+        response.elapsed = datetime.timedelta(0)
+        response.headers['ETag'] = '"{}"'.format(hash(self.body))
+        if response.headers['ETag'] == headers.get('If-None-Match'):
+            response.status_code = 304
+            response._content = b''
+        else:
+            response.status_code = 200
+            response.headers['Content-Type'] = 'application/json'
+            response._content = self.body
+        return response
+
+
+def test_cacheable_requests():
+    assert httpcache.is_cacheable('GET', APPS_URL)
+    assert httpcache.is_cacheable('get', APPS_URL + '/my/app')
+    assert httpcache.is_cacheable('GET', 'http://dcos/metadata')
+    assert httpcache.is_cacheable('GET', 'https://github.com/universe.zip')
+    assert httpcache.is_cacheable('GET', 'http://dcos/slave/S1/state.json')
+
+    assert not httpcache.is_cacheable('POST', APPS_URL)
+    assert not httpcache.is_cacheable('GET', APPS_URL, stream=True)
+    assert not httpcache.is_cacheable('GET', 'http://dcos/mesos/files/read')
+
+
+def test_disabled_by_default(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+
+    assert httpcache.create_cache() is None
+
+
+def test_config_is_read_once(cache, monkeypatch):
+    def get_config():
+        raise AssertionError('the config was read again')
+
+    monkeypatch.setattr(util, 'get_config', get_config)
+    assert httpcache.create_cache() is cache
+
+
+def test_revalidates_and_serves_cached_body(cache, monkeypatch):
+    server = _Server(b'{"apps": []}')
+    monkeypatch.setattr(requests, 'request', server)
+
+    assert http.get(APPS_URL).json() == {'apps': []}
+    response = http.get(APPS_URL)
+
+    assert response.status_code == 200
+    assert response.json() == {'apps': []}
+    assert response.headers['Content-Type'] == 'application/json'
+    assert list(response.iter_content(4)) == [b'{"ap', b'ps":', b' []}']
+    assert server.received[1]['If-None-Match'] == \
+        '"{}"'.format(hash(server.body))
+    assert metrics.registry.totals()['cache_hits'] == 1
+
+    server.body = b'{"apps": [{"id": "/new"}]}'
+    assert http.get(APPS_URL).json() == {'apps': [{'id': '/new'}]}
+    assert metrics.registry.totals()['cache_hits'] == 1
+
+
+def test_responses_without_validators_are_not_stored(cache):
+    response = requests.Response()
+    response.status_code = 200
+    response._content = b'{}'
+
+    key = cache.key(APPS_URL)
+    cache.store(key, response)
+    assert cache.lookup(key) is None
+
+
+def test_evicted_entry_is_refetched(cache, monkeypatch, tmpdir):
+    server = _Server(b'{"apps": []}')
+    monkeypatch.setattr(requests, 'request', server)
+    http.get(APPS_URL)
+
+    # a 304 arrives for an entry that is removed in the meantime
+    lookup = cache.lookup(cache.key(APPS_URL, headers=server.received[0]))
+    monkeypatch.setattr(httpcache.HTTPCache, 'lookup',
+                        lambda self, key: lookup)
+    for name in os.listdir(str(tmpdir.join(httpcache.CACHE_SUBDIR))):
+        os.remove(str(tmpdir.join(httpcache.CACHE_SUBDIR, name)))
+
+    assert http.get(APPS_URL).json() == {'apps': []}
+    assert len(server.received) == 3
+    assert 'If-None-Match' not in server.received[2]
+
+
+def test_least_recently_used_entries_are_evicted(tmpdir):
+    cache = httpcache.HTTPCache(str(tmpdir), max_bytes=12)
+
+    keys = []
+    for index in range(3):
+        response = requests.Response()
+        response.status_code = 200
+        response.headers['ETag'] = str(index)
+        response._content = b'1234'
+        keys.append(cache.key('{}/{}'.format(APPS_URL, index)))
+        cache.store(keys[-1], response)
+
+        # mtime has a resolution of a second on some filesystems
+        body = str(tmpdir.join(keys[-1] + '.body'))
+        os.utime(body, (index, index))
+
+    # touch the oldest entry, then store a new one
+    cache.serve(keys[0], cache.lookup(keys[0]), requests.Response())
+    cache.store(cache.key(APPS_URL), response)
+
+    assert cache.lookup(keys[0]) is not None
+    assert cache.lookup(keys[1]) is None
+    assert cache.lookup(keys[2]) is not None
+    assert cache.lookup(cache.key(APPS_URL)) is not None
@@ -0,0 +1,61 @@
+from dcos import mesos
+
+import pytest
+
+DATA = u'café €\n'.encode('utf-8') * 3
+
+
+class _Client(object):
+    """Serves the master's /master/log, from files/download unless
+    `downloads` is false"""
+
+    def __init__(self, downloads):
+        self._downloads = downloads
+
+    def downloads(self, slave_id):
+        return self._downloads
+
+    def master_file_download(self, path, offset, length):
+        return DATA[offset:] if length < 0 else DATA[offset:offset + length]
+
+    def master_file_read(self, path, offset, length):
+        # Mesos escapes every byte above 0x7f as one \u00XX character
+        data = DATA[offset:] if length < 0 else DATA[offset:offset + length]
+        return {'data': data.decode('latin-1'), 'offset': offset}
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 5])
+def test_read_keeps_characters_cut_between_reads(size):
+    mesos_file = mesos.MesosFile('/master/log', dcos_client=_Client(True))
+
+    text = u''
+    while mesos_file.tell() < len(DATA):
+        text += mesos_file.read(size)
+    assert text == DATA.decode('utf-8')
+
+
+def test_seek_drops_a_cut_character():
+    mesos_file = mesos.MesosFile('/master/log', dcos_client=_Client(True))
+
+    assert mesos_file.read(4) == u'caf'
+    mesos_file.seek(10)
+    assert mesos_file.read(4) == u'caf'
+
+
+def test_read_bytes_from_read_json():
+    mesos_file = mesos.MesosFile('/master/log', dcos_client=_Client(False))
+
+    assert mesos_file.read_bytes(7) == DATA[:7]
+    assert mesos_file.tell() == 7
+    assert mesos_file.read_bytes() == DATA[7:]
+    assert mesos_file.tell() == len(DATA)
+    assert not mesos_file.downloads()
+
+
+def test_read_bytes_at_keeps_the_cursor():
+    mesos_file = mesos.MesosFile('/master/log', dcos_client=_Client(True))
+
+    assert mesos_file.read(4) == u'caf'
+    assert mesos_file.read_bytes_at(10, 5) == DATA[10:15]
+    assert mesos_file.tell() == 4
+    assert mesos_file.read(2) == u'é '
@@ -0,0 +1,142 @@
+import json
+
+import requests
+from dcos import http, metrics, retry
+from dcos.errors import DCOSException
+
+import pytest
+from six import StringIO
+
+
+@pytest.fixture
+def registry(monkeypatch):
+    registry = metrics.Registry()
+    monkeypatch.setattr(metrics, 'registry', registry)
+    return registry
+
+
+def test_path_template():
+    assert metrics.path_template('/marathon/v2/apps/my/app') == \
+        '/marathon/v2/apps/{id}'
+    assert metrics.path_template('/marathon/v2/apps/my/app/versions') == \
+        '/marathon/v2/apps/{id}/versions'
+    assert metrics.path_template(
+        '/marathon/v2/groups/my/group/versions/2015-01-01') == \
+        '/marathon/v2/groups/{id}/versions/{version}'
+    assert metrics.path_template('/marathon/v2/deployments/1234') == \
+        '/marathon/v2/deployments/{id}'
+    assert metrics.path_template('/slave/20150101-S1/files/read.json') == \
+        '/slave/{id}/files/read.json'
+    assert metrics.path_template('/marathon/v2/apps') == '/marathon/v2/apps'
+    assert metrics.path_template('/mesos/master/state.json') == \
+        '/mesos/master/state.json'
+
+
+def test_histogram_percentiles():
+    histogram = metrics.Histogram([0.1, 1.0])
+    assert histogram.percentile(50) is None
+
+    for value in [0.05, 0.06, 0.5, 2.0]:
+        histogram.observe(value)
+
+    assert histogram.count == 4
+    assert histogram.percentile(50) == 0.1
+    assert histogram.percentile(75) == 1.0
+    assert histogram.percentile(100) == 2.0
+    assert histogram.max == 2.0
+
+
+def test_registry_groups_by_endpoint(registry):
+    registry.record_request('get', 'http://dcos/marathon/v2/apps/a', 200,
+                            0.01, bytes_received=10)
+    registry.record_request('GET', 'http://dcos/marathon/v2/apps/b', 404,
+                            0.02, bytes_received=5)
+    registry.record_reauth('get', 'http://dcos/marathon/v2/apps/a')
+    registry.record_request('post', 'http://dcos/marathon/v2/apps', None,
+                            1.0, bytes_sent=7)
+
+    snapshot = registry.snapshot()
+    assert [(e['method'], e['path']) for e in snapshot] == [
+        ('GET', '/marathon/v2/apps/{id}'),
+        ('POST', '/marathon/v2/apps')]
+
+    apps = snapshot[0]
+    assert apps['host'] == 'dcos'
+    assert apps['count'] == 2
+    assert apps['errors'] == 1
+    assert apps['statuses'] == {'200': 1, '404': 1}
+    assert apps['reauths'] == 1
+    assert apps['bytes_received'] == 15
+
+    assert snapshot[1]['statuses'] == {'error': 1}
+    assert registry.totals() == {
+        'count': 3,
+        'errors': 2,
+        'retries': 0,
+        'reauths': 1,
+        'cache_hits': 0,
+        'throttled': 0,
+        'bytes_sent': 7,
+        'bytes_received': 15,
+    }
+
+
+def test_report(registry):
+    registry.record_request('get', 'http://dcos/metadata', 200, 0.002,
+                            bytes_received=2048)
+
+    out = StringIO()
+    metrics.report(registry, 'json', out)
+    report = json.loads(out.getvalue())
+    assert report['totals']['count'] == 1
+    assert report['endpoints'][0]['path'] == '/metadata'
+    assert report['endpoints'][0]['latency']['p50'] == 0.002
+
+    out = StringIO()
+    metrics.report(registry, 'table', out)
+    lines = out.getvalue().splitlines()
+    assert lines[0].split() == ['METHOD', 'HOST', 'PATH', 'COUNT', 'ERRORS',
+                                'RETRIES', 'P50', 'P95', 'MAX', 'SENT',
+                                'RECEIVED']
+    assert lines[1].split() == ['GET', 'dcos', '/metadata', '1', '0', '0',
+                                '2ms', '2ms', '2ms', '0.00', 'B',
+                                '2.00', 'kB']
+
+
+def test_http_records_requests(registry, monkeypatch):
+    def fake_request(method, url, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{"a": 1}'
+        response.request = requests.Request(
+            method, url, data=kwargs.get('data')).prepare()
+        return response
+
+    monkeypatch.setattr(requests, 'request', fake_request)
+
+    http.post('http://dcos/marathon/v2/apps', data='{}')
+
+    [entry] = registry.snapshot()
+    assert entry['method'] == 'POST'
+    assert entry['bytes_sent'] == 2
+    assert entry['bytes_received'] == 8
+
+
+def test_http_records_connection_errors(registry, monkeypatch):
+    def fake_request(method, url, **kwargs):
+        raise requests.exceptions.ConnectionError(
+            request=requests.Request(method, url).prepare())
+
+    monkeypatch.setattr(requests, 'request', fake_request)
+    monkeypatch.setattr(retry, 'backoff', lambda attempt: 0)
+    retry.reset()
+
+    with pytest.raises(DCOSException):
+        http.get('http://dcos/metadata')
+    retry.reset()
+
+    [entry] = registry.snapshot()
+    assert entry['count'] == retry.max_retries('GET') + 1
+    assert entry['errors'] == entry['count']
+    assert entry['retries'] == entry['count'] - 1
+    assert entry['statuses'] == {'error': entry['count']}
@@ -0,0 +1,103 @@
+import json
+
+from dcos import constants, perf
+
+import pytest
+
+
+@pytest.fixture
+def ledger(tmpdir):
+    return str(tmpdir.join('perf', 'ledger.jsonl'))
+
+
+def test_set_command(monkeypatch):
+    monkeypatch.setattr(perf, '_command', None)
+
+    perf.set_command(['marathon', 'app', 'list'])
+    assert perf._command == 'marathon app list'
+
+    perf.set_command(['task', '--info'])
+    assert perf._command == 'task'
+
+
+def test_observe_master_state(monkeypatch):
+    monkeypatch.setattr(perf, '_cluster_size', {})
+
+    perf.observe_master_state({
+        'slaves': [{'id': 'S0'}, {'id': 'S1'}],
+        'frameworks': [{'tasks': [{}, {}]}, {'tasks': [{}]}]})
+
+    assert perf._cluster_size == {'agents': 2, 'frameworks': 2, 'tasks': 3}
+
+
+def test_percentile():
+    assert perf.percentile([], 50) is None
+    assert perf.percentile([1.0], 99) == 1.0
+    assert perf.percentile([1.0, 2.0, 3.0], 50) == 2.0
+    values = [float(i) for i in range(1, 101)]
+    assert perf.percentile(values, 95) == 95.0
+    assert perf.percentile(values, 99) == 99.0
+
+
+def test_append_and_rotate(ledger, monkeypatch):
+    monkeypatch.setattr(perf, 'LEDGER_MAX_BYTES', 100)
+
+    for i in range(10):
+        perf.append({'command': 'task', 'wall': float(i)}, ledger)
+
+    with open(ledger + '.1') as rotated:
+        assert len(rotated.readlines()) > 1
+
+    records = perf.read_records(ledger)
+    walls = [record['wall'] for record in records]
+    assert walls == sorted(walls)
+    assert walls[-1] == 9.0
+
+
+def test_read_skips_malformed_lines(ledger):
+    perf.append({'command': 'task', 'wall': 1.0}, ledger)
+    with open(ledger, 'a') as ledger_file:
+        ledger_file.write('{"command": \n')
+
+    assert perf.read_records(ledger) == [{'command': 'task', 'wall': 1.0}]
+
+
+def test_summarize():
+    records = [
+        {'command': 'task', 'cluster': 'a', 'wall': 3.0, 'requests': 1,
+         'tasks': 10, 'time': 1},
+        {'command': 'task', 'cluster': 'a', 'wall': 1.0, 'requests': 3,
+         'tasks': 20, 'time': 2},
+        {'command': 'task', 'cluster': 'b', 'wall': 5.0},
+    ]
+
+    summaries = perf.summarize(records)
+    assert [(s['command'], s['cluster'], s['count']) for s in summaries] == [
+        ('task', 'a', 2), ('task', 'b', 1)]
+
+    summary = summaries[0]
+    assert summary['p50'] == 1.0
+    assert summary['p99'] == 3.0
+    assert summary['requests'] == 1
+    assert summary['tasks'] == 20
+    assert summary['last'] == 2
+
+
+def test_write_record(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\nperf_ledger = true\ndcos_url = "http://dcos"\n')
+    monkeypatch.setenv(constants.DCOS_CONFIG_ENV, str(config))
+    monkeypatch.setenv(constants.DCOS_CACHE_DIR_ENV, str(tmpdir))
+    monkeypatch.setattr(perf, '_start', 0.0)
+    monkeypatch.setattr(perf, '_command', 'node')
+    monkeypatch.setattr(perf, '_cluster_size', {'agents': 3})
+
+    perf._write_record()
+
+    with open(perf.ledger_path()) as ledger_file:
+        record = json.loads(ledger_file.read())
+
+    assert record['command'] == 'node'
+    assert record['cluster'] == 'http://dcos'
+    assert record['agents'] == 3
+    assert record['wall'] > 0
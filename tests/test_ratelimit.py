@@ -0,0 +1,122 @@
+from dcos import metrics, ratelimit
+
+import pytest
+
+
+class _Clock(object):
+    """Stands in for time.time and time.sleep"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit.time, 'time', clock.time)
+    monkeypatch.setattr(ratelimit.time, 'sleep', clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def limits(tmpdir, monkeypatch):
+    def configure(rate, host_rate):
+        config = tmpdir.join('dcos.toml')
+        config.write('[core]\nhttp_rate_limit = {}\n'
+                     'http_rate_limit_per_host = {}\n'.format(
+                         rate, host_rate))
+        monkeypatch.setenv('DCOS_CONFIG', str(config))
+        ratelimit.reset()
+
+    metrics.registry.reset()
+    yield configure
+    ratelimit.reset()
+    metrics.registry.reset()
+
+
+def test_bucket_allows_bursts(clock):
+    bucket = ratelimit.TokenBucket(2, burst=3)
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+    assert bucket.reserve() == 0.5
+
+    clock.now += 10
+    assert [bucket.reserve() for _ in range(3)] == [0, 0, 0]
+
+
+def test_bucket_queues_waiters(clock):
+    bucket = ratelimit.TokenBucket(1)
+    assert [bucket.reserve() for _ in range(3)] == [0, 1, 2]
+
+    clock.now += 1
+    assert bucket.reserve() == 2
+
+
+def test_acquire_limits_each_host(clock, limits):
+    limits(0, 1)
+
+    assert ratelimit.acquire('GET', 'http://a/metadata') == 0
+    assert ratelimit.acquire('GET', 'http://b/metadata') == 0
+    assert ratelimit.acquire('GET', 'http://a/metadata') == 1
+    assert clock.slept == [1]
+
+    [entry] = metrics.registry.snapshot()
+    assert entry['host'] == 'a'
+    assert entry['throttled'] == 1
+    assert metrics.registry.totals()['throttled'] == 1
+
+
+def test_acquire_limits_the_process(clock, limits):
+    limits(2, 0)
+
+    for host in ['a', 'b', 'c']:
+        ratelimit.acquire('GET', 'http://{}/metadata'.format(host))
+    assert clock.slept == [0.5]
+
+
+def test_acquire_without_limits(clock, limits):
+    limits(0, 0)
+
+    for _ in range(100):
+        assert ratelimit.acquire('GET', 'http://a/metadata') == 0
+    assert clock.slept == []
+    assert metrics.registry.snapshot() == []
+
+
+def test_acquire_limits_each_agent_behind_admin_router(clock, limits):
+    limits(0, 1)
+
+    for slave_id in ['S1', 'S2']:
+        assert ratelimit.acquire(
+            'GET', 'http://a/slave/{}/metrics/snapshot'.format(slave_id)) == 0
+    assert ratelimit.acquire('GET', 'http://a/slave/S1/state.json') == 1
+    assert ratelimit.acquire('GET', 'http://a/mesos/metadata') == 0
+
+
+def test_reserved_requests_do_not_wait_again(clock, limits):
+    limits(0, 1)
+    url = 'http://a/metadata'
+
+    assert ratelimit.acquire('GET', url) == 0
+    assert ratelimit.acquire('GET', url, reserved=True) == 0
+    assert ratelimit.acquire('GET', url) == 1
+    assert clock.slept == [1]
+
+
+def test_default_limits(clock, tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+    ratelimit.reset()
+
+    buckets = ratelimit.get_buckets('http://a/metadata')
+    assert [bucket.rate for bucket in buckets] == \
+        [ratelimit.DEFAULT_RATE, ratelimit.DEFAULT_HOST_RATE]
+    ratelimit.reset()
@@ -0,0 +1,143 @@
+import datetime
+
+import requests
+from dcos import http, metrics, retry
+from dcos.errors import DCOSException
+
+import pytest
+
+URL = 'http://dcos.example.com/slave/S1/state.json'
+
+
+@pytest.fixture
+def server(tmpdir, monkeypatch):
+    config = tmpdir.join('dcos.toml')
+    config.write('[core]\nhttp_retries = 2\n')
+    monkeypatch.setenv('DCOS_CONFIG', str(config))
+    monkeypatch.setattr(retry, 'backoff', lambda attempt: 0)
+    retry.reset()
+    metrics.registry.reset()
+
+    server = _Server()
+    monkeypatch.setattr(requests, 'request', server)
+    yield server
+    retry.reset()
+
+
+class _Server(object):
+    """Answers requests.request with the queued statuses or errors"""
+
+    def __init__(self):
+        self.answers = []
+        self.count = 0
+
+    def __call__(self, method, url, **kwargs):
+        self.count += 1
+        request = requests.Request(method, url).prepare()
+        answer = self.answers.pop(0) if self.answers else 200
+        if isinstance(answer, Exception):
+            answer.request = request
+            raise answer
+
+        response = requests.Response()
+        response.status_code = answer
+        response.url = url
+        response.request = request
+        response.elapsed = datetime.timedelta(0)
+        response._content = b'{}'
+        return response
+
+
+def test_backoff_is_capped():
+    for attempt in range(10):
+        delay = retry.backoff(attempt)
+        assert 0 <= delay <= min(retry.BACKOFF_MAX,
+                                 retry.BACKOFF_BASE * 2 ** attempt)
+
+
+def test_circuit_key():
+    assert retry.circuit_key(URL) == 'dcos.example.com/slave/S1'
+    assert retry.circuit_key('http://10.0.0.1:5051/state.json') == \
+        '10.0.0.1:5051'
+
+
+def test_idempotent_requests_are_retried(server):
+    server.answers = [requests.exceptions.ConnectionError('reset'), 503]
+
+    assert http.get(URL).status_code == 200
+    assert server.count == 3
+    assert metrics.registry.totals()['retries'] == 2
+
+
+def test_retries_are_limited(server):
+    server.answers = [requests.exceptions.Timeout()] * 3
+
+    with pytest.raises(DCOSException) as exc_info:
+        http.get(URL)
+
+    assert str(exc_info.value) == \
+        'Request to URL [{}] timed out.'.format(URL)
+    assert server.count == 3
+
+
+def test_posts_are_not_retried(server):
+    server.answers = [requests.exceptions.ConnectionError('reset')]
+
+    with pytest.raises(DCOSException):
+        http.post(URL)
+    assert server.count == 1
+
+
+def test_open_circuit_fails_fast(server, monkeypatch):
+    server.answers = [requests.exceptions.ConnectionError('refused')] * 3
+    with pytest.raises(DCOSException):
+        http.get(URL)
+
+    with pytest.raises(DCOSException) as exc_info:
+        http.get(URL + '?path=/')
+    assert 'dcos.example.com/slave/S1 is down' in str(exc_info.value)
+    assert server.count == 3
+
+    # other agents are unaffected
+    assert http.get('http://dcos.example.com/slave/S2/state.json')
+    assert server.count == 4
+
+
+def test_circuit_probes_after_timeout(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(retry.time, 'time', lambda: now[0])
+    breaker = retry.CircuitBreaker('agent')
+
+    for _ in range(retry.FAILURE_THRESHOLD):
+        assert breaker.allow()
+        breaker.record_failure()
+    assert not breaker.allow()
+
+    # a failed probe reopens the circuit
+    now[0] += retry.RESET_TIMEOUT
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] += retry.RESET_TIMEOUT
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow()
+    assert breaker.allow()
+
+
+def test_probe_that_fails_otherwise_is_released(server):
+    server.answers = [requests.exceptions.ConnectionError('refused')] * 3
+    with pytest.raises(DCOSException):
+        http.get(URL)
+
+    retry.get_breaker(URL)._opened_at -= retry.RESET_TIMEOUT
+    server.answers = [requests.exceptions.TooManyRedirects('redirects')]
+    with pytest.raises(DCOSException) as exc_info:
+        http.get(URL)
+    assert 'is down' not in str(exc_info.value)
+
+    # the host is probed again rather than blocked for good
+    assert http.get(URL).status_code == 200
+    assert server.count == 5
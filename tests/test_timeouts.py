@@ -0,0 +1,113 @@
+import datetime
+
+import requests
+from dcos import http, retry, timeouts
+from dcos.errors import DCOSException
+
+import pytest
+
+STATE_URL = 'http://dcos.example.com/mesos/master/state.json'
+APP_URL = 'http://dcos.example.com/marathon/v2/apps/my/app'
+
+
+@pytest.fixture
+def history(tmpdir, monkeypatch):
+    monkeypatch.setenv('DCOS_CACHE_DIR', str(tmpdir))
+    monkeypatch.setattr(timeouts, '_history', None)
+    monkeypatch.setattr(timeouts, '_observed', {})
+    monkeypatch.setattr(timeouts, '_path', None)
+    return tmpdir
+
+
+def test_endpoint_classes():
+    assert timeouts.endpoint_class(STATE_URL).name == 'bulk'
+    assert timeouts.endpoint_class(
+        'http://dcos/slave/S1/state.json').name == 'bulk'
+    assert timeouts.endpoint_class(
+        'http://dcos/slave/S1/files/read.json').name == 'file'
+    assert timeouts.endpoint_class(APP_URL).name == 'default'
+
+
+def test_defaults_without_history(history):
+    assert timeouts.choose('GET', STATE_URL, None) == \
+        (timeouts.CONNECT_TIMEOUT, 30)
+    assert timeouts.choose('GET', STATE_URL, 5) == \
+        (timeouts.CONNECT_TIMEOUT, 5)
+    assert timeouts.choose('GET', APP_URL, None) == \
+        (timeouts.CONNECT_TIMEOUT, None)
+    assert timeouts.choose('GET', APP_URL, 5) == \
+        (timeouts.CONNECT_TIMEOUT, 5)
+    assert timeouts.choose('GET', APP_URL, (1, 2)) == (1, 2)
+    assert timeouts.choose('POST', APP_URL, 5) == \
+        (timeouts.CONNECT_TIMEOUT, 5)
+
+
+def test_timeouts_adapt_to_latency(history):
+    for _ in range(timeouts.MIN_SAMPLES):
+        timeouts.observe('GET', APP_URL, 0.01)
+        timeouts.observe('GET', STATE_URL, 20)
+
+    # fast endpoints fail fast, slow ones get the time they need
+    assert timeouts.choose('GET', APP_URL, None)[1] == 1
+    assert timeouts.choose('GET', STATE_URL, None)[1] == 80
+    assert timeouts.choose(
+        'GET', APP_URL.replace('my', 'other'), None)[1] == 1
+
+    timeouts.observe('GET', APP_URL, 1)
+    assert timeouts.choose('GET', APP_URL, None)[1] == 4
+
+    # writes keep the caller's timeout
+    timeouts.observe('POST', APP_URL, 100)
+    assert timeouts.choose('POST', APP_URL, 5)[1] == 5
+
+
+def test_explicit_timeouts_are_caps(history):
+    for _ in range(timeouts.MIN_SAMPLES):
+        timeouts.observe('GET', APP_URL, 0.01)
+        timeouts.observe('GET', STATE_URL, 20)
+
+    assert timeouts.choose('GET', APP_URL, 5)[1] == 1
+    assert timeouts.choose('GET', STATE_URL, 5)[1] == 5
+    assert timeouts.choose('GET', STATE_URL, 100)[1] == 80
+
+
+def test_history_is_persisted(history):
+    timeouts.configure()
+    for _ in range(timeouts.HISTORY_SIZE + 10):
+        timeouts.observe('GET', STATE_URL, 2)
+    timeouts.flush()
+
+    timeouts._history = None
+    key = timeouts._key(STATE_URL)
+    assert timeouts._samples(key) == [2] * timeouts.HISTORY_SIZE
+    assert timeouts.choose('GET', STATE_URL, None)[1] == 8
+
+
+def test_read_timeouts_grow(history, monkeypatch):
+    sent = []
+
+    def fake_request(method, url, timeout, **kwargs):
+        sent.append(timeout)
+        if len(sent) <= timeouts.MIN_SAMPLES:
+            response = requests.Response()
+            response.status_code = 200
+            response.request = requests.Request(method, url).prepare()
+            response.elapsed = datetime.timedelta(seconds=0.1)
+            response._content = b'{}'
+            return response
+        raise requests.exceptions.ReadTimeout(
+            request=requests.Request(method, url).prepare())
+
+    monkeypatch.setattr(requests, 'request', fake_request)
+    monkeypatch.setattr(retry, 'backoff', lambda attempt: 0)
+    retry.reset()
+
+    for _ in range(timeouts.MIN_SAMPLES):
+        http.get(APP_URL)
+    with pytest.raises(DCOSException):
+        http.get(APP_URL)
+    retry.reset()
+
+    reads = [timeout[1] for timeout in sent[timeouts.MIN_SAMPLES:]]
+    assert reads[0] == 1
+    assert reads[1:] == [8, 30][:len(reads) - 1]
@@ -0,0 +1,67 @@
+import os
+import subprocess
+import sys
+
+from dcos import constants, tracing, util
+
+import pytest
+
+
+@pytest.fixture
+def trace_path(tmpdir, monkeypatch):
+    # tracing.start sets the variable; make sure it's removed afterwards
+    monkeypatch.setenv(constants.DCOS_TRACE_PARENT_ENV, '')
+    monkeypatch.delenv(constants.DCOS_TRACE_PARENT_ENV)
+    monkeypatch.setattr(tracing, '_path', None)
+    monkeypatch.setattr(tracing, '_events', [])
+    return str(tmpdir.join('trace.json'))
+
+
+def test_spans_are_not_recorded_when_disabled(trace_path):
+    with tracing.span('phase'):
+        pass
+
+    assert tracing._events == []
+
+
+def test_nested_spans(trace_path):
+    @util.duration
+    def decode():
+        pass
+
+    tracing.start(trace_path)
+    with tracing.span('phase', command='task'):
+        decode()
+    tracing.flush()
+
+    events = tracing.load(trace_path)
+    metadata, inner, outer = events
+    assert metadata['ph'] == 'M'
+    assert metadata['pid'] == os.getpid()
+
+    assert inner['name'].endswith('.decode')
+    assert outer['name'] == 'phase'
+    assert outer['args'] == {'command': 'task'}
+    assert outer['ts'] <= inner['ts']
+    assert inner['ts'] + inner['dur'] <= outer['ts'] + outer['dur']
+
+
+def test_child_processes_append(trace_path):
+    env = dict(os.environ, **{constants.DCOS_TRACE_ENV: trace_path})
+    child = ('from dcos import tracing, util\n'
+             'util.configure_process_from_environ()\n'
+             'with tracing.span("child"):\n'
+             '    pass\n')
+
+    subprocess.check_call([sys.executable, '-c', child], env=env)
+    env[constants.DCOS_TRACE_PARENT_ENV] = '1'
+    subprocess.check_call([sys.executable, '-c', child], env=env)
+
+    events = tracing.load(trace_path)
+    spans = [event for event in events if event['name'] == 'child']
+    assert len(spans) == 2
+    assert spans[0]['pid'] != spans[1]['pid']
+
+    parents = [event['args'].get('parent_pid')
+               for event in events if event['ph'] == 'M']
+    assert parents == [None, 1]
@@ -1,3 +1,6 @@
+import threading
+import time
+
 from dcos import util
 from dcos.errors import DCOSException
 
@@ -28,3 +31,19 @@ def test_open_file():
             pass
     assert 'Error opening file [{}]: No such file or directory'.format(path) \
         in str(excinfo.value)
+
+
+def test_submit_daemon():
+    future = util.submit_daemon(lambda x: (x, threading.current_thread()), 1)
+    value, thread = future.result()
+    assert value == 1
+    assert thread.daemon
+
+    future = util.submit_daemon(util.parse_int, 'x')
+    with pytest.raises(DCOSException):
+        future.result()
+
+    # an abandoned call doesn't hold up the caller
+    start = time.time()
+    util.submit_daemon(time.sleep, 2)
+    assert time.time() - start < 1
@@ -0,0 +1,179 @@
+import datetime
+import json
+import logging
+
+import requests
+from dcos import constants, http, wire
+
+import pytest
+
+
+@pytest.fixture
+def har_path(tmpdir, monkeypatch):
+    # wire.configure sets the variable; make sure it's removed afterwards
+    monkeypatch.setenv(constants.DCOS_HAR_PARENT_ENV, '')
+    monkeypatch.delenv(constants.DCOS_HAR_PARENT_ENV)
+    monkeypatch.setattr(wire, '_har_path', None)
+    monkeypatch.setattr(wire, '_entries', [])
+    return str(tmpdir.join('dcos.har'))
+
+
+class _UnreadableBody(object):
+    def read(self, *args, **kwargs):
+        raise AssertionError('streamed body was read')
+
+    stream = read
+
+
+def _response(content, status_code=200, headers=None, stream=False):
+    request = requests.Request(
+        'POST', 'http://dcos.example.com/acs/api/v1?limit=2',
+        headers={'Authorization': 'token=secret'},
+        data=b'{"uid": "admin", "password": "hunter2"}').prepare()
+
+    response = requests.Response()
+    response.status_code = status_code
+    response.reason = 'OK'
+    response.headers.update(headers or {})
+    response.request = request
+    response.url = request.url
+    response.elapsed = datetime.timedelta(milliseconds=20)
+    if stream:
+        response.raw = _UnreadableBody()
+    else:
+        response._content = content
+    return response
+
+
+def test_redact_headers():
+    assert wire.redact_headers(None) is None
+    assert wire.redact_headers({'Authorization': 'token=x',
+                                'Accept': 'application/json'}) == \
+        {'Authorization': wire.REDACTED, 'Accept': 'application/json'}
+
+
+def test_logged_body_redacts_credentials():
+    body = wire.LoggedBody(
+        _response(b'{"token": "abc", "refresh_token": "d\\"ef", "a": 1}'),
+        stream=False)
+
+    assert str(body) == '{{"token": "{0}", "refresh_token": "{0}", "a": 1}}' \
+        .format(wire.REDACTED)
+
+    body = wire.LoggedBody(_response(b'user=admin&password=hunter2'), False)
+    assert str(body) == 'user=admin&password=' + wire.REDACTED
+
+
+def test_logged_body_is_capped(monkeypatch):
+    monkeypatch.setattr(wire, 'MAX_LOGGED_BODY', 25)
+
+    body = str(wire.LoggedBody(
+        _response(b'{"a": 1, "password": "hunter2"}'), False))
+    assert body == '{"a": 1, "password": "<redacted>... [31 bytes]'
+
+
+def test_logged_body_does_not_read_streams():
+    assert str(wire.LoggedBody(_response(None, stream=True), True)) == \
+        '<streamed body>'
+
+
+def test_streamed_response_is_logged_unread(monkeypatch, caplog, har_path):
+    response = _response(None, stream=True)
+    monkeypatch.setattr(requests, 'request', lambda **kwargs: response)
+    caplog.set_level(logging.INFO)
+
+    wire.configure(har_path)
+    assert http._request('GET', response.url, stream=True) is response
+    wire.flush()
+
+    assert 'Received HTTP response [200]: <streamed body>' in caplog.text
+    entry, = wire.load(har_path)['log']['entries']
+    assert entry['response']['content']['size'] == -1
+
+
+def test_har_is_not_recorded_when_disabled(har_path):
+    wire.record(_response(b'{}').request, _response(b'{}'), 0, 0.1)
+
+    assert wire._entries == []
+
+
+def test_har_round_trip(monkeypatch, har_path):
+    responses = [
+        _response(b'{"token": "abc"}',
+                  headers={'Content-Type': 'application/json',
+                           'Set-Cookie': 'session=1'}),
+        _response(b'\xff\xfe', headers={'Content-Type': 'image/png'}),
+    ]
+    monkeypatch.setattr(requests, 'request',
+                        lambda **kwargs: responses.pop(0))
+
+    wire.configure(har_path)
+    http._request('POST', 'http://dcos.example.com/acs/api/v1?limit=2')
+    http._request('GET', 'http://dcos.example.com/icon.png')
+    wire.flush()
+
+    har = wire.load(har_path)
+    first, second = har['log']['entries']
+    assert har['log']['version'] == '1.2'
+    assert first['startedDateTime'] <= second['startedDateTime']
+
+    request = first['request']
+    assert request['method'] == 'POST'
+    assert request['queryString'] == [{'name': 'limit', 'value': '2'}]
+    assert {'name': 'Authorization', 'value': wire.REDACTED} in \
+        request['headers']
+    post_data = json.loads(request['postData']['text'])
+    assert post_data == {'uid': 'admin', 'password': wire.REDACTED}
+
+    response = first['response']
+    assert response['status'] == 200
+    assert json.loads(response['content']['text']) == \
+        {'token': wire.REDACTED}
+    assert {'name': 'Set-Cookie', 'value': wire.REDACTED} in \
+        response['headers']
+    assert first['timings']['wait'] <= first['time']
+
+    assert second['response']['content'] == {
+        'size': 2, 'mimeType': 'image/png', 'text': '//4=',
+        'encoding': 'base64'}
+
+
+def test_har_captures_whole_bodies():
+    body = '{"a": "' + u'\u20ac' * wire.MAX_LOGGED_BODY + '", "token": "x"}'
+    content = wire._har_content(body.encode('utf-8'), 'application/json')
+
+    assert content['size'] == len(body.encode('utf-8'))
+    assert json.loads(content['text']) == \
+        {'a': u'\u20ac' * wire.MAX_LOGGED_BODY, 'token': wire.REDACTED}
+    assert 'comment' not in content
+
+
+def test_har_records_errors(monkeypatch, har_path):
+    request = _response(b'').request
+
+    def fail(**kwargs):
+        raise requests.exceptions.ConnectionError('refused', request=request)
+    monkeypatch.setattr(requests, 'request', fail)
+
+    wire.configure(har_path)
+    with pytest.raises(Exception):
+        http._request('POST', request.url)
+    wire.flush()
+
+    entry, = wire.load(har_path)['log']['entries']
+    assert entry['response']['status'] == 0
+    assert entry['_error'] == 'refused'
+
+
+def test_child_processes_append(har_path, monkeypatch):
+    wire.configure(har_path)
+    wire.record(_response(b'{}').request, _response(b'{}'), 0, 0.1)
+    wire.flush()
+
+    # a child process inherits the environment and keeps the archive
+    monkeypatch.setattr(wire, '_har_path', None)
+    wire.configure(har_path)
+    wire.record(_response(b'{}').request, _response(b'{}'), 1, 0.1)
+    wire.flush()
+
+    assert len(wire.load(har_path)['log']['entries']) == 2